@@ -0,0 +1,179 @@
+# app/config/rendimiento.py
+"""
+Parámetros de rendimiento y diagnóstico (no legales).
+
+Todos se pueden sobreescribir con variables de entorno para diagnosticar
+en terreno sin recompilar (ej: CN_SQL_INSTRUMENTAR=1 en el equipo del cliente).
+"""
+
+import os
+
+
+def _env_bool(nombre: str, defecto: bool) -> bool:
+    valor = os.environ.get(nombre)
+    if valor is None:
+        return defecto
+    return valor.strip().lower() in ("1", "true", "si", "sí", "yes", "on")
+
+
+def _env_float(nombre: str, defecto: float) -> float:
+    try:
+        return float(os.environ.get(nombre, defecto))
+    except ValueError:
+        return defecto
+
+
+# ============================================================
+# Instrumentación SQL
+# ============================================================
+
+# Activa el registro de latencias por sentencia (opt-in; tiene costo por consulta)
+SQL_INSTRUMENTAR: bool = _env_bool("CN_SQL_INSTRUMENTAR", False)
+
+# Umbral (ms) a partir del cual una sentencia se escribe en el log de consultas lentas
+SQL_LENTA_MS: float = _env_float("CN_SQL_LENTA_MS", 100.0)
+
+# Límites superiores (ms) de los buckets del histograma de latencias
+SQL_HISTOGRAMA_MS: tuple = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000)
+
+
+# ============================================================
+# Concurrencia (varias cajas sobre el mismo archivo SQLite)
+# ============================================================
+
+# Espera máxima (ms) de SQLite por un lock antes de fallar con "database is locked"
+SQL_BUSY_TIMEOUT_MS: float = _env_float("CN_SQL_BUSY_TIMEOUT_MS", 5000.0)
+
+# Reintentos de una transacción completa si aun así queda bloqueada (0 = sin reintentos)
+SQL_REINTENTOS: int = int(_env_float("CN_SQL_REINTENTOS", 3))
+
+# Espera base (ms) entre reintentos; crece exponencialmente con jitter
+SQL_REINTENTO_BASE_MS: float = _env_float("CN_SQL_REINTENTO_BASE_MS", 50.0)
+
+# Cola de escritura con group commit (app/db/cola_escritura.py):
+# escrituras que llegan dentro de esta ventana (ms) se confirman en un solo COMMIT
+SQL_GRUPO_COMMIT_MS: float = _env_float("CN_SQL_GRUPO_COMMIT_MS", 5.0)
+
+# Máximo de escrituras por transacción agrupada
+SQL_GRUPO_COMMIT_MAX: int = int(_env_float("CN_SQL_GRUPO_COMMIT_MAX", 500))
+
+# Filas por fetchmany en los iteradores iterar_* (memoria acotada en exportaciones/reportes)
+SQL_LOTE_FLUJO: int = int(_env_float("CN_SQL_LOTE_FLUJO", 500))
+
+
+# ============================================================
+# Perfiles de conexión (get_connection(perfil=...) / usar_perfil)
+# ============================================================
+# - interactivo: la UI. Consultas cortas y una conexión por llamada: caché chica,
+#   espera de locks acotada (SQL_BUSY_TIMEOUT_MS).
+# - lote: reportes, exportaciones, cola de escritura, respaldo y mantenimiento.
+#   Caché grande, esperas largas e IMMEDIATE (toma el lock de escritura al empezar,
+#   sin el SQLITE_BUSY del "upgrade" de lectura a escritura).
+# Claves:
+#   cache_kb     PRAGMA cache_size (KiB por conexión)
+#   mmap_mb      PRAGMA mmap_size (lecturas vía memoria compartida del SO; 0 = apagado)
+#   temp_memoria temp_store=MEMORY: ORDER BY/GROUP BY/DISTINCT sin archivos temporales
+#   busy_ms      PRAGMA busy_timeout
+#   aislamiento  isolation_level de sqlite3: DEFERRED | IMMEDIATE | EXCLUSIVE
+SQL_PERFILES: dict = {
+    "interactivo": {
+        "cache_kb": int(_env_float("CN_SQL_UI_CACHE_KB", 8192)),
+        "mmap_mb": int(_env_float("CN_SQL_UI_MMAP_MB", 256)),
+        "temp_memoria": _env_bool("CN_SQL_UI_TEMP_MEMORIA", True),
+        "busy_ms": SQL_BUSY_TIMEOUT_MS,
+        "aislamiento": os.environ.get("CN_SQL_UI_AISLAMIENTO", "DEFERRED").upper(),
+    },
+    "lote": {
+        "cache_kb": int(_env_float("CN_SQL_LOTE_CACHE_KB", 65536)),
+        "mmap_mb": int(_env_float("CN_SQL_LOTE_MMAP_MB", 512)),
+        "temp_memoria": _env_bool("CN_SQL_LOTE_TEMP_MEMORIA", True),
+        "busy_ms": _env_float("CN_SQL_LOTE_BUSY_MS", 30000.0),
+        "aislamiento": os.environ.get("CN_SQL_LOTE_AISLAMIENTO", "IMMEDIATE").upper(),
+    },
+}
+
+# Perfil de get_connection() cuando no se indica otro
+SQL_PERFIL: str = os.environ.get("CN_SQL_PERFIL", "interactivo")
+
+
+# ============================================================
+# Captura de cambios (registro_cambios + app/services/bus_cambios.py)
+# ============================================================
+
+# Cada cuánto (ms) la UI consulta PRAGMA data_version para detectar cambios
+CDC_SONDEO_MS: int = int(_env_float("CN_CDC_SONDEO_MS", 250))
+
+# Cambios que se conservan en registro_cambios (los más viejos se podan)
+CDC_RETENCION: int = int(_env_float("CN_CDC_RETENCION", 20000))
+
+# Sobre este número de cambios en una pasada, los suscriptores recargan completo
+CDC_MAX_FILAS: int = int(_env_float("CN_CDC_MAX_FILAS", 2000))
+
+
+# ============================================================
+# Perfilador de la UI (app/services/perfilador.py)
+# ============================================================
+
+# Muestra en la barra de estado tiempos por vista/acción, consultas y RSS pico.
+# También se alterna en caliente con F12.
+PERFIL_HUD: bool = _env_bool("CN_PERFIL", False)
+
+# Acciones recientes que se conservan para el volcado JSON
+PERFIL_HISTORIAL: int = int(_env_float("CN_PERFIL_HISTORIAL", 500))
+
+# Filas del resumen de cProfile / tracemalloc en una captura
+PERFIL_CAPTURA_TOP: int = int(_env_float("CN_PERFIL_CAPTURA_TOP", 30))
+
+
+# ============================================================
+# Respaldos en caliente (app/services/respaldo.py)
+# ============================================================
+
+# Respaldo periódico en segundo plano mientras la app (o el servidor local) corre
+RESPALDO_ACTIVO: bool = _env_bool("CN_RESPALDO", True)
+
+# Minutos entre respaldos (si no hubo cambios, no se copia nada)
+RESPALDO_INTERVALO_MIN: float = _env_float("CN_RESPALDO_INTERVALO_MIN", 60.0)
+
+# Segundos mínimos tras el arranque antes del primer respaldo
+RESPALDO_INICIO_S: float = _env_float("CN_RESPALDO_INICIO_S", 120.0)
+
+# Páginas copiadas por paso de backup y pausa (ms) entre pasos: limitan el uso de disco
+RESPALDO_PAGINAS: int = int(_env_float("CN_RESPALDO_PAGINAS", 1024))
+RESPALDO_PAUSA_MS: float = _env_float("CN_RESPALDO_PAUSA_MS", 20.0)
+
+# Verifica cada respaldo con PRAGMA integrity_check antes de darlo por bueno
+RESPALDO_VERIFICAR: bool = _env_bool("CN_RESPALDO_VERIFICAR", True)
+
+# Retención: últimos N respaldos + el último de cada día durante N días
+RESPALDO_CONSERVAR: int = int(_env_float("CN_RESPALDO_CONSERVAR", 24))
+RESPALDO_CONSERVAR_DIAS: int = int(_env_float("CN_RESPALDO_CONSERVAR_DIAS", 14))
+
+
+# ============================================================
+# Mantenimiento de la BD (app/services/mantenimiento.py)
+# ============================================================
+
+# Mantenimiento automático cuando la app está en reposo
+MANT_ACTIVO: bool = _env_bool("CN_MANT", True)
+
+# Minutos sin teclado/mouse para considerar la app en reposo
+MANT_REPOSO_MIN: float = _env_float("CN_MANT_REPOSO_MIN", 5.0)
+
+# Horas entre corridas completas (ANALYZE/optimize/vacuum); entre medio solo checkpoint
+MANT_INTERVALO_H: float = _env_float("CN_MANT_INTERVALO_H", 24.0)
+
+# Cada cuántos segundos el hilo revisa si toca mantenimiento
+MANT_SONDEO_S: float = _env_float("CN_MANT_SONDEO_S", 60.0)
+
+# Sobre este tamaño (MB) del -wal se hace wal_checkpoint(TRUNCATE)
+MANT_WAL_MAX_MB: float = _env_float("CN_MANT_WAL_MAX_MB", 64.0)
+
+# Filas muestreadas por índice en PRAGMA optimize (analysis_limit; 0 = sin límite)
+MANT_ANALISIS_LIMITE: int = int(_env_float("CN_MANT_ANALISIS_LIMITE", 1000))
+
+# Páginas libres devueltas al disco por pasada (incremental_vacuum)
+MANT_VACUUM_PAGINAS: int = int(_env_float("CN_MANT_VACUUM_PAGINAS", 2000))
+
+# La migración a auto_vacuum=INCREMENTAL (VACUUM completo) solo es automática bajo este tamaño (MB)
+MANT_VACUUM_MIGRAR_MAX_MB: float = _env_float("CN_MANT_VACUUM_MIGRAR_MAX_MB", 200.0)
@@ -0,0 +1,219 @@
+# app/db/catalogo_consultas.py
+"""
+Catálogo de consultas de los modelos y verificación de sus planes (EXPLAIN QUERY PLAN).
+
+- Cada entrada toma el SQL de las constantes del modelo (_SQL_*): lo mismo que se ejecuta.
+- Los índices de database._create_basic_indices existen para estas consultas.
+- `verificar_planes` falla si una consulta catalogada recorre la tabla completa (SCAN);
+  los listados completos (sin filtro) se marcan con permite_scan=True.
+
+Uso por consola (código de salida 1 si hay planes degradados, 2 si la BD no está migrada):
+    python -m app.db.catalogo_consultas
+"""
+
+from __future__ import annotations
+
+import sqlite3
+import sys
+from typing import Dict, List, NamedTuple, Tuple
+
+from app.models import analitica_ventas, finanzas
+from app.models.categoria import Categoria
+from app.models.cliente import Cliente
+from app.models.compra import Compra
+from app.models.costo_promedio import CostoPromedio
+from app.models.factura import Factura
+from app.models.ingreso_inventario import IngresoInventario
+from app.models.inventario import Inventario
+from app.models.lote_inventario import LoteInventario
+from app.models.movimiento_inventario import MovimientoInventario
+from app.models.producto import Producto
+from app.models.proveedor import Proveedor
+from app.models.venta import Venta
+
+
+class Consulta(NamedTuple):
+    nombre: str                 # "Modelo.metodo" de donde sale la consulta
+    sql: str
+    params: Tuple = ()
+    permite_scan: bool = False  # True solo para listados completos
+
+
+# Parámetros de ejemplo para las plantillas con {cols}/{orden}: esquema extendido
+_VENTA = {"cols": Venta._COLS}
+_COMPRA = {"cols": Compra._COLS}
+_FACTURA = {"cols": Factura._COLS_EXT, "orden": Factura._ORDEN_EXT}
+
+CATALOGO: List[Consulta] = [
+    # --- Productos ---
+    Consulta("Producto.obtener_por_id", Producto._SQL_POR_ID, (1,)),
+    Consulta("Producto.buscar_por_vencimiento", Producto._SQL_POR_VENCIMIENTO, ("2030-01-01",)),
+    Consulta(
+        "Producto.buscar_prefijo",
+        Producto._SQL_PREFIJO.format(columna="nombre"),
+        ("ab", "ab\U0010ffff", 30),
+    ),
+    Consulta(
+        "Producto.buscar_prefijo_codigo",
+        Producto._SQL_PREFIJO.format(columna="codigo_interno"),
+        ("p00", "p00\U0010ffff", 30),
+    ),
+    Consulta(
+        "Producto.ajustar_stock_por_codigo (baja)",
+        Producto._SQL_RESTAR_STOCK.format(columna="codigo_interno"),
+        (1, "x", 1),
+    ),
+    Consulta("Venta.crear (id por nombre)", Venta._SQL_ID_POR_NOMBRE, ("x",)),
+    Consulta("Venta.crear (descuento condicional)", Venta._SQL_DESCONTAR, (1, 0, 1, 0, 1)),
+    # --- Reservas de stock ---
+    Consulta("Venta.reservar (vencidas)", Venta._SQL_RESERVAS_VENCIDAS, ("2025-01-01T00:00:00",)),
+    Consulta("Venta.listar_reservas_activas", Venta._SQL_RESERVAS_ACTIVAS),
+    Consulta(
+        "IngresoInventario.registrar (stock por código)",
+        IngresoInventario._SQL_PRODUCTO_POR_CODIGO,
+        ("x",),
+    ),
+    # --- Lotes (vencimiento / FEFO) ---
+    Consulta("Inventario.por_vencer", Inventario._SQL_LOTES_ENTRE, ("2025-01-01", "2025-01-31")),
+    Consulta("Inventario.buscar_por_vencimiento", Inventario._SQL_LOTES_HASTA, ("2025-01-31",)),
+    Consulta("LoteInventario.por_vencer", LoteInventario._SQL_POR_VENCER, ("2025-01-01", "2025-01-31")),
+    Consulta("LoteInventario.consumir_fefo", LoteInventario._SQL_FEFO, (1,)),
+    Consulta("LoteInventario.devolver_venta", LoteInventario._SQL_LOTES_DE_VENTA, (1,)),
+    Consulta("LoteInventario.recortar", LoteInventario._SQL_EXCESO.format(columna="nombre"), ("x",)),
+    Consulta("Categoria.contar_uso_en_productos", Categoria._SQL_CONTAR_USO, ("x",)),
+    Consulta("Categoria.obtener_por_nombre", Categoria._SQL_POR_NOMBRE, ("x",)),
+    # --- Clientes / Proveedores ---
+    Consulta("Cliente.obtener_por_rut", Cliente._SQL_POR_RUT, ("123456785",)),
+    Consulta("Cliente.buscar_prefijo", Cliente._SQL_PREFIJO, ("ab", "ab\U0010ffff", 30)),
+    Consulta("Cliente._ventas_asociadas", Cliente._SQL_VENTAS_POR_NOMBRE, ("x",)),
+    Consulta("Proveedor.obtener_por_rut", Proveedor._SQL_POR_RUT, ("12345678-5",)),
+    # --- Ventas / Compras ---
+    Consulta("Venta.ultima_venta_producto", Venta._SQL_ULTIMA.format(**_VENTA), ("x",)),
+    Consulta("Compra.ultima_compra_producto", Compra._SQL_ULTIMA.format(**_COMPRA), ("x",)),
+    Consulta("Venta.listar_todas", Venta._SQL_LISTAR.format(**_VENTA), permite_scan=True),
+    Consulta("Compra.listar_todas", Compra._SQL_LISTAR.format(**_COMPRA), permite_scan=True),
+    # --- Facturas ---
+    Consulta("Factura.obtener_por_id", Factura._SQL_POR_ID.format(**_FACTURA), (1,)),
+    Consulta(
+        "Factura.listar_por_tipo_y_estado",
+        Factura._SQL_POR_TIPO_ESTADOS.format(ph="?, ?", **_FACTURA),
+        ("proveedor", "pendiente", "vencida"),
+    ),
+    Consulta(
+        "Factura.listar_extendidas",
+        Factura._SQL_POR_TIPO.format(y_estado=" AND estado = ?", **_FACTURA),
+        ("proveedor", "pendiente"),
+    ),
+    Consulta("Factura.obtener_por_ids", Factura._SQL_POR_IDS.format(ph="?, ?, ?", **_FACTURA), (1, 2, 3)),
+    Consulta("Factura.marcar_vencidas_automaticamente", Factura._SQL_MARCAR_VENCIDAS),
+    Consulta("Factura.listar_todas", Factura._SQL_LISTAR.format(**_FACTURA), permite_scan=True),
+    # --- Finanzas (sumas cubiertas por índice) ---
+    Consulta("Finanzas.total_facturas_pagadas", finanzas._SQL_FACTURAS_PAGADAS),
+    Consulta("Finanzas.estado_resultado (ingresos)", finanzas._SQL_INGRESOS_RECIBIDOS),
+    Consulta("Finanzas.estado_resultado (gastos)", finanzas._SQL_GASTOS_PAGADOS),
+    Consulta("Finanzas.estado_resultado (facturas proveedor)", finanzas._SQL_FACTURAS_PROVEEDOR_PAGADAS),
+    # --- Movimientos de inventario ---
+    Consulta(
+        "MovimientoInventario.filtrar_por_codigo (prefijo)",
+        MovimientoInventario._SQL_CODIGO_PREFIJO,
+        ("abc", "abc\U0010ffff"),
+    ),
+    Consulta(
+        "MovimientoInventario.filtrar_por_codigo",
+        MovimientoInventario._SQL_CODIGO_CONTIENE,
+        ("%abc%",),
+        permite_scan=True,  # LIKE '%x%': sin índice posible (prefijo=True usa el rango)
+    ),
+    Consulta("MovimientoInventario.filtrar_por_tipo", MovimientoInventario._SQL_POR_TIPO, ("entrada",)),
+    # --- Costo promedio ponderado ---
+    Consulta("CostoPromedio.entrada", CostoPromedio._SQL_ENTRADA, (1, 1, 100.0, 1, 100.0, 1, "x")),
+    Consulta(
+        "CostoPromedio.reversar_entrada",
+        CostoPromedio._SQL_REVERSA,
+        (1, 1, 100.0, 1, 100.0, 1, 1, "x", 1, 1),
+    ),
+    Consulta(
+        "CostoPromedio.valorizacion",
+        CostoPromedio._SQL_VALORIZACION,
+        permite_scan=True,  # una fila por producto (reporte completo)
+    ),
+    # --- Analítica (margen por producto) ---
+    Consulta(
+        "AnaliticaVentas.margen_por_producto (ventas del período)",
+        analitica_ventas._SQL_VENTAS_PERIODO,
+        ("2025-01-01", "2025-12-31"),
+    ),
+    Consulta(
+        "AnaliticaVentas.margen_por_producto (costos)",
+        analitica_ventas._SQL_COSTOS_HASTA,
+        ("2025-12-31",),
+        permite_scan=True,  # todo el catálogo: recorre el índice cubriente, sin ordenar
+    ),
+    Consulta(
+        "IngresoInventario.listar_entradas",
+        IngresoInventario._SQL_ENTRADAS,
+        permite_scan=True,  # listado de la mayoría de la tabla: con ANALYZE el planner prefiere SCAN
+    ),
+]
+
+
+# -------------------------------------------------
+# Planes
+# -------------------------------------------------
+def _es_scan(detalle: str) -> bool:
+    """True si el paso del plan recorre la tabla/índice completo."""
+    return detalle.startswith("SCAN ") and not detalle.startswith("SCAN CONSTANT ROW")
+
+
+def explicar(conn: sqlite3.Connection, consulta: Consulta) -> List[str]:
+    """Devuelve los pasos (columna 'detail') de EXPLAIN QUERY PLAN."""
+    cur = conn.execute("EXPLAIN QUERY PLAN " + consulta.sql, consulta.params)
+    return [row[3] for row in cur.fetchall()]
+
+
+def planes(conn: sqlite3.Connection) -> Dict[str, List[str]]:
+    """Plan de cada consulta catalogada: {nombre: [pasos]}."""
+    return {c.nombre: explicar(conn, c) for c in CATALOGO}
+
+
+def verificar_planes(conn: sqlite3.Connection) -> List[Tuple[str, List[str]]]:
+    """
+    Retorna [(nombre, plan)] de las consultas que caen a SCAN sin permitirlo.
+    Lista vacía = todos los planes usan índices.
+    """
+    fallas: List[Tuple[str, List[str]]] = []
+    for c in CATALOGO:
+        plan = explicar(conn, c)
+        if not c.permite_scan and any(_es_scan(p) for p in plan):
+            fallas.append((c.nombre, plan))
+    return fallas
+
+
+def main() -> int:
+    from app.db.database import get_connection
+
+    conn = get_connection()
+    try:
+        for nombre, plan in planes(conn).items():
+            print(f"• {nombre}")
+            for paso in plan:
+                print(f"    {paso}")
+        fallas = verificar_planes(conn)
+    except sqlite3.OperationalError as e:
+        # Esquema anterior a las migraciones (falta una tabla/columna): no se migra desde aquí
+        print(f"❌ BD sin migrar ({e}). Abra la aplicación o ejecute init_db() y vuelva a intentar.")
+        return 2
+    finally:
+        conn.close()
+
+    if fallas:
+        print(f"\n❌ {len(fallas)} consulta(s) catalogada(s) caen a SCAN:")
+        for nombre, _ in fallas:
+            print(f"   • {nombre}")
+        return 1
+    print("\n✅ Todas las consultas catalogadas usan índices.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,189 @@
+# app/db/cola_escritura.py
+"""
+Cola de escritura con group commit (write-behind opcional).
+
+Para ráfagas de escrituras pequeñas (lector de códigos, gastos masivos): en vez de un
+COMMIT por fila, un hilo escritor junta lo que llega dentro de SQL_GRUPO_COMMIT_MS
+(hasta SQL_GRUPO_COMMIT_MAX) y lo confirma en una sola transacción.
+
+- enviar(fn) encola fn(cur) y devuelve un Future; el Future se resuelve recién después
+  del COMMIT (acuse de durabilidad) con lo que devolvió fn, o con su excepción.
+- Cada escritura corre dentro de un SAVEPOINT: si una falla, se deshace solo esa y
+  el resto del lote se confirma igual.
+- Si el COMMIT del lote falla por lock (otra caja), se reintenta completo (con_reintentos).
+- vaciar() espera a que todo lo encolado quede confirmado; cerrar() además detiene el
+  hilo. iniciar_app llama cerrar() al salir (y atexit como respaldo).
+
+Uso (los modelos exponen *_diferido):
+    fut = MovimientoInventario.registrar_diferido("P0001", "entrada", 1, metodo="escáner")
+    fut.result()  # opcional: bloquea hasta que esté en disco
+"""
+
+from __future__ import annotations
+
+import atexit
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, List, Optional, Tuple
+
+from app.config import rendimiento
+from app.db.database import con_reintentos, es_bloqueo, get_connection
+
+Escritura = Callable[[sqlite3.Cursor], Any]
+
+
+class ColaEscritura:
+    def __init__(self, ventana_ms: Optional[float] = None, max_lote: Optional[int] = None):
+        self.ventana = (rendimiento.SQL_GRUPO_COMMIT_MS if ventana_ms is None else float(ventana_ms)) / 1000.0
+        self.max_lote = int(rendimiento.SQL_GRUPO_COMMIT_MAX if max_lote is None else max_lote)
+        self._cola: "queue.Queue[Optional[Tuple[Escritura, Future]]]" = queue.Queue()
+        self._pendientes = 0
+        self._cond = threading.Condition()
+        self._cerrada = False
+        self.stats = {"escrituras": 0, "commits": 0}
+        self._hilo = threading.Thread(target=self._trabajar, name="cola-escritura", daemon=True)
+        self._hilo.start()
+
+    # ---------------------------
+    # API
+    # ---------------------------
+    def enviar(self, fn: Escritura) -> Future:
+        """Encola fn(cur) para el próximo commit agrupado."""
+        fut: Future = Future()
+        with self._cond:
+            if self._cerrada:
+                raise RuntimeError("La cola de escritura está cerrada.")
+            self._pendientes += 1
+            self._cola.put((fn, fut))
+        return fut
+
+    def vaciar(self, timeout: Optional[float] = None) -> bool:
+        """Espera a que todas las escrituras encoladas estén confirmadas. False si vence el timeout."""
+        with self._cond:
+            return self._cond.wait_for(lambda: self._pendientes == 0, timeout)
+
+    def cerrar(self, timeout: Optional[float] = 30.0) -> None:
+        with self._cond:
+            if self._cerrada:
+                return
+            self._cerrada = True
+        self._cola.put(None)
+        self._hilo.join(timeout)
+
+    # ---------------------------
+    # Hilo escritor
+    # ---------------------------
+    def _recolectar(self, primero: Tuple[Escritura, Future]) -> Tuple[List[Tuple[Escritura, Future]], bool]:
+        """Junta lo que llegue durante la ventana. Devuelve (lote, hay_que_terminar)."""
+        lote = [primero]
+        limite = time.monotonic() + self.ventana
+        while len(lote) < self.max_lote:
+            resto = limite - time.monotonic()
+            try:
+                item = self._cola.get(timeout=resto) if resto > 0 else self._cola.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                return lote, True
+            lote.append(item)
+        return lote, False
+
+    def _trabajar(self) -> None:
+        conn = get_connection("lote")
+        try:
+            terminar = False
+            while not terminar:
+                item = self._cola.get()
+                if item is None:
+                    break
+                lote, terminar = self._recolectar(item)
+                recibidas = len(lote)
+                lote = [(fn, fut) for fn, fut in lote if fut.set_running_or_notify_cancel()]
+                try:
+                    resultados = con_reintentos(lambda: self._confirmar(conn, lote))
+                except Exception as e:
+                    for _, fut in lote:
+                        fut.set_exception(e)
+                else:
+                    for (_, fut), (ok, valor) in zip(lote, resultados):
+                        if ok:
+                            fut.set_result(valor)
+                        else:
+                            fut.set_exception(valor)
+                    self.stats["escrituras"] += len(lote)
+                    self.stats["commits"] += 1
+                with self._cond:
+                    self._pendientes -= recibidas
+                    self._cond.notify_all()
+        finally:
+            conn.close()
+            with self._cond:
+                self._pendientes = 0
+                self._cond.notify_all()
+
+    @staticmethod
+    def _confirmar(conn: sqlite3.Connection, lote: List[Tuple[Escritura, Future]]) -> List[Tuple[bool, Any]]:
+        """Una transacción para todo el lote; un SAVEPOINT por escritura."""
+        cur = conn.cursor()
+        resultados: List[Tuple[bool, Any]] = []
+        try:
+            cur.execute("BEGIN IMMEDIATE")
+            for fn, _ in lote:
+                cur.execute("SAVEPOINT escritura")
+                try:
+                    valor = fn(cur)
+                except Exception as e:
+                    if es_bloqueo(e):
+                        raise  # lock: se reintenta el lote completo
+                    cur.execute("ROLLBACK TO escritura")
+                    cur.execute("RELEASE escritura")
+                    resultados.append((False, e))
+                    continue
+                cur.execute("RELEASE escritura")
+                resultados.append((True, valor))
+            conn.commit()
+            return resultados
+        except Exception:
+            conn.rollback()
+            raise
+
+
+# ---------------------------
+# Instancia compartida
+# ---------------------------
+_cola: Optional[ColaEscritura] = None
+_lock = threading.Lock()
+
+
+def cola() -> ColaEscritura:
+    """Cola compartida de la app (se crea al primer uso)."""
+    global _cola
+    with _lock:
+        if _cola is None:
+            _cola = ColaEscritura()
+        return _cola
+
+
+def enviar(fn: Escritura) -> Future:
+    return cola().enviar(fn)
+
+
+def vaciar(timeout: Optional[float] = None) -> bool:
+    with _lock:
+        actual = _cola
+    return True if actual is None else actual.vaciar(timeout)
+
+
+def cerrar() -> None:
+    """Confirma lo pendiente y detiene el hilo escritor (salida de la app)."""
+    global _cola
+    with _lock:
+        actual, _cola = _cola, None
+    if actual is not None:
+        actual.cerrar()
+
+
+atexit.register(cerrar)
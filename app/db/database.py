@@ -3,40 +3,190 @@
 Gestión de base de datos SQLite (init + migraciones idempotentes).
 
 Mejoras:
-- PRAGMA (foreign_keys, WAL, synchronous) para robustez y rendimiento.
+- PRAGMA (foreign_keys, WAL, synchronous) para robustez y rendimiento, más caché,
+  mmap, temp_store y busy_timeout según el perfil (interactivo / lote) de
+  app/config/rendimiento.SQL_PERFILES; usar_perfil("lote") para reportes y procesos.
 - Helpers para comprobar/agregar columnas e índices sin romper datos.
+- Índices compuestos/cubrientes/de expresión guiados por app/db/catalogo_consultas.py.
+- Instrumentación SQL opt-in (app/db/instrumentacion.py) vía factory de conexión.
 - Migraciones para lógica chilena:
   - facturas: doc_tipo, neto, iva, retencion, total, vencimiento
   - ordenes_venta: doc_tipo, neto, retencion, total (asegura)
   - compras: doc_tipo, neto, retencion, total, vencimiento
+  - lotes_inventario / venta_lotes: stock por lote y vencimiento (FEFO)
+  - productos.reservado / reservas_stock: stock apartado para pedidos pendientes
+  - productos.costo_promedio: costo promedio ponderado (app/models/costo_promedio.py)
+  - registro_cambios + triggers: captura de cambios por fila (app/services/bus_cambios.py)
+- busy_timeout + con_reintentos() para varias cajas escribiendo el mismo archivo.
+- iterar_cursor(): lectura en bloques (fetchmany) para los iterar_* de los modelos.
 """
 
 from __future__ import annotations
 
+import random
 import sqlite3
+import threading
+import time
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Iterable
+from typing import Any, Callable, Dict, FrozenSet, Iterable, Iterator, Optional, Tuple, TypeVar
+
+from app.config import rendimiento
+from app.db import instrumentacion
+
+T = TypeVar("T")
 
 DB_PATH = Path(__file__).resolve().parent.parent / "data" / "negocio.db"
 
 
 # -------------------------------------------------
-# Conexión (con PRAGMA de robustez y rendimiento)
+# Conexión (PRAGMA según perfil: app/config/rendimiento.SQL_PERFILES)
 # -------------------------------------------------
-def get_connection() -> sqlite3.Connection:
-    DB_PATH.parent.mkdir(parents=True, exist_ok=True)
-    conn = sqlite3.connect(DB_PATH)
-    # PRAGMA recomendados (seguros en SQLite embebido)
+_perfil_hilo = threading.local()
+
+
+def perfil_conexion(nombre: Optional[str] = None) -> Dict[str, Any]:
+    """Ajustes del perfil `nombre` (por defecto el de usar_perfil() o SQL_PERFIL)."""
+    nombre = nombre or getattr(_perfil_hilo, "nombre", None) or rendimiento.SQL_PERFIL
     try:
-        conn.execute("PRAGMA foreign_keys = ON;")   # respeta FKs si las defines en el futuro
-        conn.execute("PRAGMA journal_mode = WAL;")  # mejor concurrencia/recuperación
-        conn.execute("PRAGMA synchronous = NORMAL;")# equilibrio rendimiento/seguridad
-    except Exception:
-        # Si la versión de SQLite no soporta alguno, lo ignoramos
-        pass
+        return rendimiento.SQL_PERFILES[nombre]
+    except KeyError:
+        raise ValueError(f"Perfil de conexión desconocido: {nombre!r}") from None
+
+
+@contextmanager
+def usar_perfil(nombre: str) -> Iterator[None]:
+    """
+    Las get_connection() de este hilo usan `nombre` mientras dure el bloque (los
+    modelos no reciben el perfil por parámetro):
+
+        with usar_perfil("lote"):
+            Exportador.exportar_csv("ventas", VentaFila._fields, Venta.iterar_todas())
+    """
+    perfil_conexion(nombre)  # valida antes de entrar
+    previo = getattr(_perfil_hilo, "nombre", None)
+    _perfil_hilo.nombre = nombre
+    try:
+        yield
+    finally:
+        _perfil_hilo.nombre = previo
+
+
+def _pragmas(perfil: Dict[str, Any]) -> Tuple[str, ...]:
+    return (
+        "PRAGMA foreign_keys = ON",     # respeta FKs si las defines en el futuro
+        "PRAGMA journal_mode = WAL",    # mejor concurrencia/recuperación
+        "PRAGMA synchronous = NORMAL",  # equilibrio rendimiento/seguridad
+        f"PRAGMA cache_size = {-int(perfil['cache_kb'])}",  # negativo = KiB
+        f"PRAGMA mmap_size = {int(perfil['mmap_mb']) * 1_048_576}",
+        f"PRAGMA temp_store = {'MEMORY' if perfil['temp_memoria'] else 'DEFAULT'}",
+        f"PRAGMA busy_timeout = {int(perfil['busy_ms'])}",
+    )
+
+
+def get_connection(perfil: Optional[str] = None) -> sqlite3.Connection:
+    DB_PATH.parent.mkdir(parents=True, exist_ok=True)
+    ajustes = perfil_conexion(perfil)
+    # Con instrumentación activa (CN_SQL_INSTRUMENTAR=1) la conexión mide cada sentencia.
+    # timeout = busy_timeout: espera el lock de otra caja en vez de fallar de inmediato.
+    conn = sqlite3.connect(
+        DB_PATH,
+        timeout=float(ajustes["busy_ms"]) / 1000.0,
+        isolation_level=ajustes["aislamiento"],
+        factory=instrumentacion.fabrica_conexion(),
+    )
+    # Una vez por conexión, al abrirla
+    for sql in _pragmas(ajustes):
+        try:
+            conn.execute(sql)
+        except sqlite3.Error:
+            pass  # versión de SQLite sin ese PRAGMA (o mmap no disponible): se sigue sin él
     return conn
 
 
+def es_bloqueo(error: BaseException) -> bool:
+    """True si el error es SQLITE_BUSY/SQLITE_LOCKED (otra conexión tiene el lock)."""
+    if not isinstance(error, sqlite3.OperationalError):
+        return False
+    msg = str(error).lower()
+    return "locked" in msg or "busy" in msg
+
+
+def con_reintentos(fn: Callable[[], T], intentos: Optional[int] = None) -> T:
+    """
+    Ejecuta fn() (una transacción completa: abre, BEGIN IMMEDIATE, commit/rollback, cierra)
+    y la repite si falla por lock tras agotar busy_timeout. Backoff exponencial con jitter
+    para que dos cajas no reintenten al mismo tiempo. Otros errores se propagan tal cual.
+    """
+    total = rendimiento.SQL_REINTENTOS if intentos is None else int(intentos)
+    espera = rendimiento.SQL_REINTENTO_BASE_MS / 1000.0
+    for intento in range(total + 1):
+        try:
+            return fn()
+        except sqlite3.OperationalError as e:
+            if not es_bloqueo(e) or intento >= total:
+                raise
+            time.sleep(espera * (2 ** intento) * random.uniform(0.5, 1.5))
+    raise AssertionError("inalcanzable")
+
+
+def iterar_cursor(
+    cur: sqlite3.Cursor,
+    fabrica: Optional[Callable[..., Any]] = None,
+    lote: Optional[int] = None,
+) -> Iterator[Any]:
+    """
+    Recorre un cursor ya ejecutado con fetchmany(lote): en memoria hay a lo más un
+    bloque, no la tabla. `fabrica(*fila)` arma cada fila (ej: un namedtuple).
+
+    Pensado para generadores que sostienen su conexión mientras se consumen:
+
+        conn = get_connection()
+        try:
+            yield from iterar_cursor(conn.execute(sql), Fila)
+        finally:
+            conn.close()   # al agotarse, con .close() / contextlib.closing o al soltarlo
+    """
+    tam = max(1, int(lote or rendimiento.SQL_LOTE_FLUJO))
+    while True:
+        filas = cur.fetchmany(tam)
+        if not filas:
+            return
+        if fabrica is None:
+            yield from filas
+        else:
+            for f in filas:
+                yield fabrica(*f)
+
+
+def rango_prefijo(prefijo: str) -> Tuple[str, str]:
+    """
+    Límites [desde, hasta) para buscar por prefijo con `col COLLATE NOCASE >= ? AND < ?`.
+    A diferencia de LIKE '%x%', el rango aprovecha un índice COLLATE NOCASE.
+    """
+    return prefijo, prefijo + "\U0010ffff"
+
+
+# -------------------------------------------------
+# Forma del esquema (columnas extendidas)
+# -------------------------------------------------
+_columnas_vistas: Dict[Tuple[str, str], FrozenSet[str]] = {}
+
+
+def tiene_columnas(conn: sqlite3.Connection, tabla: str, columnas: Iterable[str]) -> bool:
+    """
+    True si `tabla` tiene todas `columnas`. Las migraciones solo agregan columnas:
+    un resultado positivo se recuerda por archivo y las lecturas siguientes no
+    vuelven a consultar PRAGMA table_info.
+    """
+    clave = (str(DB_PATH), tabla)
+    vistas = _columnas_vistas.get(clave)
+    if vistas is None or not vistas.issuperset(columnas):
+        vistas = frozenset(r[1] for r in conn.execute(f"PRAGMA table_info({tabla})").fetchall())
+        _columnas_vistas[clave] = vistas
+    return vistas.issuperset(columnas)
+
+
 # -------------------------------------------------
 # Migraciones previas existentes (compatibilidad)
 # -------------------------------------------------
@@ -73,6 +223,16 @@ def _has_column(conn: sqlite3.Connection, table: str, column: str) -> bool:
     return column in [row[1] for row in cur.fetchall()]
 
 
+def _has_table(conn: sqlite3.Connection, table: str) -> bool:
+    cur = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,))
+    return cur.fetchone() is not None
+
+
+def _has_index(conn: sqlite3.Connection, name: str) -> bool:
+    cur = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = ?", (name,))
+    return cur.fetchone() is not None
+
+
 def _add_column_if_missing(conn: sqlite3.Connection, table: str, column: str, decl: str) -> None:
     if not _has_column(conn, table, column):
         conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {decl}")
@@ -87,27 +247,138 @@ def _create_index_if_missing(conn: sqlite3.Connection, name: str, table: str, co
 
 
 def _create_basic_indices(conn: sqlite3.Connection) -> None:
-    """Índices comunes que aceleran las vistas/consultas típicas."""
+    """
+    Índices comunes que aceleran las vistas/consultas típicas.
+    Cada índice responde a una consulta registrada en app/db/catalogo_consultas.py;
+    si agregas o cambias una consulta de modelo, revisa su plan allí.
+    """
     # Productos
     _create_index_if_missing(conn, "idx_productos_nombre", "productos", ["nombre"])
+    _create_index_if_missing(conn, "idx_productos_codigo_interno", "productos", ["codigo_interno"])
+    _create_index_if_missing(conn, "idx_productos_categoria", "productos", ["categoria"])
+    _create_index_if_missing(conn, "idx_productos_venc", "productos", ["fecha_vencimiento"])
+    # Autocompletar por prefijo (rango sobre COLLATE NOCASE)
+    _create_index_if_missing(conn, "idx_productos_nombre_nocase", "productos", ["nombre COLLATE NOCASE"])
+    _create_index_if_missing(
+        conn, "idx_productos_codigo_nocase", "productos", ["codigo_interno COLLATE NOCASE"]
+    )
+    _create_index_if_missing(conn, "idx_clientes_nombre_nocase", "clientes", ["nombre COLLATE NOCASE"])
+    # Clientes / Proveedores (búsqueda por RUT; clientes compara el RUT normalizado)
+    _create_index_if_missing(
+        conn, "idx_clientes_rut_norm", "clientes",
+        ["UPPER(REPLACE(REPLACE(rut,'.',''),'-',''))"],
+    )
+    _create_index_if_missing(conn, "idx_proveedores_rut", "proveedores", ["rut"])
     # Compras
     _create_index_if_missing(conn, "idx_compras_producto", "compras", ["producto"])
     _create_index_if_missing(conn, "idx_compras_fecha", "compras", ["fecha"])
     _create_index_if_missing(conn, "idx_compras_doc_tipo", "compras", ["doc_tipo"])
-    # Ventas
+    # Último costo / costo promedio por producto (ROW_NUMBER OVER producto ORDER BY id DESC, cubriente)
+    _create_index_if_missing(
+        conn, "idx_compras_producto_id", "compras",
+        ["producto", "id DESC", "fecha", "cantidad", "precio_unitario"],
+    )
+    # Ventas (idx_ov_producto incluye el rowid: sirve también para ORDER BY id DESC)
     _create_index_if_missing(conn, "idx_ov_producto", "ordenes_venta", ["producto"])
+    _create_index_if_missing(conn, "idx_ov_cliente", "ordenes_venta", ["cliente"])
     _create_index_if_missing(conn, "idx_ov_fecha", "ordenes_venta", ["fecha"])
     _create_index_if_missing(conn, "idx_ov_doc_tipo", "ordenes_venta", ["doc_tipo"])
+    # Ventas del período agrupadas por producto (margen), cubriente
+    _create_index_if_missing(
+        conn, "idx_ov_fecha_producto", "ordenes_venta",
+        ["fecha", "producto", "cantidad", "neto", "precio_unitario"],
+    )
     # Facturas (algunos ya se crean en migrate_schema, pero reforzamos aquí también)
     _create_index_if_missing(conn, "idx_facturas_estado", "facturas", ["estado"])
     _create_index_if_missing(conn, "idx_facturas_venc", "facturas", ["vencimiento"])
     _create_index_if_missing(conn, "idx_facturas_tipo", "facturas", ["tipo"])
     _create_index_if_missing(conn, "idx_facturas_doc_tipo", "facturas", ["doc_tipo"])
+    # Compuesto + cubriente: filtro (tipo, estado) y SUM(monto) sin tocar la tabla
+    _create_index_if_missing(conn, "idx_facturas_tipo_estado", "facturas", ["tipo", "estado", "monto"])
+    # Ingresos / Gastos: SUM(monto) por estado (cubriente)
+    _create_index_if_missing(conn, "idx_ingresos_estado_monto", "ingresos", ["estado", "monto"])
+    _create_index_if_missing(conn, "idx_gastos_estado_monto", "gastos", ["estado", "monto"])
+    # Movimientos: por tipo y por código (índice de expresión para LOWER(codigo_producto))
+    _create_index_if_missing(conn, "idx_mov_tipo", "movimientos_inventario", ["tipo"])
+    _create_index_if_missing(
+        conn, "idx_mov_codigo_lower", "movimientos_inventario", ["LOWER(codigo_producto)"]
+    )
+    # Lotes: alertas por vencimiento (rango; cantidad cubre el filtro de saldo) y consumo FEFO por producto
+    _create_index_if_missing(conn, "idx_lotes_venc", "lotes_inventario", ["fecha_vencimiento", "cantidad"])
+    _create_index_if_missing(conn, "idx_lotes_producto_venc", "lotes_inventario", ["producto_id", "fecha_vencimiento"])
+    _create_index_if_missing(conn, "idx_venta_lotes_venta", "venta_lotes", ["venta_id"])
+    # Reservas: vencidas por estado + expiración
+    _create_index_if_missing(conn, "idx_reservas_estado_expira", "reservas_stock", ["estado", "expira"])
+
+
+def _unificar_lotes(conn: sqlite3.Connection) -> None:
+    """
+    Junta los lotes repetidos (mismo producto, lote y vencimiento) en el de menor id:
+    suma las cantidades y repunta venta_lotes. Previo al índice único idx_lotes_clave.
+    """
+    duplicados = conn.execute("""
+        SELECT MIN(id), GROUP_CONCAT(id), SUM(cantidad)
+        FROM lotes_inventario
+        GROUP BY producto_id, COALESCE(lote, ''), COALESCE(fecha_vencimiento, '')
+        HAVING COUNT(*) > 1
+    """).fetchall()
+    for conservar, ids, total in duplicados:
+        sobran = [int(i) for i in str(ids).split(",") if int(i) != conservar]
+        conn.executemany("UPDATE venta_lotes SET lote_id = ? WHERE lote_id = ?", [(conservar, i) for i in sobran])
+        conn.executemany("DELETE FROM lotes_inventario WHERE id = ?", [(i,) for i in sobran])
+        conn.execute("UPDATE lotes_inventario SET cantidad = ? WHERE id = ?", (total, conservar))
+
+
+def sembrar_lotes(conn: sqlite3.Connection) -> None:
+    """
+    Crea un lote 'INICIAL' (stock y vencimiento del producto) para cada producto con
+    stock que todavía no tiene lotes. Migración de una sola vez: migrate_schema la corre
+    solo al crear lotes_inventario (después, un producto con lotes en cero no se re-siembra).
+    No abre transacción propia.
+    """
+    conn.execute("""
+        INSERT INTO lotes_inventario (producto_id, lote, cantidad, fecha_vencimiento, fecha_ingreso)
+        SELECT p.id, 'INICIAL', p.stock, p.fecha_vencimiento, date('now', 'localtime')
+        FROM productos p
+        WHERE p.stock > 0
+          AND NOT EXISTS (SELECT 1 FROM lotes_inventario l WHERE l.producto_id = p.id)
+    """)
 
 
 # -------------------------------------------------
 # Migraciones “lógica Chile”
 # -------------------------------------------------
+# Tablas con captura de cambios: cada INSERT/UPDATE/DELETE deja (version, tabla, fila, op)
+TABLAS_CAMBIOS: Tuple[str, ...] = (
+    "productos", "clientes", "proveedores", "categorias", "compras", "ordenes_venta",
+    "ingresos", "gastos", "facturas", "movimientos_inventario",
+)
+
+
+def _crear_registro_cambios(conn: sqlite3.Connection) -> None:
+    """
+    Registro compacto de cambios alimentado por triggers (lo lee app/services/bus_cambios.py).
+    version es monotónica: los consumidores guardan la última que procesaron.
+    """
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS registro_cambios (
+            version INTEGER PRIMARY KEY AUTOINCREMENT,
+            tabla TEXT NOT NULL,
+            fila INTEGER NOT NULL,
+            op TEXT NOT NULL  -- 'I' alta, 'U' edición, 'D' baja
+        )
+    """)
+    for tabla in TABLAS_CAMBIOS:
+        for evento, op, ref in (("INSERT", "I", "NEW"), ("UPDATE", "U", "NEW"), ("DELETE", "D", "OLD")):
+            conn.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS trg_cambios_{tabla}_{op.lower()}
+                AFTER {evento} ON {tabla}
+                BEGIN
+                    INSERT INTO registro_cambios (tabla, fila, op) VALUES ('{tabla}', {ref}.id, '{op}');
+                END
+            """)
+
+
 def migrate_schema(conn: sqlite3.Connection) -> None:
     """
     Idempotente: asegura columnas usadas por los modelos extendidos y crea índices útiles.
@@ -125,6 +396,12 @@ def migrate_schema(conn: sqlite3.Connection) -> None:
         _create_index_if_missing(conn, "idx_facturas_venc",     "facturas", ["vencimiento"])
         _create_index_if_missing(conn, "idx_facturas_tipo",     "facturas", ["tipo"])
         _create_index_if_missing(conn, "idx_facturas_doc_tipo", "facturas", ["doc_tipo"])
+        # tipo/estado en minúsculas y sin espacios (así se escriben ahora y así filtran los
+        # modelos con igualdad exacta sobre idx_facturas_tipo_estado)
+        conn.execute("""
+            UPDATE facturas SET tipo = LOWER(TRIM(tipo)), estado = LOWER(TRIM(estado))
+            WHERE tipo <> LOWER(TRIM(tipo)) OR estado <> LOWER(TRIM(estado))
+        """)
 
         # --- ORDENES_VENTA ---
         _add_column_if_missing(conn, "ordenes_venta", "doc_tipo",  "TEXT")
@@ -141,9 +418,62 @@ def migrate_schema(conn: sqlite3.Connection) -> None:
         _add_column_if_missing(conn, "compras", "vencimiento", "TEXT")
         _create_index_if_missing(conn, "idx_compras_doc_tipo", "compras", ["doc_tipo"])
 
+        # --- RESERVAS DE STOCK (pedidos pendientes) ---
+        _add_column_if_missing(conn, "productos", "reservado", "INTEGER NOT NULL DEFAULT 0")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS reservas_stock (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                producto_id INTEGER NOT NULL REFERENCES productos(id) ON DELETE CASCADE,
+                cantidad INTEGER NOT NULL,
+                referencia TEXT,
+                estado TEXT NOT NULL DEFAULT 'activa',
+                creada TEXT NOT NULL,
+                expira TEXT,
+                venta_id INTEGER
+            )
+        """)
+
+        # --- COSTO PROMEDIO PONDERADO (NULL = aún sin compras: se usa precio_compra) ---
+        _add_column_if_missing(conn, "productos", "costo_promedio", "REAL")
+
+        # --- LOTES (vencimiento / FEFO) ---
+        lotes_nuevos = not _has_table(conn, "lotes_inventario")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS lotes_inventario (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                producto_id INTEGER NOT NULL REFERENCES productos(id) ON DELETE CASCADE,
+                lote TEXT,
+                cantidad INTEGER NOT NULL DEFAULT 0,
+                fecha_vencimiento TEXT,
+                fecha_ingreso TEXT
+            )
+        """)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS venta_lotes (
+                venta_id INTEGER NOT NULL REFERENCES ordenes_venta(id) ON DELETE CASCADE,
+                lote_id INTEGER NOT NULL REFERENCES lotes_inventario(id) ON DELETE CASCADE,
+                cantidad INTEGER NOT NULL
+            )
+        """)
+
+        # Clave natural de un lote (upsert de ingresos masivos); antes, unifica duplicados
+        if not _has_index(conn, "idx_lotes_clave"):
+            _unificar_lotes(conn)
+            conn.execute("""
+                CREATE UNIQUE INDEX idx_lotes_clave ON lotes_inventario
+                (producto_id, COALESCE(lote, ''), COALESCE(fecha_vencimiento, ''))
+            """)
+
         # Índices adicionales recomendados
         _create_basic_indices(conn)
 
+        # Stock previo a los lotes: un lote 'INICIAL' por producto (solo al crear la tabla)
+        if lotes_nuevos:
+            sembrar_lotes(conn)
+
+        # --- CAPTURA DE CAMBIOS (vistas/cachés se actualizan por fila) ---
+        _crear_registro_cambios(conn)
+
         conn.execute("COMMIT")
     except Exception:
         conn.execute("ROLLBACK")
@@ -285,3 +615,13 @@ def init_db() -> None:
     conn.close()
 
     print(f"✅ Base de datos inicializada y migraciones aplicadas. Ruta: {DB_PATH}")
+
+    # 4) Planes de consulta: avisa si alguna consulta catalogada cae a SCAN
+    from app.db.catalogo_consultas import verificar_planes  # import diferido (evita ciclo)
+
+    conn = get_connection()
+    try:
+        for nombre, plan in verificar_planes(conn):
+            print(f"⚠️  Plan degradado en {nombre}: {' | '.join(plan)}")
+    finally:
+        conn.close()
@@ -0,0 +1,92 @@
+# app/db/filas.py
+"""
+Filas tipadas de los modelos: una clase por entidad, forma fija.
+
+- Cada clase es un namedtuple (__slots__ vacío, sin __dict__): sigue siendo una
+  tupla (Treeview values=fila, desempaquetado, índices) y además tiene acceso por
+  atributo (venta.total, compra.vencimiento) resuelto en C.
+- La forma no depende del esquema: las lecturas de ventas/compras/facturas piden
+  siempre las columnas extendidas; con un esquema legacy (sin migrar) las que faltan
+  llegan como NULL. Las vistas ya no adivinan columnas por len(fila).
+- fabrica(Clase) es el row_factory del cursor: arma la fila con tuple.__new__,
+  sin pasar por __init__ ni validar (las columnas vienen del SELECT del modelo).
+- FILAS registra las clases por nombre: servidor_local/cliente_remoto las
+  reconstruyen al otro lado de la red.
+
+Uso:
+    cur = conn.cursor()
+    cur.row_factory = fabrica(VentaFila)
+    cur.execute(...)
+"""
+
+from __future__ import annotations
+
+import sqlite3
+from collections import namedtuple
+from typing import Any, Callable, Dict, Tuple
+
+FILAS: Dict[str, type] = {}
+
+
+def _fila(nombre: str, campos: str) -> type:
+    cls = namedtuple(nombre, campos)
+    FILAS[nombre] = cls
+    return cls
+
+
+# -------------------------------------------------
+# Clases por entidad (orden = orden del SELECT en el modelo)
+# -------------------------------------------------
+VentaFila = _fila(
+    "VentaFila",
+    "id cliente producto cantidad precio_unitario doc_tipo neto iva retencion total fecha",
+)
+CompraFila = _fila(
+    "CompraFila",
+    "id proveedor producto cantidad precio_unitario doc_tipo neto iva retencion total fecha vencimiento",
+)
+FacturaFila = _fila(
+    "FacturaFila",
+    "id numero proveedor monto estado fecha tipo doc_tipo neto iva retencion total vencimiento",
+)
+ProductoFila = _fila(
+    "ProductoFila",
+    "id nombre categoria precio_compra precio_venta stock codigo_interno codigo_externo iva ubicacion fecha_vencimiento",
+)
+ClienteFila = _fila("ClienteFila", "id nombre rut direccion telefono")
+ProveedorFila = _fila("ProveedorFila", "id nombre rut direccion telefono razon_social correo comuna")
+InventarioFila = _fila(
+    "InventarioFila",
+    "id nombre categoria codigo_interno precio_compra precio_venta stock iva ubicacion fecha_vencimiento",
+)
+# Una fila por lote con saldo (Inventario.por_vencer / buscar_por_vencimiento): misma forma
+# que InventarioFila (stock = saldo del lote, fecha_vencimiento = la del lote) + el lote
+LoteFila = _fila("LoteFila", InventarioFila._fields + ("lote",))
+MovimientoFila = _fila("MovimientoFila", "id codigo_producto tipo cantidad ubicacion metodo fecha")
+MovimientoCaja = _fila("MovimientoCaja", "id nombre descripcion monto estado fecha")  # ingresos / gastos
+
+
+# -------------------------------------------------
+# row_factory
+# -------------------------------------------------
+_fabricas: Dict[type, Callable[[sqlite3.Cursor, Tuple[Any, ...]], Any]] = {}
+
+
+def fabrica(cls: type) -> Callable[[sqlite3.Cursor, Tuple[Any, ...]], Any]:
+    """row_factory que entrega `cls` (una de las filas de este módulo)."""
+    f = _fabricas.get(cls)
+    if f is None:
+        nuevo = tuple.__new__
+
+        def f(_cursor, fila, _cls=cls, _nuevo=nuevo):
+            return _nuevo(_cls, fila)
+
+        _fabricas[cls] = f
+    return f
+
+
+def cursor(conn: sqlite3.Connection, cls: type) -> sqlite3.Cursor:
+    """Cursor nuevo de `conn` que entrega filas `cls`."""
+    cur = conn.cursor()
+    cur.row_factory = fabrica(cls)
+    return cur
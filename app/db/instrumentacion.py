@@ -0,0 +1,317 @@
+# app/db/instrumentacion.py
+"""
+Instrumentación opt-in de las conexiones SQLite.
+
+- Conexión/cursor con temporizadores en execute/executemany/fetch*/commit.
+- set_trace_callback: cuenta TODAS las sentencias que ejecuta SQLite
+  (incluye BEGIN/COMMIT implícitos del módulo sqlite3), en total y por hilo.
+- Por sentencia: histograma de latencias, filas devueltas y método de modelo
+  (y pantalla) que la originó.
+- Log de consultas lentas con umbral configurable (app/config/rendimiento.py).
+
+Se activa con CN_SQL_INSTRUMENTAR=1 o llamando a `activar()`; apagada,
+get_connection entrega conexiones sqlite3 normales (costo cero).
+`activar_conteo()` es el modo liviano (perfilador de la UI): solo cuenta
+sentencias con el trace callback, sin temporizar ni recorrer la pila.
+"""
+
+from __future__ import annotations
+
+import logging
+import sqlite3
+import sys
+import threading
+import time
+from bisect import bisect_left
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.config.rendimiento import SQL_INSTRUMENTAR, SQL_LENTA_MS, SQL_HISTOGRAMA_MS
+
+LOG_PATH = Path(__file__).resolve().parent.parent / "data" / "logs" / "sql_lento.log"
+
+_SEP_MODELOS = ("app/models/", "app\\models\\")
+_SEP_UI = ("app/ui/", "app\\ui\\")
+
+_lock = threading.Lock()
+_estado: Dict[str, Any] = {
+    "activa": SQL_INSTRUMENTAR,
+    "umbral_ms": SQL_LENTA_MS,
+    "contar": False,   # solo conteo de sentencias (ConexionContada)
+    "sentencias": 0,   # contador global (trace callback)
+}
+_por_hilo = threading.local()  # .sentencias: las del hilo actual (perfilador de la UI)
+_stats: Dict[Tuple[str, str], "_Stat"] = {}
+_logger: Optional[logging.Logger] = None
+
+
+# -------------------------------------------------
+# Acumuladores
+# -------------------------------------------------
+class _Stat:
+    __slots__ = ("origen", "pantalla", "sql", "llamadas", "total_ms", "max_ms", "filas", "buckets")
+
+    def __init__(self, origen: str, pantalla: str, sql: str):
+        self.origen = origen
+        self.pantalla = pantalla
+        self.sql = sql
+        self.llamadas = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.filas = 0
+        self.buckets = [0] * (len(SQL_HISTOGRAMA_MS) + 1)  # último = "más lento"
+
+    def percentil(self, p: float) -> float:
+        """Percentil aproximado: límite superior del bucket que lo contiene."""
+        if not self.llamadas:
+            return 0.0
+        objetivo = p * self.llamadas
+        acumulado = 0
+        for i, n in enumerate(self.buckets):
+            acumulado += n
+            if acumulado >= objetivo:
+                return float(SQL_HISTOGRAMA_MS[i]) if i < len(SQL_HISTOGRAMA_MS) else self.max_ms
+        return self.max_ms
+
+
+def _normalizar_sql(sql: str) -> str:
+    return " ".join(sql.split())[:200]
+
+
+def _origen_llamada() -> Tuple[str, str]:
+    """
+    Recorre la pila buscando el primer frame de app/models (método de modelo)
+    y el primero de app/ui (pantalla). Solo se invoca con la instrumentación activa.
+    """
+    modelo = pantalla = ""
+    frame = sys._getframe(1)
+    while frame is not None and not (modelo and pantalla):
+        code = frame.f_code
+        nombre_archivo = code.co_filename
+        if not modelo and any(s in nombre_archivo for s in _SEP_MODELOS):
+            modelo = getattr(code, "co_qualname", code.co_name)
+        elif not pantalla and any(s in nombre_archivo for s in _SEP_UI):
+            pantalla = getattr(code, "co_qualname", code.co_name)
+        frame = frame.f_back
+    return modelo or "(fuera de modelos)", pantalla
+
+
+def _log_lento() -> logging.Logger:
+    global _logger
+    if _logger is None:
+        logger = logging.getLogger("control_negocio.sql_lento")
+        logger.propagate = False
+        if not logger.handlers:
+            LOG_PATH.parent.mkdir(parents=True, exist_ok=True)
+            handler = logging.FileHandler(LOG_PATH, encoding="utf-8")
+            handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+            logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+        _logger = logger
+    return _logger
+
+
+def _registrar(sql: str, ms: float, filas: int, origen: Tuple[str, str]) -> None:
+    clave = (origen[0], _normalizar_sql(sql))
+    with _lock:
+        st = _stats.get(clave)
+        if st is None:
+            st = _stats[clave] = _Stat(origen[0], origen[1], clave[1])
+        st.llamadas += 1
+        st.total_ms += ms
+        st.filas += filas
+        if ms > st.max_ms:
+            st.max_ms = ms
+        st.buckets[bisect_left(SQL_HISTOGRAMA_MS, ms)] += 1
+    if ms >= _estado["umbral_ms"]:
+        _log_lento().info(
+            "%.1f ms | filas=%d | %s | %s | %s", ms, filas, origen[0], origen[1] or "-", clave[1]
+        )
+
+
+def _sumar_filas(sql: str, origen: Tuple[str, str], filas: int, ms: float) -> None:
+    """Suma filas/tiempo de fetch a la sentencia ya registrada (sin contar otra llamada)."""
+    clave = (origen[0], _normalizar_sql(sql))
+    with _lock:
+        st = _stats.get(clave)
+        if st is not None:
+            st.filas += filas
+            st.total_ms += ms
+
+
+def _trace(_sql: str) -> None:
+    # Llamado por SQLite en cada sentencia (incluye BEGIN/COMMIT implícitos),
+    # en el hilo que la ejecuta
+    _estado["sentencias"] += 1
+    _por_hilo.sentencias = getattr(_por_hilo, "sentencias", 0) + 1
+
+
+# -------------------------------------------------
+# Cursor / Conexión instrumentados
+# -------------------------------------------------
+class CursorInstrumentado(sqlite3.Cursor):
+    _ultimo: Optional[Tuple[str, Tuple[str, str]]] = None
+
+    def execute(self, sql, parameters=()):
+        origen = _origen_llamada()
+        t0 = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            ms = (time.perf_counter() - t0) * 1000.0
+            _registrar(sql, ms, 0, origen)
+            self._ultimo = (sql, origen)
+
+    def executemany(self, sql, seq_of_parameters):
+        origen = _origen_llamada()
+        t0 = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            ms = (time.perf_counter() - t0) * 1000.0
+            _registrar(sql, ms, max(self.rowcount, 0), origen)
+            self._ultimo = (sql, origen)
+
+    def _medir_fetch(self, fn, *args):
+        t0 = time.perf_counter()
+        res = fn(*args)
+        if self._ultimo is not None:
+            if isinstance(res, list):
+                filas = len(res)
+            else:
+                filas = 0 if res is None else 1
+            _sumar_filas(self._ultimo[0], self._ultimo[1], filas, (time.perf_counter() - t0) * 1000.0)
+        return res
+
+    def fetchone(self):
+        return self._medir_fetch(super().fetchone)
+
+    def fetchmany(self, size=None):
+        if size is None:
+            return self._medir_fetch(super().fetchmany)
+        return self._medir_fetch(super().fetchmany, size)
+
+    def fetchall(self):
+        return self._medir_fetch(super().fetchall)
+
+
+class ConexionInstrumentada(sqlite3.Connection):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.set_trace_callback(_trace)
+
+    def cursor(self, factory=CursorInstrumentado):
+        return super().cursor(factory)
+
+    # Connection.execute/executemany en C no pasan por cursor(): los redirigimos
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def commit(self):
+        origen = _origen_llamada()
+        t0 = time.perf_counter()
+        try:
+            return super().commit()
+        finally:
+            _registrar("COMMIT", (time.perf_counter() - t0) * 1000.0, 0, origen)
+
+
+class ConexionContada(sqlite3.Connection):
+    """Solo cuenta sentencias: costo de una llamada Python por sentencia."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.set_trace_callback(_trace)
+
+
+# -------------------------------------------------
+# API pública
+# -------------------------------------------------
+def activa() -> bool:
+    return bool(_estado["activa"])
+
+
+def activar(umbral_ms: Optional[float] = None) -> None:
+    """Activa la instrumentación para las conexiones que se abran desde ahora."""
+    _estado["activa"] = True
+    if umbral_ms is not None:
+        _estado["umbral_ms"] = float(umbral_ms)
+
+
+def desactivar() -> None:
+    _estado["activa"] = False
+
+
+def activar_conteo() -> None:
+    """Cuenta sentencias (total_sentencias) en las conexiones que se abran desde ahora."""
+    _estado["contar"] = True
+
+
+def desactivar_conteo() -> None:
+    _estado["contar"] = False
+
+
+def umbral_ms() -> float:
+    return float(_estado["umbral_ms"])
+
+
+def fijar_umbral_ms(valor: float) -> None:
+    _estado["umbral_ms"] = float(valor)
+
+
+def fabrica_conexion() -> type:
+    """Clase a usar en sqlite3.connect(factory=...)."""
+    if _estado["activa"]:
+        return ConexionInstrumentada
+    return ConexionContada if _estado["contar"] else sqlite3.Connection
+
+
+def total_sentencias() -> int:
+    """Sentencias ejecutadas por SQLite desde el inicio (con instrumentación o conteo activos)."""
+    return int(_estado["sentencias"])
+
+
+def sentencias_del_hilo() -> int:
+    """
+    Sentencias ejecutadas desde el hilo actual. El perfilador mide con este contador:
+    el sondeo del bus, la cola de escritura, el respaldo y el mantenimiento corren en
+    sus propios hilos y no se cuentan en la acción de la pantalla.
+    """
+    return int(getattr(_por_hilo, "sentencias", 0))
+
+
+def reiniciar() -> None:
+    with _lock:
+        _stats.clear()
+    _estado["sentencias"] = 0
+
+
+def resumen() -> List[Dict[str, Any]]:
+    """
+    Estadísticas por (método de modelo, sentencia), ordenadas por tiempo total.
+    Cada dict: origen, pantalla, sql, llamadas, total_ms, prom_ms, p50_ms, p95_ms,
+    max_ms, filas, histograma [(limite_ms | None, n)].
+    """
+    with _lock:
+        stats = list(_stats.values())
+        filas: List[Dict[str, Any]] = []
+        for st in stats:
+            limites = list(SQL_HISTOGRAMA_MS) + [None]
+            filas.append({
+                "origen": st.origen,
+                "pantalla": st.pantalla,
+                "sql": st.sql,
+                "llamadas": st.llamadas,
+                "total_ms": st.total_ms,
+                "prom_ms": st.total_ms / st.llamadas if st.llamadas else 0.0,
+                "p50_ms": st.percentil(0.50),
+                "p95_ms": st.percentil(0.95),
+                "max_ms": st.max_ms,
+                "filas": st.filas,
+                "histograma": list(zip(limites, st.buckets)),
+            })
+    filas.sort(key=lambda d: d["total_ms"], reverse=True)
+    return filas
@@ -0,0 +1,116 @@
+# control_negocio/app/models/analitica_ventas.py
+from __future__ import annotations
+
+from datetime import date
+from typing import Any, List, Optional, Tuple
+
+try:
+    import numpy as np
+except Exception:
+    np = None
+
+from app.db.database import get_connection
+
+# Campos de cada fila de margen_por_producto (mismo orden en el record array y en las tuplas)
+CAMPOS_MARGEN: Tuple[str, ...] = (
+    "producto", "categoria", "unidades", "ingreso", "costo_unitario", "costo", "margen", "margen_pct",
+)
+
+# Ingreso neto de una venta: 'neto' del esquema extendido; filas legacy (neto 0/NULL) usan cantidad × precio
+_INGRESO_VENTA = "COALESCE(NULLIF(neto, 0), cantidad * precio_unitario)"
+
+# Ventas del período (idx_ov_fecha_producto, cubriente)
+_SQL_VENTAS_PERIODO = f"""
+            SELECT producto, SUM(cantidad) AS unidades, SUM({_INGRESO_VENTA}) AS ingreso,
+                   NULL AS costo_ultimo
+            FROM ordenes_venta
+            WHERE fecha BETWEEN ? AND ?
+            GROUP BY producto
+"""
+
+# Precio de la última compra hasta el cierre (ROW_NUMBER)
+# (idx_compras_producto_id entrega las filas ya ordenadas por producto, id DESC)
+_SQL_COSTOS_HASTA = """
+            SELECT producto, NULL, NULL,
+                   MAX(CASE WHEN rn = 1 THEN precio_unitario END)
+            FROM (
+                SELECT producto, cantidad, precio_unitario,
+                       ROW_NUMBER() OVER (PARTITION BY producto ORDER BY id DESC) AS rn
+                FROM compras
+                WHERE fecha <= ?
+            )
+            GROUP BY producto
+"""
+
+_SQL_MARGEN = f"""
+    SELECT m.producto, p.categoria, m.unidades, m.ingreso,
+           m.costo_ultimo, p.costo_promedio, p.precio_compra
+    FROM (
+        SELECT producto, SUM(unidades) AS unidades, SUM(ingreso) AS ingreso,
+               MAX(costo_ultimo) AS costo_ultimo
+        FROM (
+            {_SQL_VENTAS_PERIODO}
+            UNION ALL
+            {_SQL_COSTOS_HASTA}
+        )
+        GROUP BY producto
+        HAVING SUM(unidades) IS NOT NULL
+    ) m
+    LEFT JOIN productos p
+        ON p.id = (SELECT id FROM productos WHERE nombre = m.producto ORDER BY id LIMIT 1)
+    ORDER BY m.producto
+"""
+
+
+class AnaliticaVentas:
+    """
+    Reportes de ventas por lote (todo el catálogo en una consulta, sin una consulta por producto).
+    """
+
+    @staticmethod
+    def margen_por_producto(
+        desde: Optional[str] = None,
+        hasta: Optional[str] = None,
+        costo: str = "ultimo",  # "ultimo" | "promedio"
+    ):
+        """
+        Ingreso, unidades, costo y margen por producto vendido en [desde, hasta] (YYYY-MM-DD).
+        - costo="ultimo": precio de la última compra hasta 'hasta'.
+        - costo="promedio": costo promedio ponderado vigente (productos.costo_promedio, el
+          mismo de CostoPromedio y la valorización; es el actual, no el de la fecha 'hasta').
+        Sin compras registradas (o sin CPP) se usa productos.precio_compra.
+        Devuelve un record array de NumPy (campos CAMPOS_MARGEN) o, sin NumPy, lista de tuplas.
+        """
+        if costo not in ("ultimo", "promedio"):
+            raise ValueError("costo debe ser 'ultimo' o 'promedio'.")
+        desde = desde or "0000-01-01"
+        hasta = hasta or date.today().isoformat()
+        # fecha puede traer hora: el límite superior incluye todo el día
+        hasta_incl = hasta + "\uffff"
+
+        conn = get_connection()
+        try:
+            filas = conn.execute(_SQL_MARGEN, (desde, hasta_incl, hasta_incl)).fetchall()
+        finally:
+            conn.close()
+
+        salida: List[Tuple[Any, ...]] = []
+        for producto, categoria, unidades, ingreso, c_ultimo, c_prom, precio_compra in filas:
+            unitario = c_ultimo if costo == "ultimo" else c_prom
+            if unitario is None:
+                unitario = precio_compra or 0.0
+            unidades = int(unidades or 0)
+            ingreso = float(ingreso or 0.0)
+            costo_total = round(unidades * float(unitario), 2)
+            margen = round(ingreso - costo_total, 2)
+            pct = round(margen / ingreso * 100.0, 2) if ingreso else 0.0
+            salida.append((producto, categoria or "", unidades, round(ingreso, 2),
+                           round(float(unitario), 2), costo_total, margen, pct))
+
+        if np is None:
+            return salida
+        dtype = [
+            ("producto", object), ("categoria", object), ("unidades", np.int64), ("ingreso", np.float64),
+            ("costo_unitario", np.float64), ("costo", np.float64), ("margen", np.float64), ("margen_pct", np.float64),
+        ]
+        return np.rec.fromrecords(salida, dtype=dtype) if salida else np.recarray(0, dtype=dtype)
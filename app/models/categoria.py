@@ -5,6 +5,7 @@ import sqlite3
 from typing import List, Optional, Tuple
 
 from app.db.database import get_connection
+from app.services import cache_referencias
 
 
 def _norm(nombre: str) -> str:
@@ -33,6 +34,9 @@ class Categoria:
     # ---------------------------
     # Lecturas
     # ---------------------------
+    _SQL_POR_NOMBRE = "SELECT id, nombre FROM categorias WHERE nombre = ?"
+    _SQL_CONTAR_USO = "SELECT COUNT(*) FROM productos WHERE categoria = ?"
+
     @staticmethod
     def listar() -> List[Tuple[int, str]]:
         """
@@ -65,7 +69,7 @@ class Categoria:
         nombre_n = _norm(nombre)
         conn = get_connection()
         cur = conn.cursor()
-        cur.execute("SELECT id, nombre FROM categorias WHERE nombre = ?", (nombre_n,))
+        cur.execute(Categoria._SQL_POR_NOMBRE, (nombre_n,))
         row = cur.fetchone()
         conn.close()
         return row
@@ -85,7 +89,7 @@ class Categoria:
         nombre_n = _norm(nombre)
         conn = get_connection()
         cur = conn.cursor()
-        cur.execute("SELECT COUNT(*) FROM productos WHERE categoria = ?", (nombre_n,))
+        cur.execute(Categoria._SQL_CONTAR_USO, (nombre_n,))
         (count,) = cur.fetchone()
         conn.close()
         return int(count)
@@ -116,6 +120,7 @@ class Categoria:
             cur.execute("INSERT INTO categorias (nombre) VALUES (?)", (nombre_n,))
             new_id = cur.lastrowid
             conn.commit()
+            cache_referencias.invalidar("categorias")
             return int(new_id)
         except sqlite3.IntegrityError as e:
             # Si otra transacción la creó en paralelo (UNIQUE), recuperar su ID
@@ -171,6 +176,7 @@ class Categoria:
             )
 
             conn.commit()
+            cache_referencias.invalidar("categorias")
         except Exception:
             conn.rollback()
             raise
@@ -201,7 +207,7 @@ class Categoria:
             cur.execute("BEGIN")
 
             # ¿Hay productos que la referencian?
-            cur.execute("SELECT COUNT(*) FROM productos WHERE categoria = ?", (nombre_actual,))
+            cur.execute(Categoria._SQL_CONTAR_USO, (nombre_actual,))
             (count,) = cur.fetchone()
             count = int(count)
 
@@ -222,6 +228,7 @@ class Categoria:
             # Borra categoría
             cur.execute("DELETE FROM categorias WHERE id = ?", (id_categoria,))
             conn.commit()
+            cache_referencias.invalidar("categorias")
         except Exception:
             conn.rollback()
             raise
@@ -3,9 +3,13 @@ from __future__ import annotations
 
 import re
 import sqlite3
-from typing import List, Optional, Tuple
+from typing import Iterator, List, Optional, Tuple
 
-from app.db.database import get_connection
+from app.db import filas
+from app.db.database import get_connection, iterar_cursor, rango_prefijo
+from app.db.filas import ClienteFila
+from app.services import cache_referencias
+from app.utils.validators import normalizar_rut, validar_rut
 
 
 # =========================
@@ -41,36 +45,14 @@ def _normalize_rut(rut: Optional[str]) -> str:
     Normaliza RUT a formato compacto: '12345678K' (sin puntos ni guion).
     DV puede ser 'K' mayúscula.
     """
-    if not rut:
-        return ""
-    rut = rut.strip().upper()
-    # eliminar puntos y guiones
-    rut = re.sub(r"[\.\-]", "", rut)
-    return rut
+    return normalizar_rut(rut) if rut else ""
 
 
 def _validate_rut(rut: str) -> bool:
     """
-    Valida RUT chileno (módulo 11).
-    Acepta DV '0-9' o 'K'. Asume rut ya normalizado sin puntos ni guion.
+    Valida RUT chileno (módulo 11) con el validador común de app/utils/validators.py.
     """
-    if not rut or len(rut) < 2:
-        return False
-    cuerpo, dv = rut[:-1], rut[-1]
-    if not cuerpo.isdigit():
-        return False
-
-    # Cálculo módulo 11
-    factores = [2, 3, 4, 5, 6, 7]
-    suma = 0
-    factor_idx = 0
-    for d in reversed(cuerpo):
-        suma += int(d) * factores[factor_idx]
-        factor_idx = (factor_idx + 1) % len(factores)
-    resto = suma % 11
-    calc = 11 - resto
-    dv_calc = "0" if calc == 11 else "K" if calc == 10 else str(calc)
-    return dv == dv_calc
+    return bool(rut) and validar_rut(rut)
 
 
 class Cliente:
@@ -88,28 +70,37 @@ class Cliente:
     # ---------------
     # Consultas
     # ---------------
+    _SQL_LISTAR = """
+        SELECT id, nombre, rut, direccion, telefono
+        FROM clientes
+        ORDER BY nombre ASC
+    """
+
     @staticmethod
     def listar_todos() -> List[Tuple[int, str, str, str, str]]:
         """
         Devuelve todos los clientes, ordenados por nombre.
         """
         conn = get_connection()
-        cur = conn.cursor()
-        cur.execute(
-            """
-            SELECT id, nombre, rut, direccion, telefono
-            FROM clientes
-            ORDER BY nombre ASC
-            """
-        )
+        cur = filas.cursor(conn, ClienteFila)
+        cur.execute(Cliente._SQL_LISTAR)
         rows = cur.fetchall()
         conn.close()
         return rows
 
+    @staticmethod
+    def iterar_todos(lote: Optional[int] = None) -> Iterator[ClienteFila]:
+        """Como listar_todos, en bloques de fetchmany."""
+        conn = get_connection()
+        try:
+            yield from iterar_cursor(filas.cursor(conn, ClienteFila).execute(Cliente._SQL_LISTAR), lote=lote)
+        finally:
+            conn.close()
+
     @staticmethod
     def obtener_por_id(id_cliente: int) -> Optional[Tuple[int, str, str, str, str]]:
         conn = get_connection()
-        cur = conn.cursor()
+        cur = filas.cursor(conn, ClienteFila)
         cur.execute(
             "SELECT id, nombre, rut, direccion, telefono FROM clientes WHERE id = ?",
             (id_cliente,),
@@ -118,15 +109,18 @@ class Cliente:
         conn.close()
         return row
 
+    _SQL_POR_RUT = """
+        SELECT id, nombre, rut, direccion, telefono
+        FROM clientes
+        WHERE UPPER(REPLACE(REPLACE(rut,'.',''),'-','')) = ?
+    """
+
     @staticmethod
     def obtener_por_rut(rut: str) -> Optional[Tuple[int, str, str, str, str]]:
         rut_n = _normalize_rut(rut)
         conn = get_connection()
-        cur = conn.cursor()
-        cur.execute(
-            "SELECT id, nombre, rut, direccion, telefono FROM clientes WHERE UPPER(REPLACE(REPLACE(rut,'.',''),'-','')) = ?",
-            (rut_n,),
-        )
+        cur = filas.cursor(conn, ClienteFila)
+        cur.execute(Cliente._SQL_POR_RUT, (rut_n,))
         row = cur.fetchone()
         conn.close()
         return row
@@ -172,6 +166,7 @@ class Cliente:
                 (nombre_n, rut_n, direccion_n, telefono_n),
             )
             conn.commit()
+            cache_referencias.invalidar("clientes")
             return int(cur.lastrowid)
         finally:
             conn.close()
@@ -220,12 +215,15 @@ class Cliente:
                 (nombre_n, rut_n, direccion_n, telefono_n, id_cliente),
             )
             conn.commit()
+            cache_referencias.invalidar("clientes")
         finally:
             conn.close()
 
     # ---------------
     # Borrado
     # ---------------
+    _SQL_VENTAS_POR_NOMBRE = "SELECT COUNT(*) FROM ordenes_venta WHERE cliente = ?"
+
     @staticmethod
     def _ventas_asociadas(cur: sqlite3.Cursor, id_cliente: int) -> int:
         """
@@ -237,7 +235,7 @@ class Cliente:
         if not row:
             return 0
         nombre = row[0]
-        cur.execute("SELECT COUNT(*) FROM ordenes_venta WHERE cliente = ?", (nombre,))
+        cur.execute(Cliente._SQL_VENTAS_POR_NOMBRE, (nombre,))
         (count,) = cur.fetchone()
         return int(count)
 
@@ -271,6 +269,7 @@ class Cliente:
             # Eliminar
             cur.execute("DELETE FROM clientes WHERE id = ?", (id_cliente,))
             conn.commit()
+            cache_referencias.invalidar("clientes")
         except Exception:
             conn.rollback()
             raise
@@ -287,7 +286,7 @@ class Cliente:
         """
         patron = f"%{_clean_str(nombre)}%"
         conn = get_connection()
-        cur = conn.cursor()
+        cur = filas.cursor(conn, ClienteFila)
         cur.execute(
             """
             SELECT id, nombre, rut, direccion, telefono
@@ -300,3 +299,49 @@ class Cliente:
         rows = cur.fetchall()
         conn.close()
         return rows
+
+    @staticmethod
+    def consulta_busqueda(texto: str, limite: int) -> Tuple[str, Tuple]:
+        """
+        SQL + parámetros de buscar_por_nombre con LIMIT, para la búsqueda en vivo
+        (app/ui/busqueda_viva.py). Texto vacío = listado completo (limitado).
+        """
+        texto = _clean_str(texto)
+        if not texto:
+            return (
+                "SELECT id, nombre, rut, direccion, telefono FROM clientes ORDER BY nombre ASC LIMIT ?",
+                (int(limite),),
+            )
+        return (
+            """
+            SELECT id, nombre, rut, direccion, telefono
+            FROM clientes
+            WHERE UPPER(nombre) LIKE UPPER(?)
+            ORDER BY nombre ASC
+            LIMIT ?
+            """,
+            (f"%{texto}%", int(limite)),
+        )
+
+    _SQL_PREFIJO = """
+        SELECT id, nombre
+        FROM clientes
+        WHERE nombre COLLATE NOCASE >= ? AND nombre COLLATE NOCASE < ?
+        ORDER BY nombre COLLATE NOCASE
+        LIMIT ?
+    """
+
+    @staticmethod
+    def buscar_prefijo(prefijo: str, limite: int = 30) -> List[Tuple[int, str]]:
+        """
+        Autocompletar: clientes cuyo nombre empieza con `prefijo` (sin distinguir
+        mayúsculas), a lo más `limite`. Usa idx_clientes_nombre_nocase (rango, no LIKE).
+        """
+        desde, hasta = rango_prefijo(_clean_str(prefijo))
+        conn = get_connection()
+        try:
+            cur = conn.cursor()
+            cur.execute(Cliente._SQL_PREFIJO, (desde, hasta, int(limite)))
+            return cur.fetchall()
+        finally:
+            conn.close()
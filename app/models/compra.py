@@ -3,9 +3,13 @@ from __future__ import annotations
 
 from datetime import date, timedelta
 from decimal import Decimal, ROUND_HALF_UP
-from typing import Optional, Any, Dict
+from typing import Optional, Any, Dict, Iterator, List
 
-from app.db.database import get_connection
+from app.db import filas
+from app.db.database import get_connection, iterar_cursor, tiene_columnas
+from app.db.filas import CompraFila
+from app.models.costo_promedio import CostoPromedio
+from app.models.lote_inventario import LoteInventario
 from app.config.constantes import (
     IVA_RATE,
     RETENCION_HONORARIOS,
@@ -126,14 +130,26 @@ class Compra:
             conn = get_connection()
             close = True
         try:
-            cur = conn.execute("PRAGMA table_info(compras)")
-            cols = {r[1] for r in cur.fetchall()}
-            needed = {"doc_tipo", "neto", "retencion", "total"}  # tolera faltas de 'iva'/'vencimiento'
-            return needed.issubset(cols)
+            # tolera faltas de 'iva'/'vencimiento'
+            return tiene_columnas(conn, "compras", ("doc_tipo", "neto", "retencion", "total"))
         finally:
             if close:
                 conn.close()
 
+    # Forma fija (CompraFila): sin esquema extendido las columnas nuevas llegan NULL
+    _COLS = (
+        "id, proveedor, producto, cantidad, precio_unitario,"
+        " doc_tipo, neto, iva, retencion, total, fecha, vencimiento"
+    )
+    _COLS_LEGACY = (
+        "id, proveedor, producto, cantidad, precio_unitario,"
+        " NULL, NULL, iva, NULL, total, fecha, NULL"
+    )
+
+    @staticmethod
+    def _columnas(conn) -> str:
+        return Compra._COLS if Compra._extended_schema_enabled(conn) else Compra._COLS_LEGACY
+
     @staticmethod
     def _to_rate(iva_value: float) -> float:
         """Convierte 19 → 0.19; si ya es tasa (≤1), la devuelve igual."""
@@ -145,6 +161,14 @@ class Compra:
         if not cur.fetchone():
             raise ValueError(f"Producto '{nombre}' no existe.")
 
+    @staticmethod
+    def _validar_disponible(cur, nombre: str) -> None:
+        """Tras editar una compra, el stock del producto anterior no puede quedar bajo lo reservado."""
+        cur.execute("SELECT stock - reservado FROM productos WHERE nombre = ?", (nombre,))
+        row = cur.fetchone()
+        if row and int(row[0] or 0) < 0:
+            raise ValueError(f"Stock insuficiente para revertir la compra de '{nombre}' (hay unidades reservadas).")
+
     # ---------------------------
     # Altas (API recomendada)
     # ---------------------------
@@ -226,13 +250,11 @@ class Compra:
                     ),
                 )
 
-            # Ajustar stock
-            cur.execute(
-                "UPDATE productos SET stock = stock + ? WHERE nombre = ?",
-                (int(cantidad), producto),
-            )
-
             new_id = cur.lastrowid
+
+            # Ajustar stock y costo promedio
+            CostoPromedio.entrada(cur, producto, cantidad, float(_round(precio_unitario_neto)))
+
             conn.commit()
             return int(new_id)
         except Exception:
@@ -245,11 +267,12 @@ class Compra:
     # Altas (compatibilidad legacy)
     # ---------------------------
     @staticmethod
-    def registrar(proveedor, producto, cantidad, precio_unitario, iva=0.19) -> None:
+    def registrar(proveedor, producto, cantidad, precio_unitario, iva=0.19) -> int:
         """
         Método legacy (compatibilidad). Mantiene la firma original.
         - 'iva' puede venir como 0.19 o 19 → se normaliza a tasa.
         - Calcula total y guarda extendido si está disponible (doc_tipo NULL, retención 0).
+        - Devuelve el id de la compra.
         """
         iva_rate = Compra._to_rate(float(iva))
         neto = _round(_D(precio_unitario) * int(cantidad))
@@ -305,13 +328,13 @@ class Compra:
                     ),
                 )
 
-            # Stock
-            cur.execute(
-                "UPDATE productos SET stock = stock + ? WHERE nombre = ?",
-                (int(cantidad), producto),
-            )
+            nuevo_id = int(cur.lastrowid)
+
+            # Stock y costo promedio
+            CostoPromedio.entrada(cur, producto, cantidad, float(_round(precio_unitario)))
 
             conn.commit()
+            return nuevo_id
         except Exception:
             conn.rollback()
             raise
@@ -322,93 +345,43 @@ class Compra:
     # Lecturas
     # ---------------------------
     @staticmethod
-    def obtener_por_id(id_compra: int):
+    def obtener_por_id(id_compra: int) -> Optional[CompraFila]:
         conn = get_connection()
-        cur = conn.cursor()
-
-        if Compra._extended_schema_enabled(conn):
-            cur.execute(
-                """
-                SELECT id, proveedor, producto, cantidad, precio_unitario,
-                       doc_tipo, neto, iva, retencion, total, fecha, vencimiento
-                FROM compras
-                WHERE id = ?
-                """,
-                (id_compra,),
-            )
-        else:
-            cur.execute(
-                """
-                SELECT id, proveedor, producto, cantidad,
-                       precio_unitario, iva, total, fecha
-                FROM compras
-                WHERE id = ?
-                """,
-                (id_compra,),
-            )
-
+        cur = filas.cursor(conn, CompraFila)
+        cur.execute(f"SELECT {Compra._columnas(conn)} FROM compras WHERE id = ?", (id_compra,))
         compra = cur.fetchone()
         conn.close()
         return compra
 
+    # {cols} = Compra._columnas(conn)
+    _SQL_LISTAR = "SELECT {cols} FROM compras ORDER BY id DESC"
+    _SQL_ULTIMA = "SELECT {cols} FROM compras WHERE producto = ? ORDER BY id DESC LIMIT 1"
+
     @staticmethod
-    def listar_todas():
+    def listar_todas() -> List[CompraFila]:
         conn = get_connection()
-        cur = conn.cursor()
-
-        if Compra._extended_schema_enabled(conn):
-            cur.execute(
-                """
-                SELECT id, proveedor, producto, cantidad, precio_unitario,
-                       doc_tipo, neto, iva, retencion, total, fecha, vencimiento
-                FROM compras
-                ORDER BY id DESC
-                """
-            )
-        else:
-            cur.execute(
-                """
-                SELECT id, proveedor, producto, cantidad,
-                       precio_unitario, iva, total, fecha
-                FROM compras
-                ORDER BY id DESC
-                """
-            )
-
+        cur = filas.cursor(conn, CompraFila)
+        cur.execute(Compra._SQL_LISTAR.format(cols=Compra._columnas(conn)))
         resultados = cur.fetchall()
         conn.close()
         return resultados
 
     @staticmethod
-    def ultima_compra_producto(nombre_producto: str):
+    def iterar_todas(lote: Optional[int] = None) -> Iterator[CompraFila]:
+        """Como listar_todas, en bloques de fetchmany sin cargar la tabla completa."""
         conn = get_connection()
-        cur = conn.cursor()
-
-        if Compra._extended_schema_enabled(conn):
-            cur.execute(
-                """
-                SELECT id, proveedor, producto, cantidad, precio_unitario,
-                       doc_tipo, neto, iva, retencion, total, fecha, vencimiento
-                FROM compras
-                WHERE producto = ?
-                ORDER BY id DESC
-                LIMIT 1
-                """,
-                (nombre_producto,),
-            )
-        else:
-            cur.execute(
-                """
-                SELECT id, proveedor, producto, cantidad,
-                       precio_unitario, iva, total, fecha
-                FROM compras
-                WHERE producto = ?
-                ORDER BY id DESC
-                LIMIT 1
-                """,
-                (nombre_producto,),
-            )
+        try:
+            cur = filas.cursor(conn, CompraFila)
+            cur.execute(Compra._SQL_LISTAR.format(cols=Compra._columnas(conn)))
+            yield from iterar_cursor(cur, lote=lote)
+        finally:
+            conn.close()
 
+    @staticmethod
+    def ultima_compra_producto(nombre_producto: str) -> Optional[CompraFila]:
+        conn = get_connection()
+        cur = filas.cursor(conn, CompraFila)
+        cur.execute(Compra._SQL_ULTIMA.format(cols=Compra._columnas(conn)), (nombre_producto,))
         resultado = cur.fetchone()
         conn.close()
         return resultado
@@ -447,15 +420,14 @@ class Compra:
             cur = conn.cursor()
             cur.execute("BEGIN")
 
-            # revertir stock anterior
-            cur.execute("SELECT cantidad, producto FROM compras WHERE id = ?", (id_compra,))
+            # revertir stock y costo anteriores
+            cur.execute("SELECT cantidad, producto, precio_unitario FROM compras WHERE id = ?", (id_compra,))
             row = cur.fetchone()
             if not row:
                 raise ValueError(f"Compra id={id_compra} no existe.")
-            antigua_cant, antiguo_prod = row
-            cur.execute(
-                "UPDATE productos SET stock = stock - ? WHERE nombre = ?",
-                (int(antigua_cant), antiguo_prod),
+            antigua_cant, antiguo_prod, antiguo_precio = row
+            CostoPromedio.reversar_entrada(
+                cur, antiguo_prod, int(antigua_cant), float(antiguo_precio or 0), validar=False
             )
 
             # validar producto actual
@@ -509,11 +481,10 @@ class Compra:
                     ),
                 )
 
-            # aplicar nuevo stock
-            cur.execute(
-                "UPDATE productos SET stock = stock + ? WHERE nombre = ?",
-                (int(cantidad), producto),
-            )
+            # aplicar nuevo stock y costo; si el stock del producto anterior bajó, también sus lotes
+            CostoPromedio.entrada(cur, producto, cantidad, float(_round(precio_unitario_neto)))
+            Compra._validar_disponible(cur, antiguo_prod)
+            LoteInventario.recortar(cur, "nombre", antiguo_prod)
 
             conn.commit()
         except Exception:
@@ -539,15 +510,14 @@ class Compra:
             cur = conn.cursor()
             cur.execute("BEGIN")
 
-            # revertir stock viejo
-            cur.execute("SELECT cantidad, producto FROM compras WHERE id = ?", (id_compra,))
+            # revertir stock y costo anteriores
+            cur.execute("SELECT cantidad, producto, precio_unitario FROM compras WHERE id = ?", (id_compra,))
             viejo = cur.fetchone()
             if not viejo:
                 raise ValueError(f"Compra id={id_compra} no existe.")
-            antigua_cant, antiguo_prod = viejo
-            cur.execute(
-                "UPDATE productos SET stock = stock - ? WHERE nombre = ?",
-                (int(antigua_cant), antiguo_prod),
+            antigua_cant, antiguo_prod, antiguo_precio = viejo
+            CostoPromedio.reversar_entrada(
+                cur, antiguo_prod, int(antigua_cant), float(antiguo_precio or 0), validar=False
             )
 
             # validar producto actual
@@ -597,11 +567,10 @@ class Compra:
                     ),
                 )
 
-            # aplicar nuevo stock
-            cur.execute(
-                "UPDATE productos SET stock = stock + ? WHERE nombre = ?",
-                (int(cantidad), producto),
-            )
+            # aplicar nuevo stock y costo; si el stock del producto anterior bajó, también sus lotes
+            CostoPromedio.entrada(cur, producto, cantidad, float(_round(precio_unitario)))
+            Compra._validar_disponible(cur, antiguo_prod)
+            LoteInventario.recortar(cur, "nombre", antiguo_prod)
 
             conn.commit()
         except Exception:
@@ -620,16 +589,14 @@ class Compra:
             cur = conn.cursor()
             cur.execute("BEGIN")
 
-            # Devolver stock
-            cur.execute("SELECT cantidad, producto FROM compras WHERE id = ?", (id_compra,))
+            # Devolver stock y quitar su aporte al costo promedio
+            cur.execute("SELECT cantidad, producto, precio_unitario FROM compras WHERE id = ?", (id_compra,))
             row = cur.fetchone()
             if row:
-                cant, prod = row
+                cant, prod, precio = row
                 cur.execute("DELETE FROM compras WHERE id = ?", (id_compra,))
-                cur.execute(
-                    "UPDATE productos SET stock = stock - ? WHERE nombre = ?",
-                    (int(cant), prod),
-                )
+                CostoPromedio.reversar_entrada(cur, prod, int(cant), float(precio or 0))
+                LoteInventario.recortar(cur, "nombre", prod)
 
             conn.commit()
         except Exception:
@@ -0,0 +1,183 @@
+# control_negocio/app/models/costo_promedio.py
+from __future__ import annotations
+
+import argparse
+import sqlite3
+import sys
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.db.database import get_connection, iterar_cursor
+
+# Costo vigente de un producto: el promedio mantenido o, si aún no tiene, el precio_compra manual
+_COSTO = "COALESCE(costo_promedio, precio_compra, 0)"
+
+
+class CostoPromedio:
+    """
+    Costo promedio ponderado (CPP) por producto, mantenido en productos.costo_promedio.
+
+    - Cada compra recalcula: (stock × costo + cantidad × precio) / (stock + cantidad).
+      Si no había stock, el costo pasa a ser el precio de la compra.
+    - Editar/eliminar una compra revierte su aporte con la fórmula inversa (si las
+      unidades ya se vendieron y la reversa no tiene sentido, el costo se mantiene).
+    - Ventas, ingresos de inventario y ajustes mueven stock al costo vigente: no lo cambian.
+    - La valorización lee una fila por producto; no recorre el historial de compras.
+    - recalcular() reconstruye el CPP desde compras y ventas (validación/reparación).
+    Los métodos que reciben `cur` trabajan dentro de la transacción del llamador.
+    """
+
+    # ---------------------------
+    # Movimientos (dentro de la transacción del llamador)
+    # ---------------------------
+    _SQL_ENTRADA = f"""
+        UPDATE productos SET
+            costo_promedio = CASE
+                WHEN stock > 0 AND stock + ? > 0 THEN (stock * {_COSTO} + ? * ?) / (stock + ?)
+                ELSE ?
+            END,
+            stock = stock + ?
+        WHERE nombre = ?
+    """
+    _SQL_REVERSA = f"""
+        UPDATE productos SET
+            costo_promedio = CASE
+                WHEN stock - ? > 0 AND stock * {_COSTO} - ? * ? >= 0
+                    THEN (stock * {_COSTO} - ? * ?) / (stock - ?)
+                ELSE {_COSTO}
+            END,
+            stock = stock - ?
+        WHERE nombre = ? AND (? = 0 OR stock - reservado >= ?)
+    """
+
+    @staticmethod
+    def entrada(cur: sqlite3.Cursor, producto: str, cantidad: int, costo_unitario: float) -> None:
+        """Suma `cantidad` al stock y recalcula el CPP con el costo de esta compra."""
+        q, c = int(cantidad), float(costo_unitario)
+        cur.execute(CostoPromedio._SQL_ENTRADA, (q, q, c, q, c, q, producto))
+
+    @staticmethod
+    def reversar_entrada(
+        cur: sqlite3.Cursor, producto: str, cantidad: int, costo_unitario: float, validar: bool = True
+    ) -> None:
+        """
+        Deshace una entrada (edición o borrado de la compra): resta stock y quita su aporte al CPP.
+        Como toda baja, no toca lo reservado: si el disponible no alcanza, ValueError.
+        validar=False deja el control al llamador (una edición valida después de volver a sumar).
+        """
+        q, c = int(cantidad), float(costo_unitario)
+        cur.execute(CostoPromedio._SQL_REVERSA, (q, q, c, q, c, q, q, producto, int(validar), q))
+        if cur.rowcount == 0 and validar:
+            cur.execute("SELECT stock - reservado FROM productos WHERE nombre = ?", (producto,))
+            row = cur.fetchone()
+            if row:
+                raise ValueError(f"Stock insuficiente ({int(row[0] or 0)}) para revertir la compra de '{producto}'.")
+
+    # ---------------------------
+    # Valorización
+    # ---------------------------
+    _SQL_VALORIZACION = f"""
+        SELECT id, nombre, categoria, stock, ROUND({_COSTO}, 2), ROUND(stock * {_COSTO}, 2)
+        FROM productos
+        WHERE stock > 0
+        ORDER BY nombre ASC
+    """
+
+    @staticmethod
+    def valorizacion() -> List[Tuple[Any, ...]]:
+        """(id, nombre, categoria, stock, costo_promedio, valor) por producto con stock."""
+        conn = get_connection()
+        try:
+            cur = conn.cursor()
+            cur.execute(CostoPromedio._SQL_VALORIZACION)
+            return cur.fetchall()
+        finally:
+            conn.close()
+
+    @staticmethod
+    def valor_total() -> float:
+        conn = get_connection()
+        try:
+            cur = conn.cursor()
+            cur.execute(f"SELECT COALESCE(SUM(stock * {_COSTO}), 0) FROM productos WHERE stock > 0")
+            return round(float(cur.fetchone()[0] or 0), 2)
+        finally:
+            conn.close()
+
+    # ---------------------------
+    # Recomputo completo (validación)
+    # ---------------------------
+    @staticmethod
+    def _reconstruir(cur: sqlite3.Cursor) -> Dict[str, float]:
+        """Repite compras (+) y ventas (−) en orden cronológico. {producto: cpp}."""
+        cur.execute(
+            """
+            SELECT producto, fecha, 0 AS orden, id, cantidad, precio_unitario FROM compras
+            UNION ALL
+            SELECT producto, fecha, 1 AS orden, id, cantidad, NULL FROM ordenes_venta
+            ORDER BY 1, 2, 3, 4
+            """
+        )
+        costos: Dict[str, float] = {}
+        stock: Dict[str, int] = {}
+        for producto, _fecha, orden, _id, cantidad, precio in cur:
+            q = int(cantidad or 0)
+            s = stock.get(producto, 0)
+            if orden == 0:
+                a = costos.get(producto, 0.0)
+                p = float(precio or 0)
+                costos[producto] = (s * a + q * p) / (s + q) if s > 0 and s + q > 0 else p
+                stock[producto] = s + q
+            else:
+                stock[producto] = s - q
+        return costos
+
+    @staticmethod
+    def recalcular(aplicar: bool = False, tolerancia: float = 0.01) -> List[Tuple[int, str, float, float]]:
+        """
+        Recalcula el CPP desde el historial y devuelve las diferencias
+        [(id, nombre, almacenado, recalculado)]. Con aplicar=True guarda los recalculados.
+        Productos sin compras conservan su costo. Stock ingresado fuera de compras
+        (ingresos de inventario, ajustes) no está en el historial: puede explicar diferencias.
+        """
+        conn = get_connection("lote")
+        try:
+            cur = conn.cursor()
+            cur.execute("BEGIN")
+            costos = CostoPromedio._reconstruir(cur)
+            cur.execute(f"SELECT id, nombre, {_COSTO} FROM productos")
+            diferencias = [
+                (int(pid), nombre, round(float(actual), 2), round(costos[nombre], 2))
+                for pid, nombre, actual in iterar_cursor(cur)  # solo se retienen las diferencias
+                if nombre in costos and abs(float(actual) - costos[nombre]) > tolerancia
+            ]
+            if aplicar and diferencias:
+                cur.executemany(
+                    "UPDATE productos SET costo_promedio = ? WHERE id = ?",
+                    [(costos[nombre], pid) for pid, nombre, _, _ in diferencias],
+                )
+            conn.commit()
+            return diferencias
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Valida (y opcionalmente repara) el costo promedio ponderado.")
+    ap.add_argument("--aplicar", action="store_true", help="guarda los valores recalculados")
+    args = ap.parse_args(argv)
+
+    diferencias = CostoPromedio.recalcular(aplicar=args.aplicar)
+    for pid, nombre, actual, recalculado in diferencias:
+        print(f"   • [{pid}] {nombre}: {actual} → {recalculado}")
+    if not diferencias:
+        print("✅ CPP consistente con el historial de compras.")
+        return 0
+    print(f"{'🛠 Corregidos' if args.aplicar else '⚠️  Difieren'}: {len(diferencias)} producto(s).")
+    return 0 if args.aplicar else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
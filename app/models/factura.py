@@ -3,9 +3,11 @@ from __future__ import annotations
 
 from datetime import date, timedelta
 from decimal import Decimal, ROUND_HALF_UP
-from typing import Optional, Sequence, Any, Dict
+from typing import Optional, Sequence, Any, Dict, Iterable, Iterator, List, Tuple
 
-from app.db.database import get_connection
+from app.db import filas
+from app.db.database import get_connection, iterar_cursor, tiene_columnas
+from app.db.filas import FacturaFila
 from app.config.constantes import (
     IVA_RATE,
     RETENCION_HONORARIOS,
@@ -33,6 +35,11 @@ def _round(x: Any) -> Decimal:
     return _D(x).quantize(Q, rounding=ROUND_HALF_UP)
 
 
+def _norm_clave(x: Optional[str]) -> str:
+    """tipo/estado se guardan y se filtran en minúsculas y sin espacios ('Pendiente ' -> 'pendiente')."""
+    return (x or "").strip().lower()
+
+
 def _calc_vencimiento(fecha_iso: str, dias: int = DEFAULT_PAYMENT_DAYS) -> str:
     y, m, d = map(int, fecha_iso.split("-"))
     return (date(y, m, d) + timedelta(days=int(dias))).isoformat()
@@ -100,6 +107,35 @@ class Factura:
       - 'vencimiento' ISO (YYYY-MM-DD).
     """
 
+    _COLS_EXT = (
+        "id, numero, proveedor, monto, estado, fecha, tipo,"
+        " doc_tipo, neto, iva, retencion, total, vencimiento"
+    )
+    # Forma fija (FacturaFila): sin esquema extendido, total = monto y el resto NULL
+    _COLS_LEGACY = (
+        "id, numero, proveedor, monto, estado, fecha, tipo,"
+        " NULL, NULL, NULL, NULL, monto, NULL"
+    )
+    _ORDEN_EXT = "date(COALESCE(vencimiento, fecha))"
+    _ORDEN_LEGACY = "date(fecha)"
+    _BLOQUE_IN = 500  # < SQLITE_MAX_VARIABLE_NUMBER (999 en versiones antiguas)
+
+    # {cols} = _columnas(conn), {orden} = _orden(conn), {ph} = marcadores del IN
+    _SQL_POR_ID = "SELECT {cols} FROM facturas WHERE id = ?"
+    _SQL_POR_IDS = "SELECT {cols} FROM facturas WHERE id IN ({ph})"
+    _SQL_POR_TIPO = "SELECT {cols} FROM facturas WHERE tipo = ?{y_estado} ORDER BY {orden} DESC, id DESC"
+    _SQL_POR_TIPO_ESTADOS = (
+        "SELECT {cols} FROM facturas WHERE tipo = ? AND estado IN ({ph}) ORDER BY {orden} DESC, id DESC"
+    )
+    _SQL_LISTAR = "SELECT {cols} FROM facturas ORDER BY {orden} DESC, id DESC"
+    _SQL_MARCAR_VENCIDAS = """
+        UPDATE facturas
+        SET estado = 'vencida'
+        WHERE estado = 'pendiente'
+          AND vencimiento IS NOT NULL
+          AND date(vencimiento) < date('now')
+    """
+
     # ---------------------------
     # Introspección de esquema
     # ---------------------------
@@ -110,14 +146,19 @@ class Factura:
             conn = get_connection()
             close = True
         try:
-            needed = {"doc_tipo", "neto", "iva", "retencion", "total", "vencimiento"}
-            cur = conn.execute("PRAGMA table_info(facturas)")
-            cols = {row[1] for row in cur.fetchall()}
-            return needed.issubset(cols)
+            return tiene_columnas(conn, "facturas", ("doc_tipo", "neto", "iva", "retencion", "total", "vencimiento"))
         finally:
             if close:
                 conn.close()
 
+    @staticmethod
+    def _columnas(conn) -> str:
+        return Factura._COLS_EXT if Factura._extended_enabled(conn) else Factura._COLS_LEGACY
+
+    @staticmethod
+    def _orden(conn) -> str:
+        return Factura._ORDEN_EXT if Factura._extended_enabled(conn) else Factura._ORDEN_LEGACY
+
     # ---------------------------
     # Altas
     # ---------------------------
@@ -160,9 +201,9 @@ class Factura:
                         (numero or "").strip(),
                         tercero.strip(),
                         float(desg["total"]),   # compat: 'monto' legacy = total
-                        estado,
+                        _norm_clave(estado),
                         fecha,
-                        tipo,
+                        _norm_clave(tipo),
                         doc_tipo,
                         float(neto_dec),
                         float(desg["iva"]),
@@ -182,9 +223,9 @@ class Factura:
                         (numero or "").strip(),
                         tercero.strip(),
                         float(desg["total"]),
-                        estado,
+                        _norm_clave(estado),
                         fecha,
-                        tipo,
+                        _norm_clave(tipo),
                     ),
                 )
 
@@ -234,9 +275,9 @@ class Factura:
                         (numero or "").strip(),
                         tercero.strip(),
                         float(_round(total)),   # compat: 'monto' legacy
-                        estado,
+                        _norm_clave(estado),
                         fecha,
-                        tipo,
+                        _norm_clave(tipo),
                         doc_tipo,
                         float(_round(neto)),
                         float(_round(iva)),
@@ -255,9 +296,9 @@ class Factura:
                         (numero or "").strip(),
                         tercero.strip(),
                         float(_round(total)),
-                        estado,
+                        _norm_clave(estado),
                         fecha,
-                        tipo,
+                        _norm_clave(tipo),
                     ),
                 )
 
@@ -295,7 +336,7 @@ class Factura:
                         tercero.strip(),
                         float(_round(monto)),
                         fecha,
-                        tipo,
+                        _norm_clave(tipo),
                         None,
                         float(_round(monto)),
                         0.0,
@@ -310,7 +351,7 @@ class Factura:
                     INSERT INTO facturas (numero, proveedor, monto, estado, fecha, tipo)
                     VALUES (?, ?, ?, 'emitida', ?, ?)
                     """,
-                    ((numero or "").strip(), tercero.strip(), float(_round(monto)), fecha, tipo),
+                    ((numero or "").strip(), tercero.strip(), float(_round(monto)), fecha, _norm_clave(tipo)),
                 )
 
             new_id = cur.lastrowid
@@ -330,7 +371,7 @@ class Factura:
         conn = get_connection()
         try:
             cur = conn.cursor()
-            cur.execute("UPDATE facturas SET estado = ? WHERE id = ?", (nuevo_estado, id_factura))
+            cur.execute("UPDATE facturas SET estado = ? WHERE id = ?", (_norm_clave(nuevo_estado), id_factura))
             conn.commit()
         finally:
             conn.close()
@@ -345,15 +386,7 @@ class Factura:
         try:
             cur = conn.cursor()
             if Factura._extended_enabled(conn):
-                cur.execute(
-                    """
-                    UPDATE facturas
-                    SET estado = 'vencida'
-                    WHERE estado = 'pendiente'
-                      AND vencimiento IS NOT NULL
-                      AND date(vencimiento) < date('now')
-                    """
-                )
+                cur.execute(Factura._SQL_MARCAR_VENCIDAS)
                 count = cur.rowcount
             else:
                 count = 0
@@ -366,88 +399,97 @@ class Factura:
     # Lecturas
     # ---------------------------
     @staticmethod
-    def obtener_por_id(id_factura: int):
+    def obtener_por_id(id_factura: int) -> Optional[FacturaFila]:
         conn = get_connection()
         try:
-            cur = conn.cursor()
-            if Factura._extended_enabled(conn):
-                cur.execute(
-                    """
-                    SELECT id, numero, proveedor, monto, estado, fecha, tipo,
-                           doc_tipo, neto, iva, retencion, total, vencimiento
-                    FROM facturas
-                    WHERE id = ?
-                    """,
-                    (id_factura,),
-                )
-            else:
-                cur.execute(
-                    """
-                    SELECT id, numero, proveedor, monto, estado, fecha, tipo
-                    FROM facturas
-                    WHERE id = ?
-                    """,
-                    (id_factura,),
-                )
+            cur = filas.cursor(conn, FacturaFila)
+            cur.execute(Factura._SQL_POR_ID.format(cols=Factura._columnas(conn)), (id_factura,))
             return cur.fetchone()
         finally:
             conn.close()
 
     @staticmethod
-    def listar_por_tipo_y_estado(tipo: str, estados: Sequence[str]):
+    def obtener_por_ids(ids: Iterable[int]) -> Dict[int, FacturaFila]:
+        """
+        Lectura por lote: {id: fila} para los ids dados, con una sola conexión y
+        consultas IN por bloques (evita el N+1 de obtener_por_id en las vistas).
+        Ids inexistentes simplemente no aparecen en el resultado.
+        """
+        unicos = list(dict.fromkeys(int(i) for i in ids))
+        if not unicos:
+            return {}
+
+        conn = get_connection()
+        try:
+            cur = filas.cursor(conn, FacturaFila)
+            cols = Factura._columnas(conn)
+            por_id: Dict[int, FacturaFila] = {}
+            for i in range(0, len(unicos), Factura._BLOQUE_IN):
+                bloque = unicos[i:i + Factura._BLOQUE_IN]
+                ph = ",".join("?" for _ in bloque)
+                cur.execute(Factura._SQL_POR_IDS.format(cols=cols, ph=ph), bloque)
+                for row in cur.fetchall():
+                    por_id[row.id] = row
+            return por_id
+        finally:
+            conn.close()
+
+    @staticmethod
+    def listar_extendidas(tipo: str, estado: Optional[str] = None) -> List[FacturaFila]:
+        """
+        Facturas de un tipo ('cliente' | 'proveedor'), opcionalmente filtradas por estado,
+        en una sola consulta (índice idx_facturas_tipo_estado).
+        """
+        conn = get_connection()
+        try:
+            cur = filas.cursor(conn, FacturaFila)
+            params: List[Any] = [_norm_clave(tipo)]
+            if estado:
+                params.append(_norm_clave(estado))
+            sql = Factura._SQL_POR_TIPO.format(
+                cols=Factura._columnas(conn), y_estado=" AND estado = ?" if estado else "", orden=Factura._orden(conn)
+            )
+            cur.execute(sql, params)
+            return cur.fetchall()
+        finally:
+            conn.close()
+
+    @staticmethod
+    def listar_por_tipo_y_estado(tipo: str, estados: Sequence[str]) -> List[FacturaFila]:
         """
         Devuelve facturas de un tipo ('cliente' | 'proveedor') en los estados dados.
-        Si el schema es extendido, incluye columnas extra.
         """
         if not estados:
             return []
 
         conn = get_connection()
         try:
-            cur = conn.cursor()
+            cur = filas.cursor(conn, FacturaFila)
             ph = ",".join("?" for _ in estados)
-            if Factura._extended_enabled(conn):
-                sql = f"""
-                    SELECT id, numero, proveedor, monto, estado, fecha, tipo,
-                           doc_tipo, neto, iva, retencion, total, vencimiento
-                    FROM facturas
-                    WHERE tipo = ? AND estado IN ({ph})
-                    ORDER BY date(COALESCE(vencimiento, fecha)) DESC, id DESC
-                """
-            else:
-                sql = f"""
-                    SELECT id, numero, proveedor, monto, estado, fecha, tipo
-                    FROM facturas
-                    WHERE tipo = ? AND estado IN ({ph})
-                    ORDER BY date(fecha) DESC, id DESC
-                """
-            cur.execute(sql, [tipo, *estados])
+            sql = Factura._SQL_POR_TIPO_ESTADOS.format(cols=Factura._columnas(conn), ph=ph, orden=Factura._orden(conn))
+            params = [_norm_clave(tipo), *map(_norm_clave, estados)]
+            cur.execute(sql, params)
             return cur.fetchall()
         finally:
             conn.close()
 
     @staticmethod
-    def listar_todas():
+    def listar_todas() -> List[FacturaFila]:
         conn = get_connection()
         try:
-            cur = conn.cursor()
-            if Factura._extended_enabled(conn):
-                cur.execute(
-                    """
-                    SELECT id, numero, proveedor, monto, estado, fecha, tipo,
-                           doc_tipo, neto, iva, retencion, total, vencimiento
-                    FROM facturas
-                    ORDER BY date(COALESCE(vencimiento, fecha)) DESC, id DESC
-                    """
-                )
-            else:
-                cur.execute(
-                    """
-                    SELECT id, numero, proveedor, monto, estado, fecha, tipo
-                    FROM facturas
-                    ORDER BY date(fecha) DESC, id DESC
-                    """
-                )
+            cur = filas.cursor(conn, FacturaFila)
+            cur.execute(Factura._SQL_LISTAR.format(cols=Factura._columnas(conn), orden=Factura._orden(conn)))
             return cur.fetchall()
         finally:
             conn.close()
+
+    @staticmethod
+    def iterar_todas(lote: Optional[int] = None) -> Iterator[FacturaFila]:
+        """Como listar_todas, en bloques de fetchmany sin cargar la tabla completa."""
+        conn = get_connection()
+        try:
+            cur = filas.cursor(conn, FacturaFila)
+            cur.execute(Factura._SQL_LISTAR.format(cols=Factura._columnas(conn), orden=Factura._orden(conn)))
+            yield from iterar_cursor(cur, lote=lote)
+        finally:
+            conn.close()
@@ -1,11 +1,15 @@
 # app/models/finanzas.py
 from __future__ import annotations
 
+from concurrent.futures import Future
 from datetime import date
 from decimal import Decimal, ROUND_HALF_UP
-from typing import Any, Tuple
+from typing import Any, Iterator, Optional, Tuple
 
-from app.db.database import get_connection
+from app.db import cola_escritura
+from app.db import filas
+from app.db.database import get_connection, iterar_cursor
+from app.db.filas import MovimientoCaja
 from app.models.factura import Factura
 from app.config.constantes import (
     MONETARY_DECIMALS,
@@ -28,6 +32,27 @@ def _round(x: Any) -> float:
     return float(_D(x).quantize(Q, rounding=ROUND_HALF_UP))
 
 
+# Ingresos y gastos comparten forma: MovimientoCaja
+_SQL_INGRESOS = "SELECT id, nombre, descripcion, monto, estado, fecha FROM ingresos ORDER BY date(fecha) DESC, id DESC"
+_SQL_GASTOS = "SELECT id, nombre, descripcion, monto, estado, fecha FROM gastos ORDER BY date(fecha) DESC, id DESC"
+
+# Sumas del estado de resultados (cubiertas por los índices de estado)
+_SQL_FACTURAS_PAGADAS = "SELECT SUM(monto) FROM facturas WHERE estado = 'pagada'"
+_SQL_INGRESOS_RECIBIDOS = "SELECT SUM(monto) FROM ingresos WHERE estado = 'recibido'"
+_SQL_GASTOS_PAGADOS = "SELECT SUM(monto) FROM gastos WHERE estado = 'pagado'"
+_SQL_FACTURAS_PROVEEDOR_PAGADAS = "SELECT SUM(monto) FROM facturas WHERE estado = 'pagada' AND tipo = 'proveedor'"
+
+
+def _iterar(sql: str, lote: Optional[int]) -> Iterator[MovimientoCaja]:
+    conn = get_connection()
+    try:
+        cur = filas.cursor(conn, MovimientoCaja)
+        cur.execute(sql)
+        yield from iterar_cursor(cur, lote=lote)
+    finally:
+        conn.close()
+
+
 # ======================================================================
 #                           M Ó D U L O   F I N A N Z A S
 # ======================================================================
@@ -60,14 +85,17 @@ class Finanzas:
     def listar_ingresos():
         conn = get_connection()
         try:
-            cur = conn.cursor()
-            cur.execute(
-                "SELECT id, nombre, descripcion, monto, estado, fecha FROM ingresos ORDER BY date(fecha) DESC, id DESC"
-            )
+            cur = filas.cursor(conn, MovimientoCaja)
+            cur.execute(_SQL_INGRESOS)
             return cur.fetchall()
         finally:
             conn.close()
 
+    @staticmethod
+    def iterar_ingresos(lote: Optional[int] = None) -> Iterator[MovimientoCaja]:
+        """Como listar_ingresos, en bloques (exportaciones y reportes)."""
+        return _iterar(_SQL_INGRESOS, lote)
+
     @staticmethod
     def editar_ingreso(id_ingreso: int, nombre: str, descripcion: str, monto: float, estado: str, fecha: str) -> None:
         conn = get_connection()
@@ -108,29 +136,49 @@ class Finanzas:
         conn = get_connection()
         try:
             cur = conn.cursor()
-            cur.execute(
-                """
-                INSERT INTO gastos (nombre, descripcion, monto, estado, fecha)
-                VALUES (?, ?, ?, ?, ?)
-                """,
-                (nombre.strip(), descripcion.strip(), _round(monto), estado.strip(), fecha),
-            )
+            Finanzas._insertar_gasto(cur, nombre, descripcion, monto, estado, fecha)
             conn.commit()
         finally:
             conn.close()
 
+    @staticmethod
+    def registrar_gasto_diferido(
+        nombre: str, descripcion: str, monto: float, estado: str = "pendiente", fecha: str | None = None
+    ) -> "Future[None]":
+        """
+        Igual que registrar_gasto pero vía cola de escritura (group commit).
+        El Future se resuelve cuando el gasto quedó confirmado en disco.
+        """
+        fecha = fecha or date.today().isoformat()
+        return cola_escritura.enviar(
+            lambda cur: Finanzas._insertar_gasto(cur, nombre, descripcion, monto, estado, fecha)
+        )
+
+    @staticmethod
+    def _insertar_gasto(cur, nombre: str, descripcion: str, monto: float, estado: str, fecha: str) -> None:
+        cur.execute(
+            """
+            INSERT INTO gastos (nombre, descripcion, monto, estado, fecha)
+            VALUES (?, ?, ?, ?, ?)
+            """,
+            (nombre.strip(), descripcion.strip(), _round(monto), estado.strip(), fecha),
+        )
+
     @staticmethod
     def listar_gastos():
         conn = get_connection()
         try:
-            cur = conn.cursor()
-            cur.execute(
-                "SELECT id, nombre, descripcion, monto, estado, fecha FROM gastos ORDER BY date(fecha) DESC, id DESC"
-            )
+            cur = filas.cursor(conn, MovimientoCaja)
+            cur.execute(_SQL_GASTOS)
             return cur.fetchall()
         finally:
             conn.close()
 
+    @staticmethod
+    def iterar_gastos(lote: Optional[int] = None) -> Iterator[MovimientoCaja]:
+        """Como listar_gastos, en bloques (exportaciones y reportes)."""
+        return _iterar(_SQL_GASTOS, lote)
+
     @staticmethod
     def editar_gasto(id_gasto: int, nombre: str, descripcion: str, monto: float, estado: str, fecha: str) -> None:
         conn = get_connection()
@@ -186,6 +234,10 @@ class Finanzas:
         """
         return Factura.listar_todas()
 
+    @staticmethod
+    def iterar_facturas(lote: Optional[int] = None) -> Iterator[Any]:
+        return Factura.iterar_todas(lote)
+
     @staticmethod
     def cambiar_estado_factura(id_factura: int, nuevo_estado: str) -> None:
         Factura.cambiar_estado(id_factura, nuevo_estado.strip())
@@ -205,7 +257,8 @@ class Finanzas:
                 SET numero = ?, proveedor = ?, monto = ?, estado = ?, fecha = ?, tipo = ?
                 WHERE id = ?
                 """,
-                (numero.strip(), tercero.strip(), _round(monto), estado.strip(), fecha, tipo.strip(), id_factura),
+                (numero.strip(), tercero.strip(), _round(monto), estado.strip().lower(), fecha, tipo.strip().lower(),
+                 id_factura),
             )
             conn.commit()
         finally:
@@ -233,7 +286,7 @@ class Finanzas:
         conn = get_connection()
         try:
             cur = conn.cursor()
-            cur.execute("SELECT SUM(monto) FROM facturas WHERE estado = 'pagada'")
+            cur.execute(_SQL_FACTURAS_PAGADAS)
             total = cur.fetchone()[0] or 0
             return _round(total)
         finally:
@@ -253,11 +306,11 @@ class Finanzas:
             cur = conn.cursor()
 
             # Ingresos efectivamente recibidos
-            cur.execute("SELECT SUM(monto) FROM ingresos WHERE estado = 'recibido'")
+            cur.execute(_SQL_INGRESOS_RECIBIDOS)
             total_ingresos = _round(cur.fetchone()[0] or 0)
 
             # Gastos pagados (gastos directos)
-            cur.execute("SELECT SUM(monto) FROM gastos WHERE estado = 'pagado'")
+            cur.execute(_SQL_GASTOS_PAGADOS)
             total_gastos = _round(cur.fetchone()[0] or 0)
 
         finally:
@@ -267,9 +320,7 @@ class Finanzas:
         conn2 = get_connection()
         try:
             cur2 = conn2.cursor()
-            cur2.execute(
-                "SELECT SUM(monto) FROM facturas WHERE estado = 'pagada' AND tipo = 'proveedor'"
-            )
+            cur2.execute(_SQL_FACTURAS_PROVEEDOR_PAGADAS)
             total_fact_prov = _round(cur2.fetchone()[0] or 0)
         finally:
             conn2.close()
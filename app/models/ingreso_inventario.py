@@ -1,25 +1,107 @@
 # control_negocio/app/models/ingreso_inventario.py
 from __future__ import annotations
 
+import csv
+import io
 from datetime import datetime
-from typing import List, Tuple, Any
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, TextIO, Tuple, TypedDict, Union
 
 from app.db.database import get_connection
+from app.models.lote_inventario import LoteInventario
+
+
+# Fuente de un ingreso masivo: ruta a CSV/TXT, archivo abierto o filas
+# (codigo, cantidad[, ubicacion[, lote[, fecha_vencimiento]]])
+FuenteLote = Union[str, Path, TextIO, Iterable[Sequence[Any]]]
+
+
+class Rechazo(TypedDict):
+    linea: int
+    codigo: str
+    motivo: str
+
+
+class ResultadoLote(TypedDict):
+    lineas: int               # líneas de datos leídas
+    procesados: int           # códigos distintos aplicados
+    unidades: int             # unidades ingresadas en total
+    movimientos: int          # filas insertadas en movimientos_inventario
+    rechazados: List[Rechazo]
+
+
+def _filas_texto(texto: Iterable[str]) -> Iterator[Tuple[int, List[str]]]:
+    """
+    Lee un volcado de escáner/CSV: 'codigo[,cantidad[,ubicacion]]' por línea.
+    Separador ',', ';' o tabulador (se detecta en la primera línea con datos).
+    Una línea con solo el código cuenta como 1 unidad (lectura de pistola).
+    """
+    delimitador: Optional[str] = None
+    for n, linea in enumerate(texto, start=1):
+        linea = linea.strip()
+        if not linea:
+            continue
+        if delimitador is None:
+            delimitador = next((d for d in (";", "\t", ",") if d in linea), ",")
+        yield n, next(csv.reader([linea], delimiter=delimitador))
+
+
+def _filas_fuente(fuente: FuenteLote) -> Iterator[Tuple[int, Sequence[Any]]]:
+    if isinstance(fuente, (str, Path)):
+        with open(fuente, "r", encoding="utf-8-sig", newline="") as fh:
+            yield from _filas_texto(fh)
+    elif isinstance(fuente, io.IOBase) or hasattr(fuente, "readline"):
+        yield from _filas_texto(fuente)  # type: ignore[arg-type]
+    else:
+        for n, fila in enumerate(fuente, start=1):
+            yield n, fila
+
+
+# Nombres de columna reconocidos en la primera línea de un archivo (minúsculas, sin tildes)
+_ENCABEZADOS = frozenset({
+    "codigo", "codigo_interno", "cod", "sku", "cantidad", "cant", "unidades",
+    "ubicacion", "bodega", "lote", "vencimiento", "fecha_vencimiento",
+})
+_SIN_TILDES = str.maketrans("áéíóú", "aeiou")
+
+
+def _es_encabezado(fila: Sequence[Any]) -> bool:
+    """True si todas las celdas con texto de la fila son nombres de columna conocidos."""
+    celdas = [str(c).strip().lower().translate(_SIN_TILDES) for c in fila if c is not None and str(c).strip()]
+    return bool(celdas) and all(c in _ENCABEZADOS for c in celdas)
 
 
 class IngresoInventario:
     """
     Registro de entradas de inventario.
     - Actualiza stock del producto.
+    - Suma la cantidad a su lote (lote/vencimiento) en lotes_inventario.
     - Guarda movimiento en tabla movimientos_inventario.
     """
 
+    # Con códigos repetidos (el esquema no los impide) gana el menor id, como en registrar_lote
+    _SQL_PRODUCTO_POR_CODIGO = "SELECT id, stock FROM productos WHERE codigo_interno = ? ORDER BY id LIMIT 1"
+    _SQL_ENTRADAS = """
+        SELECT id, codigo_producto, cantidad, ubicacion, metodo, fecha
+        FROM movimientos_inventario
+        WHERE tipo = 'entrada'
+        ORDER BY datetime(fecha) DESC
+    """
+
     @staticmethod
-    def registrar(producto_codigo: str, cantidad: int, ubicacion: str, metodo: str = "manual") -> None:
+    def registrar(
+        producto_codigo: str,
+        cantidad: int,
+        ubicacion: str,
+        metodo: str = "manual",
+        lote: Optional[str] = None,
+        fecha_vencimiento: Optional[str] = None,
+    ) -> None:
         """
         Registra un ingreso de inventario:
         - Verifica que la cantidad sea válida (>0).
         - Aumenta el stock del producto con `codigo_interno = producto_codigo`.
+        - Suma la cantidad al lote (lote, fecha_vencimiento YYYY-MM-DD) del producto.
         - Inserta un movimiento en movimientos_inventario.
         """
         if not producto_codigo or not isinstance(producto_codigo, str):
@@ -33,20 +115,16 @@ class IngresoInventario:
             cur.execute("BEGIN")
 
             # Verificar existencia del producto
-            cur.execute("SELECT stock FROM productos WHERE codigo_interno = ?", (producto_codigo,))
+            cur.execute(IngresoInventario._SQL_PRODUCTO_POR_CODIGO, (producto_codigo,))
             row = cur.fetchone()
             if not row:
                 raise ValueError(f"Producto con código interno '{producto_codigo}' no existe.")
 
             # Actualizar stock
-            cur.execute(
-                """
-                UPDATE productos
-                SET stock = stock + ?
-                WHERE codigo_interno = ?
-                """,
-                (cantidad, producto_codigo),
-            )
+            cur.execute("UPDATE productos SET stock = stock + ? WHERE id = ?", (cantidad, row[0]))
+
+            # Lote / vencimiento (FEFO)
+            LoteInventario.ingresar(cur, row[0], cantidad, lote, fecha_vencimiento)
 
             # Registrar movimiento
             cur.execute(
@@ -72,21 +150,150 @@ class IngresoInventario:
             conn.close()
 
     @staticmethod
-    def listar_entradas() -> List[Tuple[Any, ...]]:
+    def registrar_lote(
+        fuente: FuenteLote,
+        metodo: str = "escaner",
+        ubicacion_defecto: Optional[str] = None,
+    ) -> ResultadoLote:
         """
-        Retorna todos los movimientos de entrada de inventario, ordenados del más reciente al más antiguo.
+        Ingreso masivo desde archivo de escáner/CSV o filas
+        (codigo, cantidad[, ubicacion[, lote[, fecha_vencimiento]]]).
+        - Agrupa códigos repetidos (una actualización de stock por código,
+          un movimiento por código+ubicación y un ingreso por código+lote+vencimiento).
+        - Resuelve todos los códigos con una sola consulta (tabla temporal + índice
+          idx_productos_codigo_interno).
+        - Aplica UPDATE e INSERT con executemany en una única transacción.
+        Los códigos desconocidos y las cantidades inválidas vuelven en 'rechazados'.
         """
+        rechazados: List[Rechazo] = []
+        por_codigo: Dict[str, int] = {}
+        por_ubicacion: Dict[Tuple[str, Optional[str]], int] = {}
+        por_lote: Dict[Tuple[str, Optional[str], Optional[str]], int] = {}
+        primera_linea: Dict[str, int] = {}
+        defecto = (ubicacion_defecto or "").strip() or None
+        lineas = 0
+
+        primera = True
+        for n, fila in _filas_fuente(fuente):
+            codigo = str(fila[0]).strip() if len(fila) > 0 and fila[0] is not None else ""
+            if not codigo:
+                continue
+            if primera:
+                primera = False
+                if _es_encabezado(fila):
+                    continue  # ej: "codigo;cantidad;ubicacion"
+            bruto = fila[1] if len(fila) > 1 else None
+            try:
+                cantidad = 1 if bruto is None or str(bruto).strip() == "" else int(str(bruto).strip())
+            except ValueError:
+                rechazados.append({"linea": n, "codigo": codigo, "motivo": f"cantidad inválida: {bruto!r}"})
+                lineas += 1
+                continue
+            lineas += 1
+            if cantidad <= 0:
+                rechazados.append({"linea": n, "codigo": codigo, "motivo": "cantidad debe ser mayor a 0"})
+                continue
+
+            ubic = (str(fila[2]).strip() if len(fila) > 2 and fila[2] is not None else "") or defecto
+            lote = (str(fila[3]).strip() if len(fila) > 3 and fila[3] is not None else "") or None
+            venc = (str(fila[4]).strip() if len(fila) > 4 and fila[4] is not None else "") or None
+            if venc:
+                try:
+                    venc = datetime.strptime(venc, "%Y-%m-%d").date().isoformat()
+                except ValueError:
+                    rechazados.append({"linea": n, "codigo": codigo, "motivo": f"vencimiento inválido: {venc!r}"})
+                    continue
+            por_codigo[codigo] = por_codigo.get(codigo, 0) + cantidad
+            clave_lote = (codigo, lote, venc)
+            por_lote[clave_lote] = por_lote.get(clave_lote, 0) + cantidad
+            clave = (codigo, ubic)
+            por_ubicacion[clave] = por_ubicacion.get(clave, 0) + cantidad
+            primera_linea.setdefault(codigo, n)
+
+        resultado: ResultadoLote = {
+            "lineas": lineas, "procesados": 0, "unidades": 0, "movimientos": 0, "rechazados": rechazados,
+        }
+        if not por_codigo:
+            return resultado
+
         conn = get_connection()
         try:
             cur = conn.cursor()
+            cur.execute("BEGIN")
+
+            # Resolver todos los códigos de una vez
+            cur.execute("CREATE TEMP TABLE IF NOT EXISTS _lote_codigos (codigo TEXT PRIMARY KEY)")
+            cur.execute("DELETE FROM temp._lote_codigos")
+            cur.executemany("INSERT INTO temp._lote_codigos (codigo) VALUES (?)", [(c,) for c in por_codigo])
             cur.execute(
                 """
-                SELECT id, codigo_producto, cantidad, ubicacion, metodo, fecha
-                FROM movimientos_inventario
-                WHERE tipo = 'entrada'
-                ORDER BY datetime(fecha) DESC
+                SELECT p.codigo_interno, MIN(p.id)
+                FROM temp._lote_codigos l
+                JOIN productos p ON p.codigo_interno = l.codigo
+                GROUP BY p.codigo_interno
                 """
             )
+            existentes = dict(cur.fetchall())  # codigo -> producto_id
+            cur.execute("DROP TABLE temp._lote_codigos")
+
+            for codigo in por_codigo:
+                if codigo not in existentes:
+                    rechazados.append({
+                        "linea": primera_linea[codigo],
+                        "codigo": codigo,
+                        "motivo": f"producto con código interno '{codigo}' no existe",
+                    })
+
+            # Por id resuelto: con códigos repetidos, stock y lote van al mismo producto
+            stock = [(cant, existentes[cod]) for cod, cant in por_codigo.items() if cod in existentes]
+            cur.executemany("UPDATE productos SET stock = stock + ? WHERE id = ?", stock)
+
+            fecha = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            metodo = (metodo or "escaner").strip()
+            movimientos = [
+                (cod, cant, ubic, metodo, fecha)
+                for (cod, ubic), cant in por_ubicacion.items()
+                if cod in existentes
+            ]
+            cur.executemany(
+                """
+                INSERT INTO movimientos_inventario (
+                    codigo_producto, tipo, cantidad, ubicacion, metodo, fecha
+                ) VALUES (?, 'entrada', ?, ?, ?, ?)
+                """,
+                movimientos,
+            )
+
+            # Lotes: un upsert por producto+lote+vencimiento; el próximo vencimiento, una vez por producto
+            LoteInventario.ingresar_varios(cur, [
+                (existentes[cod], cant, lote, venc)
+                for (cod, lote, venc), cant in por_lote.items()
+                if cod in existentes
+            ])
+            LoteInventario.sincronizar_vencimiento(cur, *{pid for _, pid in stock})
+
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+        rechazados.sort(key=lambda r: r["linea"])
+        resultado["procesados"] = len(stock)
+        resultado["unidades"] = sum(c for c, _ in stock)
+        resultado["movimientos"] = len(movimientos)
+        return resultado
+
+    @staticmethod
+    def listar_entradas() -> List[Tuple[Any, ...]]:
+        """
+        Retorna todos los movimientos de entrada de inventario, ordenados del más reciente al más antiguo.
+        """
+        conn = get_connection()
+        try:
+            cur = conn.cursor()
+            cur.execute(IngresoInventario._SQL_ENTRADAS)
             return cur.fetchall()
         finally:
             conn.close()
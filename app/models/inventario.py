@@ -2,9 +2,11 @@
 from __future__ import annotations
 
 from datetime import date, timedelta
-from typing import List, Tuple, Optional, Any
+from typing import Iterator, List, Tuple, Optional, Any
 
-from app.db.database import get_connection
+from app.db import filas
+from app.db.database import get_connection, iterar_cursor
+from app.db.filas import InventarioFila, LoteFila
 # Si ya tienes IVA por producto como valor en tabla, lo mantenemos; estas constantes son para defaults.
 from app.config.constantes import IVA_RATE  # opcional si quieres un default de IVA
 
@@ -41,19 +43,30 @@ class Inventario:
         """Lista todos los productos ordenados por nombre (insensible a mayúsculas)."""
         conn = get_connection()
         try:
-            cur = conn.cursor()
+            cur = filas.cursor(conn, InventarioFila)
             cur.execute(Inventario._SELECT_BASE + " ORDER BY LOWER(nombre) ASC")
             return cur.fetchall()
         finally:
             conn.close()
 
+    @staticmethod
+    def iterar_todo(lote: Optional[int] = None) -> Iterator[InventarioFila]:
+        """Como listar_todo, en bloques de fetchmany (conteos, exportaciones)."""
+        conn = get_connection()
+        try:
+            cur = filas.cursor(conn, InventarioFila)
+            cur.execute(Inventario._SELECT_BASE + " ORDER BY LOWER(nombre) ASC")
+            yield from iterar_cursor(cur, lote=lote)
+        finally:
+            conn.close()
+
     @staticmethod
     def buscar_por_nombre(nombre: str) -> List[Row]:
         """Filtra por nombre (LIKE, case-insensitive)."""
         patron = f"%{(nombre or '').strip()}%"
         conn = get_connection()
         try:
-            cur = conn.cursor()
+            cur = filas.cursor(conn, InventarioFila)
             cur.execute(
                 Inventario._SELECT_BASE
                 + " WHERE LOWER(nombre) LIKE LOWER(?) ORDER BY LOWER(nombre) ASC",
@@ -69,7 +82,7 @@ class Inventario:
         patron = f"%{(codigo or '').strip()}%"
         conn = get_connection()
         try:
-            cur = conn.cursor()
+            cur = filas.cursor(conn, InventarioFila)
             cur.execute(
                 Inventario._SELECT_BASE
                 + " WHERE LOWER(codigo_interno) LIKE LOWER(?) ORDER BY LOWER(codigo_interno) ASC",
@@ -85,7 +98,7 @@ class Inventario:
         patron = f"%{(categoria or '').strip()}%"
         conn = get_connection()
         try:
-            cur = conn.cursor()
+            cur = filas.cursor(conn, InventarioFila)
             cur.execute(
                 Inventario._SELECT_BASE
                 + " WHERE LOWER(categoria) LIKE LOWER(?) ORDER BY LOWER(nombre) ASC",
@@ -95,46 +108,88 @@ class Inventario:
         finally:
             conn.close()
 
+    # Filas por lote con saldo (LoteFila): forma de _SELECT_BASE + lote (stock = saldo del lote
+    # acotado al stock del producto, fecha_vencimiento = la del lote). Rango sobre idx_lotes_venc.
+    _SELECT_LOTES = """
+        SELECT
+            p.id,
+            p.nombre,
+            p.categoria,
+            p.codigo_interno,
+            p.precio_compra,
+            p.precio_venta,
+            MIN(l.cantidad, p.stock),
+            p.iva,
+            p.ubicacion,
+            l.fecha_vencimiento,
+            l.lote
+        FROM lotes_inventario l
+        JOIN productos p ON p.id = l.producto_id
+    """
+    _ORDEN_LOTES = " ORDER BY l.fecha_vencimiento ASC, LOWER(p.nombre) ASC"
+    _SQL_LOTES_HASTA = (
+        _SELECT_LOTES + " WHERE l.fecha_vencimiento <= ? AND l.cantidad > 0 AND p.stock > 0" + _ORDEN_LOTES
+    )
+    _SQL_LOTES_ENTRE = (
+        _SELECT_LOTES + " WHERE l.fecha_vencimiento BETWEEN ? AND ? AND l.cantidad > 0 AND p.stock > 0" + _ORDEN_LOTES
+    )
+
     @staticmethod
-    def buscar_por_vencimiento(fecha_limite: str) -> List[Row]:
+    def buscar_por_vencimiento(fecha_limite: str) -> List[LoteFila]:
         """
-        Productos con fecha_vencimiento <= fecha_limite (YYYY-MM-DD).
-        Ignora NULLs (productos sin vencimiento).
+        Lotes con saldo que vencen en o antes de fecha_limite (YYYY-MM-DD),
+        una fila por lote. Ignora lotes sin vencimiento.
         """
+        try:
+            limite = date.fromisoformat((fecha_limite or "").strip()).isoformat()
+        except ValueError:
+            limite = (fecha_limite or "").strip()
         conn = get_connection()
         try:
-            cur = conn.cursor()
-            cur.execute(
-                Inventario._SELECT_BASE
-                + " WHERE fecha_vencimiento IS NOT NULL AND date(fecha_vencimiento) <= date(?)"
-                + " ORDER BY date(fecha_vencimiento) ASC, LOWER(nombre) ASC",
-                (fecha_limite,),
-            )
+            cur = filas.cursor(conn, LoteFila)
+            cur.execute(Inventario._SQL_LOTES_HASTA, (limite,))
             return cur.fetchall()
         finally:
             conn.close()
 
+    # Filtros de búsqueda en vivo: campo -> (WHERE, ORDER BY); mismos criterios que buscar_por_*
+    _FILTROS_BUSQUEDA = {
+        "nombre": ("LOWER(nombre) LIKE LOWER(?)", "LOWER(nombre) ASC"),
+        "codigo": ("LOWER(codigo_interno) LIKE LOWER(?)", "LOWER(codigo_interno) ASC"),
+        "categoria": ("LOWER(categoria) LIKE LOWER(?)", "LOWER(nombre) ASC"),
+    }
+
+    @staticmethod
+    def consulta_busqueda(campo: str, texto: str, limite: int) -> Tuple[str, Tuple[Any, ...]]:
+        """
+        SQL + parámetros de la búsqueda por `campo` ('nombre' | 'codigo' | 'categoria'),
+        con LIMIT. La ejecuta app/ui/busqueda_viva.py en su propio hilo (cancelable).
+        Texto vacío = listado completo (también limitado).
+        """
+        texto = (texto or "").strip()
+        if not texto:
+            return Inventario._SELECT_BASE + " ORDER BY LOWER(nombre) ASC LIMIT ?", (int(limite),)
+        where, orden = Inventario._FILTROS_BUSQUEDA[campo]
+        return (
+            Inventario._SELECT_BASE + f" WHERE {where} ORDER BY {orden} LIMIT ?",
+            (f"%{texto}%", int(limite)),
+        )
+
     # ---------------------------
     # Utilidades de negocio
     # ---------------------------
     @staticmethod
-    def por_vencer(dias: int = 30) -> List[Row]:
+    def por_vencer(dias: int = 30) -> List[LoteFila]:
         """
-        Productos que vencen dentro de 'dias' a partir de hoy (incluye hoy).
-        Útil para mermas, alertas y rotación FEFO.
+        Lotes con saldo que vencen dentro de 'dias' a partir de hoy (incluye hoy),
+        una fila por lote (stock = saldo del lote). Útil para mermas, alertas y rotación FEFO.
         """
         hoy = date.today()
         limite = (hoy + timedelta(days=int(dias))).isoformat()
         conn = get_connection()
         try:
-            cur = conn.cursor()
-            cur.execute(
-                Inventario._SELECT_BASE
-                + " WHERE fecha_vencimiento IS NOT NULL"
-                  " AND date(fecha_vencimiento) BETWEEN date(?) AND date(?)"
-                + " ORDER BY date(fecha_vencimiento) ASC, LOWER(nombre) ASC",
-                (hoy.isoformat(), limite),
-            )
+            cur = filas.cursor(conn, LoteFila)
+            cur.execute(Inventario._SQL_LOTES_ENTRE, (hoy.isoformat(), limite))
             return cur.fetchall()
         finally:
             conn.close()
@@ -144,7 +199,7 @@ class Inventario:
         """Productos con stock ≤ umbral."""
         conn = get_connection()
         try:
-            cur = conn.cursor()
+            cur = filas.cursor(conn, InventarioFila)
             cur.execute(
                 Inventario._SELECT_BASE
                 + " WHERE stock <= ? ORDER BY stock ASC, LOWER(nombre) ASC",
@@ -159,7 +214,7 @@ class Inventario:
         """Productos agotados (stock = 0)."""
         conn = get_connection()
         try:
-            cur = conn.cursor()
+            cur = filas.cursor(conn, InventarioFila)
             cur.execute(
                 Inventario._SELECT_BASE
                 + " WHERE stock = 0 ORDER BY LOWER(nombre) ASC"
@@ -211,7 +266,7 @@ class Inventario:
         """Listado paginado para mejorar rendimiento en catálogos grandes."""
         conn = get_connection()
         try:
-            cur = conn.cursor()
+            cur = filas.cursor(conn, InventarioFila)
             cur.execute(
                 Inventario._SELECT_BASE
                 + " ORDER BY LOWER(nombre) ASC LIMIT ? OFFSET ?",
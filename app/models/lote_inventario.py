@@ -0,0 +1,251 @@
+# control_negocio/app/models/lote_inventario.py
+from __future__ import annotations
+
+import sqlite3
+from datetime import date, datetime, timedelta
+from typing import Any, Iterable, List, Optional, Tuple
+
+from app.db.database import get_connection
+
+# (lote_id, cantidad) consumida de cada lote en una venta
+Asignacion = Tuple[int, int]
+
+
+def _norm_fecha(x: Optional[str]) -> Optional[str]:
+    """'YYYY-MM-DD' o None. Lanza ValueError si viene en otro formato."""
+    x = (x or "").strip()
+    if not x:
+        return None
+    try:
+        return datetime.strptime(x, "%Y-%m-%d").date().isoformat()
+    except ValueError:
+        raise ValueError(f"Fecha de vencimiento inválida: {x!r} (use YYYY-MM-DD).")
+
+
+class LoteInventario:
+    """
+    Stock por lote y vencimiento:
+      lotes_inventario(id, producto_id, lote, cantidad, fecha_vencimiento, fecha_ingreso)
+      venta_lotes(venta_id, lote_id, cantidad)  -- de qué lotes salió cada venta
+
+    - productos.stock sigue siendo el total; los lotes lo desglosan (suma de lotes <= stock).
+      Lo que entra sin datos de lote (compras, ajustes, edición manual) queda "sin lote".
+    - Las ventas consumen FEFO (primero el que vence antes; sin vencimiento al final).
+    - Las bajas de stock por fuera de las ventas (ajustes, edición, compras revertidas)
+      salen primero de lo "sin lote" y el resto FEFO de los lotes (recortar).
+    - Las alertas de vencimiento son un rango sobre idx_lotes_venc, acotadas al stock.
+    Los métodos que reciben `cur` trabajan dentro de la transacción del llamador.
+    """
+
+    # ---------------------------
+    # Escrituras (dentro de la transacción del llamador)
+    # ---------------------------
+    @staticmethod
+    def ingresar(
+        cur: sqlite3.Cursor,
+        producto_id: int,
+        cantidad: int,
+        lote: Optional[str] = None,
+        fecha_vencimiento: Optional[str] = None,
+        sincronizar: bool = True,
+    ) -> int:
+        """
+        Suma `cantidad` al lote (producto, lote, vencimiento); lo crea si no existe.
+        sincronizar=False deja al llamador actualizar productos.fecha_vencimiento (ingresos masivos).
+        """
+        lote = (lote or "").strip() or None
+        venc = _norm_fecha(fecha_vencimiento)
+        cur.execute(
+            """
+            SELECT id FROM lotes_inventario
+            WHERE producto_id = ? AND fecha_vencimiento IS ? AND lote IS ?
+            """,
+            (int(producto_id), venc, lote),
+        )
+        row = cur.fetchone()
+        if row:
+            cur.execute(
+                "UPDATE lotes_inventario SET cantidad = cantidad + ? WHERE id = ?",
+                (int(cantidad), row[0]),
+            )
+            lote_id = int(row[0])
+        else:
+            cur.execute(
+                """
+                INSERT INTO lotes_inventario (producto_id, lote, cantidad, fecha_vencimiento, fecha_ingreso)
+                VALUES (?, ?, ?, ?, ?)
+                """,
+                (int(producto_id), lote, int(cantidad), venc, date.today().isoformat()),
+            )
+            lote_id = int(cur.lastrowid)
+        if sincronizar:
+            LoteInventario.sincronizar_vencimiento(cur, producto_id)
+        return lote_id
+
+    # Suma al lote por su clave (idx_lotes_clave: NULL en lote/vencimiento cuenta como un valor)
+    _SQL_UPSERT = """
+        INSERT INTO lotes_inventario (producto_id, lote, cantidad, fecha_vencimiento, fecha_ingreso)
+        VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT (producto_id, COALESCE(lote, ''), COALESCE(fecha_vencimiento, ''))
+        DO UPDATE SET cantidad = cantidad + excluded.cantidad
+    """
+
+    @staticmethod
+    def ingresar_varios(
+        cur: sqlite3.Cursor,
+        ingresos: Iterable[Tuple[int, int, Optional[str], Optional[str]]],
+    ) -> None:
+        """
+        Ingreso masivo (producto_id, cantidad, lote, fecha_vencimiento): un solo executemany
+        con upsert, sin SELECT por fila. El llamador sincroniza productos.fecha_vencimiento.
+        """
+        hoy = date.today().isoformat()
+        cur.executemany(
+            LoteInventario._SQL_UPSERT,
+            [
+                (int(pid), (lote or "").strip() or None, int(cant), _norm_fecha(venc), hoy)
+                for pid, cant, lote, venc in ingresos
+            ],
+        )
+
+    # Lotes con saldo en orden FEFO (sin vencimiento al final)
+    _SQL_FEFO = """
+        SELECT id, cantidad FROM lotes_inventario
+        WHERE producto_id = ? AND cantidad > 0
+        ORDER BY fecha_vencimiento IS NULL, fecha_vencimiento, id
+    """
+
+    @staticmethod
+    def consumir_fefo(cur: sqlite3.Cursor, producto_id: int, cantidad: int) -> List[Asignacion]:
+        """
+        Descuenta `cantidad` de los lotes con saldo, primero el que vence antes.
+        Si los lotes no alcanzan, el resto sale del stock "sin lote".
+        """
+        pendiente = int(cantidad)
+        asignaciones: List[Asignacion] = []
+        cur.execute(LoteInventario._SQL_FEFO, (int(producto_id),))
+        for lote_id, saldo in cur.fetchall():
+            if pendiente <= 0:
+                break
+            toma = min(int(saldo), pendiente)
+            asignaciones.append((int(lote_id), toma))
+            pendiente -= toma
+        if asignaciones:
+            cur.executemany(
+                "UPDATE lotes_inventario SET cantidad = cantidad - ? WHERE id = ?",
+                [(c, lid) for lid, c in asignaciones],
+            )
+            LoteInventario.sincronizar_vencimiento(cur, producto_id)
+        return asignaciones
+
+    @staticmethod
+    def asignar_a_venta(cur: sqlite3.Cursor, venta_id: int, asignaciones: List[Asignacion]) -> None:
+        if asignaciones:
+            cur.executemany(
+                "INSERT INTO venta_lotes (venta_id, lote_id, cantidad) VALUES (?, ?, ?)",
+                [(int(venta_id), lid, c) for lid, c in asignaciones],
+            )
+
+    _SQL_LOTES_DE_VENTA = """
+        SELECT vl.lote_id, vl.cantidad, l.producto_id
+        FROM venta_lotes vl JOIN lotes_inventario l ON l.id = vl.lote_id
+        WHERE vl.venta_id = ?
+    """
+
+    @staticmethod
+    def devolver_venta(cur: sqlite3.Cursor, venta_id: int) -> None:
+        """Repone a sus lotes lo que consumió la venta (al editarla o eliminarla)."""
+        cur.execute(LoteInventario._SQL_LOTES_DE_VENTA, (int(venta_id),))
+        filas = cur.fetchall()
+        if filas:
+            cur.executemany(
+                "UPDATE lotes_inventario SET cantidad = cantidad + ? WHERE id = ?",
+                [(c, lid) for lid, c, _ in filas],
+            )
+            LoteInventario.sincronizar_vencimiento(cur, *{f[2] for f in filas})
+        cur.execute("DELETE FROM venta_lotes WHERE venta_id = ?", (int(venta_id),))
+
+    _SQL_EXCESO = """
+        SELECT p.id, COALESCE(SUM(l.cantidad), 0) - MAX(p.stock, 0)
+        FROM productos p
+        JOIN lotes_inventario l ON l.producto_id = p.id AND l.cantidad > 0
+        WHERE p.{columna} = ?
+        GROUP BY p.id
+    """
+
+    @staticmethod
+    def recortar(cur: sqlite3.Cursor, columna: str, valor: Any) -> None:
+        """
+        Tras bajar productos.stock por fuera de una venta: si los lotes suman más que el
+        stock, descuenta el exceso FEFO. `columna` identifica el producto: id | nombre | codigo_interno.
+        """
+        if columna not in ("id", "nombre", "codigo_interno"):
+            raise ValueError(f"Columna de producto inválida: {columna!r}")
+        cur.execute(LoteInventario._SQL_EXCESO.format(columna=columna), (valor,))
+        for producto_id, exceso in cur.fetchall():
+            if exceso > 0:
+                LoteInventario.consumir_fefo(cur, producto_id, int(exceso))
+
+    _SQL_SINCRONIZAR = """
+        UPDATE productos SET fecha_vencimiento = (
+            SELECT MIN(fecha_vencimiento) FROM lotes_inventario
+            WHERE producto_id = ? AND cantidad > 0
+        )
+        WHERE id = ?
+    """
+
+    @staticmethod
+    def sincronizar_vencimiento(cur: sqlite3.Cursor, *producto_ids: int) -> None:
+        """productos.fecha_vencimiento = próximo vencimiento entre los lotes con saldo."""
+        cur.executemany(LoteInventario._SQL_SINCRONIZAR, [(int(i), int(i)) for i in producto_ids])
+
+    # ---------------------------
+    # Lecturas
+    # ---------------------------
+    # Saldo acotado al stock del producto: una alerta nunca muestra unidades que ya no están
+    _SELECT_ALERTA = """
+        SELECT
+            l.id, p.id, p.nombre, p.codigo_interno, l.lote, MIN(l.cantidad, p.stock), l.fecha_vencimiento
+        FROM lotes_inventario l
+        JOIN productos p ON p.id = l.producto_id
+    """
+    _SQL_POR_VENCER = (
+        _SELECT_ALERTA
+        + " WHERE l.fecha_vencimiento BETWEEN ? AND ? AND l.cantidad > 0 AND p.stock > 0"
+          " ORDER BY l.fecha_vencimiento ASC, l.id ASC"
+    )
+
+    @staticmethod
+    def listar_por_producto(producto_id: int) -> List[Tuple[Any, ...]]:
+        """Lotes con saldo del producto en orden FEFO: (id, lote, cantidad, fecha_vencimiento, fecha_ingreso)."""
+        conn = get_connection()
+        try:
+            cur = conn.cursor()
+            cur.execute(
+                """
+                SELECT id, lote, cantidad, fecha_vencimiento, fecha_ingreso
+                FROM lotes_inventario
+                WHERE producto_id = ? AND cantidad > 0
+                ORDER BY fecha_vencimiento IS NULL, fecha_vencimiento, id
+                """,
+                (int(producto_id),),
+            )
+            return cur.fetchall()
+        finally:
+            conn.close()
+
+    @staticmethod
+    def por_vencer(dias: int = 30) -> List[Tuple[Any, ...]]:
+        """
+        Lotes con saldo que vencen entre hoy y hoy+dias:
+        (lote_id, producto_id, nombre, codigo_interno, lote, cantidad, fecha_vencimiento).
+        """
+        hoy = date.today()
+        limite = (hoy + timedelta(days=int(dias))).isoformat()
+        conn = get_connection()
+        try:
+            cur = conn.cursor()
+            cur.execute(LoteInventario._SQL_POR_VENCER, (hoy.isoformat(), limite))
+            return cur.fetchall()
+        finally:
+            conn.close()
@@ -1,8 +1,13 @@
 # control_negocio/app/models/movimiento_inventario.py
 from __future__ import annotations
 
-from typing import List, Tuple, Optional
-from app.db.database import get_connection
+from concurrent.futures import Future
+from typing import Iterator, List, Tuple, Optional
+
+from app.db import cola_escritura
+from app.db import filas
+from app.db.database import get_connection, iterar_cursor
+from app.db.filas import MovimientoFila
 
 Row = Tuple[int, str, str, int, Optional[str], Optional[str], str]
 
@@ -23,6 +28,11 @@ class MovimientoInventario:
             fecha
         FROM movimientos_inventario
     """
+    _ORDEN = " ORDER BY date(fecha) DESC, id DESC"
+    _SQL_CODIGO_CONTIENE = _SELECT_BASE + " WHERE LOWER(codigo_producto) LIKE LOWER(?)" + _ORDEN
+    # Rango sobre idx_mov_codigo_lower (sin recorrer la tabla)
+    _SQL_CODIGO_PREFIJO = _SELECT_BASE + " WHERE LOWER(codigo_producto) >= ? AND LOWER(codigo_producto) < ?" + _ORDEN
+    _SQL_POR_TIPO = _SELECT_BASE + " WHERE tipo = ?" + _ORDEN
 
     # ---------------------------
     # Altas
@@ -41,31 +51,56 @@ class MovimientoInventario:
         - tipo: 'entrada' | 'salida'
         - cantidad: positiva (no se permiten negativas aquí)
         """
-        if tipo not in ("entrada", "salida"):
-            raise ValueError("tipo debe ser 'entrada' o 'salida'")
-        if cantidad <= 0:
-            raise ValueError("cantidad debe ser > 0")
-
+        MovimientoInventario._validar(tipo, cantidad)
         conn = get_connection()
         try:
             cur = conn.cursor()
-            cur.execute(
-                """
-                INSERT INTO movimientos_inventario
-                    (codigo_producto, tipo, cantidad, ubicacion, metodo, fecha)
-                VALUES (?, ?, ?, ?, ?, COALESCE(?, datetime('now')))
-                """,
-                (codigo_producto.strip(), tipo, int(cantidad),
-                 (ubicacion or "").strip() or None,
-                 (metodo or "").strip() or None,
-                 fecha),
-            )
-            new_id = cur.lastrowid
+            new_id = MovimientoInventario._insertar(cur, codigo_producto, tipo, cantidad, ubicacion, metodo, fecha)
             conn.commit()
-            return int(new_id)
+            return new_id
         finally:
             conn.close()
 
+    @staticmethod
+    def registrar_diferido(
+        codigo_producto: str,
+        tipo: str,
+        cantidad: int,
+        ubicacion: Optional[str] = None,
+        metodo: Optional[str] = "manual",
+        fecha: Optional[str] = None,
+    ) -> "Future[int]":
+        """
+        Igual que registrar pero vía cola de escritura (group commit), para ráfagas
+        del lector de códigos. Valida al instante; el Future entrega el id tras el COMMIT.
+        """
+        MovimientoInventario._validar(tipo, cantidad)
+        return cola_escritura.enviar(
+            lambda cur: MovimientoInventario._insertar(cur, codigo_producto, tipo, cantidad, ubicacion, metodo, fecha)
+        )
+
+    @staticmethod
+    def _validar(tipo: str, cantidad: int) -> None:
+        if tipo not in ("entrada", "salida"):
+            raise ValueError("tipo debe ser 'entrada' o 'salida'")
+        if cantidad <= 0:
+            raise ValueError("cantidad debe ser > 0")
+
+    @staticmethod
+    def _insertar(cur, codigo_producto, tipo, cantidad, ubicacion, metodo, fecha) -> int:
+        cur.execute(
+            """
+            INSERT INTO movimientos_inventario
+                (codigo_producto, tipo, cantidad, ubicacion, metodo, fecha)
+            VALUES (?, ?, ?, ?, ?, COALESCE(?, datetime('now')))
+            """,
+            (codigo_producto.strip(), tipo, int(cantidad),
+             (ubicacion or "").strip() or None,
+             (metodo or "").strip() or None,
+             fecha),
+        )
+        return int(cur.lastrowid)
+
     # ---------------------------
     # Consultas
     # ---------------------------
@@ -74,18 +109,29 @@ class MovimientoInventario:
         """Lista todos los movimientos, más recientes primero."""
         conn = get_connection()
         try:
-            cur = conn.cursor()
+            cur = filas.cursor(conn, MovimientoFila)
             cur.execute(MovimientoInventario._SELECT_BASE + " ORDER BY date(fecha) DESC, id DESC")
             return cur.fetchall()
         finally:
             conn.close()
 
+    @staticmethod
+    def iterar_todo(lote: Optional[int] = None) -> Iterator[MovimientoFila]:
+        """Como listar_todo, en bloques de fetchmany: el historial no se carga completo."""
+        conn = get_connection()
+        try:
+            cur = filas.cursor(conn, MovimientoFila)
+            cur.execute(MovimientoInventario._SELECT_BASE + " ORDER BY date(fecha) DESC, id DESC")
+            yield from iterar_cursor(cur, lote=lote)
+        finally:
+            conn.close()
+
     @staticmethod
     def listar_paginado(limit: int = 50, offset: int = 0) -> List[Row]:
         """Listado paginado para grandes volúmenes."""
         conn = get_connection()
         try:
-            cur = conn.cursor()
+            cur = filas.cursor(conn, MovimientoFila)
             cur.execute(
                 MovimientoInventario._SELECT_BASE
                 + " ORDER BY date(fecha) DESC, id DESC LIMIT ? OFFSET ?",
@@ -96,18 +142,21 @@ class MovimientoInventario:
             conn.close()
 
     @staticmethod
-    def filtrar_por_codigo(codigo: str) -> List[Row]:
-        """Filtra por código de producto (case-insensitive)."""
-        patron = f"%{(codigo or '').strip()}%"
+    def filtrar_por_codigo(codigo: str, prefijo: bool = False) -> List[Row]:
+        """
+        Filtra por código de producto (case-insensitive).
+        - Por defecto, coincidencia en cualquier parte (LIKE '%x%', recorre la tabla).
+        - prefijo=True: solo códigos que empiezan con `codigo`, por rango sobre idx_mov_codigo_lower.
+        """
+        texto = (codigo or "").strip()
         conn = get_connection()
         try:
-            cur = conn.cursor()
-            cur.execute(
-                MovimientoInventario._SELECT_BASE
-                + " WHERE LOWER(codigo_producto) LIKE LOWER(?)"
-                + " ORDER BY date(fecha) DESC, id DESC",
-                (patron,),
-            )
+            cur = filas.cursor(conn, MovimientoFila)
+            if prefijo:
+                desde = texto.lower()
+                cur.execute(MovimientoInventario._SQL_CODIGO_PREFIJO, (desde, desde + "\U0010ffff"))
+            else:
+                cur.execute(MovimientoInventario._SQL_CODIGO_CONTIENE, (f"%{texto}%",))
             return cur.fetchall()
         finally:
             conn.close()
@@ -119,12 +168,8 @@ class MovimientoInventario:
             raise ValueError("tipo debe ser 'entrada' o 'salida'")
         conn = get_connection()
         try:
-            cur = conn.cursor()
-            cur.execute(
-                MovimientoInventario._SELECT_BASE
-                + " WHERE tipo = ? ORDER BY date(fecha) DESC, id DESC",
-                (tipo,),
-            )
+            cur = filas.cursor(conn, MovimientoFila)
+            cur.execute(MovimientoInventario._SQL_POR_TIPO, (tipo,))
             return cur.fetchall()
         finally:
             conn.close()
@@ -137,7 +182,7 @@ class MovimientoInventario:
         """
         conn = get_connection()
         try:
-            cur = conn.cursor()
+            cur = filas.cursor(conn, MovimientoFila)
             cur.execute(
                 MovimientoInventario._SELECT_BASE
                 + " WHERE date(fecha) BETWEEN date(?) AND date(?)"
@@ -1,11 +1,17 @@
 # control_negocio/app/models/producto.py
 from __future__ import annotations
 
+from concurrent.futures import Future
 from datetime import datetime
 from decimal import Decimal, ROUND_HALF_UP
-from typing import Optional, Any
+from typing import Optional, Any, Iterator
 
-from app.db.database import get_connection
+from app.db import cola_escritura
+from app.db import filas
+from app.db.database import get_connection, iterar_cursor, rango_prefijo
+from app.db.filas import ProductoFila
+from app.models.lote_inventario import LoteInventario
+from app.services import cache_referencias
 from app.config.constantes import IVA_RATE, MONETARY_DECIMALS
 
 # ---------------------------------
@@ -43,6 +49,14 @@ def _norm_date(x: Optional[str]) -> Optional[str]:
         return x
 
 
+def _es_fecha(x: Optional[str]) -> bool:
+    try:
+        datetime.strptime(x or "", "%Y-%m-%d")
+        return True
+    except ValueError:
+        return False
+
+
 def _norm_iva(x: Any) -> float:
     """
     Normaliza IVA guardado en producto:
@@ -75,9 +89,10 @@ class Producto:
         iva: Any,
         ubicacion: Optional[str],
         fecha_vencimiento: Optional[str],
-    ) -> None:
+    ) -> int:
         """
         Inserta un producto. Normaliza IVA, redondea montos y sanitiza textos.
+        Devuelve el id nuevo.
         """
         conn = get_connection()
         try:
@@ -102,7 +117,17 @@ class Producto:
                     _norm_date(fecha_vencimiento),
                 ),
             )
+            nuevo_id = int(cur.lastrowid)
+            # El stock inicial es un lote con el vencimiento del producto (si es una fecha válida)
+            if int(stock or 0) > 0:
+                venc = _norm_date(fecha_vencimiento)
+                LoteInventario.ingresar(
+                    cur, nuevo_id, int(stock), "INICIAL", venc if _es_fecha(venc) else None,
+                    sincronizar=False,
+                )
             conn.commit()
+            cache_referencias.invalidar("productos", ids=(nuevo_id,))
+            return nuevo_id
         finally:
             conn.close()
 
@@ -122,6 +147,7 @@ class Producto:
     ) -> None:
         """
         Actualiza campos del producto. Mantiene compatibilidad con tu UI.
+        Bajar el stock por debajo de lo reservado lanza ValueError.
         """
         conn = get_connection()
         try:
@@ -131,7 +157,7 @@ class Producto:
                 UPDATE productos SET
                     nombre = ?, categoria = ?, precio_compra = ?, precio_venta = ?, stock = ?,
                     codigo_interno = ?, codigo_externo = ?, iva = ?, ubicacion = ?, fecha_vencimiento = ?
-                WHERE id = ?
+                WHERE id = ? AND (? >= stock OR ? >= reservado)
                 """,
                 (
                     _norm_txt(nombre),
@@ -145,9 +171,19 @@ class Producto:
                     _norm_txt(ubicacion),
                     _norm_date(fecha_vencimiento),
                     int(id_producto),
+                    int(stock or 0),
+                    int(stock or 0),
                 ),
             )
+            if cur.rowcount == 0:
+                cur.execute("SELECT reservado FROM productos WHERE id = ?", (int(id_producto),))
+                row = cur.fetchone()
+                if row:
+                    raise ValueError(f"El stock no puede quedar bajo lo reservado ({int(row[0] or 0)}).")
+            # Si el stock bajó bajo lo que suman los lotes, la diferencia sale de los lotes
+            LoteInventario.recortar(cur, "id", int(id_producto))
             conn.commit()
+            cache_referencias.invalidar("productos", ids=(int(id_producto),))
         finally:
             conn.close()
 
@@ -158,12 +194,21 @@ class Producto:
             cur = conn.cursor()
             cur.execute("DELETE FROM productos WHERE id = ?", (int(id_producto),))
             conn.commit()
+            cache_referencias.invalidar("productos", ids=(int(id_producto),))
         finally:
             conn.close()
 
     # ---------------------------
     # CONSULTAS
     # ---------------------------
+    _SQL_LISTAR = """
+        SELECT
+            id, nombre, categoria, precio_compra, precio_venta, stock,
+            codigo_interno, codigo_externo, iva, ubicacion, fecha_vencimiento
+        FROM productos
+        ORDER BY nombre ASC
+    """
+
     @staticmethod
     def listar_todos():
         """
@@ -171,25 +216,26 @@ class Producto:
         """
         conn = get_connection()
         try:
-            cur = conn.cursor()
-            cur.execute(
-                """
-                SELECT
-                    id, nombre, categoria, precio_compra, precio_venta, stock,
-                    codigo_interno, codigo_externo, iva, ubicacion, fecha_vencimiento
-                FROM productos
-                ORDER BY nombre ASC
-                """
-            )
+            cur = filas.cursor(conn, ProductoFila)
+            cur.execute(Producto._SQL_LISTAR)
             return cur.fetchall()
         finally:
             conn.close()
 
+    @staticmethod
+    def iterar_todos(lote: Optional[int] = None) -> Iterator[ProductoFila]:
+        """Como listar_todos, en bloques de fetchmany (exportaciones, valorización)."""
+        conn = get_connection()
+        try:
+            yield from iterar_cursor(filas.cursor(conn, ProductoFila).execute(Producto._SQL_LISTAR), lote=lote)
+        finally:
+            conn.close()
+
     @staticmethod
     def buscar_por_nombre(nombre: str):
         conn = get_connection()
         try:
-            cur = conn.cursor()
+            cur = filas.cursor(conn, ProductoFila)
             cur.execute(
                 """
                 SELECT
@@ -209,7 +255,7 @@ class Producto:
     def buscar_por_codigo(codigo: str):
         conn = get_connection()
         try:
-            cur = conn.cursor()
+            cur = filas.cursor(conn, ProductoFila)
             cur.execute(
                 """
                 SELECT
@@ -225,11 +271,51 @@ class Producto:
         finally:
             conn.close()
 
+    # Autocompletar por `columna` (nombre | codigo_interno): rango sobre el índice NOCASE
+    _SQL_PREFIJO = """
+        SELECT id, nombre, codigo_interno
+        FROM productos
+        WHERE {columna} COLLATE NOCASE >= ? AND {columna} COLLATE NOCASE < ?
+        ORDER BY {columna} COLLATE NOCASE
+        LIMIT ?
+    """
+
     @staticmethod
-    def buscar_por_categoria(categoria: str):
+    def buscar_prefijo(prefijo: str, limite: int = 30):
+        """
+        Autocompletar: productos cuyo nombre empieza con `prefijo` (sin distinguir
+        mayúsculas). Rango sobre idx_productos_nombre_nocase, a lo más `limite` filas.
+        Devuelve [(id, nombre, codigo_interno)].
+        """
+        desde, hasta = rango_prefijo(_norm_txt(prefijo))
         conn = get_connection()
         try:
             cur = conn.cursor()
+            cur.execute(Producto._SQL_PREFIJO.format(columna="nombre"), (desde, hasta, int(limite)))
+            return cur.fetchall()
+        finally:
+            conn.close()
+
+    @staticmethod
+    def buscar_prefijo_codigo(prefijo: str, limite: int = 30):
+        """
+        Autocompletar por código interno (prefijo, sin distinguir mayúsculas).
+        Devuelve [(id, nombre, codigo_interno)].
+        """
+        desde, hasta = rango_prefijo(_norm_txt(prefijo))
+        conn = get_connection()
+        try:
+            cur = conn.cursor()
+            cur.execute(Producto._SQL_PREFIJO.format(columna="codigo_interno"), (desde, hasta, int(limite)))
+            return cur.fetchall()
+        finally:
+            conn.close()
+
+    @staticmethod
+    def buscar_por_categoria(categoria: str):
+        conn = get_connection()
+        try:
+            cur = filas.cursor(conn, ProductoFila)
             cur.execute(
                 """
                 SELECT
@@ -245,6 +331,16 @@ class Producto:
         finally:
             conn.close()
 
+    _SQL_POR_VENCIMIENTO = """
+        SELECT
+            id, nombre, categoria, precio_compra, precio_venta, stock,
+            codigo_interno, codigo_externo, iva, ubicacion, fecha_vencimiento
+        FROM productos
+        WHERE fecha_vencimiento IS NOT NULL
+          AND fecha_vencimiento <= ?
+        ORDER BY fecha_vencimiento ASC, nombre ASC
+    """
+
     @staticmethod
     def buscar_por_vencimiento(fecha_limite: str):
         """
@@ -252,23 +348,20 @@ class Producto:
         """
         conn = get_connection()
         try:
-            cur = conn.cursor()
-            cur.execute(
-                """
-                SELECT
-                    id, nombre, categoria, precio_compra, precio_venta, stock,
-                    codigo_interno, codigo_externo, iva, ubicacion, fecha_vencimiento
-                FROM productos
-                WHERE fecha_vencimiento IS NOT NULL
-                  AND fecha_vencimiento <= ?
-                ORDER BY fecha_vencimiento ASC, nombre ASC
-                """,
-                (_norm_date(fecha_limite),),
-            )
+            cur = filas.cursor(conn, ProductoFila)
+            cur.execute(Producto._SQL_POR_VENCIMIENTO, (_norm_date(fecha_limite),))
             return cur.fetchall()
         finally:
             conn.close()
 
+    _SQL_POR_ID = """
+        SELECT
+            id, nombre, categoria, precio_compra, precio_venta, stock,
+            codigo_interno, codigo_externo, iva, ubicacion, fecha_vencimiento
+        FROM productos
+        WHERE id = ?
+    """
+
     @staticmethod
     def obtener_por_id(id_producto: int):
         """
@@ -276,17 +369,8 @@ class Producto:
         """
         conn = get_connection()
         try:
-            cur = conn.cursor()
-            cur.execute(
-                """
-                SELECT
-                    id, nombre, categoria, precio_compra, precio_venta, stock,
-                    codigo_interno, codigo_externo, iva, ubicacion, fecha_vencimiento
-                FROM productos
-                WHERE id = ?
-                """,
-                (int(id_producto),),
-            )
+            cur = filas.cursor(conn, ProductoFila)
+            cur.execute(Producto._SQL_POR_ID, (int(id_producto),))
             return cur.fetchone()
         finally:
             conn.close()
@@ -297,28 +381,54 @@ class Producto:
     @staticmethod
     def ajustar_stock_por_nombre(nombre: str, delta: int) -> None:
         """
-        Ajusta stock sumando delta (puede ser negativo).
+        Ajusta stock sumando delta (puede ser negativo; no baja de lo reservado).
         """
         conn = get_connection()
         try:
             cur = conn.cursor()
-            cur.execute(
-                "UPDATE productos SET stock = stock + ? WHERE nombre = ?",
-                (int(delta), _norm_txt(nombre)),
-            )
+            Producto._sumar_stock_por_nombre(cur, nombre, delta)
             conn.commit()
         finally:
             conn.close()
 
+    @staticmethod
+    def ajustar_stock_por_nombre_diferido(nombre: str, delta: int) -> "Future[None]":
+        """Igual que ajustar_stock_por_nombre pero vía cola de escritura (group commit)."""
+        return cola_escritura.enviar(lambda cur: Producto._sumar_stock_por_nombre(cur, nombre, delta))
+
+    @staticmethod
+    def _sumar_stock_por_nombre(cur, nombre: str, delta: int) -> None:
+        Producto._sumar_stock(cur, "nombre", _norm_txt(nombre), delta)
+
+    _SQL_SUMAR_STOCK = "UPDATE productos SET stock = stock + ? WHERE {columna} = ?"
+    # Misma guardia que Venta._descontar_stock: una baja no toca lo apartado por reservas
+    _SQL_RESTAR_STOCK = "UPDATE productos SET stock = stock - ? WHERE {columna} = ? AND stock - reservado >= ?"
+
+    @staticmethod
+    def _sumar_stock(cur, columna: str, valor: str, delta: int) -> None:
+        """
+        stock += delta del producto con `columna` (nombre | codigo_interno) = valor.
+        Una baja exige disponible (stock - reservado) suficiente, o ValueError, y recorta los lotes.
+        """
+        delta = int(delta)
+        if delta >= 0:
+            cur.execute(Producto._SQL_SUMAR_STOCK.format(columna=columna), (delta, valor))
+            return
+        cur.execute(Producto._SQL_RESTAR_STOCK.format(columna=columna), (-delta, valor, -delta))
+        if cur.rowcount == 0:
+            cur.execute(f"SELECT stock - reservado FROM productos WHERE {columna} = ?", (valor,))
+            row = cur.fetchone()
+            if row:
+                raise ValueError(f"Stock insuficiente ({int(row[0] or 0)}) para '{valor}'.")
+            return
+        LoteInventario.recortar(cur, columna, valor)
+
     @staticmethod
     def ajustar_stock_por_codigo(codigo_interno: str, delta: int) -> None:
         conn = get_connection()
         try:
             cur = conn.cursor()
-            cur.execute(
-                "UPDATE productos SET stock = stock + ? WHERE codigo_interno = ?",
-                (int(delta), _norm_txt(codigo_interno)),
-            )
+            Producto._sumar_stock(cur, "codigo_interno", _norm_txt(codigo_interno), delta)
             conn.commit()
         finally:
             conn.close()
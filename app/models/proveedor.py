@@ -2,9 +2,13 @@
 from __future__ import annotations
 
 import re
-from typing import List, Optional, Tuple, Any, Dict
+from typing import Iterator, List, Optional, Tuple, Any, Dict
 
-from app.db.database import get_connection
+from app.db import filas
+from app.db.database import get_connection, iterar_cursor
+from app.db.filas import ProveedorFila
+from app.services import cache_referencias
+from app.utils.validators import normalizar_rut, validar_rut
 
 Row = Tuple[
     int,            # id
@@ -17,6 +21,7 @@ Row = Tuple[
     Optional[str],  # comuna
 ]
 
+
 EMAIL_RE = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
 
 
@@ -43,39 +48,20 @@ def _clean_rut(rut: Optional[str]) -> Optional[str]:
     """
     if rut is None:
         return None
-    s = rut.strip().lower().replace(".", "").replace(" ", "")
-    if not s:
-        return None
-    # Si viene sin guión, lo insertamos antes del último carácter
-    if "-" not in s and len(s) >= 2:
-        s = f"{s[:-1]}-{s[-1]}"
-    return s
+    s = normalizar_rut(rut).lower()
+    if len(s) < 2:
+        return s or None
+    return f"{s[:-1]}-{s[-1]}"
 
 
 def _valid_rut(rut: Optional[str]) -> bool:
     """
-    Valida DV (módulo 11). Permite K/k como DV.
+    Valida DV (módulo 11) con el validador común. Permite K/k como DV.
     Si viene vacío/None, lo consideramos válido (campo opcional).
     """
     if rut is None or rut == "":
         return True
-    r = _clean_rut(rut)
-    if not r or "-" not in r:
-        return False
-    num, dv = r.split("-", 1)
-    if not num.isdigit():
-        return False
-    dv = dv.lower()
-    # cálculo módulo 11
-    factors = [2, 3, 4, 5, 6, 7]
-    acc = 0
-    f_idx = 0
-    for ch in reversed(num):
-        acc += int(ch) * factors[f_idx]
-        f_idx = (f_idx + 1) % len(factors)
-    mod = 11 - (acc % 11)
-    dv_calc = {10: "k", 11: "0"}.get(mod, str(mod))
-    return dv == dv_calc
+    return validar_rut(rut)
 
 
 def _validate_fields(nombre: Optional[str], rut: Optional[str], correo: Optional[str]) -> None:
@@ -129,6 +115,7 @@ class Proveedor:
             )
             new_id = cur.lastrowid
             conn.commit()
+            cache_referencias.invalidar("proveedores")
             return int(new_id)
         finally:
             conn.close()
@@ -178,27 +165,36 @@ class Proveedor:
     # ---------------
     # Lecturas
     # ---------------
+    _SQL_LISTAR = """
+        SELECT id, nombre, rut, direccion, telefono, razon_social, correo, comuna
+        FROM proveedores
+        ORDER BY LOWER(nombre) ASC, id ASC
+    """
+
     @staticmethod
     def listar_todos() -> List[Row]:
         conn = get_connection()
         try:
-            cur = conn.cursor()
-            cur.execute(
-                """
-                SELECT id, nombre, rut, direccion, telefono, razon_social, correo, comuna
-                FROM proveedores
-                ORDER BY LOWER(nombre) ASC, id ASC
-                """
-            )
+            cur = filas.cursor(conn, ProveedorFila)
+            cur.execute(Proveedor._SQL_LISTAR)
             return cur.fetchall()
         finally:
             conn.close()
 
+    @staticmethod
+    def iterar_todos(lote: Optional[int] = None) -> Iterator[ProveedorFila]:
+        """Como listar_todos, en bloques de fetchmany."""
+        conn = get_connection()
+        try:
+            yield from iterar_cursor(filas.cursor(conn, ProveedorFila).execute(Proveedor._SQL_LISTAR), lote=lote)
+        finally:
+            conn.close()
+
     @staticmethod
     def listar_paginado(limit: int = 50, offset: int = 0) -> List[Row]:
         conn = get_connection()
         try:
-            cur = conn.cursor()
+            cur = filas.cursor(conn, ProveedorFila)
             cur.execute(
                 """
                 SELECT id, nombre, rut, direccion, telefono, razon_social, correo, comuna
@@ -216,7 +212,7 @@ class Proveedor:
     def obtener_por_id(id_proveedor: int) -> Optional[Row]:
         conn = get_connection()
         try:
-            cur = conn.cursor()
+            cur = filas.cursor(conn, ProveedorFila)
             cur.execute(
                 """
                 SELECT id, nombre, rut, direccion, telefono, razon_social, correo, comuna
@@ -229,6 +225,12 @@ class Proveedor:
         finally:
             conn.close()
 
+    _SQL_POR_RUT = """
+        SELECT id, nombre, rut, direccion, telefono, razon_social, correo, comuna
+        FROM proveedores
+        WHERE rut = ?
+    """
+
     @staticmethod
     def obtener_por_rut(rut: str) -> Optional[Row]:
         rut_n = _clean_rut(_norm(rut))
@@ -236,15 +238,8 @@ class Proveedor:
             return None
         conn = get_connection()
         try:
-            cur = conn.cursor()
-            cur.execute(
-                """
-                SELECT id, nombre, rut, direccion, telefono, razon_social, correo, comuna
-                FROM proveedores
-                WHERE rut = ?
-                """,
-                (rut_n,),
-            )
+            cur = filas.cursor(conn, ProveedorFila)
+            cur.execute(Proveedor._SQL_POR_RUT, (rut_n,))
             return cur.fetchone()
         finally:
             conn.close()
@@ -254,7 +249,7 @@ class Proveedor:
         patron = f"%{(_norm(nombre) or '')}%"
         conn = get_connection()
         try:
-            cur = conn.cursor()
+            cur = filas.cursor(conn, ProveedorFila)
             cur.execute(
                 """
                 SELECT id, nombre, rut, direccion, telefono, razon_social, correo, comuna
@@ -308,6 +303,7 @@ class Proveedor:
                 (nombre, rut, direccion, telefono, razon_social, correo, comuna, id_proveedor),
             )
             conn.commit()
+            cache_referencias.invalidar("proveedores")
         finally:
             conn.close()
 
@@ -356,6 +352,7 @@ class Proveedor:
             cur = conn.cursor()
             cur.execute(sql, tuple(values))
             conn.commit()
+            cache_referencias.invalidar("proveedores")
         finally:
             conn.close()
 
@@ -369,5 +366,6 @@ class Proveedor:
             cur = conn.cursor()
             cur.execute("DELETE FROM proveedores WHERE id = ?", (id_proveedor,))
             conn.commit()
+            cache_referencias.invalidar("proveedores")
         finally:
             conn.close()
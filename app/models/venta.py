@@ -1,11 +1,14 @@
 # app/models/venta.py
 from __future__ import annotations
 
-from datetime import date
+from datetime import date, datetime, timedelta
 from decimal import Decimal, ROUND_HALF_UP
-from typing import Optional, Any, Dict
+from typing import Optional, Any, Dict, Iterator, List
 
-from app.db.database import get_connection
+from app.db import filas
+from app.db.database import con_reintentos, get_connection, iterar_cursor, tiene_columnas
+from app.db.filas import VentaFila
+from app.models.lote_inventario import LoteInventario
 from app.config.constantes import (
     IVA_RATE,
     RETENCION_HONORARIOS,
@@ -107,14 +110,118 @@ class Venta:
             conn = get_connection()
             close = True
         try:
-            cur = conn.execute("PRAGMA table_info(ordenes_venta)")
-            cols = {row[1] for row in cur.fetchall()}
-            needed = {"doc_tipo", "neto", "retencion", "total"}
-            return needed.issubset(cols)
+            return tiene_columnas(conn, "ordenes_venta", ("doc_tipo", "neto", "retencion", "total"))
         finally:
             if close:
                 conn.close()
 
+    # Forma fija (VentaFila): sin esquema extendido las columnas nuevas llegan NULL
+    _COLS = (
+        "id, cliente, producto, cantidad, precio_unitario,"
+        " doc_tipo, neto, iva, retencion, total, fecha"
+    )
+    _COLS_LEGACY = (
+        "id, cliente, producto, cantidad, precio_unitario,"
+        " NULL, NULL, iva, NULL, total, fecha"
+    )
+
+    @staticmethod
+    def _columnas(conn) -> str:
+        return Venta._COLS if Venta._extended_schema_enabled(conn) else Venta._COLS_LEGACY
+
+    # ---------------------------
+    # Stock: descuento atómico
+    # ---------------------------
+    _SQL_ID_POR_NOMBRE = "SELECT id FROM productos WHERE nombre = ?"
+    _SQL_DESCONTAR = """
+        UPDATE productos
+        SET stock = stock - ?, reservado = reservado - ?
+        WHERE id = ? AND stock - reservado + ? >= ?
+    """
+
+    @staticmethod
+    def _descontar_stock(cur, producto: str, cantidad: int, desde_reserva: int = 0) -> int:
+        """
+        Descuenta stock con un UPDATE condicional (no lee-y-luego-escribe): solo afecta
+        la fila si el disponible (stock - reservado) alcanza. Con BEGIN IMMEDIATE y este
+        guardia, dos cajas no pueden vender la misma unidad.
+        `desde_reserva` = unidades que ya estaban apartadas para esta venta (se liberan).
+        Devuelve el id del producto.
+        """
+        cur.execute(Venta._SQL_ID_POR_NOMBRE, (producto,))
+        row = cur.fetchone()
+        if not row:
+            raise ValueError(f"Producto '{producto}' no existe.")
+        producto_id = int(row[0])
+        cant = int(cantidad)
+        cur.execute(Venta._SQL_DESCONTAR, (cant, int(desde_reserva), producto_id, int(desde_reserva), cant))
+        if cur.rowcount != 1:
+            cur.execute("SELECT stock - reservado FROM productos WHERE id = ?", (producto_id,))
+            disponible = int(cur.fetchone()[0] or 0)
+            raise ValueError(f"Stock insuficiente ({disponible}) para '{producto}'.")
+        return producto_id
+
+    @staticmethod
+    def _insertar(
+        cur,
+        cliente: str,
+        producto: str,
+        cantidad: int,
+        precio_unitario_neto: float | Decimal,
+        doc_tipo: Optional[str],
+        fecha: str,
+    ) -> int:
+        """INSERT en ordenes_venta (extendido o legacy). Devuelve el id de la venta."""
+        desglose = _desglose_venta(
+            cantidad=cantidad,
+            precio_unitario_neto=precio_unitario_neto,
+            doc_tipo=doc_tipo,
+            iva_rate=IVA_RATE,
+            retencion_rate=RETENCION_HONORARIOS,
+        )
+
+        if Venta._extended_schema_enabled(cur.connection):
+            cur.execute(
+                """
+                INSERT INTO ordenes_venta (
+                    cliente, producto, cantidad, precio_unitario,
+                    doc_tipo, neto, iva, retencion, total, fecha
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (
+                    cliente,
+                    producto,
+                    int(cantidad),
+                    float(_round(precio_unitario_neto)),
+                    (doc_tipo or None),
+                    float(desglose["neto"]),
+                    float(desglose["iva"]),
+                    float(desglose["retencion"]),
+                    float(desglose["total"]),
+                    fecha,
+                ),
+            )
+        else:
+            # Legacy: guardamos tasa en 'iva' (si exento → 0.0)
+            iva_rate = 0.0 if _es_exenta(doc_tipo) else _to_rate(IVA_RATE)
+            cur.execute(
+                """
+                INSERT INTO ordenes_venta (
+                    cliente, producto, cantidad, precio_unitario, iva, total, fecha
+                ) VALUES (?, ?, ?, ?, ?, ?, ?)
+                """,
+                (
+                    cliente,
+                    producto,
+                    int(cantidad),
+                    float(_round(precio_unitario_neto)),
+                    float(_round(iva_rate)),
+                    float(desglose["total"]),
+                    fecha,
+                ),
+            )
+        return int(cur.lastrowid)
+
     # ---------------------------
     # Altas (API recomendada)
     # ---------------------------
@@ -128,85 +235,215 @@ class Venta:
         fecha: Optional[str] = None,     # YYYY-MM-DD
     ) -> int:
         """
-        Crea una venta con cálculo automático (neto/iva/retención/total). Valida stock.
+        Crea una venta con cálculo automático (neto/iva/retención/total). Valida stock
+        y descuenta de los lotes en orden FEFO (venta_lotes guarda de cuáles salió).
+        Transacción BEGIN IMMEDIATE con descuento condicional; si otra caja mantiene
+        el lock más allá de busy_timeout, se reintenta (con_reintentos).
         Degrada a legacy si el esquema extendido no está disponible.
         """
+        return con_reintentos(
+            lambda: Venta._crear(cliente, producto, cantidad, precio_unitario_neto, doc_tipo, fecha)
+        )
+
+    @staticmethod
+    def _crear(cliente, producto, cantidad, precio_unitario_neto, doc_tipo, fecha) -> int:
+        if int(cantidad) <= 0:
+            raise ValueError("Cantidad debe ser > 0.")
         fecha_actual = fecha or date.today().isoformat()
         conn = get_connection()
         try:
             cur = conn.cursor()
-            cur.execute("BEGIN")
+            cur.execute("BEGIN IMMEDIATE")  # toma el lock de escritura antes de validar stock
 
-            # Verificar existencia y stock
-            cur.execute("SELECT stock FROM productos WHERE nombre = ?", (producto,))
-            row = cur.fetchone()
-            if not row:
-                raise ValueError(f"Producto '{producto}' no existe.")
-            stock_actual = int(row[0] or 0)
-            if int(cantidad) > stock_actual:
-                raise ValueError(f"Stock insuficiente ({stock_actual}) para '{producto}'.")
+            producto_id = Venta._descontar_stock(cur, producto, cantidad)
+            new_id = Venta._insertar(cur, cliente, producto, cantidad, precio_unitario_neto, doc_tipo, fecha_actual)
+            LoteInventario.asignar_a_venta(cur, new_id, LoteInventario.consumir_fefo(cur, producto_id, cantidad))
 
-            desglose = _desglose_venta(
-                cantidad=cantidad,
-                precio_unitario_neto=precio_unitario_neto,
-                doc_tipo=doc_tipo,
-                iva_rate=IVA_RATE,
-                retencion_rate=RETENCION_HONORARIOS,
+            conn.commit()
+            return new_id
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+    # ---------------------------
+    # Reservas (pedidos pendientes)
+    # ---------------------------
+    _SQL_RESERVAS_VENCIDAS = "SELECT id, producto_id, cantidad FROM reservas_stock WHERE estado = 'activa' AND expira < ?"
+    _SQL_RESERVAS_ACTIVAS = """
+        SELECT r.id, p.nombre, r.cantidad, r.referencia, r.creada, r.expira
+        FROM reservas_stock r JOIN productos p ON p.id = r.producto_id
+        WHERE r.estado = 'activa'
+        ORDER BY r.expira ASC
+    """
+
+    @staticmethod
+    def _liberar_vencidas(cur, ahora: str) -> int:
+        cur.execute(Venta._SQL_RESERVAS_VENCIDAS, (ahora,))
+        vencidas = cur.fetchall()
+        if vencidas:
+            cur.executemany(
+                "UPDATE productos SET reservado = reservado - ? WHERE id = ?",
+                [(cant, pid) for _, pid, cant in vencidas],
+            )
+            cur.executemany(
+                "UPDATE reservas_stock SET estado = 'liberada' WHERE id = ?",
+                [(rid,) for rid, _, _ in vencidas],
             )
+        return len(vencidas)
 
-            if Venta._extended_schema_enabled(conn):
+    @staticmethod
+    def reservar(producto: str, cantidad: int, referencia: Optional[str] = None, minutos: int = 30) -> int:
+        """
+        Aparta `cantidad` de un producto para un pedido pendiente (no descuenta stock,
+        pero deja de estar disponible para otras ventas). Expira tras `minutos`.
+        Devuelve el id de la reserva. Las reservas vencidas se liberan aquí mismo.
+        """
+        if int(cantidad) <= 0:
+            raise ValueError("Cantidad debe ser > 0.")
+
+        def _tx() -> int:
+            ahora = datetime.now()
+            conn = get_connection()
+            try:
+                cur = conn.cursor()
+                cur.execute("BEGIN IMMEDIATE")
+                Venta._liberar_vencidas(cur, ahora.isoformat(timespec="seconds"))
+
+                cur.execute(Venta._SQL_ID_POR_NOMBRE, (producto,))
+                row = cur.fetchone()
+                if not row:
+                    raise ValueError(f"Producto '{producto}' no existe.")
                 cur.execute(
-                    """
-                    INSERT INTO ordenes_venta (
-                        cliente, producto, cantidad, precio_unitario,
-                        doc_tipo, neto, iva, retencion, total, fecha
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    """,
-                    (
-                        cliente,
-                        producto,
-                        int(cantidad),
-                        float(_round(precio_unitario_neto)),
-                        (doc_tipo or None),
-                        float(desglose["neto"]),
-                        float(desglose["iva"]),
-                        float(desglose["retencion"]),
-                        float(desglose["total"]),
-                        fecha_actual,
-                    ),
+                    "UPDATE productos SET reservado = reservado + ? WHERE id = ? AND stock - reservado >= ?",
+                    (int(cantidad), row[0], int(cantidad)),
                 )
-            else:
-                # Legacy: guardamos tasa en 'iva' (si exento → 0.0)
-                iva_rate = 0.0 if _es_exenta(doc_tipo) else _to_rate(IVA_RATE)
+                if cur.rowcount != 1:
+                    cur.execute("SELECT stock - reservado FROM productos WHERE id = ?", (row[0],))
+                    raise ValueError(f"Stock insuficiente ({int(cur.fetchone()[0] or 0)}) para reservar '{producto}'.")
                 cur.execute(
                     """
-                    INSERT INTO ordenes_venta (
-                        cliente, producto, cantidad, precio_unitario, iva, total, fecha
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?)
+                    INSERT INTO reservas_stock (producto_id, cantidad, referencia, estado, creada, expira)
+                    VALUES (?, ?, ?, 'activa', ?, ?)
                     """,
                     (
-                        cliente,
-                        producto,
-                        int(cantidad),
-                        float(_round(precio_unitario_neto)),
-                        float(_round(iva_rate)),
-                        float(desglose["total"]),
-                        fecha_actual,
+                        row[0], int(cantidad), referencia,
+                        ahora.isoformat(timespec="seconds"),
+                        (ahora + timedelta(minutes=int(minutos))).isoformat(timespec="seconds"),
                     ),
                 )
+                id_reserva = int(cur.lastrowid)
+                conn.commit()
+                return id_reserva
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                conn.close()
 
-            # Descontar stock
-            cur.execute(
-                "UPDATE productos SET stock = stock - ? WHERE nombre = ?",
-                (int(cantidad), producto),
-            )
+        return con_reintentos(_tx)
 
-            new_id = cur.lastrowid
-            conn.commit()
-            return int(new_id)
-        except Exception:
-            conn.rollback()
-            raise
+    @staticmethod
+    def _tomar_reserva(cur, id_reserva: int):
+        cur.execute(
+            """
+            SELECT r.producto_id, r.cantidad, p.nombre
+            FROM reservas_stock r JOIN productos p ON p.id = r.producto_id
+            WHERE r.id = ? AND r.estado = 'activa'
+            """,
+            (int(id_reserva),),
+        )
+        row = cur.fetchone()
+        if not row:
+            raise ValueError(f"Reserva {id_reserva} no existe o ya no está activa.")
+        return row
+
+    @staticmethod
+    def confirmar_reserva(
+        id_reserva: int,
+        cliente: str,
+        precio_unitario_neto: float | Decimal,
+        doc_tipo: Optional[str] = None,
+        fecha: Optional[str] = None,
+    ) -> int:
+        """Convierte la reserva en venta (mismo flujo que crear, usando lo apartado). Devuelve el id de la venta."""
+
+        def _tx() -> int:
+            conn = get_connection()
+            try:
+                cur = conn.cursor()
+                cur.execute("BEGIN IMMEDIATE")
+                producto_id, cantidad, producto = Venta._tomar_reserva(cur, id_reserva)
+                Venta._descontar_stock(cur, producto, cantidad, desde_reserva=cantidad)
+                venta_id = Venta._insertar(
+                    cur, cliente, producto, cantidad, precio_unitario_neto, doc_tipo,
+                    fecha or date.today().isoformat(),
+                )
+                LoteInventario.asignar_a_venta(cur, venta_id, LoteInventario.consumir_fefo(cur, producto_id, cantidad))
+                cur.execute(
+                    "UPDATE reservas_stock SET estado = 'confirmada', venta_id = ? WHERE id = ?",
+                    (venta_id, int(id_reserva)),
+                )
+                conn.commit()
+                return venta_id
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                conn.close()
+
+        return con_reintentos(_tx)
+
+    @staticmethod
+    def liberar_reserva(id_reserva: int) -> None:
+        """Anula la reserva: las unidades vuelven a estar disponibles."""
+
+        def _tx() -> None:
+            conn = get_connection()
+            try:
+                cur = conn.cursor()
+                cur.execute("BEGIN IMMEDIATE")
+                producto_id, cantidad, _ = Venta._tomar_reserva(cur, id_reserva)
+                cur.execute("UPDATE productos SET reservado = reservado - ? WHERE id = ?", (cantidad, producto_id))
+                cur.execute("UPDATE reservas_stock SET estado = 'liberada' WHERE id = ?", (int(id_reserva),))
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                conn.close()
+
+        con_reintentos(_tx)
+
+    @staticmethod
+    def liberar_reservas_vencidas() -> int:
+        """Libera las reservas activas cuya expiración ya pasó. Devuelve cuántas."""
+
+        def _tx() -> int:
+            conn = get_connection()
+            try:
+                cur = conn.cursor()
+                cur.execute("BEGIN IMMEDIATE")
+                n = Venta._liberar_vencidas(cur, datetime.now().isoformat(timespec="seconds"))
+                conn.commit()
+                return n
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                conn.close()
+
+        return con_reintentos(_tx)
+
+    @staticmethod
+    def listar_reservas_activas():
+        """(id, producto, cantidad, referencia, creada, expira) de las reservas activas."""
+        conn = get_connection()
+        try:
+            cur = conn.cursor()
+            cur.execute(Venta._SQL_RESERVAS_ACTIVAS)
+            return cur.fetchall()
         finally:
             conn.close()
 
@@ -222,19 +459,17 @@ class Venta:
         if int(cantidad) <= 0 or float(precio_unitario) < 0:
             raise ValueError("Cantidad y precio deben ser válidos.")
 
+        con_reintentos(lambda: Venta._registrar(cliente, producto, cantidad, precio_unitario, iva))
+
+    @staticmethod
+    def _registrar(cliente, producto, cantidad, precio_unitario, iva) -> None:
         conn = get_connection()
         try:
             cur = conn.cursor()
-            cur.execute("BEGIN")
+            cur.execute("BEGIN IMMEDIATE")
 
-            # Stock
-            cur.execute("SELECT stock FROM productos WHERE nombre = ?", (producto,))
-            fila = cur.fetchone()
-            if not fila:
-                raise ValueError(f"Producto '{producto}' no existe.")
-            stock_actual = int(fila[0] or 0)
-            if int(cantidad) > stock_actual:
-                raise ValueError(f"Stock insuficiente ({stock_actual}) para '{producto}'.")
+            # Stock (descuento condicional; falla si no alcanza)
+            producto_id = Venta._descontar_stock(cur, producto, cantidad)
 
             iva_rate = _to_rate(float(iva))
             neto = _round(_D(precio_unitario) * int(cantidad))
@@ -273,12 +508,10 @@ class Venta:
                     """,
                     (cliente, producto, int(cantidad), float(_round(precio_unitario)), float(_round(iva_rate)), float(total), fecha),
                 )
+            venta_id = cur.lastrowid
 
-            # Descontar stock
-            cur.execute(
-                "UPDATE productos SET stock = stock - ? WHERE nombre = ?",
-                (int(cantidad), producto),
-            )
+            # Lotes (FEFO)
+            LoteInventario.asignar_a_venta(cur, venta_id, LoteInventario.consumir_fefo(cur, producto_id, cantidad))
 
             conn.commit()
         except Exception:
@@ -305,11 +538,17 @@ class Venta:
         if int(cantidad) <= 0 or float(precio_unitario_neto) < 0:
             raise ValueError("Cantidad y precio deben ser válidos.")
 
+        con_reintentos(
+            lambda: Venta._editar_extendido(id_venta, cliente, producto, cantidad, precio_unitario_neto, doc_tipo)
+        )
+
+    @staticmethod
+    def _editar_extendido(id_venta, cliente, producto, cantidad, precio_unitario_neto, doc_tipo) -> None:
         fecha_actual = date.today().isoformat()
         conn = get_connection()
         try:
             cur = conn.cursor()
-            cur.execute("BEGIN")
+            cur.execute("BEGIN IMMEDIATE")
 
             # Reponer stock anterior
             cur.execute("SELECT cantidad, producto FROM ordenes_venta WHERE id = ?", (id_venta,))
@@ -318,15 +557,10 @@ class Venta:
                 raise ValueError(f"Venta con ID {id_venta} no encontrada.")
             cant_prev, prod_prev = prev
             cur.execute("UPDATE productos SET stock = stock + ? WHERE nombre = ?", (int(cant_prev), prod_prev))
+            LoteInventario.devolver_venta(cur, id_venta)
 
-            # Verificar stock del nuevo producto
-            cur.execute("SELECT stock FROM productos WHERE nombre = ?", (producto,))
-            row = cur.fetchone()
-            if not row:
-                raise ValueError(f"Producto '{producto}' no existe.")
-            stock_disp = int(row[0] or 0)
-            if int(cantidad) > stock_disp:
-                raise ValueError(f"Stock insuficiente ({stock_disp}) para '{producto}'.")
+            # Descontar stock del nuevo producto (condicional; falla si no alcanza)
+            producto_id = Venta._descontar_stock(cur, producto, cantidad)
 
             # Calcular de nuevo
             desglose = _desglose_venta(
@@ -380,8 +614,8 @@ class Venta:
                     ),
                 )
 
-            # Descontar stock nuevo
-            cur.execute("UPDATE productos SET stock = stock - ? WHERE nombre = ?", (int(cantidad), producto))
+            # Lotes del nuevo producto (FEFO)
+            LoteInventario.asignar_a_venta(cur, id_venta, LoteInventario.consumir_fefo(cur, producto_id, cantidad))
 
             conn.commit()
         except Exception:
@@ -393,63 +627,38 @@ class Venta:
     # ---------------------------
     # Lecturas y borrado
     # ---------------------------
+    # {cols} = Venta._columnas(conn)
+    _SQL_LISTAR = "SELECT {cols} FROM ordenes_venta ORDER BY id DESC"
+    _SQL_ULTIMA = "SELECT {cols} FROM ordenes_venta WHERE producto = ? ORDER BY id DESC LIMIT 1"
+
     @staticmethod
-    def listar_todas():
+    def listar_todas() -> List[VentaFila]:
         """
-        Si hay esquema extendido, incluye doc_tipo, neto, retención.
+        VentaFila con doc_tipo, neto y retención (NULL si el esquema no está migrado).
         """
         conn = get_connection()
-        cur = conn.cursor()
-        if Venta._extended_schema_enabled(conn):
-            cur.execute(
-                """
-                SELECT id, cliente, producto, cantidad, precio_unitario,
-                       doc_tipo, neto, iva, retencion, total, fecha
-                FROM ordenes_venta
-                ORDER BY id DESC
-                """
-            )
-        else:
-            cur.execute(
-                """
-                SELECT id, cliente, producto, cantidad,
-                       precio_unitario, iva, total, fecha
-                FROM ordenes_venta
-                ORDER BY id DESC
-                """
-            )
+        cur = filas.cursor(conn, VentaFila)
+        cur.execute(Venta._SQL_LISTAR.format(cols=Venta._columnas(conn)))
         rows = cur.fetchall()
         conn.close()
         return rows
 
     @staticmethod
-    def ultima_venta_producto(nombre_producto: str):
+    def iterar_todas(lote: Optional[int] = None) -> Iterator[VentaFila]:
+        """Como listar_todas, en bloques de fetchmany sin cargar la tabla completa."""
         conn = get_connection()
-        cur = conn.cursor()
-        if Venta._extended_schema_enabled(conn):
-            cur.execute(
-                """
-                SELECT id, cliente, producto, cantidad, precio_unitario,
-                       doc_tipo, neto, iva, retencion, total, fecha
-                FROM ordenes_venta
-                WHERE producto = ?
-                ORDER BY id DESC
-                LIMIT 1
-                """,
-                (nombre_producto,),
-            )
-        else:
-            cur.execute(
-                """
-                SELECT id, cliente, producto, cantidad,
-                       precio_unitario, iva, total, fecha
-                FROM ordenes_venta
-                WHERE producto = ?
-                ORDER BY id DESC
-                LIMIT 1
-                """,
-                (nombre_producto,),
-            )
+        try:
+            cur = filas.cursor(conn, VentaFila)
+            cur.execute(Venta._SQL_LISTAR.format(cols=Venta._columnas(conn)))
+            yield from iterar_cursor(cur, lote=lote)
+        finally:
+            conn.close()
+
+    @staticmethod
+    def ultima_venta_producto(nombre_producto: str) -> Optional[VentaFila]:
+        conn = get_connection()
+        cur = filas.cursor(conn, VentaFila)
+        cur.execute(Venta._SQL_ULTIMA.format(cols=Venta._columnas(conn)), (nombre_producto,))
         row = cur.fetchone()
         conn.close()
         return row
@@ -457,12 +666,17 @@ class Venta:
     @staticmethod
     def eliminar(id_venta: int):
         """
-        Elimina una venta y repone stock (transaccional).
+        Elimina una venta y repone stock y lotes (BEGIN IMMEDIATE; reintenta si otra caja
+        mantiene el lock, igual que crear/editar).
         """
+        con_reintentos(lambda: Venta._eliminar(id_venta))
+
+    @staticmethod
+    def _eliminar(id_venta: int) -> None:
         conn = get_connection()
         try:
             cur = conn.cursor()
-            cur.execute("BEGIN")
+            cur.execute("BEGIN IMMEDIATE")
 
             cur.execute("SELECT producto, cantidad FROM ordenes_venta WHERE id = ?", (id_venta,))
             fila = cur.fetchone()
@@ -470,6 +684,7 @@ class Venta:
                 raise ValueError(f"Venta con ID {id_venta} no encontrada.")
             producto, cantidad = fila
 
+            LoteInventario.devolver_venta(cur, id_venta)
             cur.execute("DELETE FROM ordenes_venta WHERE id = ?", (id_venta,))
             cur.execute("UPDATE productos SET stock = stock + ? WHERE nombre = ?", (int(cantidad), producto))
 
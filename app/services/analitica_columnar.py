@@ -0,0 +1,352 @@
+# app/services/analitica_columnar.py
+"""
+Snapshot columnar para analítica (ventas, compras, facturas, movimientos).
+
+Los reportes de varios años recorren miles de tuplas en Python; aquí se vuelcan
+las tablas a columnas NumPy (.npy, una por columna) y los reportes se calculan
+vectorizados (bincount/agrupación por códigos), sin volver a SQLite.
+
+- generar_snapshot(): relee las tablas completas y escribe <BD>/columnar/<tabla>/*.npy.
+  Textos repetidos (cliente, producto, categoría...) se guardan como códigos int32
+  + diccionario (<col>.cats.npy); fechas como datetime64[D] (NaT si vacía).
+  Escritura atómica: se arma en un directorio temporal y se reemplaza al final.
+- snapshot_vigente(max_edad_s): carga el snapshot y lo regenera si falta o está viejo
+  (es el "job" periódico; también: python -m app.services.analitica_columnar).
+  Con al_dia=True también lo regenera si registro_cambios trae cambios en sus tablas
+  posteriores a la versión con que se generó.
+- Snapshot.top_productos / margen_por_categoria / ventas_mensuales_por_cliente.
+
+Requiere NumPy (opcional para el resto de la app). Los datos del snapshot son los
+del momento en que se generó: sirve para analítica, no para saldos en línea.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import shutil
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except Exception:
+    np = None
+
+import app.db.database as database
+from app.services import bus_cambios
+
+VERSION_FORMATO = 1
+
+# tabla -> (SELECT, columnas (nombre, tipo)); tipo: "i8" | "f8" | "cat" | "str" | "fecha"
+_TABLAS: Dict[str, Tuple[str, Tuple[Tuple[str, str], ...]]] = {
+    "ordenes_venta": (
+        """
+        SELECT id, COALESCE(cliente, ''), COALESCE(producto, ''), COALESCE(cantidad, 0),
+               COALESCE(NULLIF(neto, 0), cantidad * precio_unitario, 0), COALESCE(total, 0),
+               COALESCE(doc_tipo, ''), substr(fecha, 1, 10)
+        FROM ordenes_venta ORDER BY id
+        """,
+        (("id", "i8"), ("cliente", "cat"), ("producto", "cat"), ("cantidad", "i8"),
+         ("neto", "f8"), ("total", "f8"), ("doc_tipo", "cat"), ("fecha", "fecha")),
+    ),
+    "compras": (
+        """
+        SELECT id, COALESCE(proveedor, ''), COALESCE(producto, ''), COALESCE(cantidad, 0),
+               COALESCE(NULLIF(neto, 0), cantidad * precio_unitario, 0), COALESCE(total, 0), substr(fecha, 1, 10)
+        FROM compras ORDER BY id
+        """,
+        (("id", "i8"), ("proveedor", "cat"), ("producto", "cat"), ("cantidad", "i8"),
+         ("neto", "f8"), ("total", "f8"), ("fecha", "fecha")),
+    ),
+    "facturas": (
+        """
+        SELECT id, COALESCE(proveedor, ''), COALESCE(tipo, ''), COALESCE(estado, ''),
+               COALESCE(total, monto, 0), substr(fecha, 1, 10), substr(vencimiento, 1, 10)
+        FROM facturas ORDER BY id
+        """,
+        (("id", "i8"), ("tercero", "cat"), ("tipo", "cat"), ("estado", "cat"),
+         ("total", "f8"), ("fecha", "fecha"), ("vencimiento", "fecha")),
+    ),
+    "movimientos_inventario": (
+        """
+        SELECT id, COALESCE(codigo_producto, ''), COALESCE(tipo, ''), COALESCE(cantidad, 0),
+               COALESCE(metodo, ''), substr(fecha, 1, 10)
+        FROM movimientos_inventario ORDER BY id
+        """,
+        (("id", "i8"), ("codigo_producto", "cat"), ("tipo", "cat"), ("cantidad", "i8"),
+         ("metodo", "cat"), ("fecha", "fecha")),
+    ),
+    # Dimensión para cruzar ventas con categoría/costo
+    "productos": (
+        """
+        SELECT id, COALESCE(nombre, ''), COALESCE(categoria, ''), COALESCE(precio_compra, 0)
+        FROM productos ORDER BY id
+        """,
+        (("id", "i8"), ("nombre", "str"), ("categoria", "cat"), ("precio_compra", "f8")),
+    ),
+}
+
+TABLAS = tuple(_TABLAS)
+
+_LOTE_LECTURA = 50_000
+
+
+def _requiere_numpy() -> None:
+    if np is None:
+        raise RuntimeError("La analítica columnar requiere NumPy (pip install numpy).")
+
+
+def directorio_snapshot() -> Path:
+    """<carpeta de la BD>/columnar/<nombre de la BD> (sigue a database.DB_PATH)."""
+    ruta = Path(database.DB_PATH)
+    return ruta.parent / "columnar" / ruta.stem
+
+
+# -------------------------------------------------
+# Generación
+# -------------------------------------------------
+def _a_fechas(valores: List[Optional[str]]):
+    limpios = [v if v else "NaT" for v in valores]
+    try:
+        return np.array(limpios, dtype="datetime64[D]")
+    except ValueError:
+        # Alguna fecha con formato inesperado: se convierte una a una (las inválidas quedan NaT)
+        salida = np.empty(len(limpios), dtype="datetime64[D]")
+        for i, v in enumerate(limpios):
+            try:
+                salida[i] = np.datetime64(v, "D")
+            except ValueError:
+                salida[i] = np.datetime64("NaT")
+        return salida
+
+
+def _columna(tipo: str, valores: List[Any]):
+    """Devuelve {sufijo: arreglo} a guardar para una columna."""
+    if tipo == "i8":
+        return {"": np.array(valores, dtype=np.int64)}
+    if tipo == "f8":
+        return {"": np.array(valores, dtype=np.float64)}
+    if tipo == "fecha":
+        return {"": _a_fechas(valores)}
+    if tipo == "str":
+        return {"": np.array(valores, dtype=str)}
+    cats, codigos = np.unique(np.array(valores, dtype=str), return_inverse=True)
+    return {"": codigos.astype(np.int32), ".cats": cats}
+
+
+def generar_snapshot(destino: Optional[Path] = None) -> Dict[str, int]:
+    """Vuelca las tablas a columnas .npy. Devuelve filas por tabla."""
+    _requiere_numpy()
+    destino = Path(destino) if destino is not None else directorio_snapshot()
+    tmp = destino.with_name(destino.name + ".tmp")
+    shutil.rmtree(tmp, ignore_errors=True)
+    tmp.mkdir(parents=True)
+
+    filas: Dict[str, int] = {}
+    conn = database.get_connection("lote")
+    try:
+        version_cambios = bus_cambios.ultima_version(conn)  # antes de leer: lo posterior lo deja desactualizado
+        for tabla, (sql, columnas) in _TABLAS.items():
+            datos: List[List[Any]] = [[] for _ in columnas]
+            cur = conn.execute(sql)
+            while True:
+                bloque = cur.fetchmany(_LOTE_LECTURA)
+                if not bloque:
+                    break
+                for i, col in enumerate(zip(*bloque)):
+                    datos[i].extend(col)
+            (tmp / tabla).mkdir()
+            for (nombre, tipo), valores in zip(columnas, datos):
+                for sufijo, arr in _columna(tipo, valores).items():
+                    np.save(tmp / tabla / f"{nombre}{sufijo}.npy", arr, allow_pickle=False)
+            filas[tabla] = len(datos[0])
+    finally:
+        conn.close()
+
+    meta = {"version": VERSION_FORMATO, "generado": time.time(), "filas": filas, "version_cambios": version_cambios}
+    (tmp / "meta.json").write_text(json.dumps(meta), encoding="utf-8")
+
+    viejo = destino.with_name(destino.name + ".old")
+    shutil.rmtree(viejo, ignore_errors=True)
+    if destino.exists():
+        destino.rename(viejo)
+    tmp.rename(destino)
+    shutil.rmtree(viejo, ignore_errors=True)
+    return filas
+
+
+# -------------------------------------------------
+# Lectura y reportes
+# -------------------------------------------------
+class Snapshot:
+    """Columnas de un snapshot (cargadas con mmap: solo se lee lo que se usa)."""
+
+    def __init__(self, ruta: Path):
+        self.ruta = Path(ruta)
+        self.meta = json.loads((self.ruta / "meta.json").read_text(encoding="utf-8"))
+        self._cache: Dict[Tuple[str, str], Any] = {}
+
+    @staticmethod
+    def cargar(ruta: Optional[Path] = None) -> "Snapshot":
+        _requiere_numpy()
+        return Snapshot(Path(ruta) if ruta is not None else directorio_snapshot())
+
+    @property
+    def generado(self) -> float:
+        return float(self.meta["generado"])
+
+    def col(self, tabla: str, nombre: str):
+        clave = (tabla, nombre)
+        if clave not in self._cache:
+            self._cache[clave] = np.load(self.ruta / tabla / f"{nombre}.npy", mmap_mode="r", allow_pickle=False)
+        return self._cache[clave]
+
+    def cats(self, tabla: str, nombre: str):
+        return self.col(tabla, f"{nombre}.cats")
+
+    # --- filtros ---
+    def _mascara_fechas(self, tabla: str, desde: Optional[str], hasta: Optional[str]):
+        fechas = self.col(tabla, "fecha")
+        m = np.ones(len(fechas), dtype=bool)
+        if desde:
+            m &= fechas >= np.datetime64(desde, "D")
+        if hasta:
+            m &= fechas <= np.datetime64(hasta, "D")
+        return m
+
+    # --- reportes ---
+    def top_productos(
+        self, n: int = 10, desde: Optional[str] = None, hasta: Optional[str] = None, por: str = "neto"
+    ) -> List[Tuple[str, int, float]]:
+        """[(producto, unidades, neto)] de los n productos con más ventas (por 'neto' o 'cantidad')."""
+        m = self._mascara_fechas("ordenes_venta", desde, hasta)
+        cod = np.asarray(self.col("ordenes_venta", "producto"))[m]
+        nombres = self.cats("ordenes_venta", "producto")
+        unidades = np.bincount(cod, weights=np.asarray(self.col("ordenes_venta", "cantidad"))[m], minlength=len(nombres))
+        neto = np.bincount(cod, weights=np.asarray(self.col("ordenes_venta", "neto"))[m], minlength=len(nombres))
+        clave = unidades if por == "cantidad" else neto
+        n = min(int(n), len(nombres))
+        if n <= 0:
+            return []
+        top = np.argpartition(-clave, n - 1)[:n]
+        top = top[np.argsort(-clave[top], kind="stable")]
+        return [(str(nombres[i]), int(unidades[i]), round(float(neto[i]), 2)) for i in top if unidades[i] or neto[i]]
+
+    def margen_por_categoria(
+        self, desde: Optional[str] = None, hasta: Optional[str] = None
+    ) -> List[Tuple[str, float, float, float, float]]:
+        """
+        [(categoría, ventas_neto, costo, margen, margen_%)] ordenado por margen.
+        Costo = unidades × precio_compra del producto al momento del snapshot.
+        """
+        # producto (código en ventas) -> fila en la dimensión productos; -1 si ya no existe.
+        # El diccionario recorre productos distintos, no ventas.
+        fila_dim = {str(n): i for i, n in enumerate(self.col("productos", "nombre"))}
+        idx_dim = np.array(
+            [fila_dim.get(str(n), -1) for n in self.cats("ordenes_venta", "producto")], dtype=np.int64
+        )
+
+        cats = self.cats("productos", "categoria")
+        sin_cat = len(cats)  # categoría extra para ventas de productos ya eliminados
+        # El índice -1 cae en el valor centinela agregado al final
+        cat_por_prod = np.append(np.asarray(self.col("productos", "categoria")), sin_cat)[idx_dim]
+        costo_por_prod = np.append(np.asarray(self.col("productos", "precio_compra")), 0.0)[idx_dim]
+
+        m = self._mascara_fechas("ordenes_venta", desde, hasta)
+        cod = np.asarray(self.col("ordenes_venta", "producto"))[m]
+        cant = np.asarray(self.col("ordenes_venta", "cantidad"))[m]
+        neto = np.asarray(self.col("ordenes_venta", "neto"))[m]
+        cat = cat_por_prod[cod]
+        ventas = np.bincount(cat, weights=neto, minlength=sin_cat + 1)
+        costo = np.bincount(cat, weights=cant * costo_por_prod[cod], minlength=sin_cat + 1)
+        margen = ventas - costo
+
+        etiquetas = [str(c) or "(sin categoría)" for c in cats] + ["(producto eliminado)"]
+        filas = []
+        for i in np.argsort(-margen, kind="stable"):
+            if ventas[i] == 0 and costo[i] == 0:
+                continue
+            pct = (margen[i] / ventas[i] * 100.0) if ventas[i] else 0.0
+            filas.append((etiquetas[i], round(float(ventas[i]), 2), round(float(costo[i]), 2),
+                          round(float(margen[i]), 2), round(float(pct), 2)))
+        return filas
+
+    def ventas_mensuales_por_cliente(
+        self, desde: Optional[str] = None, hasta: Optional[str] = None, campo: str = "total"
+    ) -> List[Tuple[str, str, float]]:
+        """[(cliente, 'YYYY-MM', monto)] con monto = suma de 'total' (o 'neto'), sin filas vacías."""
+        m = self._mascara_fechas("ordenes_venta", desde, hasta)
+        fechas = np.asarray(self.col("ordenes_venta", "fecha"))[m]
+        validas = ~np.isnat(fechas)
+        fechas = fechas[validas]
+        cli = np.asarray(self.col("ordenes_venta", "cliente"))[m][validas]
+        monto = np.asarray(self.col("ordenes_venta", campo))[m][validas]
+        if not len(fechas):
+            return []
+
+        meses = fechas.astype("datetime64[M]").astype(np.int64)
+        base = int(meses.min())
+        n_meses = int(meses.max()) - base + 1
+        clave = cli.astype(np.int64) * n_meses + (meses - base)
+        suma = np.bincount(clave, weights=monto)
+        presentes = np.flatnonzero(np.bincount(clave))
+
+        clientes = self.cats("ordenes_venta", "cliente")
+        etiquetas_mes = np.datetime_as_string(np.arange(base, base + n_meses).astype("datetime64[M]"), unit="M")
+        return [
+            (str(clientes[k // n_meses]), str(etiquetas_mes[k % n_meses]), round(float(suma[k]), 2))
+            for k in presentes
+        ]
+
+
+def _desactualizado(snap: Snapshot) -> bool:
+    """True si alguna tabla del snapshot cambió después de generarlo."""
+    desde = snap.meta.get("version_cambios")
+    if desde is None:
+        return True
+    conn = database.get_connection()
+    try:
+        return bool(bus_cambios.tablas_cambiadas(conn, int(desde)) & set(TABLAS))
+    finally:
+        conn.close()
+
+
+def snapshot_vigente(max_edad_s: float = 3600.0, al_dia: bool = False) -> Snapshot:
+    """
+    Snapshot actual; lo regenera si no existe o tiene más de max_edad_s segundos
+    (con al_dia=True, también si sus tablas cambiaron desde que se generó).
+    """
+    _requiere_numpy()
+    ruta = directorio_snapshot()
+    try:
+        snap = Snapshot(ruta)
+        if (
+            snap.meta.get("version") == VERSION_FORMATO
+            and time.time() - snap.generado <= max_edad_s
+            and not (al_dia and _desactualizado(snap))
+        ):
+            return snap
+    except (OSError, ValueError, KeyError):
+        pass
+    generar_snapshot(ruta)
+    return Snapshot(ruta)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Genera el snapshot columnar de analítica.")
+    ap.add_argument("--db", type=Path, default=None, help="ruta de la BD (por defecto app/data/negocio.db)")
+    args = ap.parse_args(argv)
+    if args.db is not None:
+        database.DB_PATH = args.db
+    t0 = time.perf_counter()
+    filas = generar_snapshot()
+    print(f"📊 Snapshot en {directorio_snapshot()} ({time.perf_counter() - t0:.2f} s)")
+    for tabla, n in filas.items():
+        print(f"   • {tabla}: {n} filas")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,238 @@
+# app/services/bus_cambios.py
+"""
+Bus de cambios en proceso, alimentado por registro_cambios (triggers en la BD).
+
+- Cada INSERT/UPDATE/DELETE sobre las tablas de TABLAS_CAMBIOS deja una fila
+  (version, tabla, fila, op) en la misma transacción: los cambios de otras cajas o
+  procesos también quedan registrados.
+- sondear() consulta PRAGMA data_version (no toca tablas): solo si otro commit
+  ocurrió lee los cambios nuevos (version > última procesada, por PK).
+- Los cambios se agrupan por tabla como {id: op} (última op de cada fila) y se
+  entregan a los suscriptores: callback(tabla, cambios). 'I'/'U' = releer la fila,
+  'D' = quitarla. cambios=None significa "recargar completo" (demasiados cambios o
+  registro ya podado).
+- Las tablas de referencia (productos, clientes, proveedores, categorías) se
+  reenvían a cache_referencias.invalidar(tabla, ids): su caché y el catálogo en
+  memoria se actualizan también por cambios hechos fuera de los modelos locales.
+- iniciar(widget) sondea cada CDC_SONDEO_MS con widget.after (hilo de Tk).
+
+Uso:
+    bus = bus_cambios.iniciar(ventana)
+    bus.suscribir("productos", self._on_cambios)   # None = todas las tablas
+"""
+
+from __future__ import annotations
+
+import sqlite3
+import weakref
+from typing import Callable, Dict, List, Optional, Set
+
+from app.config import rendimiento
+from app.db.database import TABLAS_CAMBIOS, es_bloqueo, get_connection
+from app.services import cache_referencias
+
+Cambios = Optional[Dict[int, str]]
+Suscriptor = Callable[[str, Cambios], None]
+
+
+# -------------------------------------------------
+# Consultas sobre el registro (también para resúmenes que se regeneran por lote)
+# -------------------------------------------------
+def ultima_version(conn: sqlite3.Connection) -> int:
+    return int(conn.execute("SELECT COALESCE(MAX(version), 0) FROM registro_cambios").fetchone()[0])
+
+
+def tablas_cambiadas(conn: sqlite3.Connection, desde_version: int) -> Set[str]:
+    """Tablas con cambios posteriores a desde_version."""
+    filas = conn.execute(
+        "SELECT DISTINCT tabla FROM registro_cambios WHERE version > ?", (int(desde_version),)
+    ).fetchall()
+    return {t for (t,) in filas}
+
+
+def podar(conn: sqlite3.Connection, conservar: Optional[int] = None) -> int:
+    """Borra los cambios más viejos y deja los últimos `conservar`. Devuelve filas borradas."""
+    conservar = rendimiento.CDC_RETENCION if conservar is None else int(conservar)
+    cur = conn.execute(
+        "DELETE FROM registro_cambios WHERE version <= (SELECT MAX(version) FROM registro_cambios) - ?",
+        (conservar,),
+    )
+    conn.commit()
+    return cur.rowcount
+
+
+def acumular(pendientes: Dict[str, Cambios], tabla: str, cambios: Cambios) -> None:
+    """
+    Suma `cambios` a lo pendiente de `tabla`. None (recargar completo) gana sobre
+    cualquier lista de ids, llegue antes o después.
+    """
+    previos = pendientes.get(tabla, {})
+    if cambios is None or previos is None:
+        pendientes[tabla] = None
+    else:
+        previos.update(cambios)
+        pendientes[tabla] = previos
+
+
+class BusCambios:
+    def __init__(self) -> None:
+        self._conn: Optional[sqlite3.Connection] = None
+        self._data_version: Optional[int] = None
+        self._ultima = 0
+        self._suscriptores: Dict[Optional[str], List[Callable[[], Optional[Suscriptor]]]] = {}
+        self.stats = {"sondeos": 0, "lecturas": 0, "cambios": 0}
+
+    # ---------------------------
+    # Suscripciones (referencias débiles, como cache_referencias)
+    # ---------------------------
+    def suscribir(self, tabla: Optional[str], callback: Suscriptor) -> None:
+        """callback(tabla, cambios) ante cambios en `tabla` (None = cualquier tabla)."""
+        if hasattr(callback, "__self__"):
+            ref: Callable[[], Optional[Suscriptor]] = weakref.WeakMethod(callback)  # type: ignore[arg-type]
+        else:
+            ref = lambda cb=callback: cb  # noqa: E731
+        self._suscriptores.setdefault(tabla, []).append(ref)
+
+    def desuscribir(self, tabla: Optional[str], callback: Suscriptor) -> None:
+        self._suscriptores[tabla] = [r for r in self._suscriptores.get(tabla, []) if r() != callback]
+
+    # ---------------------------
+    # Sondeo
+    # ---------------------------
+    def _conexion(self) -> sqlite3.Connection:
+        # Conexión propia y de solo lectura: data_version cambia con commits de las demás
+        if self._conn is None:
+            self._conn = get_connection()
+            self._conn.execute("PRAGMA busy_timeout = 0")  # la UI no espera locks: podar() reintenta luego
+            self._ultima = ultima_version(self._conn)  # se consume desde ahora
+            self._data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+        return self._conn
+
+    def sondear(self) -> int:
+        """Entrega los cambios nuevos a los suscriptores. Devuelve cuántos cambios leyó."""
+        conn = self._conexion()
+        self.stats["sondeos"] += 1
+        dv = conn.execute("PRAGMA data_version").fetchone()[0]
+        if dv == self._data_version:
+            return 0
+        self._data_version = dv
+        self.stats["lecturas"] += 1
+
+        limite = rendimiento.CDC_MAX_FILAS
+        filas = conn.execute(
+            "SELECT version, tabla, fila, op FROM registro_cambios WHERE version > ? ORDER BY version LIMIT ?",
+            (self._ultima, limite + 1),
+        ).fetchall()
+        if not filas:
+            return 0
+
+        por_tabla: Dict[str, Cambios] = {}
+        if len(filas) > limite or filas[0][0] != self._ultima + 1:
+            # Demasiados cambios o el registro se podó antes de leerlos: recarga completa
+            for t in tablas_cambiadas(conn, self._ultima):
+                por_tabla[t] = None
+            self._ultima = ultima_version(conn)
+        else:
+            for _version, tabla, fila, op in filas:
+                por_tabla.setdefault(tabla, {})[int(fila)] = op  # type: ignore[index]
+            self._ultima = filas[-1][0]
+
+        self.stats["cambios"] += len(filas)
+        self._entregar(por_tabla)
+        if self._ultima % max(1, rendimiento.CDC_RETENCION) < len(filas):
+            self._podar()
+        return len(filas)
+
+    def _entregar(self, por_tabla: Dict[str, Cambios]) -> None:
+        for tabla, cambios in por_tabla.items():
+            for clave in (tabla, None):
+                refs = self._suscriptores.get(clave)
+                if not refs:
+                    continue
+                vivos = []
+                for ref in refs:
+                    cb = ref()
+                    if cb is None:
+                        continue
+                    vivos.append(ref)
+                    try:
+                        cb(tabla, cambios)
+                    except Exception:
+                        pass
+                self._suscriptores[clave] = vivos
+
+    def _podar(self) -> None:
+        """Cada CDC_RETENCION cambios procesados, deja solo los últimos CDC_RETENCION."""
+        try:
+            podar(self._conexion())
+        except sqlite3.OperationalError as e:
+            if not es_bloqueo(e):
+                raise
+            # Otra caja tiene el lock: se poda en la próxima vuelta
+
+    def cerrar(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+# -------------------------------------------------
+# Reenvío a cache_referencias
+# -------------------------------------------------
+def _reenviar_a_referencias(tabla: str, cambios: Cambios) -> None:
+    if tabla in cache_referencias.TABLAS:
+        cache_referencias.invalidar(tabla, ids=None if cambios is None else list(cambios))
+
+
+# -------------------------------------------------
+# Instancia compartida (hilo de Tk)
+# -------------------------------------------------
+_bus: Optional[BusCambios] = None
+_sondeando = False
+
+
+def bus() -> BusCambios:
+    global _bus
+    if _bus is None:
+        _bus = BusCambios()
+        _bus.suscribir(None, _reenviar_a_referencias)
+    return _bus
+
+
+def activo() -> bool:
+    """True si hay un sondeo periódico en marcha (vistas/cachés reciben los cambios solos)."""
+    return _sondeando
+
+
+def iniciar(widget, intervalo_ms: Optional[int] = None) -> BusCambios:
+    """Sondea cada intervalo_ms con widget.after hasta que el widget se destruya."""
+    global _sondeando
+    intervalo = int(rendimiento.CDC_SONDEO_MS if intervalo_ms is None else intervalo_ms)
+    b = bus()
+    b.sondear()  # fija la versión de partida
+
+    def _tick():
+        global _sondeando
+        if _bus is not b:
+            return  # detener() o un iniciar() posterior
+        try:
+            b.sondear()
+        except sqlite3.Error:
+            pass  # BD ocupada o en mantenimiento: se reintenta en el próximo tick
+        try:
+            widget.after(intervalo, _tick)
+        except Exception:
+            _sondeando = False  # widget destruido
+
+    widget.after(intervalo, _tick)
+    _sondeando = True
+    return b
+
+
+def detener() -> None:
+    global _bus, _sondeando
+    _sondeando = False
+    if _bus is not None:
+        _bus.cerrar()
+        _bus = None
+
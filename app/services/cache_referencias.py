@@ -0,0 +1,186 @@
+# app/services/cache_referencias.py
+"""
+Caché en memoria de datos de referencia para combobox/listas
+(productos, clientes, proveedores, categorías).
+
+- Cada tabla tiene un contador de versión que incrementan los métodos de
+  escritura de los modelos (crear/editar/eliminar) vía `invalidar(tabla)`.
+- La lectura es perezosa y solo de las columnas necesarias (id, nombre[, código]);
+  se guarda compacta: ids en array('q'), nombres en tupla.
+- Invalidación incremental: solo se relee la tabla que cambió. Las vistas comparan
+  `version(tabla)` con la última que usaron y no tocan el widget si no cambió.
+- `suscribir(tabla, callback)` avisa a las vistas cuando una tabla cambia
+  (referencia débil: una vista destruida no queda retenida).
+- `suscribir_filas(tabla, callback)` recibe además los ids afectados cuando el modelo
+  los conoce (`invalidar(tabla, ids=...)`); lo usa el catálogo en memoria para
+  actualizar solo esas filas.
+"""
+
+from __future__ import annotations
+
+import threading
+import weakref
+from array import array
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from app.db.database import get_connection
+
+# Consulta de cada tabla: (sql, hay_columna_extra). El orden coincide con listar_todos()/listar().
+_CONSULTAS: Dict[str, Tuple[str, bool]] = {
+    "productos": ("SELECT id, nombre, codigo_interno FROM productos ORDER BY nombre ASC", True),
+    "clientes": ("SELECT id, nombre FROM clientes ORDER BY nombre ASC", False),
+    "proveedores": ("SELECT id, nombre FROM proveedores ORDER BY LOWER(nombre) ASC, id ASC", False),
+    "categorias": ("SELECT id, nombre FROM categorias ORDER BY nombre ASC", False),
+}
+
+TABLAS = tuple(_CONSULTAS)
+
+
+class _Referencia:
+    __slots__ = ("version", "ids", "nombres", "extra", "_por_nombre")
+
+    def __init__(self, version: int, ids: array, nombres: Tuple[str, ...], extra: Optional[Tuple]):
+        self.version = version
+        self.ids = ids
+        self.nombres = nombres
+        self.extra = extra
+        self._por_nombre: Optional[Dict[str, int]] = None
+
+    def por_nombre(self) -> Dict[str, int]:
+        if self._por_nombre is None:
+            # Si hay nombres repetidos, gana el primero (mismo criterio que un combobox)
+            idx: Dict[str, int] = {}
+            for i, n in zip(self.ids, self.nombres):
+                idx.setdefault(n, i)
+            self._por_nombre = idx
+        return self._por_nombre
+
+
+_lock = threading.RLock()
+_versiones: Dict[str, int] = {t: 0 for t in TABLAS}
+_cargadas: Dict[str, _Referencia] = {}
+_suscriptores: Dict[str, List[Callable[[], Optional[Callable[[str], None]]]]] = {t: [] for t in TABLAS}
+_suscriptores_filas: Dict[str, List[Callable[[], Optional[Callable[..., None]]]]] = {t: [] for t in TABLAS}
+
+
+# -------------------------------------------------
+# Carga
+# -------------------------------------------------
+def _cargar(tabla: str) -> _Referencia:
+    with _lock:
+        ref = _cargadas.get(tabla)
+        version = _versiones[tabla]
+        if ref is not None and ref.version == version:
+            return ref
+
+        sql, con_extra = _CONSULTAS[tabla]
+        conn = get_connection()
+        try:
+            filas = conn.execute(sql).fetchall()
+        finally:
+            conn.close()
+
+        ids = array("q", (int(f[0]) for f in filas))
+        nombres = tuple((f[1] or "") for f in filas)
+        extra = tuple(f[2] for f in filas) if con_extra else None
+        ref = _Referencia(version, ids, nombres, extra)
+        _cargadas[tabla] = ref
+        return ref
+
+
+# -------------------------------------------------
+# Lecturas
+# -------------------------------------------------
+def version(tabla: str) -> int:
+    """Versión actual de la tabla (cambia con cada escritura vía modelos)."""
+    return _versiones[tabla]
+
+
+def nombres(tabla: str) -> Tuple[str, ...]:
+    """Nombres en el mismo orden que el listado del modelo."""
+    return _cargar(tabla).nombres
+
+
+def ids(tabla: str) -> array:
+    """Ids alineados con nombres(tabla)."""
+    return _cargar(tabla).ids
+
+
+def id_por_nombre(tabla: str, nombre: str) -> Optional[int]:
+    return _cargar(tabla).por_nombre().get(nombre)
+
+
+def codigos_productos() -> Tuple[Optional[str], ...]:
+    """codigo_interno de cada producto, alineado con nombres('productos')."""
+    return _cargar("productos").extra or ()
+
+
+# -------------------------------------------------
+# Invalidación / suscripciones
+# -------------------------------------------------
+def invalidar(tabla: Optional[str] = None, ids: Optional[Iterable[int]] = None) -> None:
+    """
+    Marca la tabla como modificada (o todas si tabla=None). La próxima lectura relee.
+    Llamado por los métodos de escritura de los modelos tras el commit.
+    `ids`: filas afectadas, si se conocen (None = no se sabe cuáles).
+    """
+    tablas = TABLAS if tabla is None else (tabla,)
+    filas = None if ids is None else tuple(int(i) for i in ids)
+    with _lock:
+        for t in tablas:
+            _versiones[t] += 1
+            _cargadas.pop(t, None)
+        pendientes = {t: list(_suscriptores[t]) for t in tablas}
+        pendientes_filas = {t: list(_suscriptores_filas[t]) for t in tablas}
+
+    # Notificar fuera del lock
+    for t in tablas:
+        for ref in pendientes_filas[t]:
+            cb = ref()
+            if cb is not None:
+                try:
+                    cb(t, filas)
+                except Exception:
+                    pass
+        for ref in pendientes[t]:
+            cb = ref()
+            if cb is None:
+                continue
+            try:
+                cb(t)
+            except Exception:
+                pass
+        with _lock:
+            # Limpia suscriptores cuyas vistas ya no existen
+            _suscriptores[t] = [r for r in _suscriptores[t] if r() is not None]
+            _suscriptores_filas[t] = [r for r in _suscriptores_filas[t] if r() is not None]
+
+
+def _referencia(callback: Callable) -> Callable[[], Optional[Callable]]:
+    if hasattr(callback, "__self__"):
+        return weakref.WeakMethod(callback)  # type: ignore[arg-type]
+    return lambda cb=callback: cb
+
+
+def suscribir(tabla: str, callback: Callable[[str], None]) -> None:
+    """
+    Registra callback(tabla) para cuando la tabla cambie. Con métodos ligados se guarda
+    una referencia débil (la vista puede destruirse sin desuscribirse).
+    """
+    with _lock:
+        _suscriptores[tabla].append(_referencia(callback))
+
+
+def suscribir_filas(tabla: str, callback: Callable[[str, Optional[Tuple[int, ...]]], None]) -> None:
+    """
+    Registra callback(tabla, ids) para cuando la tabla cambie. `ids` son las filas
+    afectadas o None si el cambio no las informa. Se llama antes que los de suscribir().
+    """
+    with _lock:
+        _suscriptores_filas[tabla].append(_referencia(callback))
+
+
+def desuscribir(tabla: str, callback: Callable) -> None:
+    with _lock:
+        _suscriptores[tabla] = [r for r in _suscriptores[tabla] if r() != callback]
+        _suscriptores_filas[tabla] = [r for r in _suscriptores_filas[tabla] if r() != callback]
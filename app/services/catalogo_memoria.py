@@ -0,0 +1,385 @@
+# app/services/catalogo_memoria.py
+"""
+Catálogo de productos en memoria, compacto (struct-of-arrays).
+
+En vez de una tupla de 11 campos por producto (≈ 600 B c/u con sus objetos), cada
+columna vive en un arreglo propio:
+- id y stock en array('q'); precio_compra, precio_venta e iva en array('d')
+  (NaN = NULL).
+- nombre y códigos (casi únicos) en listas de str.
+- categoria, ubicacion y fecha_vencimiento (muy repetidas) como códigos array('i')
+  sobre un pool de textos internados: cada valor distinto se guarda una sola vez.
+- Índices hash: nombre → id y codigo_interno → id. id → posición por búsqueda binaria
+  (los ids se mantienen ordenados; no hace falta otro diccionario).
+
+Se carga una vez (al primer uso) y se mantiene con las notificaciones de
+cache_referencias: Producto.crear/editar/eliminar informan el id y se relee solo esa
+fila. Un cambio sin ids (p. ej. modo remoto) marca el catálogo para recarga completa.
+El stock también lo mueven ventas/compras sin notificar: refrescar_stock() lo relee
+(una columna, sin rearmar el catálogo).
+
+Uso:
+    cat = catalogo()
+    cat.obtener(15)                  # tupla de 11 campos, como Producto.obtener_por_id
+    cat.por_nombre("Azúcar 1kg")
+    cat.listar(nombre="azu", orden="precio_venta", desc=True)
+"""
+
+from __future__ import annotations
+
+import math
+import threading
+from array import array
+from bisect import bisect_left
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except Exception:
+    np = None
+
+from app.db.database import get_connection
+from app.services import cache_referencias
+
+# Mismo orden de campos que Producto.listar_todos()/obtener_por_id()
+CAMPOS: Tuple[str, ...] = (
+    "id", "nombre", "categoria", "precio_compra", "precio_venta", "stock",
+    "codigo_interno", "codigo_externo", "iva", "ubicacion", "fecha_vencimiento",
+)
+_SQL_COLUMNAS = ", ".join(CAMPOS)
+
+_NUMERICOS = ("precio_compra", "precio_venta", "iva")
+_TEXTOS = ("nombre", "codigo_interno", "codigo_externo")
+_POOL = ("categoria", "ubicacion", "fecha_vencimiento")
+
+_LOTE_IDS = 500  # ids por consulta al releer filas puntuales
+
+
+def _num(x: Any) -> float:
+    return math.nan if x is None else float(x)
+
+
+def _de_num(x: float) -> Optional[float]:
+    return None if x != x else x
+
+
+def _contiene(aguja: str) -> Callable[[Optional[str]], bool]:
+    """Coincidencia parcial sin distinguir mayúsculas (como LIKE '%x%')."""
+    aguja = aguja.strip().casefold()
+    return lambda texto: bool(texto) and aguja in texto.casefold()
+
+
+class CatalogoEnMemoria:
+    __slots__ = (
+        "_lock", "_cargado", "version",
+        "_ids", "_stock", "_num", "_txt", "_cod",
+        "_pool", "_pool_idx", "_por_nombre", "_por_codigo", "_orden_nombre",
+        "__weakref__",  # cache_referencias guarda el callback con referencia débil
+    )
+
+    def __init__(self) -> None:
+        self._lock = threading.RLock()
+        self._cargado = False
+        self.version = 0  # sube con cada cambio aplicado (las vistas pueden compararla)
+        self._vaciar()
+
+    def _vaciar(self) -> None:
+        self._ids = array("q")
+        self._stock = array("q")
+        self._num: Dict[str, array] = {c: array("d") for c in _NUMERICOS}
+        self._txt: Dict[str, List[Optional[str]]] = {c: [] for c in _TEXTOS}
+        self._cod: Dict[str, array] = {c: array("i") for c in _POOL}
+        self._pool: List[Optional[str]] = [None]  # código 0 = NULL
+        self._pool_idx: Dict[str, int] = {}
+        self._por_nombre: Dict[str, int] = {}
+        self._por_codigo: Dict[str, int] = {}
+        self._orden_nombre: Optional[array] = None
+
+    # ---------------------------
+    # Carga / actualización
+    # ---------------------------
+    def cargar(self) -> None:
+        """Lee el catálogo completo (una pasada por el cursor, sin fetchall)."""
+        conn = get_connection()
+        try:
+            with self._lock:
+                self._vaciar()
+                for fila in conn.execute(f"SELECT {_SQL_COLUMNAS} FROM productos ORDER BY id"):
+                    self._agregar(len(self._ids), fila)
+                self._cargado = True
+                self.version += 1
+        finally:
+            conn.close()
+
+    def _asegurar(self) -> None:
+        if not self._cargado:
+            with self._lock:
+                if not self._cargado:
+                    self.cargar()
+
+    def _internar(self, texto: Optional[str]) -> int:
+        if texto is None:
+            return 0
+        cod = self._pool_idx.get(texto)
+        if cod is None:
+            cod = len(self._pool)
+            self._pool.append(texto)
+            self._pool_idx[texto] = cod
+        return cod
+
+    def _agregar(self, pos: int, fila: Sequence[Any]) -> None:
+        pid, nombre, categoria, p_compra, p_venta, stock, cod_int, cod_ext, iva, ubic, venc = fila
+        pid = int(pid)
+        self._ids.insert(pos, pid)
+        self._stock.insert(pos, int(stock or 0))
+        self._num["precio_compra"].insert(pos, _num(p_compra))
+        self._num["precio_venta"].insert(pos, _num(p_venta))
+        self._num["iva"].insert(pos, _num(iva))
+        self._txt["nombre"].insert(pos, nombre)
+        self._txt["codigo_interno"].insert(pos, cod_int)
+        self._txt["codigo_externo"].insert(pos, cod_ext)
+        self._cod["categoria"].insert(pos, self._internar(categoria))
+        self._cod["ubicacion"].insert(pos, self._internar(ubic))
+        self._cod["fecha_vencimiento"].insert(pos, self._internar(venc))
+        # Si hay nombres/códigos repetidos, gana el id menor (mismo criterio que cache_referencias)
+        if nombre is not None:
+            self._por_nombre.setdefault(nombre, pid)
+        if cod_int:
+            self._por_codigo.setdefault(cod_int, pid)
+
+    def _quitar(self, pos: int) -> None:
+        pid = self._ids[pos]
+        nombre, cod_int = self._txt["nombre"][pos], self._txt["codigo_interno"][pos]
+        del self._ids[pos]
+        del self._stock[pos]
+        for col in self._num.values():
+            del col[pos]
+        for col in self._txt.values():
+            del col[pos]
+        for col in self._cod.values():
+            del col[pos]
+        if self._por_nombre.get(nombre) == pid:
+            del self._por_nombre[nombre]
+            self._reindexar(self._por_nombre, self._txt["nombre"], nombre)
+        if cod_int and self._por_codigo.get(cod_int) == pid:
+            del self._por_codigo[cod_int]
+            self._reindexar(self._por_codigo, self._txt["codigo_interno"], cod_int)
+
+    def _reindexar(self, indice: Dict[str, int], columna: List[Optional[str]], valor: Optional[str]) -> None:
+        """Tras quitar una fila, otro producto con el mismo nombre/código pasa a ser el indexado."""
+        try:
+            indice[valor] = self._ids[columna.index(valor)]
+        except ValueError:
+            pass
+
+    def _posicion(self, pid: int) -> Optional[int]:
+        pos = bisect_left(self._ids, pid)
+        return pos if pos < len(self._ids) and self._ids[pos] == pid else None
+
+    def aplicar_cambios(self, ids: Iterable[int]) -> None:
+        """Relee solo los ids indicados: inserta, actualiza o quita según lo que haya en la BD."""
+        ids = sorted({int(i) for i in ids})
+        if not ids:
+            return
+        filas: Dict[int, Tuple[Any, ...]] = {}
+        conn = get_connection()
+        try:
+            for i in range(0, len(ids), _LOTE_IDS):
+                lote = ids[i:i + _LOTE_IDS]
+                marcas = ",".join("?" * len(lote))
+                for f in conn.execute(f"SELECT {_SQL_COLUMNAS} FROM productos WHERE id IN ({marcas})", lote):
+                    filas[int(f[0])] = f
+        finally:
+            conn.close()
+
+        with self._lock:
+            for pid in ids:
+                pos = self._posicion(pid)
+                if pos is not None:
+                    self._quitar(pos)
+                if pid in filas:
+                    self._agregar(bisect_left(self._ids, pid), filas[pid])
+            self._orden_nombre = None
+            self.version += 1
+
+    def refrescar_stock(self) -> None:
+        """Relee solo la columna stock (ventas/compras la mueven sin notificar al catálogo)."""
+        if not self._cargado:
+            return self._asegurar()
+        conn = get_connection()
+        try:
+            filas = conn.execute("SELECT id, stock FROM productos ORDER BY id").fetchall()
+        finally:
+            conn.close()
+        with self._lock:
+            if len(filas) != len(self._ids) or any(int(f[0]) != i for f, i in zip(filas, self._ids)):
+                # Hubo altas/bajas fuera de Producto: recarga completa
+                return self.cargar()
+            self._stock = array("q", (int(f[1] or 0) for f in filas))
+            self.version += 1
+
+    def _al_cambiar(self, _tabla: str, ids: Optional[Tuple[int, ...]]) -> None:
+        if not self._cargado:
+            return
+        if ids is None:
+            with self._lock:
+                self._cargado = False  # cambio sin detalle: recarga perezosa
+            return
+        self.aplicar_cambios(ids)
+
+    # ---------------------------
+    # Lecturas puntuales
+    # ---------------------------
+    def __len__(self) -> int:
+        self._asegurar()
+        return len(self._ids)
+
+    def _fila(self, pos: int) -> Tuple[Any, ...]:
+        pool, num, txt, cod = self._pool, self._num, self._txt, self._cod
+        return (
+            self._ids[pos], txt["nombre"][pos], pool[cod["categoria"][pos]],
+            _de_num(num["precio_compra"][pos]), _de_num(num["precio_venta"][pos]), self._stock[pos],
+            txt["codigo_interno"][pos], txt["codigo_externo"][pos], _de_num(num["iva"][pos]),
+            pool[cod["ubicacion"][pos]], pool[cod["fecha_vencimiento"][pos]],
+        )
+
+    def obtener(self, id_producto: int) -> Optional[Tuple[Any, ...]]:
+        """Producto por id como tupla de 11 campos (CAMPOS), o None."""
+        self._asegurar()
+        with self._lock:
+            pos = self._posicion(int(id_producto))
+            return None if pos is None else self._fila(pos)
+
+    def por_nombre(self, nombre: str) -> Optional[Tuple[Any, ...]]:
+        self._asegurar()
+        pid = self._por_nombre.get((nombre or "").strip())
+        return None if pid is None else self.obtener(pid)
+
+    def por_codigo(self, codigo_interno: str) -> Optional[Tuple[Any, ...]]:
+        self._asegurar()
+        pid = self._por_codigo.get((codigo_interno or "").strip())
+        return None if pid is None else self.obtener(pid)
+
+    def precio_venta(self, nombre: str) -> Optional[float]:
+        """Precio de venta neto vigente del producto (None si no existe o no tiene)."""
+        fila = self.por_nombre(nombre)
+        return None if fila is None else fila[4]
+
+    # ---------------------------
+    # Filtros / orden
+    # ---------------------------
+    def _posiciones_pool(self, campo: str, prueba: Callable[[Optional[str]], bool]) -> List[int]:
+        """Evalúa la condición una vez por valor distinto del pool, no por producto."""
+        aceptados = {c for c, v in enumerate(self._pool) if prueba(v)}
+        col = self._cod[campo]
+        if np is not None and col:
+            cods = np.frombuffer(col, dtype=np.int32)
+            return np.flatnonzero(np.isin(cods, list(aceptados))).tolist()
+        return [p for p, c in enumerate(col) if c in aceptados]
+
+    def _clave(self, campo: str) -> Callable[[int], Any]:
+        if campo == "id":
+            return self._ids.__getitem__
+        if campo == "stock":
+            return self._stock.__getitem__
+        if campo in self._num:
+            col = self._num[campo]
+            return lambda p: (col[p] != col[p], col[p])  # NULL al final
+        if campo in self._txt:
+            col = self._txt[campo]
+            return lambda p: col[p] or ""
+        if campo in self._cod:
+            col, pool = self._cod[campo], self._pool
+            return lambda p: pool[col[p]] or ""
+        raise ValueError(f"Campo desconocido: {campo}")
+
+    def _orden_por_nombre(self) -> array:
+        if self._orden_nombre is None:
+            self._orden_nombre = array("i", sorted(range(len(self._ids)), key=self._clave("nombre")))
+        return self._orden_nombre
+
+    def listar(
+        self,
+        nombre: Optional[str] = None,
+        categoria: Optional[str] = None,
+        codigo: Optional[str] = None,
+        vence_hasta: Optional[str] = None,
+        orden: str = "nombre",
+        desc: bool = False,
+        limite: Optional[int] = None,
+    ) -> List[Tuple[Any, ...]]:
+        """
+        Productos filtrados (coincidencia parcial sin mayúsculas en nombre/categoría/código;
+        vence_hasta = fecha_vencimiento <= YYYY-MM-DD) y ordenados por `orden`.
+        Solo se materializan como tuplas las filas devueltas.
+        """
+        self._asegurar()
+        with self._lock:
+            candidatas: Optional[set] = None
+            if categoria:
+                candidatas = set(self._posiciones_pool("categoria", _contiene(categoria)))
+            if vence_hasta:
+                tope = vence_hasta.strip()
+                vencen = self._posiciones_pool("fecha_vencimiento", lambda v: v is not None and v <= tope)
+                candidatas = set(vencen) if candidatas is None else candidatas.intersection(vencen)
+            for campo, valor in (("nombre", nombre), ("codigo_interno", codigo)):
+                if valor:
+                    prueba, col = _contiene(valor), self._txt[campo]
+                    rango = range(len(col)) if candidatas is None else candidatas
+                    candidatas = {p for p in rango if prueba(col[p])}
+
+            if orden == "nombre":
+                posiciones: Iterable[int] = self._orden_por_nombre()
+                if desc:
+                    posiciones = reversed(posiciones)
+                if candidatas is not None:
+                    posiciones = (p for p in posiciones if p in candidatas)
+            else:
+                base = range(len(self._ids)) if candidatas is None else candidatas
+                posiciones = sorted(base, key=self._clave(orden), reverse=desc)
+
+            salida: List[Tuple[Any, ...]] = []
+            for p in posiciones:
+                if limite is not None and len(salida) >= limite:
+                    break
+                salida.append(self._fila(p))
+            return salida
+
+    # ---------------------------
+    # Cálculos sobre columnas
+    # ---------------------------
+    def valor_inventario(self, precio: str = "precio_compra") -> float:
+        """Σ stock × precio (precio_compra o precio_venta); productos sin precio no suman."""
+        if precio not in ("precio_compra", "precio_venta"):
+            raise ValueError("precio debe ser 'precio_compra' o 'precio_venta'.")
+        self._asegurar()
+        with self._lock:
+            stock, precios = self._stock, self._num[precio]
+            if np is not None and stock:
+                total = np.nansum(np.frombuffer(stock, dtype=np.int64) * np.frombuffer(precios, dtype=np.float64))
+                return round(float(total), 2)
+            return round(sum(s * p for s, p in zip(stock, precios) if p == p), 2)
+
+
+# ---------------------------
+# Instancia compartida
+# ---------------------------
+_catalogo: Optional[CatalogoEnMemoria] = None
+_lock = threading.Lock()
+
+
+def catalogo() -> CatalogoEnMemoria:
+    """Catálogo compartido de la app (se carga al primer uso y se suscribe a los cambios)."""
+    global _catalogo
+    with _lock:
+        if _catalogo is None:
+            _catalogo = CatalogoEnMemoria()
+            cache_referencias.suscribir_filas("productos", _catalogo._al_cambiar)
+        return _catalogo
+
+
+def disponible() -> bool:
+    """False en modo multi-terminal: la BD local no es la del servidor."""
+    from app.services import cliente_remoto
+
+    return cliente_remoto.activo() is None
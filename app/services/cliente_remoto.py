@@ -0,0 +1,137 @@
+# app/services/cliente_remoto.py
+"""
+Cliente del servidor local (modo multi-terminal).
+
+- ClienteRemoto(url).llamar("Producto.listar_todos") ejecuta una operación en el servidor.
+- ClienteRemoto(url).lote([("Producto.obtener_por_id", (1,), {}), ...]) manda varias
+  en una sola petición HTTP.
+- activar(url) redirige los métodos expuestos de Producto, Venta, Compra, Finanzas y
+  Factura al servidor: las vistas siguen llamando a los modelos sin cambios.
+  Lo llama main.py si está definida la variable de entorno CN_SERVIDOR_URL (en ese modo
+  la terminal no abre la BD: ni init_db ni verificar_tablas; el esquema es del servidor).
+  Los iterar_X (lectura en flujo) pasan a iterar la respuesta de listar_X: el
+  transporte es una sola respuesta JSON, así que en este modo no hay bloques.
+
+Los errores de negocio (ValueError, etc.) se relanzan con su tipo; si el servidor no
+responde se lanza ConnectionError.
+"""
+
+from __future__ import annotations
+
+import builtins
+import json
+import urllib.error
+import urllib.request
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from app.services import cache_referencias
+from app.services.servidor_local import EXCEPCIONES_TRANSPORTABLES, OPERACIONES, codificar, decodificar
+
+Llamada = Tuple[str, Sequence[Any], Dict[str, Any]]
+
+# Tabla de cache_referencias que invalida una escritura remota de cada modelo
+_TABLA_REFERENCIA = {"Producto": "productos"}
+
+_cliente_activo: Optional["ClienteRemoto"] = None
+
+
+class ClienteRemoto:
+    def __init__(self, url: str, timeout: float = 30.0):
+        self.url = url.rstrip("/")
+        self.timeout = float(timeout)
+
+    def llamar(self, op: str, *args: Any, **kwargs: Any) -> Any:
+        return self.lote([(op, args, kwargs)])[0]
+
+    def lote(self, llamadas: Iterable[Llamada]) -> List[Any]:
+        """Ejecuta varias operaciones en una petición. Lanza la primera excepción encontrada."""
+        cuerpo = {
+            "llamadas": [
+                {"op": op, "args": codificar(list(args)), "kwargs": codificar(dict(kwargs))}
+                for op, args, kwargs in llamadas
+            ]
+        }
+        respuesta = self._post("/rpc", cuerpo)
+        valores: List[Any] = []
+        for r in respuesta["resultados"]:
+            if not r.get("ok"):
+                tipo = r.get("tipo")
+                exc = getattr(builtins, tipo) if tipo in EXCEPCIONES_TRANSPORTABLES else RuntimeError
+                raise exc(r.get("error"))
+            valores.append(decodificar(r.get("valor")))
+        return valores
+
+    def salud(self) -> Dict[str, Any]:
+        try:
+            with urllib.request.urlopen(self.url + "/salud", timeout=self.timeout) as resp:
+                return json.loads(resp.read().decode("utf-8"))
+        except (urllib.error.URLError, OSError) as e:
+            raise ConnectionError(f"Servidor no disponible en {self.url}: {e}") from e
+
+    def _post(self, ruta: str, cuerpo: Dict[str, Any]) -> Dict[str, Any]:
+        datos = json.dumps(cuerpo, ensure_ascii=False).encode("utf-8")
+        pedido = urllib.request.Request(
+            self.url + ruta, data=datos, method="POST",
+            headers={"Content-Type": "application/json; charset=utf-8"},
+        )
+        try:
+            with urllib.request.urlopen(pedido, timeout=self.timeout) as resp:
+                return json.loads(resp.read().decode("utf-8"))
+        except urllib.error.HTTPError as e:
+            raise RuntimeError(f"Servidor respondió {e.code}: {e.read().decode('utf-8', 'replace')}") from e
+        except (urllib.error.URLError, OSError) as e:
+            raise ConnectionError(f"Servidor no disponible en {self.url}: {e}") from e
+
+
+def _proxy(cliente: ClienteRemoto, op: str, tabla: Optional[str]):
+    def metodo(*args, **kwargs):
+        valor = cliente.llamar(op, *args, **kwargs)
+        if tabla is not None:
+            cache_referencias.invalidar(tabla)
+        return valor
+
+    metodo.__name__ = op.split(".", 1)[1]
+    metodo.__qualname__ = op
+    return staticmethod(metodo)
+
+
+def _proxy_flujo(cliente: ClienteRemoto, op: str):
+    def metodo(*args, lote=None, **kwargs):
+        return iter(cliente.llamar(op, *args, **kwargs))
+
+    metodo.__name__ = "iterar_" + op.split(".listar_", 1)[1]
+    metodo.__qualname__ = op
+    return staticmethod(metodo)
+
+
+def activar(url: str) -> ClienteRemoto:
+    """
+    Redirige los métodos expuestos de los modelos al servidor en `url`.
+    Falla con ConnectionError si el servidor no responde.
+    """
+    global _cliente_activo
+    from app.models.compra import Compra
+    from app.models.factura import Factura
+    from app.models.finanzas import Finanzas
+    from app.models.producto import Producto
+    from app.models.venta import Venta
+
+    cliente = ClienteRemoto(url)
+    cliente.salud()
+
+    clases = {"Producto": Producto, "Venta": Venta, "Compra": Compra, "Finanzas": Finanzas, "Factura": Factura}
+    for modelo, (lecturas, escrituras) in OPERACIONES.items():
+        for nombre in lecturas:
+            setattr(clases[modelo], nombre, _proxy(cliente, f"{modelo}.{nombre}", None))
+            flujo = "iterar_" + nombre[len("listar_"):]
+            if nombre.startswith("listar_") and hasattr(clases[modelo], flujo):
+                setattr(clases[modelo], flujo, _proxy_flujo(cliente, f"{modelo}.{nombre}"))
+        for nombre in escrituras:
+            setattr(clases[modelo], nombre, _proxy(cliente, f"{modelo}.{nombre}", _TABLA_REFERENCIA.get(modelo)))
+    _cliente_activo = cliente
+    return cliente
+
+
+def activo() -> Optional[ClienteRemoto]:
+    """Cliente en uso si la app corre en modo multi-terminal; None en modo local."""
+    return _cliente_activo
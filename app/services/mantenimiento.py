@@ -0,0 +1,284 @@
+# app/services/mantenimiento.py
+"""
+Mantenimiento de la BD: estadísticas del planificador, checkpoint del WAL y
+vacuum incremental. Sin esto una instalación de meses se pone lenta: el -wal crece
+sin tope y el planificador no tiene estadísticas de los índices nuevos.
+
+- optimizar(): ANALYZE de los índices que aún no tienen estadísticas
+  (sqlite_stat1) y PRAGMA optimize (acotado con analysis_limit) para el resto.
+- checkpoint(): PRAGMA wal_checkpoint(TRUNCATE) cuando el -wal supera MANT_WAL_MAX_MB.
+  Si un lector lo impide (respaldo en curso, otra caja) queda para la próxima vuelta.
+- migrar_auto_vacuum(): pasa la BD a auto_vacuum=INCREMENTAL (requiere un VACUUM
+  completo: solo automático bajo MANT_VACUUM_MIGRAR_MAX_MB; si no, por línea de comandos).
+- vaciar_incremental(): devuelve al disco hasta MANT_VACUUM_PAGINAS páginas libres por
+  pasada, sin el bloqueo largo de un VACUUM.
+- ejecutar() corre todo (y poda registro_cambios) y devuelve un informe con tamaños
+  antes/después y el tiempo de cada paso; se anota en data/logs/mantenimiento.log.
+- iniciar(widget) lo programa en reposo: tras MANT_REPOSO_MIN minutos sin teclado ni
+  mouse, a lo más una vez cada MANT_INTERVALO_H horas (entre medio, solo checkpoint).
+  Corre en un hilo: la UI no se congela. Sin widget (servidor local), la actividad
+  la marca actividad() en cada petición.
+
+Uso:
+    python -m app.services.mantenimiento                 # todo ahora
+    python -m app.services.mantenimiento --migrar-vacuum # incluye el VACUUM de migración
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from app.config import rendimiento
+import app.db.database as database
+from app.db.database import es_bloqueo
+from app.services import bus_cambios
+
+LOG_PATH = Path(__file__).resolve().parent.parent / "data" / "logs" / "mantenimiento.log"
+
+AUTO_VACUUM_INCREMENTAL = 2
+
+
+# -------------------------------------------------
+# Tamaños
+# -------------------------------------------------
+def tamanos(conn: sqlite3.Connection) -> Dict[str, int]:
+    """Bytes del archivo y del -wal, páginas totales/libres y modo auto_vacuum."""
+    wal = Path(f"{database.DB_PATH}-wal")
+    return {
+        "bd": database.DB_PATH.stat().st_size if database.DB_PATH.exists() else 0,
+        "wal": wal.stat().st_size if wal.exists() else 0,
+        "pagina": int(conn.execute("PRAGMA page_size").fetchone()[0]),
+        "paginas": int(conn.execute("PRAGMA page_count").fetchone()[0]),
+        "libres": int(conn.execute("PRAGMA freelist_count").fetchone()[0]),
+        "auto_vacuum": int(conn.execute("PRAGMA auto_vacuum").fetchone()[0]),
+    }
+
+
+# -------------------------------------------------
+# Pasos
+# -------------------------------------------------
+def optimizar(conn: sqlite3.Connection) -> Dict[str, Any]:
+    """ANALYZE de índices sin estadísticas + PRAGMA optimize acotado."""
+    con_stats = conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'").fetchone() is not None
+    sql = (
+        "SELECT name FROM sqlite_master WHERE type = 'index' AND sql IS NOT NULL"
+        + (" AND name NOT IN (SELECT idx FROM sqlite_stat1 WHERE idx IS NOT NULL)" if con_stats else "")
+    )
+    nuevos = [n for (n,) in conn.execute(sql).fetchall()]
+    if not con_stats:
+        conn.execute("ANALYZE")  # primera vez: todo
+    else:
+        for indice in nuevos:
+            conn.execute(f'ANALYZE "{indice}"')
+    conn.execute(f"PRAGMA analysis_limit = {int(rendimiento.MANT_ANALISIS_LIMITE)}")
+    # 0x10002: revisa todas las tablas (no solo las consultadas por esta conexión)
+    conn.execute("PRAGMA optimize(0x10002)")
+    return {"analizados": len(nuevos), "analyze_completo": not con_stats}
+
+
+def checkpoint(conn: sqlite3.Connection, umbral_mb: Optional[float] = None) -> Dict[str, Any]:
+    """wal_checkpoint(TRUNCATE) si el -wal pasa el umbral. busy=1: un lector lo impidió."""
+    umbral = float(rendimiento.MANT_WAL_MAX_MB if umbral_mb is None else umbral_mb) * 1_048_576
+    wal = Path(f"{database.DB_PATH}-wal")
+    bytes_wal = wal.stat().st_size if wal.exists() else 0
+    if bytes_wal <= umbral:
+        return {"omitido": True, "wal": bytes_wal}
+    busy, marcos, copiados = conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchone()
+    return {"omitido": False, "wal": bytes_wal, "busy": busy, "marcos": marcos, "copiados": copiados}
+
+
+def migrar_auto_vacuum(conn: sqlite3.Connection, forzar: bool = False) -> Dict[str, Any]:
+    """
+    auto_vacuum=INCREMENTAL solo surte efecto tras un VACUUM completo (reescribe el
+    archivo y bloquea escrituras mientras dura). Automático bajo MANT_VACUUM_MIGRAR_MAX_MB.
+    """
+    if int(conn.execute("PRAGMA auto_vacuum").fetchone()[0]) == AUTO_VACUUM_INCREMENTAL:
+        return {"omitido": True, "motivo": "ya incremental"}
+    mb = database.DB_PATH.stat().st_size / 1_048_576 if database.DB_PATH.exists() else 0.0
+    if not forzar and mb > rendimiento.MANT_VACUUM_MIGRAR_MAX_MB:
+        return {"omitido": True, "motivo": f"BD de {mb:.0f} MB: migrar con --migrar-vacuum"}
+    conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+    conn.execute("VACUUM")
+    return {"omitido": False, "mb": round(mb, 1)}
+
+
+def vaciar_incremental(conn: sqlite3.Connection, paginas: Optional[int] = None) -> Dict[str, Any]:
+    """PRAGMA incremental_vacuum(N): libera a lo más N páginas libres por pasada."""
+    if int(conn.execute("PRAGMA auto_vacuum").fetchone()[0]) != AUTO_VACUUM_INCREMENTAL:
+        return {"omitido": True, "motivo": "auto_vacuum no es incremental"}
+    libres = int(conn.execute("PRAGMA freelist_count").fetchone()[0])
+    if not libres:
+        return {"omitido": True, "motivo": "sin páginas libres"}
+    n = max(1, int(rendimiento.MANT_VACUUM_PAGINAS if paginas is None else paginas))
+    # executescript: execute() da un solo paso a un PRAGMA sin columnas (liberaría 1 página)
+    conn.executescript(f"PRAGMA incremental_vacuum({n});")
+    return {"omitido": False, "liberadas": libres - int(conn.execute("PRAGMA freelist_count").fetchone()[0])}
+
+
+# -------------------------------------------------
+# Corrida completa
+# -------------------------------------------------
+def ejecutar(
+    solo_checkpoint: bool = False,
+    migrar_vacuum: bool = False,
+    umbral_wal_mb: Optional[float] = None,
+) -> Dict[str, Any]:
+    """
+    Corre los pasos en orden (podar CDC, optimizar, migrar/vaciar, checkpoint al final
+    para vaciar también lo que escribieron los anteriores). Un paso bloqueado por otra
+    caja se anota y se sigue con el resto. Devuelve el informe.
+    """
+    t0 = time.perf_counter()
+    conn = database.get_connection("lote")
+    conn.isolation_level = None  # VACUUM/PRAGMA fuera de transacciones implícitas
+    pasos: List[Dict[str, Any]] = []
+
+    def _paso(nombre: str, fn: Callable[[], Any]) -> None:
+        t = time.perf_counter()
+        try:
+            detalle = fn()
+        except sqlite3.OperationalError as e:
+            if not es_bloqueo(e):
+                raise
+            detalle = {"omitido": True, "motivo": "BD ocupada"}
+        pasos.append({"paso": nombre, "ms": round((time.perf_counter() - t) * 1000, 1), "detalle": detalle})
+
+    try:
+        antes = tamanos(conn)
+        if not solo_checkpoint:
+            _paso("podar_cambios", lambda: {"borradas": bus_cambios.podar(conn)})
+            _paso("optimizar", lambda: optimizar(conn))
+            _paso("migrar_auto_vacuum", lambda: migrar_auto_vacuum(conn, forzar=migrar_vacuum))
+            _paso("vacuum_incremental", lambda: vaciar_incremental(conn))
+        _paso("checkpoint", lambda: checkpoint(conn, umbral_wal_mb))
+        despues = tamanos(conn)
+    finally:
+        conn.close()
+
+    informe = {"antes": antes, "despues": despues, "pasos": pasos,
+               "ms": round((time.perf_counter() - t0) * 1000, 1)}
+    if not solo_checkpoint or not pasos[-1]["detalle"].get("omitido"):
+        _log().info(texto(informe).replace("\n", " | "))
+    return informe
+
+
+def texto(informe: Dict[str, Any]) -> str:
+    """Informe en líneas legibles (CLI / log)."""
+    a, d = informe["antes"], informe["despues"]
+    mb = lambda n: f"{n / 1_048_576:.1f} MB"  # noqa: E731
+    lineas = [
+        f"BD {mb(a['bd'])} -> {mb(d['bd'])}, WAL {mb(a['wal'])} -> {mb(d['wal'])}, "
+        f"páginas libres {a['libres']} -> {d['libres']} ({informe['ms']:.0f} ms)"
+    ]
+    for p in informe["pasos"]:
+        lineas.append(f"{p['paso']}: {p['ms']:.0f} ms {p['detalle']}")
+    return "\n".join(lineas)
+
+
+_logger: Optional[logging.Logger] = None
+
+
+def _log() -> logging.Logger:
+    global _logger
+    if _logger is None:
+        logger = logging.getLogger("control_negocio.mantenimiento")
+        logger.propagate = False
+        if not logger.handlers:
+            LOG_PATH.parent.mkdir(parents=True, exist_ok=True)
+            handler = logging.FileHandler(LOG_PATH, encoding="utf-8")
+            handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+            logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+        _logger = logger
+    return _logger
+
+
+# -------------------------------------------------
+# Programación en reposo (hilo de fondo)
+# -------------------------------------------------
+class Programador:
+    def __init__(self) -> None:
+        self._actividad = time.monotonic()
+        self._ultima_completa: Optional[float] = None
+        self.ultimo: Optional[Dict[str, Any]] = None
+        self._parar = threading.Event()
+        self._hilo = threading.Thread(target=self._trabajar, name="mantenimiento", daemon=True)
+        self._hilo.start()
+
+    def actividad(self, _event=None) -> None:
+        """El usuario (o una terminal remota) hizo algo: posterga el mantenimiento."""
+        self._actividad = time.monotonic()
+
+    def _trabajar(self) -> None:
+        while not self._parar.wait(rendimiento.MANT_SONDEO_S):
+            ahora = time.monotonic()
+            if ahora - self._actividad < rendimiento.MANT_REPOSO_MIN * 60.0:
+                continue
+            completa = (self._ultima_completa is None
+                        or ahora - self._ultima_completa >= rendimiento.MANT_INTERVALO_H * 3600.0)
+            try:
+                self.ultimo = ejecutar(solo_checkpoint=not completa)
+            except (sqlite3.Error, OSError):
+                continue  # BD en restauración, disco lleno...: se reintenta en la próxima vuelta
+            if completa:
+                self._ultima_completa = time.monotonic()
+
+    def detener(self, timeout: Optional[float] = 10.0) -> None:
+        self._parar.set()
+        self._hilo.join(timeout)
+
+
+_programador: Optional[Programador] = None
+
+
+def iniciar(widget=None) -> Optional[Programador]:
+    """Programa el mantenimiento en reposo (si MANT_ACTIVO). Con widget, teclado/mouse marcan actividad."""
+    global _programador
+    if _programador is None and rendimiento.MANT_ACTIVO:
+        _programador = Programador()
+        if widget is not None:
+            for evento in ("<Any-KeyPress>", "<Any-ButtonPress>"):
+                widget.bind_all(evento, _programador.actividad, add="+")
+    return _programador
+
+
+def actividad() -> None:
+    if _programador is not None:
+        _programador.actividad()
+
+
+def detener() -> None:
+    global _programador
+    actual, _programador = _programador, None
+    if actual is not None:
+        actual.detener()
+
+
+# -------------------------------------------------
+# Línea de comandos
+# -------------------------------------------------
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Mantenimiento de la BD de Control de Negocio.")
+    ap.add_argument("--db", type=Path, default=None, help="ruta de la BD (por defecto app/data/negocio.db)")
+    ap.add_argument("--migrar-vacuum", action="store_true", help="VACUUM a auto_vacuum=INCREMENTAL aunque la BD sea grande")
+    ap.add_argument("--checkpoint", action="store_true", help="solo checkpoint del WAL (sin umbral)")
+    args = ap.parse_args(argv)
+
+    if args.db is not None:
+        database.DB_PATH = args.db
+    if args.checkpoint:
+        informe = ejecutar(solo_checkpoint=True, umbral_wal_mb=0)
+    else:
+        informe = ejecutar(migrar_vacuum=args.migrar_vacuum)
+    print(texto(informe))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
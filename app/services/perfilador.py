@@ -0,0 +1,401 @@
+# app/services/perfilador.py
+"""
+Perfilador de la UI: cuánto tarda cada acción del usuario y en qué se va el tiempo.
+
+- accion(nombre): context manager que mide una acción (abrir una vista, refrescarla
+  por el bus de cambios, un clic). Registra:
+    total_ms   tiempo de pared (sin contar diálogos modales: messagebox pausa el reloj)
+    modelo_ms  tiempo dentro de métodos públicos de app/models (SQL + Python del modelo)
+    render_ms  el resto: construir/llenar widgets y el layout de Tk (update_idletasks)
+    consultas  sentencias SQLite ejecutadas en el hilo de Tk (instrumentacion.activar_conteo);
+               las de otros hilos (bus, cola de escritura, respaldo) no se cuentan
+    rss_mb     RSS pico del proceso al terminar
+  Las acciones anidadas (clic -> abrir vista) se registran por separado y suman
+  también en la externa.
+- activar()/desactivar(): envuelve los métodos estáticos de los modelos para medir
+  modelo_ms (como cliente_remoto reemplaza métodos por proxies); apagado, accion()
+  no hace nada.
+- capturar_siguiente(): la próxima acción corre bajo cProfile + tracemalloc y deja
+  perfil_<accion>_<fecha>.prof (abrir con pstats/snakeviz) y un .json con las
+  funciones y líneas que más asignaron.
+- volcar_json(): resumen por acción (n, prom, máx) + últimas acciones, para adjuntar
+  a un reporte de lentitud.
+
+Se activa con CN_PERFIL=1 o con F12 en la ventana principal.
+"""
+
+from __future__ import annotations
+
+import cProfile
+import io
+import json
+import pstats
+import re
+import sys
+import threading
+import time
+import tracemalloc
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, Tuple
+
+from app.config import rendimiento
+from app.db import instrumentacion
+
+LOG_DIR = Path(__file__).resolve().parent.parent / "data" / "logs"
+
+_MODULOS_MODELOS = (
+    "analitica_ventas", "categoria", "cliente", "compra", "costo_promedio", "factura",
+    "finanzas", "ingreso_inventario", "inventario", "lote_inventario",
+    "movimiento_inventario", "producto", "proveedor", "venta",
+)
+
+
+class Medicion:
+    __slots__ = ("accion", "inicio", "total_ms", "modelo_ms", "pausa_ms", "consultas", "rss_mb",
+                 "_t0", "_sql0")
+
+    def __init__(self, accion: str):
+        self.accion = accion
+        self.inicio = datetime.now().isoformat(timespec="seconds")
+        self.total_ms = 0.0
+        self.modelo_ms = 0.0
+        self.pausa_ms = 0.0
+        self.consultas = 0
+        self.rss_mb: Optional[float] = None
+        self._t0 = time.perf_counter()
+        self._sql0 = instrumentacion.sentencias_del_hilo()
+
+    @property
+    def render_ms(self) -> float:
+        return max(0.0, self.total_ms - self.modelo_ms)
+
+    def como_dict(self) -> Dict[str, Any]:
+        return {
+            "accion": self.accion,
+            "inicio": self.inicio,
+            "total_ms": round(self.total_ms, 2),
+            "modelo_ms": round(self.modelo_ms, 2),
+            "render_ms": round(self.render_ms, 2),
+            "consultas": self.consultas,
+            "rss_mb": None if self.rss_mb is None else round(self.rss_mb, 1),
+        }
+
+    def texto(self) -> str:
+        """Línea para la barra de estado."""
+        rss = "" if self.rss_mb is None else f" · RSS pico {self.rss_mb:.0f} MB"
+        return (
+            f"⏱ {self.accion}: {self.total_ms:.0f} ms "
+            f"(modelo {self.modelo_ms:.0f} · render {self.render_ms:.0f}) · "
+            f"{self.consultas} SQL{rss}"
+        )
+
+
+# -------------------------------------------------
+# Memoria
+# -------------------------------------------------
+def pico_rss_mb() -> Optional[float]:
+    """RSS pico del proceso en MB (None si la plataforma no lo informa)."""
+    try:
+        import resource
+    except ImportError:
+        resource = None  # type: ignore[assignment]
+    if resource is not None:
+        pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return pico / (1024 * 1024) if sys.platform == "darwin" else pico / 1024  # macOS: bytes
+    if sys.platform == "win32":
+        try:
+            import ctypes
+            from ctypes import wintypes
+
+            class _Contadores(ctypes.Structure):
+                _fields_ = [
+                    ("cb", wintypes.DWORD), ("PageFaultCount", wintypes.DWORD),
+                    ("PeakWorkingSetSize", ctypes.c_size_t), ("WorkingSetSize", ctypes.c_size_t),
+                    ("QuotaPeakPagedPoolUsage", ctypes.c_size_t), ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                    ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t), ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                    ("PagefileUsage", ctypes.c_size_t), ("PeakPagefileUsage", ctypes.c_size_t),
+                ]
+
+            c = _Contadores()
+            c.cb = ctypes.sizeof(_Contadores)
+            kernel32 = ctypes.WinDLL("kernel32")
+            kernel32.GetCurrentProcess.restype = wintypes.HANDLE
+            if ctypes.WinDLL("psapi").GetProcessMemoryInfo(kernel32.GetCurrentProcess(), ctypes.byref(c), c.cb):
+                return c.PeakWorkingSetSize / (1024 * 1024)
+        except Exception:
+            pass
+    return None
+
+
+# -------------------------------------------------
+# Estado (las acciones se miden en el hilo de Tk)
+# -------------------------------------------------
+_estado: Dict[str, Any] = {
+    "activo": False,
+    "capturar": False,
+    "hilo": None,          # ident del hilo que mide (el de Tk)
+}
+_pila: List[Medicion] = []                   # acciones abiertas (anidadas)
+_ultimas: Deque[Medicion] = deque(maxlen=max(1, rendimiento.PERFIL_HISTORIAL))
+_agregado: Dict[str, List[float]] = {}       # accion -> [n, total_ms, max_ms, modelo_ms, consultas]
+_originales: List[Tuple[type, str, Any]] = []
+_profundidad_modelo = [0]
+_oyentes: List[Callable[[Medicion], None]] = []
+_messagebox_show: Optional[Callable[..., Any]] = None
+
+
+def activo() -> bool:
+    return bool(_estado["activo"])
+
+
+def activar() -> None:
+    """Empieza a medir: conteo de sentencias, modelos envueltos, diálogos pausan el reloj."""
+    if _estado["activo"]:
+        return
+    _estado["activo"] = True
+    _estado["hilo"] = threading.get_ident()
+    instrumentacion.activar_conteo()
+    _envolver_modelos()
+    _pausar_en_dialogos()
+
+
+def desactivar() -> None:
+    if not _estado["activo"]:
+        return
+    _estado["activo"] = False
+    instrumentacion.desactivar_conteo()
+    _restaurar_modelos()
+    _restaurar_dialogos()
+    _pila.clear()
+
+
+def alternar() -> bool:
+    (desactivar if activo() else activar)()
+    return activo()
+
+
+def al_medir(callback: Callable[[Medicion], None]) -> None:
+    """callback(medicion) al cerrar cada acción externa (ej: actualizar la barra de estado)."""
+    _oyentes.append(callback)
+
+
+def reiniciar() -> None:
+    _ultimas.clear()
+    _agregado.clear()
+
+
+# -------------------------------------------------
+# Medición
+# -------------------------------------------------
+@contextmanager
+def accion(nombre: str) -> Iterator[Optional[Medicion]]:
+    if not _estado["activo"] or threading.get_ident() != _estado["hilo"]:
+        yield None
+        return
+
+    captura = _iniciar_captura() if _estado["capturar"] and not _pila else None
+    m = Medicion(nombre)
+    _pila.append(m)
+    try:
+        yield m
+    finally:
+        m.total_ms = (time.perf_counter() - m._t0) * 1000.0 - m.pausa_ms
+        m.consultas = instrumentacion.sentencias_del_hilo() - m._sql0
+        m.rss_mb = pico_rss_mb()
+        if _pila and _pila[-1] is m:
+            _pila.pop()
+        _registrar(m)
+        if captura is not None:
+            _terminar_captura(captura, m)
+        if not _pila:
+            for cb in list(_oyentes):
+                try:
+                    cb(m)
+                except Exception:
+                    pass
+
+
+def _registrar(m: Medicion) -> None:
+    _ultimas.append(m)
+    a = _agregado.setdefault(m.accion, [0, 0.0, 0.0, 0.0, 0])
+    a[0] += 1
+    a[1] += m.total_ms
+    a[2] = max(a[2], m.total_ms)
+    a[3] += m.modelo_ms
+    a[4] += m.consultas
+
+
+@contextmanager
+def pausa() -> Iterator[None]:
+    """Tiempo que no es de la app (diálogo modal esperando al usuario)."""
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        ms = (time.perf_counter() - t0) * 1000.0
+        for m in _pila:
+            m.pausa_ms += ms
+
+
+# -------------------------------------------------
+# Modelos envueltos (tiempo de modelo)
+# -------------------------------------------------
+def _medir_modelo(fn: Callable[..., Any]) -> Callable[..., Any]:
+    def envuelto(*args, **kwargs):
+        if not _pila or _profundidad_modelo[0] or threading.get_ident() != _estado["hilo"]:
+            return fn(*args, **kwargs)  # anidado u otro hilo: lo cuenta la llamada externa
+        _profundidad_modelo[0] += 1
+        t0 = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _profundidad_modelo[0] -= 1
+            ms = (time.perf_counter() - t0) * 1000.0
+            for m in _pila:
+                m.modelo_ms += ms
+
+    envuelto.__name__ = getattr(fn, "__name__", "envuelto")
+    envuelto.__qualname__ = getattr(fn, "__qualname__", envuelto.__name__)
+    envuelto.__doc__ = getattr(fn, "__doc__", None)
+    envuelto.__wrapped__ = fn  # type: ignore[attr-defined]
+    return envuelto
+
+
+def _envolver_modelos() -> None:
+    import importlib
+
+    for nombre_mod in _MODULOS_MODELOS:
+        try:
+            mod = importlib.import_module(f"app.models.{nombre_mod}")
+        except Exception:
+            continue
+        for cls in list(vars(mod).values()):
+            if not isinstance(cls, type) or cls.__module__ != mod.__name__:
+                continue
+            for nombre, attr in list(vars(cls).items()):
+                if nombre.startswith("_") or not isinstance(attr, staticmethod):
+                    continue
+                _originales.append((cls, nombre, attr))
+                setattr(cls, nombre, staticmethod(_medir_modelo(attr.__func__)))
+
+
+def _restaurar_modelos() -> None:
+    while _originales:
+        cls, nombre, attr = _originales.pop()
+        setattr(cls, nombre, attr)
+
+
+def _pausar_en_dialogos() -> None:
+    global _messagebox_show
+    try:
+        from tkinter import messagebox
+    except Exception:
+        return
+    original = messagebox._show  # showinfo/showerror/askyesno... pasan por aquí
+
+    def _show(*args, **kwargs):
+        with pausa():
+            return original(*args, **kwargs)
+
+    _messagebox_show = original
+    messagebox._show = _show
+
+
+def _restaurar_dialogos() -> None:
+    global _messagebox_show
+    if _messagebox_show is not None:
+        from tkinter import messagebox
+
+        messagebox._show = _messagebox_show
+        _messagebox_show = None
+
+
+# -------------------------------------------------
+# Captura detallada (una acción)
+# -------------------------------------------------
+def capturar_siguiente() -> None:
+    """La próxima acción externa se perfila con cProfile y tracemalloc."""
+    _estado["capturar"] = True
+
+
+def captura_pendiente() -> bool:
+    return bool(_estado["capturar"])
+
+
+def _iniciar_captura() -> Tuple[cProfile.Profile, bool]:
+    _estado["capturar"] = False
+    ya_trazaba = tracemalloc.is_tracing()
+    if not ya_trazaba:
+        tracemalloc.start(10)
+    prof = cProfile.Profile()
+    prof.enable()
+    return prof, ya_trazaba
+
+
+def _terminar_captura(captura: Tuple[cProfile.Profile, bool], m: Medicion) -> None:
+    prof, ya_trazaba = captura
+    prof.disable()
+    instantanea = tracemalloc.take_snapshot()
+    _, pico = tracemalloc.get_traced_memory()
+    if not ya_trazaba:
+        tracemalloc.stop()
+
+    top = max(1, rendimiento.PERFIL_CAPTURA_TOP)
+    base = LOG_DIR / f"perfil_{_nombre_archivo(m.accion)}_{datetime.now():%Y%m%d_%H%M%S}"
+    LOG_DIR.mkdir(parents=True, exist_ok=True)
+    prof.dump_stats(str(base.with_suffix(".prof")))
+
+    salida = io.StringIO()
+    pstats.Stats(prof, stream=salida).sort_stats("cumulative").print_stats(top)
+    asignaciones = [
+        {"linea": str(st.traceback[0]), "kb": round(st.size / 1024, 1), "bloques": st.count}
+        for st in instantanea.statistics("lineno")[:top]
+    ]
+    resumen = {
+        "medicion": m.como_dict(),
+        "tracemalloc_pico_kb": round(pico / 1024, 1),
+        "asignaciones": asignaciones,
+        "cprofile": salida.getvalue().splitlines(),
+    }
+    base.with_suffix(".json").write_text(json.dumps(resumen, ensure_ascii=False, indent=2), encoding="utf-8")
+
+
+def _nombre_archivo(texto: str) -> str:
+    return re.sub(r"[^\w]+", "_", texto, flags=re.UNICODE).strip("_")[:40] or "accion"
+
+
+# -------------------------------------------------
+# Resumen / volcado
+# -------------------------------------------------
+def resumen() -> List[Dict[str, Any]]:
+    """Por acción: n, prom_ms, max_ms, modelo_prom_ms, consultas_prom. Orden: tiempo total."""
+    filas = []
+    for nombre, (n, total, maximo, modelo, consultas) in _agregado.items():
+        filas.append({
+            "accion": nombre,
+            "n": int(n),
+            "total_ms": round(total, 2),
+            "prom_ms": round(total / n, 2) if n else 0.0,
+            "max_ms": round(maximo, 2),
+            "modelo_prom_ms": round(modelo / n, 2) if n else 0.0,
+            "consultas_prom": round(consultas / n, 1) if n else 0.0,
+        })
+    filas.sort(key=lambda d: d["total_ms"], reverse=True)
+    return filas
+
+
+def volcar_json(ruta: Optional[Path] = None) -> Path:
+    """Escribe resumen + últimas acciones. Devuelve la ruta usada."""
+    ruta = Path(ruta) if ruta is not None else LOG_DIR / f"perfil_{datetime.now():%Y%m%d_%H%M%S}.json"
+    ruta.parent.mkdir(parents=True, exist_ok=True)
+    datos = {
+        "generado": datetime.now().isoformat(timespec="seconds"),
+        "pico_rss_mb": pico_rss_mb(),
+        "acciones": resumen(),
+        "ultimas": [m.como_dict() for m in _ultimas],
+    }
+    ruta.write_text(json.dumps(datos, ensure_ascii=False, indent=2), encoding="utf-8")
+    return ruta
@@ -0,0 +1,344 @@
+# app/services/respaldo.py
+"""
+Respaldos en caliente de la BD con la API de backup de SQLite.
+
+Copiar negocio.db con el explorador mientras la app corre (WAL activo) puede dejar
+un respaldo corrupto, y una copia completa de golpe congela la app.
+
+- respaldar(): copia la BD a app/data/respaldos con Connection.backup, de a
+  RESPALDO_PAGINAS páginas y una pausa de RESPALDO_PAUSA_MS entre pasos. El hilo de
+  la UI sigue libre (backup_step suelta el GIL) y las ventas no esperan: en WAL los
+  escritores no se bloquean por lectores.
+- La copia se toma dentro de una transacción de lectura: es la foto de un instante.
+  Sin ella, cada commit de otra caja reinicia el backup desde la primera página y en
+  una BD grande y ocupada no terminaría nunca.
+- Respaldos incrementales por tiempo: el nombre lleva la versión de registro_cambios
+  (negocio_AAAAMMDD_HHMMSS_v<versión>.db). Si no hubo cambios desde el último, no se
+  copia nada.
+- Cada respaldo queda en un solo archivo (journal_mode=DELETE), se verifica con
+  PRAGMA integrity_check y recién entonces se renombra desde .parcial.
+- Retención: los últimos RESPALDO_CONSERVAR respaldos, más el último de cada día
+  durante RESPALDO_CONSERVAR_DIAS días.
+- iniciar() deja un hilo que respalda cada RESPALDO_INTERVALO_MIN minutos;
+  iniciar_app/servidor_local lo llaman y detener() lo corta al salir.
+- restaurar(ruta): verifica el respaldo, respalda el estado actual (etiqueta
+  "antes_restaurar") y lo copia sobre la BD. Con la app cerrada.
+
+Uso:
+    python -m app.services.respaldo                      # respaldo ahora
+    python -m app.services.respaldo --listar
+    python -m app.services.respaldo --verificar app/data/respaldos/negocio_..._v120.db
+    python -m app.services.respaldo --restaurar app/data/respaldos/negocio_..._v120.db
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from app.config import rendimiento
+import app.db.database as database
+
+_NOMBRE = re.compile(r"^negocio_(\d{8})_(\d{6})(?:_v(\d+))?(?:_([a-z_]+))?\.db$")
+
+
+class RespaldoCancelado(Exception):
+    """detener() pidió cortar un respaldo en curso."""
+
+
+# -------------------------------------------------
+# Rutas y listado
+# -------------------------------------------------
+def carpeta() -> Path:
+    """Carpeta de respaldos (junto a la BD vigente)."""
+    return database.DB_PATH.parent / "respaldos"
+
+
+def listar() -> List[Path]:
+    """Respaldos terminados, del más nuevo al más viejo."""
+    destino = carpeta()
+    if not destino.exists():
+        return []
+    return sorted((p for p in destino.iterdir() if _NOMBRE.match(p.name)), key=lambda p: p.name, reverse=True)
+
+
+def _version(ruta: Path) -> Optional[int]:
+    m = _NOMBRE.match(ruta.name)
+    return int(m.group(3)) if m and m.group(3) is not None else None
+
+
+def _version_actual(conn: sqlite3.Connection) -> Optional[int]:
+    try:
+        return int(conn.execute("SELECT COALESCE(MAX(version), 0) FROM registro_cambios").fetchone()[0])
+    except sqlite3.OperationalError:
+        return None  # BD sin registro_cambios: se respalda siempre
+
+
+# -------------------------------------------------
+# Verificación
+# -------------------------------------------------
+def verificar(ruta: Path) -> List[str]:
+    """PRAGMA integrity_check del archivo (solo lectura). Lista vacía = íntegro."""
+    ruta = Path(ruta)
+    if not ruta.exists():
+        return [f"No existe: {ruta}"]
+    conn = sqlite3.connect(f"{ruta.resolve().as_uri()}?mode=ro", uri=True)
+    try:
+        filas = conn.execute("PRAGMA integrity_check").fetchall()
+    except sqlite3.DatabaseError as e:
+        return [str(e)]
+    finally:
+        conn.close()
+    errores = [str(f[0]) for f in filas]
+    return [] if errores == ["ok"] else errores
+
+
+# -------------------------------------------------
+# Respaldo
+# -------------------------------------------------
+def respaldar(
+    forzar: bool = False,
+    etiqueta: Optional[str] = None,
+    paginas: Optional[int] = None,
+    pausa_ms: Optional[float] = None,
+    cancelar: Optional[threading.Event] = None,
+) -> Dict[str, Any]:
+    """
+    Toma un respaldo de la BD vigente. Devuelve un resumen:
+    {"ruta", "omitido", "version", "paginas", "bytes", "segundos", "errores"}.
+    Sin cambios desde el último respaldo (y sin forzar) no copia: "omitido" = True.
+    """
+    paginas = max(1, int(rendimiento.RESPALDO_PAGINAS if paginas is None else paginas))
+    pausa = max(0.0, float(rendimiento.RESPALDO_PAUSA_MS if pausa_ms is None else pausa_ms)) / 1000.0
+    destino = carpeta()
+    destino.mkdir(parents=True, exist_ok=True)
+
+    t0 = time.perf_counter()
+    origen = database.get_connection("lote")
+    try:
+        origen.isolation_level = None
+        # Transacción de lectura: foto consistente aunque otras cajas sigan escribiendo
+        origen.execute("BEGIN")
+        version = _version_actual(origen)
+        ultimos = listar()
+        if not forzar and version is not None and ultimos and _version(ultimos[0]) == version:
+            origen.execute("COMMIT")
+            return {"ruta": ultimos[0], "omitido": True, "version": version, "paginas": 0,
+                    "bytes": 0, "segundos": time.perf_counter() - t0, "errores": []}
+
+        nombre = f"negocio_{datetime.now():%Y%m%d_%H%M%S}"
+        if version is not None:
+            nombre += f"_v{version}"
+        if etiqueta:
+            nombre += f"_{etiqueta}"
+        final = destino / f"{nombre}.db"
+        parcial = final.with_suffix(".db.parcial")
+
+        total = [0]
+
+        def _progreso(_estado: int, restantes: int, paginas_total: int) -> None:
+            total[0] = paginas_total
+            if cancelar is not None and cancelar.is_set():
+                raise RespaldoCancelado()
+            if restantes and pausa:
+                time.sleep(pausa)  # cede disco y CPU a la app entre pasos
+
+        copia = sqlite3.connect(parcial)
+        try:
+            origen.backup(copia, pages=paginas, progress=_progreso)
+            copia.execute("PRAGMA journal_mode = DELETE")  # un solo archivo, sin -wal
+        except BaseException:
+            copia.close()
+            parcial.unlink(missing_ok=True)
+            raise
+        else:
+            copia.close()
+        finally:
+            origen.execute("COMMIT")
+    finally:
+        origen.close()
+
+    errores = verificar(parcial) if rendimiento.RESPALDO_VERIFICAR else []
+    if errores:
+        parcial.unlink(missing_ok=True)
+    else:
+        os.replace(parcial, final)
+        podar()
+    return {"ruta": None if errores else final, "omitido": False, "version": version, "paginas": total[0],
+            "bytes": 0 if errores else final.stat().st_size, "segundos": time.perf_counter() - t0,
+            "errores": errores}
+
+
+def podar(conservar: Optional[int] = None, dias: Optional[int] = None) -> List[Path]:
+    """
+    Borra respaldos fuera de la retención: quedan los últimos `conservar` y el último
+    de cada uno de los `dias` días más recientes. Devuelve los borrados.
+    """
+    conservar = int(rendimiento.RESPALDO_CONSERVAR if conservar is None else conservar)
+    dias = int(rendimiento.RESPALDO_CONSERVAR_DIAS if dias is None else dias)
+    todos = listar()
+    quedan = set(todos[:max(1, conservar)])
+    por_dia: Dict[str, Path] = {}
+    for p in todos:  # del más nuevo al más viejo: el primero de cada día es el último tomado
+        dia = _NOMBRE.match(p.name).group(1)  # type: ignore[union-attr]
+        if dia not in por_dia and len(por_dia) < dias:
+            por_dia[dia] = p
+    quedan.update(por_dia.values())
+
+    borrados = []
+    for p in todos:
+        if p not in quedan:
+            p.unlink(missing_ok=True)
+            borrados.append(p)
+    return borrados
+
+
+# -------------------------------------------------
+# Restauración
+# -------------------------------------------------
+def restaurar(ruta: Path) -> Dict[str, Any]:
+    """
+    Reemplaza el contenido de la BD vigente por el del respaldo `ruta`.
+    Antes verifica el respaldo y respalda el estado actual. Usar con la app cerrada
+    (u otras cajas desconectadas): toma el lock exclusivo mientras copia.
+    """
+    ruta = Path(ruta)
+    errores = verificar(ruta)
+    if errores:
+        raise ValueError(f"El respaldo {ruta.name} no pasó integrity_check: {errores[:3]}")
+
+    previo = None
+    if database.DB_PATH.exists():
+        previo = respaldar(forzar=True, etiqueta="antes_restaurar", pausa_ms=0)["ruta"]
+
+    t0 = time.perf_counter()
+    origen = sqlite3.connect(f"{ruta.resolve().as_uri()}?mode=ro", uri=True)
+    destino = database.get_connection("lote")
+    try:
+        origen.backup(destino)  # de una vez: la BD queda como el respaldo al terminar
+    finally:
+        destino.close()
+        origen.close()
+    database._columnas_vistas.clear()  # la forma del esquema puede ser otra
+    return {"ruta": ruta, "previo": previo, "segundos": time.perf_counter() - t0}
+
+
+# -------------------------------------------------
+# Servicio periódico (hilo de fondo)
+# -------------------------------------------------
+class ServicioRespaldo:
+    def __init__(self, intervalo_min: Optional[float] = None):
+        self.intervalo = max(1.0, float(rendimiento.RESPALDO_INTERVALO_MIN if intervalo_min is None else intervalo_min)) * 60.0
+        self.ultimo: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+        self._parar = threading.Event()
+        self._hilo = threading.Thread(target=self._trabajar, name="respaldo", daemon=True)
+        self._hilo.start()
+
+    def _primera_espera(self) -> float:
+        # Si el último respaldo ya tiene más de un intervalo, el primero va pronto
+        # (sin competir con el arranque); si no, se respeta el ritmo de siempre.
+        ultimos = listar()
+        edad = time.time() - ultimos[0].stat().st_mtime if ultimos else self.intervalo
+        return max(rendimiento.RESPALDO_INICIO_S, self.intervalo - edad)
+
+    def _trabajar(self) -> None:
+        espera = self._primera_espera()
+        while not self._parar.wait(espera):
+            try:
+                self.ultimo = respaldar(cancelar=self._parar)
+                self.error = "; ".join(self.ultimo["errores"]) or None
+            except RespaldoCancelado:
+                return
+            except (sqlite3.Error, OSError) as e:
+                self.error = str(e)  # disco lleno, BD en mantenimiento...: se reintenta al próximo
+            if self.error:
+                print(f"⚠️  Respaldo fallido: {self.error}", file=sys.stderr)
+            espera = self.intervalo
+
+    def detener(self, timeout: Optional[float] = 10.0) -> None:
+        self._parar.set()
+        self._hilo.join(timeout)
+
+
+_servicio: Optional[ServicioRespaldo] = None
+
+
+def iniciar(intervalo_min: Optional[float] = None) -> Optional[ServicioRespaldo]:
+    """Arranca el respaldo periódico (si RESPALDO_ACTIVO). Idempotente."""
+    global _servicio
+    if _servicio is None and rendimiento.RESPALDO_ACTIVO:
+        _servicio = ServicioRespaldo(intervalo_min)
+    return _servicio
+
+
+def detener() -> None:
+    """Corta el hilo; un respaldo a medias se descarta (queda el .parcial borrado)."""
+    global _servicio
+    actual, _servicio = _servicio, None
+    if actual is not None:
+        actual.detener()
+
+
+# -------------------------------------------------
+# Línea de comandos
+# -------------------------------------------------
+def _mb(n: int) -> str:
+    return f"{n / 1_048_576:.1f} MB"
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Respaldos de la BD de Control de Negocio.")
+    ap.add_argument("--db", type=Path, default=None, help="ruta de la BD (por defecto app/data/negocio.db)")
+    grupo = ap.add_mutually_exclusive_group()
+    grupo.add_argument("--listar", action="store_true", help="lista los respaldos")
+    grupo.add_argument("--verificar", type=Path, metavar="RESPALDO", help="integrity_check de un respaldo")
+    grupo.add_argument("--restaurar", type=Path, metavar="RESPALDO", help="restaura la BD desde un respaldo")
+    ap.add_argument("--forzar", action="store_true", help="respalda aunque no haya cambios")
+    args = ap.parse_args(argv)
+
+    if args.db is not None:
+        database.DB_PATH = args.db
+
+    if args.listar:
+        for p in listar():
+            print(f"{p.name}  {_mb(p.stat().st_size)}")
+        return 0
+
+    if args.verificar is not None:
+        errores = verificar(args.verificar)
+        print("✅ Íntegro." if not errores else "❌ " + "\n   ".join(errores[:20]))
+        return 0 if not errores else 1
+
+    if args.restaurar is not None:
+        try:
+            r = restaurar(args.restaurar)
+        except ValueError as e:
+            print(f"❌ {e}")
+            return 1
+        print(f"✅ Restaurado desde {r['ruta'].name} en {r['segundos']:.1f} s")
+        if r["previo"] is not None:
+            print(f"   Estado anterior respaldado en {r['previo']}")
+        return 0
+
+    r = respaldar(forzar=args.forzar, pausa_ms=0)
+    if r["omitido"]:
+        print(f"ℹ️  Sin cambios desde {r['ruta'].name}")
+    elif r["errores"]:
+        print("❌ El respaldo no pasó integrity_check: " + "; ".join(r["errores"][:5]))
+        return 1
+    else:
+        print(f"✅ {r['ruta']} ({_mb(r['bytes'])}, {r['paginas']} páginas, {r['segundos']:.1f} s)")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,354 @@
+# app/services/servidor_local.py
+"""
+Servidor local HTTP/JSON para modo multi-terminal.
+
+Un único proceso abre la BD SQLite; las terminales (UI) le hablan por HTTP en vez
+de abrir el archivo por una carpeta compartida (ver cliente_remoto.activar).
+
+- Expone las operaciones de Producto, Venta, Compra, Finanzas y Factura
+  registradas en OPERACIONES (lecturas y escrituras por separado).
+- Escritor único: todas las escrituras pasan por una cola y un solo hilo, en orden
+  de llegada. Sin contención de locks entre terminales.
+- Lecturas concurrentes (un hilo por petición) con caché caliente: cada resultado
+  se guarda con la "generación" vigente y se descarta en la siguiente escritura
+  confirmada. Cada lectura consulta además PRAGMA data_version en una conexión
+  vigía: un commit hecho por fuera del escritor (modelos no expuestos, cola de
+  escritura, mantenimiento, otro proceso) también invalida la caché.
+- Peticiones por lotes: POST /rpc con {"llamadas": [{"op", "args", "kwargs"}, ...]}
+  responde {"resultados": [{"ok": true, "valor": ...} | {"ok": false, "tipo", "error"}]}.
+- GET /salud devuelve contadores (lecturas, aciertos de caché, escrituras, cola).
+
+Uso:
+    python -m app.services.servidor_local --puerto 8765
+    python -m app.services.servidor_local --host 0.0.0.0 --db /ruta/negocio.db   # LAN
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import queue
+import sqlite3
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from datetime import date, datetime
+from decimal import Decimal
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from app.db.filas import FILAS
+from app.services import mantenimiento, respaldo
+
+PUERTO_POR_DEFECTO = 8765
+
+# Operaciones expuestas: modelo -> (lecturas, escrituras)
+OPERACIONES: Dict[str, Tuple[Tuple[str, ...], Tuple[str, ...]]] = {
+    "Producto": (
+        ("listar_todos", "buscar_por_nombre", "buscar_por_codigo", "buscar_prefijo",
+         "buscar_prefijo_codigo", "buscar_por_categoria", "buscar_por_vencimiento", "obtener_por_id"),
+        ("crear", "editar", "eliminar", "ajustar_stock_por_nombre", "ajustar_stock_por_codigo"),
+    ),
+    "Venta": (
+        ("listar_todas", "ultima_venta_producto", "listar_reservas_activas"),
+        ("crear", "registrar", "editar_extendido", "eliminar", "reservar", "confirmar_reserva",
+         "liberar_reserva", "liberar_reservas_vencidas"),
+    ),
+    "Compra": (
+        ("obtener_por_id", "listar_todas", "ultima_compra_producto"),
+        ("crear", "registrar", "editar_extendido", "editar", "eliminar"),
+    ),
+    "Finanzas": (
+        ("listar_ingresos", "listar_gastos", "listar_facturas", "total_facturas_pagadas", "estado_resultado"),
+        ("registrar_ingreso", "editar_ingreso", "eliminar_ingreso", "registrar_gasto", "editar_gasto",
+         "eliminar_gasto", "registrar_factura", "cambiar_estado_factura", "editar_factura", "eliminar_factura"),
+    ),
+    "Factura": (
+        ("obtener_por_id", "obtener_por_ids", "listar_extendidas", "listar_por_tipo_y_estado", "listar_todas"),
+        ("crear_desde_neto", "crear_extendida", "crear", "cambiar_estado", "marcar_vencidas_automaticamente"),
+    ),
+}
+
+# Excepciones que viajan con su tipo; el resto llega al cliente como RuntimeError
+EXCEPCIONES_TRANSPORTABLES = ("ValueError", "KeyError", "TypeError", "LookupError")
+
+
+# -------------------------------------------------
+# Codificación JSON (filas tipadas, tuplas, dicts con claves no-texto, Decimal, fechas)
+# -------------------------------------------------
+def codificar(x: Any) -> Any:
+    """Valor Python -> JSON conservando filas (app/db/filas), tuplas y dicts con claves int."""
+    if isinstance(x, tuple):
+        nombre = type(x).__name__
+        if FILAS.get(nombre) is type(x):
+            return {"__fila__": nombre, "v": [codificar(v) for v in x]}
+        return {"__tupla__": [codificar(v) for v in x]}
+    if isinstance(x, list):
+        return [codificar(v) for v in x]
+    if isinstance(x, dict):
+        return {"__dict__": [[codificar(k), codificar(v)] for k, v in x.items()]}
+    if isinstance(x, Decimal):
+        return float(x)
+    if isinstance(x, (date, datetime)):
+        return x.isoformat()
+    return x
+
+
+def decodificar(x: Any) -> Any:
+    if isinstance(x, list):
+        return [decodificar(v) for v in x]
+    if isinstance(x, dict):
+        if "__fila__" in x:
+            return FILAS[x["__fila__"]]._make(decodificar(v) for v in x["v"])
+        if "__tupla__" in x:
+            return tuple(decodificar(v) for v in x["__tupla__"])
+        if "__dict__" in x:
+            return {decodificar(k): decodificar(v) for k, v in x["__dict__"]}
+        return {k: decodificar(v) for k, v in x.items()}
+    return x
+
+
+def _resolver() -> Dict[str, Tuple[Callable[..., Any], bool]]:
+    """'Modelo.metodo' -> (función, es_escritura). Importa los modelos recién aquí."""
+    from app.models.compra import Compra
+    from app.models.factura import Factura
+    from app.models.finanzas import Finanzas
+    from app.models.producto import Producto
+    from app.models.venta import Venta
+
+    clases = {"Producto": Producto, "Venta": Venta, "Compra": Compra, "Finanzas": Finanzas, "Factura": Factura}
+    ops: Dict[str, Tuple[Callable[..., Any], bool]] = {}
+    for modelo, (lecturas, escrituras) in OPERACIONES.items():
+        for nombre in lecturas:
+            ops[f"{modelo}.{nombre}"] = (getattr(clases[modelo], nombre), False)
+        for nombre in escrituras:
+            ops[f"{modelo}.{nombre}"] = (getattr(clases[modelo], nombre), True)
+    return ops
+
+
+# -------------------------------------------------
+# Núcleo: escritor único + caché de lecturas
+# -------------------------------------------------
+class Despachador:
+    """Ejecuta llamadas: lecturas en el hilo que pide (con caché), escrituras en el hilo escritor."""
+
+    def __init__(self, max_cache: int = 512):
+        self._ops = _resolver()
+        self._max_cache = int(max_cache)
+        self._cache: "OrderedDict[str, Tuple[int, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._generacion = 0
+        self._vigia: Optional[sqlite3.Connection] = None
+        self._data_version: Optional[int] = None
+        self._cola: "queue.Queue[Optional[Tuple[Callable[..., Any], tuple, dict, Future]]]" = queue.Queue()
+        self._escritor = threading.Thread(target=self._escribir, name="escritor-unico", daemon=True)
+        self.stats = {"lecturas": 0, "aciertos_cache": 0, "escrituras": 0, "cambios_externos": 0}
+        self._escritor.start()
+
+    # --- API ---
+    def ejecutar(self, op: str, args: List[Any], kwargs: Dict[str, Any]) -> Any:
+        if op not in self._ops:
+            raise ValueError(f"Operación no expuesta: {op}")
+        fn, es_escritura = self._ops[op]
+        if es_escritura:
+            fut: Future = Future()
+            self._cola.put((fn, tuple(args), dict(kwargs), fut))
+            return fut.result()
+        return self._leer(op, fn, args, kwargs)
+
+    def ejecutar_lote(self, llamadas: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        resultados = []
+        for ll in llamadas:
+            try:
+                valor = self.ejecutar(ll["op"], decodificar(ll.get("args") or []), decodificar(ll.get("kwargs") or {}))
+                resultados.append({"ok": True, "valor": codificar(valor)})
+            except Exception as e:
+                tipo = type(e).__name__
+                resultados.append({
+                    "ok": False,
+                    "tipo": tipo if tipo in EXCEPCIONES_TRANSPORTABLES else "RuntimeError",
+                    "error": str(e),
+                })
+        return resultados
+
+    def detener(self) -> None:
+        self._cola.put(None)
+        self._escritor.join(timeout=5)
+        with self._lock:
+            if self._vigia is not None:
+                self._vigia.close()
+                self._vigia = None
+
+    def salud(self) -> Dict[str, Any]:
+        with self._lock:
+            return dict(self.stats, generacion=self._generacion, en_cache=len(self._cache), en_cola=self._cola.qsize())
+
+    # --- Lecturas ---
+    def _leer(self, op: str, fn: Callable[..., Any], args, kwargs) -> Any:
+        clave = json.dumps([op, codificar(list(args)), codificar(kwargs)], sort_keys=True, default=str)
+        with self._lock:
+            self.stats["lecturas"] += 1
+            self._vigilar()
+            gen = self._generacion
+            hit = self._cache.get(clave)
+            if hit is not None and hit[0] == gen:
+                self._cache.move_to_end(clave)
+                self.stats["aciertos_cache"] += 1
+                return hit[1]
+        valor = fn(*args, **kwargs)
+        with self._lock:
+            # Solo se guarda si no hubo escrituras mientras se leía
+            if gen == self._generacion:
+                self._cache[clave] = (gen, valor)
+                if len(self._cache) > self._max_cache:
+                    self._cache.popitem(last=False)
+        return valor
+
+    # --- Escritor único ---
+    def _escribir(self) -> None:
+        while True:
+            item = self._cola.get()
+            if item is None:
+                return
+            fn, args, kwargs, fut = item
+            if not fut.set_running_or_notify_cancel():
+                continue
+            try:
+                valor = fn(*args, **kwargs)
+            except Exception as e:
+                self._invalidar()  # una escritura fallida pudo dejar efectos parciales fuera de transacción
+                fut.set_exception(e)
+                continue
+            self._invalidar()
+            with self._lock:
+                self.stats["escrituras"] += 1
+            fut.set_result(valor)
+
+    def _invalidar(self) -> None:
+        with self._lock:
+            self._generacion += 1
+            self._cache.clear()
+            if self._vigia is not None:
+                # Lo confirmado hasta aquí (propio o ajeno) ya quedó invalidado
+                self._data_version = self._vigia.execute("PRAGMA data_version").fetchone()[0]
+
+    def _vigilar(self) -> None:
+        """
+        Con self._lock tomado: nueva generación si otra conexión confirmó algo desde la
+        última lectura. data_version no toca tablas; la vigía nunca escribe.
+        """
+        if self._vigia is None:
+            from app.db import database
+
+            # Compartida entre hilos de petición, siempre bajo self._lock
+            self._vigia = sqlite3.connect(database.DB_PATH, check_same_thread=False)
+            self._data_version = self._vigia.execute("PRAGMA data_version").fetchone()[0]
+            return
+        dv = self._vigia.execute("PRAGMA data_version").fetchone()[0]
+        if dv != self._data_version:
+            self._data_version = dv
+            self._generacion += 1
+            self._cache.clear()
+            self.stats["cambios_externos"] += 1
+
+    def precalentar(self) -> None:
+        """Llena la caché con los listados que la UI pide al abrir cada vista."""
+        for op in ("Producto.listar_todos", "Venta.listar_todas", "Compra.listar_todas", "Finanzas.estado_resultado"):
+            try:
+                self.ejecutar(op, [], {})
+            except Exception:
+                pass
+
+
+# -------------------------------------------------
+# HTTP
+# -------------------------------------------------
+class _Manejador(BaseHTTPRequestHandler):
+    despachador: Despachador  # asignado por crear_servidor
+
+    def log_message(self, fmt, *args):  # silencioso (una línea por petición es demasiado)
+        pass
+
+    def _responder(self, codigo: int, cuerpo: Dict[str, Any]) -> None:
+        datos = json.dumps(cuerpo, ensure_ascii=False).encode("utf-8")
+        self.send_response(codigo)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(datos)))
+        self.end_headers()
+        self.wfile.write(datos)
+
+    def do_GET(self):
+        if self.path.rstrip("/") == "/salud":
+            self._responder(200, {"ok": True, **self.despachador.salud()})
+        else:
+            self._responder(404, {"ok": False, "error": "no encontrado"})
+
+    def do_POST(self):
+        if self.path.rstrip("/") != "/rpc":
+            self._responder(404, {"ok": False, "error": "no encontrado"})
+            return
+        try:
+            largo = int(self.headers.get("Content-Length") or 0)
+            pedido = json.loads(self.rfile.read(largo).decode("utf-8") or "{}")
+            llamadas = pedido["llamadas"]
+        except Exception as e:
+            self._responder(400, {"ok": False, "error": f"petición inválida: {e}"})
+            return
+        mantenimiento.actividad()  # posterga el mantenimiento en reposo
+        self._responder(200, {"ok": True, "resultados": self.despachador.ejecutar_lote(llamadas)})
+
+
+def crear_servidor(host: str = "127.0.0.1", puerto: int = PUERTO_POR_DEFECTO,
+                   despachador: Optional[Despachador] = None) -> ThreadingHTTPServer:
+    """Crea (sin iniciar) el servidor. puerto=0 elige uno libre (server_address[1])."""
+    manejador = type("Manejador", (_Manejador,), {"despachador": despachador or Despachador()})
+    servidor = ThreadingHTTPServer((host, int(puerto)), manejador)
+    servidor.daemon_threads = True
+    return servidor
+
+
+def iniciar_en_hilo(host: str = "127.0.0.1", puerto: int = 0) -> Tuple[ThreadingHTTPServer, str]:
+    """Levanta el servidor en un hilo (pruebas/bench en localhost). Devuelve (servidor, url)."""
+    servidor = crear_servidor(host, puerto)
+    threading.Thread(target=servidor.serve_forever, name="servidor-local", daemon=True).start()
+    return servidor, f"http://{host}:{servidor.server_address[1]}"
+
+
+def detener(servidor: ThreadingHTTPServer) -> None:
+    servidor.shutdown()
+    servidor.server_close()
+    servidor.RequestHandlerClass.despachador.detener()
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Servidor local de Control de Negocio (multi-terminal).")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--puerto", type=int, default=PUERTO_POR_DEFECTO)
+    ap.add_argument("--db", type=Path, default=None, help="ruta de la BD (por defecto app/data/negocio.db)")
+    args = ap.parse_args(argv)
+
+    import app.db.database as database
+
+    if args.db is not None:
+        database.DB_PATH = args.db
+    database.init_db()
+
+    servidor = crear_servidor(args.host, args.puerto)
+    servidor.RequestHandlerClass.despachador.precalentar()
+    respaldo.iniciar()  # el servidor es el dueño de la BD: respalda y mantiene él
+    mantenimiento.iniciar()
+    print(f"🌐 Servidor local escuchando en http://{args.host}:{servidor.server_address[1]} (BD: {database.DB_PATH})")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        respaldo.detener()
+        mantenimiento.detener()
+        detener(servidor)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,215 @@
+# app/ui/autocompletar.py
+"""
+Combobox con autocompletado por prefijo para catálogos grandes (productos, clientes).
+
+- Consulta al modelo mientras se escribe, con retardo (debounce) para no lanzar
+  una consulta por tecla.
+- Nunca carga el catálogo completo: cada consulta trae a lo más `limite` sugerencias
+  (búsqueda por rango sobre índices COLLATE NOCASE en los modelos).
+- Guarda los últimos prefijos consultados (LRU). Si un prefijo más corto ya trajo
+  menos de `limite` resultados, el prefijo más largo se filtra en memoria.
+- Con `tabla=...` la caché se descarta sola cuando cambia
+  cache_referencias.version(tabla) (altas/ediciones/bajas desde los modelos).
+
+Uso:
+    cb = Autocompletar(form, buscar=sugerir_productos, tabla="productos", width=30)
+    cb.get()    -> texto mostrado
+    cb.valor()  -> valor asociado a la sugerencia elegida (o el texto tal cual)
+    ↓ abre la lista de sugerencias; <<ComboboxSelected>> funciona igual que en ttk.
+"""
+
+from __future__ import annotations
+
+import tkinter as tk
+from collections import OrderedDict
+from tkinter import ttk
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from app.services import cache_referencias
+
+Sugerencia = Tuple[str, str]  # (etiqueta mostrada, valor)
+Buscador = Callable[[str, int], Sequence[Sugerencia]]
+
+# Teclas que no cambian el texto: no disparan búsqueda
+_TECLAS_IGNORADAS = {
+    "Up", "Down", "Left", "Right", "Return", "KP_Enter", "Escape", "Tab", "ISO_Left_Tab",
+    "Home", "End", "Prior", "Next", "Shift_L", "Shift_R", "Control_L", "Control_R",
+    "Alt_L", "Alt_R", "Caps_Lock",
+}
+
+
+def _empieza_con(etiqueta: str, clave: str) -> bool:
+    return etiqueta.lower().startswith(clave)
+
+
+class Autocompletar(ttk.Combobox):
+    def __init__(
+        self,
+        master,
+        buscar: Buscador,
+        limite: int = 30,
+        retardo_ms: int = 200,
+        minimo: int = 1,
+        tabla: Optional[str] = None,
+        coincide: Callable[[str, str], bool] = _empieza_con,
+        max_prefijos: int = 64,
+        **kw,
+    ):
+        kw.pop("state", None)  # debe ser editable
+        super().__init__(master, **kw)
+        self._buscar = buscar
+        self.limite = int(limite)
+        self.retardo_ms = int(retardo_ms)
+        self.minimo = int(minimo)
+        self._tabla = tabla
+        self._coincide = coincide
+        self._max_prefijos = int(max_prefijos)
+
+        self._cache: "OrderedDict[str, List[Sugerencia]]" = OrderedDict()
+        self._version = self._version_tabla()
+        self._valores: Dict[str, str] = {}  # etiqueta -> valor de la última lista
+        self._pendiente: Optional[str] = None  # id de after()
+
+        self.bind("<KeyRelease>", self._programar, add="+")
+
+    # ---------------------------
+    # API
+    # ---------------------------
+    def valor(self) -> str:
+        """Valor de la sugerencia mostrada; si el texto no viene de la lista, el texto."""
+        texto = self.get().strip()
+        return self._valores.get(texto, texto)
+
+    def seleccion_valida(self) -> bool:
+        """True si el texto actual corresponde exactamente a una sugerencia existente."""
+        texto = self.get().strip()
+        if not texto:
+            return False
+        if texto in self._valores:
+            return True
+        for etiqueta, valor in self._resultados(texto):
+            if etiqueta == texto:
+                self._valores[etiqueta] = valor
+                return True
+        return False
+
+    def limpiar(self) -> None:
+        self._cancelar()
+        self.set("")
+        self["values"] = ()
+        self._valores = {}
+
+    def invalidar_cache(self) -> None:
+        self._cache.clear()
+        self._version = self._version_tabla()
+
+    def destroy(self):
+        self._cancelar()
+        super().destroy()
+
+    # ---------------------------
+    # Debounce
+    # ---------------------------
+    def _programar(self, event=None):
+        if event is not None and getattr(event, "keysym", "") in _TECLAS_IGNORADAS:
+            return
+        self._cancelar()
+        self._pendiente = self.after(self.retardo_ms, self._actualizar)
+
+    def _cancelar(self):
+        if self._pendiente is not None:
+            try:
+                self.after_cancel(self._pendiente)
+            except tk.TclError:
+                pass
+            self._pendiente = None
+
+    def _actualizar(self):
+        self._pendiente = None
+        texto = self.get().strip()
+        if len(texto) < self.minimo:
+            self["values"] = ()
+            self._valores = {}
+            return
+        try:
+            sugerencias = self._resultados(texto)
+        except Exception:
+            sugerencias = []
+        self._valores = dict(sugerencias)
+        self["values"] = [e for e, _ in sugerencias]
+
+    # ---------------------------
+    # Caché de prefijos (LRU)
+    # ---------------------------
+    def _version_tabla(self) -> Optional[int]:
+        return cache_referencias.version(self._tabla) if self._tabla else None
+
+    def _resultados(self, texto: str) -> List[Sugerencia]:
+        version = self._version_tabla()
+        if version != self._version:
+            self.invalidar_cache()
+
+        clave = texto.lower()
+        previo = self._cache.get(clave)
+        if previo is not None:
+            self._cache.move_to_end(clave)
+            return previo
+
+        # Un prefijo más corto con lista incompleta (< limite) ya contiene todas las coincidencias
+        resultado: Optional[List[Sugerencia]] = None
+        for corte in range(len(clave) - 1, 0, -1):
+            base = self._cache.get(clave[:corte])
+            if base is not None and len(base) < self.limite:
+                resultado = [s for s in base if self._coincide(s[0], clave)]
+                break
+        if resultado is None:
+            resultado = list(self._buscar(texto, self.limite))[: self.limite]
+
+        self._cache[clave] = resultado
+        if len(self._cache) > self._max_prefijos:
+            self._cache.popitem(last=False)
+        return resultado
+
+
+# ---------------------------
+# Fuentes de sugerencias
+# ---------------------------
+def sugerir_productos(prefijo: str, limite: int) -> List[Sugerencia]:
+    from app.models.producto import Producto
+
+    return [(nombre, nombre) for _id, nombre, _cod in Producto.buscar_prefijo(prefijo, limite)]
+
+
+def sugerir_clientes(prefijo: str, limite: int) -> List[Sugerencia]:
+    from app.models.cliente import Cliente
+
+    return [(nombre, nombre) for _id, nombre in Cliente.buscar_prefijo(prefijo, limite)]
+
+
+def etiqueta_producto(codigo: Optional[str], nombre: str) -> str:
+    return f"{codigo} — {nombre}" if codigo else nombre
+
+
+def sugerir_productos_por_codigo(prefijo: str, limite: int) -> List[Sugerencia]:
+    """
+    Sugerencias 'CÓDIGO — Nombre' -> codigo_interno, buscando el prefijo en el código
+    y luego en el nombre (sin repetir productos).
+    """
+    from app.models.producto import Producto
+
+    filas = list(Producto.buscar_prefijo_codigo(prefijo, limite))
+    if len(filas) < limite:
+        vistos = {f[0] for f in filas}
+        filas += [f for f in Producto.buscar_prefijo(prefijo, limite) if f[0] not in vistos]
+    return [
+        (etiqueta_producto(codigo, nombre), codigo or nombre)
+        for _id, nombre, codigo in filas[:limite]
+    ]
+
+
+def coincide_codigo_o_nombre(etiqueta: str, clave: str) -> bool:
+    """Filtro en memoria equivalente a sugerir_productos_por_codigo."""
+    codigo, sep, nombre = etiqueta.partition(" — ")
+    if not sep:
+        return etiqueta.lower().startswith(clave)
+    return codigo.lower().startswith(clave) or nombre.lower().startswith(clave)
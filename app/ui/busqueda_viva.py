@@ -0,0 +1,218 @@
+# app/ui/busqueda_viva.py
+"""
+Búsqueda "mientras se escribe" para tablas (ttk.Treeview) sin congelar la UI.
+
+- Debounce: cada tecla reprograma la búsqueda; solo corre la última tras `retardo_ms`.
+- Cancelación: una búsqueda nueva interrumpe la anterior en curso
+  (sqlite3.Connection.interrupt) y descarta sus resultados pendientes.
+- La consulta corre en un hilo con su propia conexión; las filas llegan por cola
+  en lotes y se insertan de a poco con after() (la tabla se llena incrementalmente).
+- A lo más `limite` filas; al_terminar(total, truncado, error) informa el resultado.
+
+Uso:
+    self.busqueda = BusquedaViva(self.tabla, al_terminar=self._fin_busqueda)
+    entry.bind("<KeyRelease>", lambda e: self.busqueda.programar(
+        lambda limite: Inventario.consulta_busqueda("nombre", entry.get(), limite)))
+
+`fabrica(limite)` devuelve (sql, params) o None; se evalúa al disparar, no al teclear.
+"""
+
+from __future__ import annotations
+
+import queue
+import sqlite3
+import threading
+import tkinter as tk
+from typing import Callable, Optional, Sequence, Tuple
+
+from app.db.database import get_connection
+
+Consulta = Tuple[str, Sequence]
+Fabrica = Callable[[int], Optional[Consulta]]
+
+
+class BusquedaViva:
+    def __init__(
+        self,
+        tabla,
+        al_terminar: Optional[Callable[[int, bool, Optional[str]], None]] = None,
+        retardo_ms: int = 250,
+        limite: int = 500,
+        lote: int = 100,
+    ):
+        self.tabla = tabla
+        self.al_terminar = al_terminar
+        self.retardo_ms = int(retardo_ms)
+        self.limite = int(limite)
+        self.lote = int(lote)
+
+        self._lock = threading.Lock()
+        self._generacion = 0          # id de la búsqueda vigente
+        self._en_curso: Optional[int] = None
+        self._conn: Optional[sqlite3.Connection] = None  # conexión del hilo (para interrupt)
+        self._solicitudes: "queue.Queue[Optional[Tuple[int, str, Sequence]]]" = queue.Queue()
+        self._resultados: "queue.Queue[tuple]" = queue.Queue()
+        self._hilo: Optional[threading.Thread] = None
+
+        self._pendiente: Optional[str] = None  # after() del debounce
+        self._sondeo: Optional[str] = None     # after() que vacía la cola de resultados
+        self._mostrada = 0                     # generación cuyas filas están en la tabla
+        self._esperando: Optional[int] = None  # generación cuyo "fin" aún no llega
+
+        tabla.bind("<Destroy>", self._al_destruir, add="+")
+
+    # ---------------------------
+    # API
+    # ---------------------------
+    def programar(self, fabrica: Fabrica) -> None:
+        """Reprograma la búsqueda (debounce). Llamar en cada <KeyRelease>."""
+        self._cancelar_after("_pendiente")
+        self._pendiente = self.tabla.after(self.retardo_ms, lambda: self._disparar(fabrica))
+
+    def buscar_ahora(self, fabrica: Fabrica) -> None:
+        """Búsqueda inmediata (botón / Enter)."""
+        self._cancelar_after("_pendiente")
+        self._disparar(fabrica)
+
+    def cancelar(self) -> None:
+        """Descarta la búsqueda programada o en curso (p.ej. antes de una recarga completa)."""
+        self._cancelar_after("_pendiente")
+        self._nueva_generacion()
+        self._esperando = None
+
+    # ---------------------------
+    # Envío al hilo
+    # ---------------------------
+    def _disparar(self, fabrica: Fabrica) -> None:
+        self._pendiente = None
+        consulta = fabrica(self.limite + 1)  # +1: detecta si hay más filas que el límite
+        if consulta is None:
+            return
+        sql, params = consulta
+        gen = self._nueva_generacion()
+        self._esperando = gen
+        self._solicitudes.put((gen, sql, tuple(params)))
+        self._asegurar_hilo()
+        if self._sondeo is None:
+            self._sondeo = self.tabla.after(20, self._drenar)
+
+    def _nueva_generacion(self) -> int:
+        with self._lock:
+            self._generacion += 1
+            gen = self._generacion
+            conn = self._conn if self._en_curso is not None else None
+        if conn is not None:
+            conn.interrupt()  # corta la consulta anterior; seguro desde otro hilo
+        return gen
+
+    def _asegurar_hilo(self) -> None:
+        if self._hilo is None or not self._hilo.is_alive():
+            self._hilo = threading.Thread(target=self._trabajar, name="busqueda-viva", daemon=True)
+            self._hilo.start()
+
+    # ---------------------------
+    # Hilo de consultas
+    # ---------------------------
+    def _trabajar(self) -> None:
+        conn = get_connection()
+        with self._lock:
+            self._conn = conn
+        try:
+            while True:
+                item = self._solicitudes.get()
+                # Solo interesa la última solicitud encolada
+                while item is not None:
+                    try:
+                        siguiente = self._solicitudes.get_nowait()
+                    except queue.Empty:
+                        break
+                    item = siguiente
+                if item is None:
+                    return
+                self._ejecutar(conn, *item)
+        finally:
+            with self._lock:
+                self._conn = None
+            conn.close()
+
+    def _vigente(self, gen: int) -> bool:
+        return gen == self._generacion
+
+    def _ejecutar(self, conn: sqlite3.Connection, gen: int, sql: str, params: Sequence) -> None:
+        with self._lock:
+            if not self._vigente(gen):
+                return
+            self._en_curso = gen
+        cur = None
+        try:
+            cur = conn.execute(sql, params)
+            total = 0
+            while total < self.limite and self._vigente(gen):
+                filas = cur.fetchmany(min(self.lote, self.limite - total))
+                if not filas:
+                    break
+                total += len(filas)
+                self._resultados.put(("filas", gen, filas))
+            truncado = total >= self.limite and cur.fetchone() is not None
+            self._resultados.put(("fin", gen, total, truncado, None))
+        except sqlite3.OperationalError as e:
+            # Interrumpida por una búsqueda más nueva: se descarta sin avisar
+            if self._vigente(gen):
+                self._resultados.put(("fin", gen, 0, False, str(e)))
+        except Exception as e:
+            self._resultados.put(("fin", gen, 0, False, str(e)))
+        finally:
+            if cur is not None:
+                cur.close()
+            with self._lock:
+                self._en_curso = None
+
+    # ---------------------------
+    # Lado UI (after)
+    # ---------------------------
+    def _drenar(self) -> None:
+        self._sondeo = None
+        # Pocos lotes por tick: la UI sigue respondiendo mientras llegan filas
+        for _ in range(4):
+            try:
+                msg = self._resultados.get_nowait()
+            except queue.Empty:
+                break
+            gen = msg[1]
+            if not self._vigente(gen):
+                continue
+            if self._mostrada != gen:
+                self.tabla.delete(*self.tabla.get_children())
+                self._mostrada = gen
+            if msg[0] == "filas":
+                for fila in msg[2]:
+                    self.tabla.insert("", tk.END, values=fila)
+            else:
+                _, _, total, truncado, error = msg
+                self._esperando = None
+                if self.al_terminar is not None:
+                    self.al_terminar(total, truncado, error)
+
+        if self._esperando is None and self._resultados.empty():
+            return
+        try:
+            self._sondeo = self.tabla.after(30, self._drenar)
+        except tk.TclError:
+            self._sondeo = None  # tabla destruida
+
+    def _cancelar_after(self, attr: str) -> None:
+        ident = getattr(self, attr)
+        if ident is not None:
+            try:
+                self.tabla.after_cancel(ident)
+            except tk.TclError:
+                pass
+            setattr(self, attr, None)
+
+    def _al_destruir(self, event=None) -> None:
+        if event is not None and event.widget is not self.tabla:
+            return
+        self._cancelar_after("_pendiente")
+        self._cancelar_after("_sondeo")
+        self._nueva_generacion()
+        self._solicitudes.put(None)  # termina el hilo
@@ -4,6 +4,8 @@ import tkinter as tk
 from tkinter import ttk, messagebox
 import re
 from app.models.cliente import Cliente
+from app.ui.busqueda_viva import BusquedaViva
+from app.ui.tabla_enlazada import TablaEnlazada
 
 
 def _rut_basico_valido(rut: str) -> bool:
@@ -60,6 +62,8 @@ class ClientesView(tk.Frame):
         self.entradas["rut"].bind("<Return>", lambda e: self.guardar_cliente())
         self.entradas["direccion"].bind("<Return>", lambda e: self.guardar_cliente())
         self.entradas["telefono"].bind("<Return>", lambda e: self.guardar_cliente())
+        # Filtra la tabla mientras se escribe el nombre
+        self.entradas["nombre"].bind("<KeyRelease>", self._filtrar_en_vivo)
         self.bind_all("<Control-f>", lambda e: self._focus_nombre())
 
         # Botones
@@ -103,6 +107,11 @@ class ClientesView(tk.Frame):
         self.status = tk.StringVar(value="Listo.")
         tk.Label(self, textvariable=self.status, bg="white", fg="#555").pack(padx=12, pady=(0, 8), anchor="w")
 
+        # Búsqueda en vivo (debounce + cancelación + filas por lotes)
+        self.busqueda = BusquedaViva(self.tabla, al_terminar=self._fin_busqueda)
+        # Altas/ediciones/bajas tocan solo el ítem afectado (orden por nombre, como listar_todos)
+        self.filas = TablaEnlazada(self.tabla, obtener=Cliente.obtener_por_id, clave_orden=lambda f: f[1] or "")
+
     def _focus_nombre(self):
         try:
             self.entradas["nombre"].focus_set()
@@ -114,17 +123,29 @@ class ClientesView(tk.Frame):
     # -----------------------
     def cargar_tabla(self, datos=None):
         """Limpia y carga la tabla de clientes."""
+        self.busqueda.cancelar()  # una búsqueda en vivo pendiente no debe pisar esta carga
         try:
-            for row in self.tabla.get_children():
-                self.tabla.delete(row)
             registros = datos if datos is not None else Cliente.listar_todos()
-            for r in registros:
-                self.tabla.insert("", tk.END, values=r)
-            self.status.set(f"{len(registros)} cliente(s) cargado(s).")
+            n = self.filas.recargar(registros, parcial=datos is not None)
+            self.status.set(f"{n} cliente(s) cargado(s).")
         except Exception as e:
             messagebox.showerror("❌ Error", f"No se pudieron cargar los clientes.\n\n{e}")
             self.status.set("Error al cargar.")
 
+    def _aplicar(self, ids):
+        """Refleja en la tabla los clientes `ids` recién escritos (recarga completa si hay una búsqueda)."""
+        if not self.filas.aplicar(ids):
+            self.cargar_tabla()
+
+    def aplicar_cambios(self, cambios):
+        """Cambios del bus {tabla: {id: op} | None} (MainWindow). Una búsqueda visible no se pisa."""
+        ids = cambios.get("clientes", {})
+        if ids is None:
+            if self.filas.propia:
+                self.cargar_tabla()
+        elif ids:
+            self.filas.aplicar(ids)
+
     def _leer_form(self):
         """Lee y valida campos del formulario."""
         d = {k: v.get().strip() for k, v in self.entradas.items()}
@@ -138,11 +159,11 @@ class ClientesView(tk.Frame):
         """Crea un nuevo cliente."""
         try:
             d = self._leer_form()
-            Cliente.crear(d["nombre"], d["rut"], d["direccion"], d["telefono"])
+            nuevo_id = Cliente.crear(d["nombre"], d["rut"], d["direccion"], d["telefono"])
             self.status.set("Cliente creado correctamente.")
             messagebox.showinfo("✅ Éxito", "Cliente creado correctamente.")
             self._limpiar_form()
-            self.cargar_tabla()
+            self._aplicar([nuevo_id])
         except Exception as e:
             messagebox.showerror("❌ Error", str(e))
             self.status.set("Error al crear cliente.")
@@ -153,13 +174,26 @@ class ClientesView(tk.Frame):
         if not nombre:
             messagebox.showwarning("⚠️ Atención", "Ingresa un nombre para buscar.")
             return
-        try:
-            resultados = Cliente.buscar_por_nombre(nombre)
-            self.cargar_tabla(resultados)
-            self.status.set(f"Búsqueda: {len(resultados)} resultado(s).")
-        except Exception as e:
-            messagebox.showerror("❌ Error", str(e))
+        self.filas.soltar()  # la búsqueda llena la tabla por su cuenta
+        self.busqueda.buscar_ahora(lambda limite: Cliente.consulta_busqueda(nombre, limite))
+
+    def _filtrar_en_vivo(self, event=None):
+        if event is not None and event.keysym in ("Return", "KP_Enter", "Tab", "Up", "Down", "Left", "Right"):
+            return
+        # Con un cliente seleccionado el campo se está editando, no buscando
+        if self.cliente_seleccionado_id:
+            return
+        entrada = self.entradas["nombre"]
+        self.filas.soltar()
+        self.busqueda.programar(lambda limite: Cliente.consulta_busqueda(entrada.get(), limite))
+
+    def _fin_busqueda(self, total: int, truncado: bool, error=None):
+        if error:
+            messagebox.showerror("❌ Error", error)
             self.status.set("Error en la búsqueda.")
+            return
+        extra = f" (mostrando los primeros {total}; refina la búsqueda)" if truncado else ""
+        self.status.set(f"Búsqueda: {total} resultado(s){extra}.")
 
     def _seleccionar_fila(self, _event=None):
         """Carga los datos de la fila seleccionada en el formulario."""
@@ -187,14 +221,12 @@ class ClientesView(tk.Frame):
             return
         try:
             d = self._leer_form()
-            Cliente.editar(
-                self.cliente_seleccionado_id,
-                d["nombre"], d["rut"], d["direccion"], d["telefono"]
-            )
+            cid = self.cliente_seleccionado_id
+            Cliente.editar(cid, d["nombre"], d["rut"], d["direccion"], d["telefono"])
             messagebox.showinfo("✏️ Editado", "Cliente actualizado correctamente.")
             self.status.set("Cliente editado.")
             self._limpiar_form()
-            self.cargar_tabla()
+            self._aplicar([cid])
         except Exception as e:
             messagebox.showerror("❌ Error", str(e))
             self.status.set("Error al editar.")
@@ -207,11 +239,12 @@ class ClientesView(tk.Frame):
         if not messagebox.askyesno("Confirmar", "¿Eliminar este cliente?"):
             return
         try:
-            Cliente.eliminar(self.cliente_seleccionado_id)
+            cid = self.cliente_seleccionado_id
+            Cliente.eliminar(cid)
             messagebox.showinfo("🗑️ Eliminado", "Cliente eliminado correctamente.")
             self.status.set("Cliente eliminado.")
             self._limpiar_form()
-            self.cargar_tabla()
+            self._aplicar([cid])
         except Exception as e:
             messagebox.showerror("❌ Error", str(e))
             self.status.set("Error al eliminar.")
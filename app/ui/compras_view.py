@@ -6,10 +6,13 @@ from typing import Dict, Any, Optional
 from email.message import EmailMessage
 import smtplib
 
+from app.db.filas import CompraFila
 from app.models.compra import Compra
-from app.models.producto import Producto
 from app.models.proveedor import Proveedor
 from app.config.tipos import DocTipo  # ✅ ruta corregida
+from app.services import cache_referencias
+from app.ui.autocompletar import Autocompletar, sugerir_productos
+from app.ui.tabla_enlazada import TablaEnlazada
 
 # Servicio por módulo (fallback si no viene por inyección)
 try:
@@ -55,7 +58,9 @@ class ComprasView(tk.Frame):
         self.var_credito = tk.BooleanVar(value=True)
 
         self._build_ui()
+        self._ver_combos = None  # versión de caché ya cargada en el combobox de proveedores
         self.after(0, self.cargar_combobox)
+        cache_referencias.suscribir("proveedores", self._on_referencias)
         self.after(0, self.cargar_tabla)
         self.after(0, self._recalcular)
 
@@ -85,7 +90,8 @@ class ComprasView(tk.Frame):
 
         # Producto
         tk.Label(form, text="Producto:", bg="white").grid(row=2, column=0, sticky="e", padx=5, pady=5)
-        self.cmb_producto = ttk.Combobox(form, width=30, state="readonly")
+        # Autocompletar por prefijo: el catálogo de productos puede ser muy grande
+        self.cmb_producto = Autocompletar(form, buscar=sugerir_productos, tabla="productos", width=30)
         self.cmb_producto.grid(row=2, column=1, padx=5, pady=5)
 
         # Cantidad
@@ -131,7 +137,7 @@ class ComprasView(tk.Frame):
         # Tabla con scroll
         self.tabla_frame = tk.Frame(self, bg="white")
         self.tabla_frame.pack(pady=10, fill="both", expand=True)
-        self._build_tree(("id", "proveedor", "producto", "cantidad", "precio_unitario", "iva", "total", "fecha"))
+        self._build_tree(CompraFila._fields)
 
     def _build_tree(self, columns: tuple[str, ...]):
         for w in self.tabla_frame.winfo_children():
@@ -147,39 +153,51 @@ class ComprasView(tk.Frame):
 
         self.tabla.bind("<<TreeviewSelect>>", self._seleccionar_fila)
         self.tabla.pack(fill="both", expand=True)
+        # Orden id DESC (como listar_todas): altas arriba, ediciones en su lugar
+        self.filas = TablaEnlazada(self.tabla, obtener=Compra.obtener_por_id, clave_orden=lambda f: -int(f[0]))
 
     # ------------- Datos -------------
 
-    def cargar_combobox(self):
+    def cargar_combobox(self, forzar: bool = False):
+        # Proveedores desde la caché de referencia (solo si cambió la versión);
+        # productos se sugieren por prefijo en cmb_producto.
+        version = cache_referencias.version("proveedores")
+        if not forzar and version == self._ver_combos:
+            return
         try:
-            # Producto.listar_todos() y Proveedor.listar_todos() → SELECT *; nombre está en idx 1
-            self.cmb_proveedor["values"] = [p[1] for p in Proveedor.listar_todos()]
-            self.cmb_producto["values"] = [p[1] for p in Producto.listar_todos()]
+            self.cmb_proveedor["values"] = cache_referencias.nombres("proveedores")
+            self._ver_combos = version
         except Exception as e:
             messagebox.showerror("❌ Error", f"No se pudieron cargar listas.\n\n{e}")
 
+    def _on_referencias(self, _tabla: str):
+        try:
+            self.after_idle(self.cargar_combobox)
+        except tk.TclError:
+            pass  # vista destruida
+
     def cargar_tabla(self):
         try:
-            for row in self.tabla.get_children():
-                self.tabla.delete(row)
-
-            compras = list(Compra.listar_todas())
-            if not compras:
-                return
-
-            # Detecta columnas extendidas vs legacy por longitud de tupla
-            # extendido: (id, proveedor, producto, cantidad, precio_unitario, doc_tipo, neto, iva, retencion, total, fecha, vencimiento)
-            cols = ("id", "proveedor", "producto", "cantidad", "precio_unitario", "iva", "total", "fecha")
-            if len(compras[0]) >= 12:
-                cols = ("id", "proveedor", "producto", "cantidad", "precio_unitario",
-                        "doc_tipo", "neto", "iva", "retencion", "total", "fecha", "vencimiento")
-
-            self._build_tree(cols)
-            for c in compras:
-                self.tabla.insert("", tk.END, values=c)
+            self.filas.recargar(Compra.listar_todas())
         except Exception as e:
             messagebox.showerror("❌ Error", f"No se pudieron cargar compras.\n\n{e}")
 
+    def _aplicar(self, ids):
+        """Refleja en la tabla las compras `ids` recién escritas (sin id conocido: recarga completa)."""
+        ids = [i for i in ids if i is not None]
+        if not ids or not self.filas.aplicar(ids):
+            self.cargar_tabla()
+
+    def aplicar_cambios(self, cambios):
+        """Cambios del bus {tabla: {id: op} | None} (MainWindow)."""
+        if "proveedores" in cambios:
+            self.cargar_combobox()
+        if "compras" in cambios:
+            if cambios["compras"] is None:
+                self.cargar_tabla()
+            else:
+                self._aplicar(cambios["compras"])
+
     # ------------- Lógica -------------
 
     def _parse_int(self, s: str, default: int = 0) -> int:
@@ -236,6 +254,8 @@ class ComprasView(tk.Frame):
             precio_neto = self._parse_float(self.entry_precio.get(), -1.0)
             if not proveedor or not producto:
                 raise ValueError("Debe seleccionar proveedor y producto.")
+            if not self.cmb_producto.seleccion_valida():
+                raise ValueError(f"Producto '{producto}' no existe. Elija uno de la lista.")
             if cantidad <= 0 or precio_neto < 0:
                 raise ValueError("Cantidad y precio deben ser válidos.")
 
@@ -252,7 +272,7 @@ class ComprasView(tk.Frame):
 
             # --- Intento 1: API extendida -------------------------------
             if hasattr(Compra, "registrar_extendido"):
-                Compra.registrar_extendido(
+                nuevo_id = Compra.registrar_extendido(
                     proveedor=proveedor,
                     producto=producto,
                     cantidad=cantidad,
@@ -269,12 +289,12 @@ class ComprasView(tk.Frame):
                 iva_percent = 0.0
                 if tot["neto"] > 0 and tot["iva"] > 0:
                     iva_percent = round((tot["iva"] / tot["neto"]) * 100.0, 2)
-                Compra.registrar(proveedor, producto, cantidad, precio_neto, iva_percent)
+                nuevo_id = Compra.registrar(proveedor, producto, cantidad, precio_neto, iva_percent)
 
             messagebox.showinfo("✅ Éxito", "Compra registrada correctamente.")
             self._limpiar_form()
             self.cargar_combobox()
-            self.cargar_tabla()
+            self._aplicar([nuevo_id])
         except Exception as e:
             messagebox.showerror("❌ Error", str(e))
 
@@ -288,6 +308,8 @@ class ComprasView(tk.Frame):
             precio_neto = self._parse_float(self.entry_precio.get(), -1.0)
             if not proveedor or not producto:
                 raise ValueError("Debe seleccionar proveedor y producto.")
+            if not self.cmb_producto.seleccion_valida():
+                raise ValueError(f"Producto '{producto}' no existe. Elija uno de la lista.")
             if cantidad <= 0 or precio_neto < 0:
                 raise ValueError("Cantidad y precio deben ser válidos.")
 
@@ -296,9 +318,10 @@ class ComprasView(tk.Frame):
             tot = self._calcular_totales(doc_tipo, neto_total)
 
             # API extendida si existe
+            cid = self.compra_seleccionada_id
             if hasattr(Compra, "editar_extendido"):
                 Compra.editar_extendido(
-                    id_compra=self.compra_seleccionada_id,
+                    id_compra=cid,
                     proveedor=proveedor,
                     producto=producto,
                     cantidad=cantidad,
@@ -313,12 +336,12 @@ class ComprasView(tk.Frame):
                 iva_percent = 0.0
                 if tot["neto"] > 0 and tot["iva"] > 0:
                     iva_percent = round((tot["iva"] / tot["neto"]) * 100.0, 2)
-                Compra.editar(self.compra_seleccionada_id, proveedor, producto, cantidad, precio_neto, iva_percent)
+                Compra.editar(cid, proveedor, producto, cantidad, precio_neto, iva_percent)
 
             messagebox.showinfo("✏️ Editado", "Orden de compra actualizada.")
             self._limpiar_form()
             self.cargar_combobox()
-            self.cargar_tabla()
+            self._aplicar([cid])
         except Exception as e:
             messagebox.showerror("❌ Error", str(e))
 
@@ -328,11 +351,12 @@ class ComprasView(tk.Frame):
         if not messagebox.askyesno("Confirmar", "¿Eliminar esta orden de compra?"):
             return
         try:
-            Compra.eliminar(self.compra_seleccionada_id)
+            cid = self.compra_seleccionada_id
+            Compra.eliminar(cid)
             messagebox.showinfo("🗑️ Eliminada", "Orden de compra eliminada.")
             self._limpiar_form()
             self.cargar_combobox()
-            self.cargar_tabla()
+            self._aplicar([cid])
         except Exception as e:
             messagebox.showerror("❌ Error", str(e))
 
@@ -364,32 +388,23 @@ class ComprasView(tk.Frame):
             return messagebox.showerror("❌ Error", "Compra no encontrada.")
 
         # Buscar correo del proveedor
-        prov = Proveedor.buscar_por_nombre(compra[1])
+        prov = Proveedor.buscar_por_nombre(compra.proveedor)
         correo = None
         if prov:
-            # (id, nombre, rut, direccion, telefono, razon_social, correo, comuna)
             for p in prov:
-                if p[1] == compra[1]:
-                    correo = p[6]
+                if p.nombre == compra.proveedor:
+                    correo = p.correo
                     break
             if not correo:
-                correo = prov[0][6]  # fallback primer match
+                correo = prov[0].correo  # fallback primer match
         if not correo:
             return messagebox.showerror("❌ Error", "No se encontró correo del proveedor.")
 
-        # Cuerpo del correo según estructura
-        if len(compra) >= 12:
-            _, proveedor, producto, cant, punit, doc_tipo, neto, iva_monto, ret, total, fecha, venc = compra
-            iva_txt = f"${iva_monto:.2f}"
-            ret_txt = f"${ret:.2f}"
-            doc_txt = str(doc_tipo)
-            venc_txt = venc or "-"
-        else:
-            _, proveedor, producto, cant, punit, iva_percent, total, fecha = compra
-            iva_txt = f"{iva_percent:.0f}%"
-            ret_txt = "-"
-            doc_txt = "-"
-            venc_txt = "-"
+        # Cuerpo del correo (CompraFila: columnas extendidas; NULL si el esquema no está migrado)
+        iva_txt = f"${float(compra.iva or 0):.2f}"
+        ret_txt = f"${float(compra.retencion or 0):.2f}" if compra.retencion is not None else "-"
+        doc_txt = str(compra.doc_tipo) if compra.doc_tipo is not None else "-"
+        venc_txt = compra.vencimiento or "-"
 
         msg = EmailMessage()
         msg["Subject"] = f"Orden de Compra #{self.compra_seleccionada_id}"
@@ -397,15 +412,15 @@ class ComprasView(tk.Frame):
         msg["To"] = correo
         cuerpo = (
             f"Orden de Compra #{self.compra_seleccionada_id}\n\n"
-            f"Proveedor: {proveedor}\n"
-            f"Producto: {producto}\n"
-            f"Cantidad: {cant}\n"
-            f"Precio Unitario: {punit}\n"
+            f"Proveedor: {compra.proveedor}\n"
+            f"Producto: {compra.producto}\n"
+            f"Cantidad: {compra.cantidad}\n"
+            f"Precio Unitario: {compra.precio_unitario}\n"
             f"Tipo Doc: {doc_txt}\n"
             f"IVA: {iva_txt}\n"
             f"Retención: {ret_txt}\n"
-            f"Total: {total}\n"
-            f"Fecha: {fecha}\n"
+            f"Total: {compra.total}\n"
+            f"Fecha: {compra.fecha}\n"
             f"Vencimiento: {venc_txt}\n"
         )
         msg.set_content(cuerpo)
@@ -421,7 +436,7 @@ class ComprasView(tk.Frame):
     def _limpiar_form(self):
         self.compra_seleccionada_id = None
         self.cmb_proveedor.set("")
-        self.cmb_producto.set("")
+        self.cmb_producto.limpiar()
         self.entry_cantidad.delete(0, tk.END); self.entry_cantidad.insert(0, "1")
         self.entry_precio.delete(0, tk.END);   self.entry_precio.insert(0, "0")
         self._recalcular()
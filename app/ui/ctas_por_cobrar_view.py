@@ -309,76 +309,39 @@ class CtasPorCobrarView(tk.Frame):
             for r in self.tree.get_children():
                 self.tree.delete(r)
 
-            facturas = Finanzas.listar_facturas()  # legacy: (id, numero, proveedor, monto, estado, fecha, tipo)
-            # Filtra por tipo 'cliente'
-            facturas = [f for f in facturas if (f[6] or "").strip().lower() == "cliente"]
-
             estado = self.var_estado_filtro.get().lower().strip()
-            if estado != "todos":
-                facturas = [f for f in facturas if (f[4] or "").strip().lower() == estado]
+            estado_filtro = None if estado == "todos" else estado
 
             if self._extended and Factura is not None:
-                # Intentar leer extendido para esas mismas IDs, si existen
-                ids = [f[0] for f in facturas]
-                extendidas = {}
-                # Leer una por una (simple y robusto)
-                for idf in ids:
-                    try:
-                        row = Factura.obtener_por_id(int(idf))
-                        # row extendido: (id, numero, proveedor, monto, estado, fecha, tipo, doc_tipo, neto, iva, retencion, total, vencimiento)
-                        if row and len(row) >= 13:
-                            extendidas[idf] = row
-                    except Exception:
-                        pass
-
-                # Si hay extendidas, usamos las columnas extendidas
-                if extendidas:
-                    if tuple(self.tree["columns"]) != self.columns_extended:
-                        self._build_tree(self.columns_extended)
-
-                    for f in facturas:
-                        base = extendidas.get(f[0])
-                        if base:
-                            (_, numero, cliente, _monto_legacy, estado, fecha, _tipo,
-                             doc_tipo, neto, iva, ret, total, venc) = base
-                            self.tree.insert(
-                                "",
-                                tk.END,
-                                values=(
-                                    f[0],
-                                    numero or "",
-                                    cliente or "",
-                                    doc_tipo or "",
-                                    self._fmt_money(neto),
-                                    self._fmt_money(iva),
-                                    self._fmt_money(ret),
-                                    self._fmt_money(total),
-                                    estado or "",
-                                    fecha or "",
-                                    venc or "",
-                                ),
-                            )
-                        else:
-                            # No hay extendida: caer a legacy en fila
-                            if tuple(self.tree["columns"]) != self.columns_legacy:
-                                self._build_tree(self.columns_legacy)
-                            self.tree.insert(
-                                "",
-                                tk.END,
-                                values=(f[0], f[1], f[2], self._fmt_money(f[3]), f[4], f[5]),
-                            )
-                else:
-                    # No hay extendidas: usar legacy
-                    if tuple(self.tree["columns"]) != self.columns_legacy:
-                        self._build_tree(self.columns_legacy)
-                    for f in facturas:
-                        self.tree.insert(
-                            "",
-                            tk.END,
-                            values=(f[0], f[1], f[2], self._fmt_money(f[3]), f[4], f[5]),
-                        )
+                # Una sola consulta filtrada (tipo/estado) con las columnas extendidas
+                facturas = Factura.listar_extendidas("cliente", estado_filtro)
+                if tuple(self.tree["columns"]) != self.columns_extended:
+                    self._build_tree(self.columns_extended)
+                for (idf, numero, cliente, _monto_legacy, est, fecha, _tipo,
+                     doc_tipo, neto, iva, ret, total, venc) in facturas:
+                    self.tree.insert(
+                        "",
+                        tk.END,
+                        values=(
+                            idf,
+                            numero or "",
+                            cliente or "",
+                            doc_tipo or "",
+                            self._fmt_money(neto),
+                            self._fmt_money(iva),
+                            self._fmt_money(ret),
+                            self._fmt_money(total),
+                            est or "",
+                            fecha or "",
+                            venc or "",
+                        ),
+                    )
             else:
-                # Legacy puro
+                # Legacy puro: (id, numero, cliente, monto, estado, fecha, tipo)
+                facturas = Finanzas.listar_facturas()
+                facturas = [f for f in facturas if (f[6] or "").strip().lower() == "cliente"]
+                if estado_filtro:
+                    facturas = [f for f in facturas if (f[4] or "").strip().lower() == estado_filtro]
                 if tuple(self.tree["columns"]) != self.columns_legacy:
                     self._build_tree(self.columns_legacy)
                 for f in facturas:
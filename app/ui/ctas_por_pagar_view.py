@@ -292,65 +292,39 @@ class CtasPorPagarView(tk.Frame):
             for r in self.tree.get_children():
                 self.tree.delete(r)
 
-            facturas = Finanzas.listar_facturas()  # (id, numero, proveedor, monto, estado, fecha, tipo)
-            facturas = [f for f in facturas if (f[6] or "").strip().lower() == "proveedor"]
-
             estado = self.var_estado_filtro.get().lower().strip()
-            if estado != "todos":
-                facturas = [f for f in facturas if (f[4] or "").strip().lower() == estado]
+            estado_filtro = None if estado == "todos" else estado
 
             if self._extended and Factura is not None:
-                ids = [f[0] for f in facturas]
-                extendidas = {}
-                for idf in ids:
-                    try:
-                        row = Factura.obtener_por_id(int(idf))
-                        # row extendido: (id, numero, proveedor, monto, estado, fecha, tipo, doc_tipo, neto, iva, retencion, total, vencimiento)
-                        if row and len(row) >= 13:
-                            extendidas[idf] = row
-                    except Exception:
-                        pass
-
-                if extendidas:
-                    if tuple(self.tree["columns"]) != self.columns_extended:
-                        self._build_tree(self.columns_extended)
-
-                    for f in facturas:
-                        base = extendidas.get(f[0])
-                        if base:
-                            (_, numero, proveedor, _monto_legacy, estado, fecha, _tipo,
-                             doc_tipo, neto, iva, ret, total, venc) = base
-                            self.tree.insert(
-                                "",
-                                tk.END,
-                                values=(
-                                    f[0],
-                                    numero or "",
-                                    proveedor or "",
-                                    doc_tipo or "",
-                                    self._fmt_money(neto),
-                                    self._fmt_money(iva),
-                                    self._fmt_money(ret),
-                                    self._fmt_money(total),
-                                    estado or "",
-                                    fecha or "",
-                                    venc or "",
-                                ),
-                            )
-                        else:
-                            if tuple(self.tree["columns"]) != self.columns_legacy:
-                                self._build_tree(self.columns_legacy)
-                            self.tree.insert(
-                                "",
-                                tk.END,
-                                values=(f[0], f[1], f[2], self._fmt_money(f[3]), f[4], f[5]),
-                            )
-                else:
-                    if tuple(self.tree["columns"]) != self.columns_legacy:
-                        self._build_tree(self.columns_legacy)
-                    for f in facturas:
-                        self.tree.insert("", tk.END, values=(f[0], f[1], f[2], self._fmt_money(f[3]), f[4], f[5]))
+                # Una sola consulta filtrada (tipo/estado) con las columnas extendidas
+                facturas = Factura.listar_extendidas("proveedor", estado_filtro)
+                if tuple(self.tree["columns"]) != self.columns_extended:
+                    self._build_tree(self.columns_extended)
+                for (idf, numero, proveedor, _monto_legacy, est, fecha, _tipo,
+                     doc_tipo, neto, iva, ret, total, venc) in facturas:
+                    self.tree.insert(
+                        "",
+                        tk.END,
+                        values=(
+                            idf,
+                            numero or "",
+                            proveedor or "",
+                            doc_tipo or "",
+                            self._fmt_money(neto),
+                            self._fmt_money(iva),
+                            self._fmt_money(ret),
+                            self._fmt_money(total),
+                            est or "",
+                            fecha or "",
+                            venc or "",
+                        ),
+                    )
             else:
+                # Legacy puro: (id, numero, proveedor, monto, estado, fecha, tipo)
+                facturas = Finanzas.listar_facturas()
+                facturas = [f for f in facturas if (f[6] or "").strip().lower() == "proveedor"]
+                if estado_filtro:
+                    facturas = [f for f in facturas if (f[4] or "").strip().lower() == estado_filtro]
                 if tuple(self.tree["columns"]) != self.columns_legacy:
                     self._build_tree(self.columns_legacy)
                 for f in facturas:
@@ -0,0 +1,137 @@
+# control_negocio/app/ui/diagnostico_view.py
+
+import tkinter as tk
+from tkinter import ttk, messagebox
+
+from app.db import instrumentacion
+
+
+class DiagnosticoView(tk.Frame):
+    COLUMNAS = (
+        ("origen", "Método", 200),
+        ("pantalla", "Pantalla", 160),
+        ("llamadas", "Llamadas", 70),
+        ("total_ms", "Total ms", 80),
+        ("prom_ms", "Prom ms", 70),
+        ("p95_ms", "p95 ms", 70),
+        ("max_ms", "Máx ms", 70),
+        ("filas", "Filas", 70),
+        ("sql", "Sentencia", 420),
+    )
+
+    def __init__(self, master=None, servicios=None):
+        """
+        Panel de diagnóstico SQL: latencias por sentencia y método de modelo.
+        - Los datos vienen de app/db/instrumentacion.py (opt-in).
+        """
+        super().__init__(master, bg="white")
+        self.servicios = servicios or {}
+        self._build_ui()
+        self.after(0, self.refrescar)
+
+    # ------------------------
+    # UI
+    # ------------------------
+    def _build_ui(self):
+        tk.Label(
+            self, text="🩺 Diagnóstico SQL", font=("Segoe UI", 16, "bold"), bg="white"
+        ).pack(pady=(12, 4))
+
+        top = tk.Frame(self, bg="white")
+        top.pack(fill="x", padx=12, pady=6)
+
+        self.var_activa = tk.BooleanVar(value=instrumentacion.activa())
+        tk.Checkbutton(
+            top, text="Instrumentación activa", variable=self.var_activa,
+            bg="white", command=self._toggle_activa
+        ).pack(side="left", padx=(0, 12))
+
+        tk.Label(top, text="Umbral lento (ms):", bg="white").pack(side="left")
+        self.entry_umbral = tk.Entry(top, width=8)
+        self.entry_umbral.insert(0, f"{instrumentacion.umbral_ms():g}")
+        self.entry_umbral.pack(side="left", padx=(4, 4))
+        self.entry_umbral.bind("<Return>", lambda e: self._aplicar_umbral())
+        tk.Button(top, text="Aplicar", command=self._aplicar_umbral).pack(side="left", padx=(0, 12))
+
+        tk.Button(top, text="🔄 Refrescar", command=self.refrescar).pack(side="left", padx=4)
+        tk.Button(top, text="🧹 Reiniciar", command=self.reiniciar).pack(side="left", padx=4)
+
+        cont = tk.Frame(self, bg="white")
+        cont.pack(fill="both", expand=True, padx=12, pady=(6, 4))
+
+        self.tree = ttk.Treeview(cont, columns=[c[0] for c in self.COLUMNAS], show="headings")
+        for col, titulo, ancho in self.COLUMNAS:
+            self.tree.heading(col, text=titulo)
+            anchor = "w" if col in ("origen", "pantalla", "sql") else "e"
+            self.tree.column(col, width=ancho, anchor=anchor, stretch=(col == "sql"))
+        self.tree.pack(side="left", fill="both", expand=True)
+        self.tree.bind("<<TreeviewSelect>>", self._on_select)
+
+        sb = ttk.Scrollbar(cont, orient="vertical", command=self.tree.yview)
+        sb.pack(side="right", fill="y")
+        self.tree.configure(yscrollcommand=sb.set)
+
+        # Histograma de la fila seleccionada
+        self.var_histo = tk.StringVar(value="")
+        tk.Label(
+            self, textvariable=self.var_histo, bg="white", fg="#2c3e50",
+            anchor="w", justify="left", font=("Consolas", 9)
+        ).pack(fill="x", padx=12)
+
+        self.status = tk.StringVar(value="Listo.")
+        tk.Label(self, textvariable=self.status, bg="white", fg="#555").pack(pady=(4, 8))
+
+    # ------------------------
+    # Lógica
+    # ------------------------
+    def refrescar(self):
+        self._filas = instrumentacion.resumen()
+        self.tree.delete(*self.tree.get_children())
+        for i, f in enumerate(self._filas):
+            self.tree.insert("", "end", iid=str(i), values=(
+                f["origen"], f["pantalla"], f["llamadas"],
+                f"{f['total_ms']:.1f}", f"{f['prom_ms']:.2f}", f"{f['p95_ms']:g}",
+                f"{f['max_ms']:.1f}", f["filas"], f["sql"],
+            ))
+        self.var_histo.set("")
+        if instrumentacion.activa():
+            self.status.set(
+                f"{len(self._filas)} sentencias distintas · {instrumentacion.total_sentencias()} "
+                f"ejecutadas · log lento: {instrumentacion.LOG_PATH}"
+            )
+        else:
+            self.status.set("Instrumentación apagada (CN_SQL_INSTRUMENTAR=1 o marque la casilla).")
+
+    def reiniciar(self):
+        instrumentacion.reiniciar()
+        self.refrescar()
+
+    def _toggle_activa(self):
+        if self.var_activa.get():
+            instrumentacion.activar()
+        else:
+            instrumentacion.desactivar()
+        self.refrescar()
+
+    def _aplicar_umbral(self):
+        try:
+            valor = float(self.entry_umbral.get().replace(",", "."))
+            if valor < 0:
+                raise ValueError
+        except ValueError:
+            messagebox.showwarning("Umbral", "Ingrese un número de milisegundos válido.")
+            return
+        instrumentacion.fijar_umbral_ms(valor)
+        self.status.set(f"Umbral de consulta lenta: {valor:g} ms")
+
+    def _on_select(self, _event=None):
+        sel = self.tree.selection()
+        if not sel:
+            return
+        f = self._filas[int(sel[0])]
+        partes = []
+        for limite, n in f["histograma"]:
+            if n:
+                etiqueta = f"≤{limite}ms" if limite is not None else ">máx"
+                partes.append(f"{etiqueta}: {n}")
+        self.var_histo.set("Histograma  " + "  ·  ".join(partes) if partes else "")
@@ -7,6 +7,7 @@ from datetime import date
 import csv
 import matplotlib.pyplot as plt
 
+from app.db.database import usar_perfil
 from app.models.finanzas import Finanzas
 
 
@@ -325,10 +326,17 @@ class FinanzasView(Frame):
 
     def mostrar_grafico(self):
         try:
-            ingresos_nf = sum(float(i[3] or 0) for i in Finanzas.listar_ingresos() if (i[4] or "").lower() == "recibido")
-            total_ing_fc = sum(float(f[3] or 0) for f in Finanzas.listar_facturas() if f[6] == "cliente" and (f[4] or "").lower() == "pagada")
-            gastos_nf = sum(float(g[3] or 0) for g in Finanzas.listar_gastos() if (g[4] or "").lower() == "pagado")
-            total_gas_fp = sum(float(f[3] or 0) for f in Finanzas.listar_facturas() if f[6] == "proveedor" and (f[4] or "").lower() == "pagada")
+            # Sumas en flujo: una pasada por tabla, sin listas intermedias
+            ingresos_nf = sum(float(i[3] or 0) for i in Finanzas.iterar_ingresos() if (i[4] or "").lower() == "recibido")
+            gastos_nf = sum(float(g[3] or 0) for g in Finanzas.iterar_gastos() if (g[4] or "").lower() == "pagado")
+            total_ing_fc = total_gas_fp = 0.0
+            for f in Finanzas.iterar_facturas():
+                if (f[4] or "").lower() != "pagada":
+                    continue
+                if f[6] == "cliente":
+                    total_ing_fc += float(f[3] or 0)
+                elif f[6] == "proveedor":
+                    total_gas_fp += float(f[3] or 0)
             util = (ingresos_nf + total_ing_fc) - (gastos_nf + total_gas_fp)
 
             etiquetas = ["Ing Peq", "Fact Cli", "Gas Peq", "Fact Prov", "Utilidad"]
@@ -356,21 +364,22 @@ class FinanzasView(Frame):
         if not ruta:
             return
         try:
-            ingresos_nf = [i for i in Finanzas.listar_ingresos() if (i[4] or "").lower() == "recibido"]
-            fact_cob = [f for f in Finanzas.listar_facturas() if f[6] == "cliente" and (f[4] or "").lower() == "pagada"]
-            gastos_nf = [g for g in Finanzas.listar_gastos() if (g[4] or "").lower() == "pagado"]
-            fact_prov = [f for f in Finanzas.listar_facturas() if f[6] == "proveedor" and (f[4] or "").lower() == "pagada"]
+            # Se escribe a medida que se lee (iterar_*): la memoria no crece con el historial
+            def _facturas_pagadas(tipo):
+                return (f for f in Finanzas.iterar_facturas() if f[6] == tipo and (f[4] or "").lower() == "pagada")
 
-            with open(ruta, "w", newline="", encoding="utf-8") as f:
+            with usar_perfil("lote"), open(ruta, "w", newline="", encoding="utf-8") as f:
                 w = csv.writer(f)
                 w.writerow(["Tipo", "Descripción", "Monto", "Estado", "Fecha"])
-                for i in ingresos_nf:
-                    w.writerow(["Ingreso Peq", i[1], i[3], i[4], i[5]])
-                for fc in fact_cob:
+                for i in Finanzas.iterar_ingresos():
+                    if (i[4] or "").lower() == "recibido":
+                        w.writerow(["Ingreso Peq", i[1], i[3], i[4], i[5]])
+                for fc in _facturas_pagadas("cliente"):
                     w.writerow(["Fact Cli", fc[1], fc[3], fc[4], fc[5]])
-                for g in gastos_nf:
-                    w.writerow(["Gas Peq", g[1], g[3], g[4], g[5]])
-                for fp in fact_prov:
+                for g in Finanzas.iterar_gastos():
+                    if (g[4] or "").lower() == "pagado":
+                        w.writerow(["Gas Peq", g[1], g[3], g[4], g[5]])
+                for fp in _facturas_pagadas("proveedor"):
                     w.writerow(["Fact Prov", fp[1], fp[3], fp[4], fp[5]])
 
             messagebox.showinfo("Exportación", "Estado exportado exitosamente.")
@@ -1,18 +1,16 @@
 # control_negocio/app/ui/ingreso_inventario_view.py
 
 import tkinter as tk
-from tkinter import ttk, messagebox
+from tkinter import ttk, messagebox, filedialog
 
-from app.models.producto import Producto
 from app.models.ingreso_inventario import IngresoInventario
+from app.ui.autocompletar import Autocompletar, coincide_codigo_o_nombre, sugerir_productos_por_codigo
 
 
 class IngresoInventarioView(tk.Frame):
     def __init__(self, parent):
         super().__init__(parent, bg="white")
-        self._map_codigo_to_codigo = {}  # texto mostrado -> codigo_interno real
         self.crear_widgets()
-        self.cargar_combobox_producto()
         self.cargar_tabla()
 
     # ---------------- UI ----------------
@@ -27,10 +25,13 @@ class IngresoInventarioView(tk.Frame):
         form = tk.Frame(self, bg="white")
         form.pack(pady=10, padx=10, fill="x")
 
-        # Código Interno (combobox)
+        # Código Interno (autocompletar por prefijo de código o nombre: 'COD123 — Nombre')
         tk.Label(form, text="Código Interno:", bg="white")\
             .grid(row=0, column=0, sticky="e", padx=5, pady=5)
-        self.cmb_codigo = ttk.Combobox(form, width=40, state="readonly")
+        self.cmb_codigo = Autocompletar(
+            form, buscar=sugerir_productos_por_codigo, coincide=coincide_codigo_o_nombre,
+            tabla="productos", width=40,
+        )
         self.cmb_codigo.grid(row=0, column=1, padx=5, pady=5)
 
         # Cantidad
@@ -53,11 +54,24 @@ class IngresoInventarioView(tk.Frame):
         self.entry_metodo.insert(0, "manual")
         self.entry_metodo.grid(row=3, column=1, padx=5, pady=5, sticky="w")
 
+        # Lote / Vencimiento (opcionales; alimentan el control FEFO)
+        tk.Label(form, text="Lote:", bg="white")\
+            .grid(row=4, column=0, sticky="e", padx=5, pady=5)
+        self.entry_lote = ttk.Entry(form, width=20)
+        self.entry_lote.grid(row=4, column=1, padx=5, pady=5, sticky="w")
+
+        tk.Label(form, text="Vence (YYYY-MM-DD):", bg="white")\
+            .grid(row=5, column=0, sticky="e", padx=5, pady=5)
+        self.entry_vencimiento = ttk.Entry(form, width=20)
+        self.entry_vencimiento.grid(row=5, column=1, padx=5, pady=5, sticky="w")
+
         # Botones
         btn_frame = tk.Frame(self, bg="white")
         btn_frame.pack(pady=10)
         ttk.Button(btn_frame, text="Registrar Ingreso", command=self.registrar, width=16)\
             .pack(side="left", padx=5)
+        ttk.Button(btn_frame, text="Importar lote…", command=self.importar_lote, width=14)\
+            .pack(side="left", padx=5)
         ttk.Button(btn_frame, text="Recargar", command=self._refrescar, width=10)\
             .pack(side="left", padx=5)
 
@@ -70,35 +84,6 @@ class IngresoInventarioView(tk.Frame):
         self.tabla.pack(fill="both", expand=True, padx=10, pady=10)
 
     # ------------- Datos -------------
-    def cargar_combobox_producto(self):
-        """
-        Carga en el Combobox todos los códigos internos con su nombre:
-        'COD123 — Nombre del producto'
-        """
-        try:
-            productos = Producto.listar_todos()
-        except Exception as e:
-            messagebox.showerror("Error", f"No se pudieron cargar productos.\n{e}")
-            return
-
-        # Estructura de productos según tu tabla:
-        # (id, nombre, categoria, precio_compra, precio_venta, stock, codigo_interno, codigo_externo, iva, ubicacion, fecha_vencimiento)
-        # índice 6 -> codigo_interno, índice 1 -> nombre
-        opciones = []
-        self._map_codigo_to_codigo.clear()
-        for p in productos:
-            codigo = p[6]
-            nombre = p[1]
-            if not codigo:
-                continue
-            etiqueta = f"{codigo} — {nombre}"
-            self._map_codigo_to_codigo[etiqueta] = codigo
-            opciones.append(etiqueta)
-
-        self.cmb_codigo["values"] = opciones
-        if opciones:
-            self.cmb_codigo.current(0)
-
     def cargar_tabla(self):
         """Refresca la tabla con todas las entradas de inventario."""
         for row in self.tabla.get_children():
@@ -118,7 +103,7 @@ class IngresoInventarioView(tk.Frame):
             etiqueta = self.cmb_codigo.get().strip()
             if not etiqueta:
                 raise ValueError("Debes seleccionar un código interno de producto.")
-            codigo = self._map_codigo_to_codigo.get(etiqueta, etiqueta)
+            codigo = self.cmb_codigo.valor()  # etiqueta elegida -> codigo_interno (o lo escaneado)
 
             try:
                 cantidad = int((self.entry_cantidad.get() or "0").strip())
@@ -133,9 +118,11 @@ class IngresoInventarioView(tk.Frame):
                 raise ValueError("Debes especificar la ubicación.")
 
             metodo = (self.entry_metodo.get() or "manual").strip()
+            lote = (self.entry_lote.get() or "").strip() or None
+            vencimiento = (self.entry_vencimiento.get() or "").strip() or None
 
-            # Registrar (actualiza stock y crea movimiento)
-            IngresoInventario.registrar(codigo, cantidad, ubic, metodo)
+            # Registrar (actualiza stock, suma al lote y crea movimiento)
+            IngresoInventario.registrar(codigo, cantidad, ubic, metodo, lote=lote, fecha_vencimiento=vencimiento)
 
             messagebox.showinfo("✅ Éxito", "Ingreso registrado; stock actualizado.")
             self._limpiar_form()
@@ -144,15 +131,52 @@ class IngresoInventarioView(tk.Frame):
         except Exception as e:
             messagebox.showerror("❌ Error", f"{e}")
 
+    def importar_lote(self):
+        """
+        Ingreso masivo desde un volcado de escáner o CSV (codigo[;cantidad[;ubicacion]]).
+        La ubicación del formulario se usa para las líneas que no traen una.
+        """
+        ruta = filedialog.askopenfilename(
+            title="Archivo de escáner / CSV",
+            filetypes=[("CSV / texto", "*.csv *.txt"), ("Todos", "*.*")],
+        )
+        if not ruta:
+            return
+        metodo = (self.entry_metodo.get() or "").strip()
+        if not metodo or metodo == "manual":
+            metodo = "escaner"
+        try:
+            res = IngresoInventario.registrar_lote(
+                ruta, metodo=metodo, ubicacion_defecto=(self.entry_ubicacion.get() or "").strip()
+            )
+        except Exception as e:
+            messagebox.showerror("❌ Error", f"No se pudo importar el lote.\n{e}")
+            return
+
+        msg = (
+            f"Líneas leídas: {res['lineas']}\n"
+            f"Productos actualizados: {res['procesados']}\n"
+            f"Unidades ingresadas: {res['unidades']}"
+        )
+        rech = res["rechazados"]
+        if rech:
+            detalle = "\n".join(f"  línea {r['linea']}: {r['codigo']} — {r['motivo']}" for r in rech[:15])
+            extra = f"\n  … y {len(rech) - 15} más" if len(rech) > 15 else ""
+            messagebox.showwarning("Lote importado con rechazos", f"{msg}\n\nRechazados ({len(rech)}):\n{detalle}{extra}")
+        else:
+            messagebox.showinfo("✅ Lote importado", msg)
+        self._refrescar()
+
     # ------------- Util -------------
     def _limpiar_form(self):
-        self.cmb_codigo.set("")
+        self.cmb_codigo.limpiar()
         self.entry_cantidad.delete(0, tk.END)
         self.entry_cantidad.insert(0, "1")
         self.entry_ubicacion.delete(0, tk.END)
         self.entry_metodo.delete(0, tk.END)
         self.entry_metodo.insert(0, "manual")
+        self.entry_lote.delete(0, tk.END)
+        self.entry_vencimiento.delete(0, tk.END)
 
     def _refrescar(self):
-        self.cargar_combobox_producto()
         self.cargar_tabla()
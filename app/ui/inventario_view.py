@@ -4,6 +4,7 @@ import tkinter as tk
 from tkinter import ttk, messagebox
 
 from app.models.inventario import Inventario
+from app.ui.busqueda_viva import BusquedaViva
 
 
 class InventarioView(tk.Frame):
@@ -31,6 +32,7 @@ class InventarioView(tk.Frame):
         self.entry_nombre = ttk.Entry(filtro, width=24)
         self.entry_nombre.grid(row=0, column=1, padx=5, pady=3)
         self.entry_nombre.bind("<Return>", lambda e: self.buscar_por_nombre())
+        self.entry_nombre.bind("<KeyRelease>", lambda e: self._filtrar_en_vivo(e, "nombre", self.entry_nombre))
 
         # Código Interno
         tk.Label(filtro, text="Código Interno:", bg="white")\
@@ -38,6 +40,7 @@ class InventarioView(tk.Frame):
         self.entry_codigo = ttk.Entry(filtro, width=24)
         self.entry_codigo.grid(row=0, column=3, padx=5, pady=3)
         self.entry_codigo.bind("<Return>", lambda e: self.buscar_por_codigo())
+        self.entry_codigo.bind("<KeyRelease>", lambda e: self._filtrar_en_vivo(e, "codigo", self.entry_codigo))
 
         # Categoría
         tk.Label(filtro, text="Categoría:", bg="white")\
@@ -45,6 +48,9 @@ class InventarioView(tk.Frame):
         self.entry_categoria = ttk.Entry(filtro, width=24)
         self.entry_categoria.grid(row=1, column=1, padx=5, pady=3)
         self.entry_categoria.bind("<Return>", lambda e: self.buscar_por_categoria())
+        self.entry_categoria.bind(
+            "<KeyRelease>", lambda e: self._filtrar_en_vivo(e, "categoria", self.entry_categoria)
+        )
 
         # Fecha Vencimiento
         tk.Label(filtro, text="Vence antes de (YYYY-MM-DD):", bg="white")\
@@ -104,9 +110,18 @@ class InventarioView(tk.Frame):
         ysb.place(in_=self.tabla, relx=1.0, rely=0, relheight=1.0, anchor="ne")
         self.tabla.configure(yscrollcommand=ysb.set)
 
+        # Estado (resultado de la búsqueda en vivo)
+        self.status = tk.StringVar(value="")
+        tk.Label(self, textvariable=self.status, bg="white", fg="#555").pack(padx=10, pady=(0, 6), anchor="w")
+
+        # Filtrado mientras se escribe (debounce + cancelación + filas por lotes)
+        self.busqueda = BusquedaViva(self.tabla, al_terminar=self._fin_busqueda)
+
     # ------------- Carga Tabla -------------
     def cargar_tabla(self, datos=None):
+        self.busqueda.cancelar()  # una búsqueda en vivo pendiente no debe pisar esta carga
         self._limpiar_tabla()
+        self.status.set("")
         try:
             rows = datos if datos is not None else Inventario.listar_todo()
             for r in rows:
@@ -117,8 +132,7 @@ class InventarioView(tk.Frame):
             messagebox.showerror("Error", f"No se pudo cargar el inventario.\n{e}")
 
     def _limpiar_tabla(self):
-        for row in self.tabla.get_children():
-            self.tabla.delete(row)
+        self.tabla.delete(*self.tabla.get_children())
 
     def _limpiar_filtros(self):
         self.entry_nombre.delete(0, tk.END)
@@ -128,35 +142,36 @@ class InventarioView(tk.Frame):
         self.cargar_tabla()
 
     # ------------- Búsquedas -------------
+    def _filtrar_en_vivo(self, event, campo: str, entry: ttk.Entry):
+        if event.keysym in ("Return", "KP_Enter", "Tab", "Up", "Down", "Left", "Right"):
+            return
+        self.busqueda.programar(lambda limite: Inventario.consulta_busqueda(campo, entry.get(), limite))
+
+    def _buscar(self, campo: str, entry: ttk.Entry):
+        self.busqueda.buscar_ahora(lambda limite: Inventario.consulta_busqueda(campo, entry.get(), limite))
+
+    def _fin_busqueda(self, total: int, truncado: bool, error=None):
+        if error:
+            self.status.set("Error en la búsqueda.")
+            messagebox.showerror("Error", f"No se pudo buscar.\n{error}")
+            return
+        extra = f" (mostrando los primeros {total}; refina la búsqueda)" if truncado else ""
+        self.status.set(f"{total} producto(s){extra}.")
+
     def buscar_por_nombre(self):
-        texto = self.entry_nombre.get().strip()
-        if not texto:
+        if not self.entry_nombre.get().strip():
             return messagebox.showwarning("Atención", "Ingresa un nombre para buscar.")
-        try:
-            datos = Inventario.buscar_por_nombre(texto)
-            self.cargar_tabla(datos)
-        except Exception as e:
-            messagebox.showerror("Error", f"No se pudo buscar por nombre.\n{e}")
+        self._buscar("nombre", self.entry_nombre)
 
     def buscar_por_codigo(self):
-        texto = self.entry_codigo.get().strip()
-        if not texto:
+        if not self.entry_codigo.get().strip():
             return messagebox.showwarning("Atención", "Ingresa un código interno para buscar.")
-        try:
-            datos = Inventario.buscar_por_codigo_interno(texto)
-            self.cargar_tabla(datos)
-        except Exception as e:
-            messagebox.showerror("Error", f"No se pudo buscar por código.\n{e}")
+        self._buscar("codigo", self.entry_codigo)
 
     def buscar_por_categoria(self):
-        texto = self.entry_categoria.get().strip()
-        if not texto:
+        if not self.entry_categoria.get().strip():
             return messagebox.showwarning("Atención", "Ingresa una categoría para buscar.")
-        try:
-            datos = Inventario.buscar_por_categoria(texto)
-            self.cargar_tabla(datos)
-        except Exception as e:
-            messagebox.showerror("Error", f"No se pudo buscar por categoría.\n{e}")
+        self._buscar("categoria", self.entry_categoria)
 
     def buscar_por_vencimiento(self):
         fecha = self.entry_vencimiento.get().strip()
@@ -1,7 +1,11 @@
 # app/ui/main_window.py
 import tkinter as tk
 from tkinter import ttk, messagebox
-from typing import Dict, Type
+from typing import Dict, Optional, Tuple, Type
+
+from app.config import rendimiento
+from app.db import cola_escritura
+from app.services import bus_cambios, cliente_remoto, mantenimiento, perfilador, respaldo
 
 # Vistas
 from app.ui.productos_view import ProductosView
@@ -18,6 +22,7 @@ from app.ui.gastos_view import GastosView
 from app.ui.estado_resultados_view import EstadoResultadosView
 from app.ui.categorias_view import CategoriasView
 from app.ui.ingreso_inventario_view import IngresoInventarioView
+from app.ui.diagnostico_view import DiagnosticoView
 
 
 class MainWindow(tk.Tk):
@@ -25,7 +30,7 @@ class MainWindow(tk.Tk):
         "📦 Productos", "👥 Clientes", "🏢 Proveedores", "🛒 Compras", "💰 Ventas",
         "📦 Inventario", "📊 Finanzas", "💳 Ctas por cobrar", "💸 Ctas por pagar",
         "🧾 Consulta de Ingresos", "📉 Gastos", "📈 Estado de Resultados",
-        "🏷️ Categorías", "📥 Ingreso de Productos",
+        "🏷️ Categorías", "📥 Ingreso de Productos", "🩺 Diagnóstico",
     ]
 
     MAPEO_VISTAS: Dict[str, Type[tk.Frame]] = {
@@ -43,8 +48,30 @@ class MainWindow(tk.Tk):
         "Estado de Resultados": EstadoResultadosView,
         "Categorías": CategoriasView,
         "Ingreso de Productos": IngresoInventarioView,
+        "Diagnóstico": DiagnosticoView,
+    }
+
+    # Vista -> (tablas de las que depende, métodos que la recargan completa)
+    DEPENDENCIAS: Dict[str, Tuple[Tuple[str, ...], Tuple[str, ...]]] = {
+        "Productos": (("productos", "categorias"), ("cargar_tabla",)),
+        "Clientes": (("clientes",), ("cargar_tabla",)),
+        "Proveedores": (("proveedores",), ("cargar_tabla",)),
+        "Compras": (("compras", "proveedores"), ("cargar_tabla",)),
+        "Ventas": (("ordenes_venta",), ("cargar_tabla",)),
+        "Inventario": (("productos",), ("cargar_tabla",)),
+        "Finanzas": (("ingresos", "gastos", "facturas"), ("cargar_ingresos", "cargar_gastos", "cargar_facturas")),
+        "Ctas por cobrar": (("facturas",), ("cargar_ctas",)),
+        "Ctas por pagar": (("facturas",), ("cargar_ctas",)),
+        "Consulta de Ingresos": (("ingresos",), ("cargar_datos",)),
+        "Gastos": (("gastos",), ("mostrar_gastos",)),
+        "Estado de Resultados": (("ingresos", "gastos", "facturas"), ("mostrar_resultados",)),
+        "Categorías": (("categorias",), ("cargar_categorias",)),
+        "Ingreso de Productos": (("movimientos_inventario",), ("cargar_tabla",)),
     }
 
+    # Bindtag que se antepone a los botones para medir su command (ver _perfil_marcar_boton)
+    TAG_PERFIL = "PerfilClic"
+
     def __init__(self, servicios: Dict | None = None):
         super().__init__()
         self.title("Control de Tu Negocio")
@@ -64,10 +91,22 @@ class MainWindow(tk.Tk):
 
         self.servicios = servicios or {}
         self._cache_vistas: Dict[str, tk.Frame] = {}
+        self._vista_actual: Optional[str] = None
+        # Cambios llegados mientras la vista estaba oculta: clave -> {tabla: {id: op} | None}
+        self._cambios_pendientes: Dict[str, Dict[str, Optional[Dict[int, str]]]] = {}
+        self._clic_en_curso = None  # acción del perfilador abierta por un clic
 
         self._build_layout()
         self._build_sidebar()
         self._build_statusbar()
+        self._build_perfilador()
+
+        # Cambios en la BD (esta caja u otras) -> vistas en caché (modo local)
+        # y respaldo/mantenimiento periódicos (en modo multi-terminal los toma el servidor local)
+        if cliente_remoto.activo() is None:
+            bus_cambios.iniciar(self).suscribir(None, self._on_cambios)
+            respaldo.iniciar()
+            mantenimiento.iniciar(self)
 
         # Vista por defecto
         self.mostrar_vista("💰 Ventas")
@@ -75,6 +114,9 @@ class MainWindow(tk.Tk):
         # Atajos
         self.bind("<Control-q>", lambda e: self.destroy())
         self.bind("<Escape>", lambda e: self._focus_sidebar())
+        self.bind("<F12>", lambda e: self._perfil_alternar())
+        self.bind("<Shift-F12>", lambda e: self._perfil_capturar())
+        self.bind("<Control-F12>", lambda e: self._perfil_volcar())
 
     # ---- layout ----
     def _build_layout(self):
@@ -111,6 +153,79 @@ class MainWindow(tk.Tk):
             self.statusbar, textvariable=self.status_msg, bg="#ecf0f1",
             fg="#2c3e50", anchor="w", padx=8
         ).pack(side="left", fill="x", expand=True)
+        self.hud_msg = tk.StringVar(value="")
+        tk.Label(
+            self.statusbar, textvariable=self.hud_msg, bg="#ecf0f1",
+            fg="#7f8c8d", anchor="e", padx=8
+        ).pack(side="right")
+
+    # ---- perfilador (HUD en la barra de estado) ----
+    def _build_perfilador(self):
+        perfilador.al_medir(self._perfil_mostrar)
+        # Clics: el bindtag propio abre la acción antes del command del botón; "all" la cierra después
+        self.bind_class(self.TAG_PERFIL, "<ButtonRelease-1>", self._perfil_inicio_clic)
+        self.bind_all("<ButtonPress-1>", self._perfil_marcar_boton, add="+")
+        self.bind_all("<ButtonRelease-1>", self._perfil_fin_clic, add="+")
+        if rendimiento.PERFIL_HUD:
+            perfilador.activar()
+            self.hud_msg.set("⏱ Perfilador activo (F12 apaga)")
+
+    def _perfil_mostrar(self, medicion: perfilador.Medicion):
+        try:
+            self.hud_msg.set(medicion.texto())
+        except tk.TclError:
+            pass  # ventana cerrándose
+
+    def _perfil_alternar(self):
+        if perfilador.alternar():
+            self.hud_msg.set("⏱ Perfilador activo")
+            self.status_msg.set("Perfilador activo: Shift+F12 captura la próxima acción, Ctrl+F12 vuelca JSON.")
+        else:
+            self.hud_msg.set("")
+            self.status_msg.set("Perfilador desactivado.")
+
+    def _perfil_capturar(self):
+        if not perfilador.activo():
+            perfilador.activar()
+        perfilador.capturar_siguiente()
+        self.status_msg.set("Captura armada: la próxima acción se perfila con cProfile + tracemalloc.")
+
+    def _perfil_volcar(self):
+        try:
+            ruta = perfilador.volcar_json()
+            self.status_msg.set(f"Perfil guardado en {ruta}")
+        except OSError as e:
+            self.status_msg.set(f"No se pudo guardar el perfil: {e}")
+
+    def _perfil_marcar_boton(self, event):
+        w = event.widget
+        if not perfilador.activo() or not isinstance(w, (tk.Button, ttk.Button)):
+            return
+        tags = w.bindtags()
+        if tags[0] != self.TAG_PERFIL:
+            w.bindtags((self.TAG_PERFIL,) + tags)
+
+    def _perfil_inicio_clic(self, event):
+        self._perfil_cerrar_clic()  # un clic anterior cuyo botón se destruyó antes de llegar a "all"
+        w = event.widget
+        if not perfilador.activo() or not (0 <= event.x < w.winfo_width() and 0 <= event.y < w.winfo_height()):
+            return  # soltó fuera del botón: no hay command
+        try:
+            texto = str(w.cget("text")).strip() or w.winfo_class()
+        except tk.TclError:
+            texto = "botón"
+        self._clic_en_curso = perfilador.accion(f"Clic {texto}")
+        self._clic_en_curso.__enter__()
+
+    def _perfil_fin_clic(self, _event=None):
+        if self._clic_en_curso is not None:
+            self.update_idletasks()  # el render que dispara el command cuenta en la acción
+            self._perfil_cerrar_clic()
+
+    def _perfil_cerrar_clic(self):
+        accion, self._clic_en_curso = self._clic_en_curso, None
+        if accion is not None:
+            accion.__exit__(None, None, None)
 
     # ---- navegación ----
     @staticmethod
@@ -124,16 +239,59 @@ class MainWindow(tk.Tk):
                 w.focus_set()
                 break
 
+    # ---- cambios en datos ----
+    def _on_cambios(self, tabla: str, cambios: Optional[Dict[int, str]]):
+        """
+        La vista visible se actualiza en vivo solo si aplica cambios por fila
+        (aplicar_cambios); las demás quedan marcadas y se recargan al volver a mostrarse.
+        """
+        for clave, vista in self._cache_vistas.items():
+            tablas, _ = self.DEPENDENCIAS.get(clave, ((), ()))
+            if tabla not in tablas:
+                continue
+            bus_cambios.acumular(self._cambios_pendientes.setdefault(clave, {}), tabla, cambios)
+            if clave == self._vista_actual and hasattr(vista, "aplicar_cambios"):
+                self._refrescar_vista(clave)
+
+    def _refrescar_vista(self, clave: str):
+        pendientes = self._cambios_pendientes.pop(clave, None)
+        vista = self._cache_vistas.get(clave)
+        if not pendientes or vista is None:
+            return
+        with perfilador.accion(f"Refrescar {clave}"):
+            self._aplicar_pendientes(clave, vista, pendientes)
+            if perfilador.activo():
+                self.update_idletasks()  # el layout de Tk cuenta como render
+
+    def _aplicar_pendientes(self, clave: str, vista: tk.Frame, pendientes: Dict[str, Optional[Dict[int, str]]]):
+        try:
+            if hasattr(vista, "aplicar_cambios"):
+                vista.aplicar_cambios(pendientes)
+                return
+            for metodo in self.DEPENDENCIAS[clave][1]:
+                if hasattr(vista, metodo):
+                    getattr(vista, metodo)()
+        except tk.TclError:
+            self._cache_vistas.pop(clave, None)  # vista destruida
+        except Exception as e:
+            self.status_msg.set(f"No se pudo actualizar {clave}: {e}")
+
     def _limpiar_contenedor(self):
+        # Las vistas en caché solo se ocultan (destruirlas dejaría la caché apuntando a widgets muertos)
+        en_cache = {str(v.master) for v in self._cache_vistas.values()}
         for w in self.contenedor.winfo_children():
             try:
-                w.destroy()
+                if str(w) in en_cache:
+                    w.pack_forget()
+                else:
+                    w.destroy()
             except Exception:
                 pass
         self.update_idletasks()
 
     def _mostrar_en_contenedor(self, vista: tk.Frame):
         self._limpiar_contenedor()
+        vista.master.pack(expand=True, fill="both")
         vista.pack(expand=True, fill="both")
 
     def mostrar_vista(self, texto_menu: str):
@@ -142,7 +300,14 @@ class MainWindow(tk.Tk):
         1) con 'servicios' (API nueva)
         2) sin 'servicios' (compatibilidad)
         """
+        with perfilador.accion(f"Abrir {self._nombre_limpio(texto_menu)}"):
+            self._abrir_vista(texto_menu)
+            if perfilador.activo():
+                self.update_idletasks()  # el layout de Tk cuenta como render
+
+    def _abrir_vista(self, texto_menu: str):
         clave = self._nombre_limpio(texto_menu)
+        self._vista_actual = clave
         self.status_msg.set(f"Abrir: {clave}")
         vista_cls = self.MAPEO_VISTAS.get(clave)
 
@@ -157,11 +322,15 @@ class MainWindow(tk.Tk):
             return
 
         # Si ya existe en caché, sólo mostrar
+        if clave in self._cache_vistas and not self._cache_vistas[clave].winfo_exists():
+            self._cache_vistas.pop(clave)
         if clave in self._cache_vistas:
             self._mostrar_en_contenedor(self._cache_vistas[clave])
+            self._refrescar_vista(clave)  # aplica lo que cambió mientras estaba oculta
             return
 
         # Intento A: con servicios
+        self._limpiar_contenedor()
         holder = tk.Frame(self.contenedor, bg="white")
         holder.pack(expand=True, fill="both")
         try:
@@ -209,4 +378,11 @@ def iniciar_app(servicios: Dict | None = None):
     app.update_idletasks()
     # Tamaño mínimo prudente para que quepan las vistas
     app.minsize(980, 600)
-    app.mainloop()
+    try:
+        app.mainloop()
+    finally:
+        # Confirma escrituras diferidas (group commit) antes de salir
+        cola_escritura.cerrar()
+        bus_cambios.detener()
+        respaldo.detener()
+        mantenimiento.detener()
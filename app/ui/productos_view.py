@@ -4,8 +4,9 @@ from tkinter import ttk, messagebox
 import unicodedata
 
 from app.models.producto import Producto
-from app.models.categoria import Categoria
 from app.config.constantes import IVA_RATE  # tasa por defecto (19% -> 0.19)
+from app.services import bus_cambios, cache_referencias, catalogo_memoria
+from app.ui.tabla_enlazada import TablaEnlazada
 
 class ProductosView(tk.Frame):
     def __init__(self, parent):
@@ -96,6 +97,8 @@ class ProductosView(tk.Frame):
             self.tabla.column(c, width=110 if c != "nombre" else 160, anchor="center")
         self.tabla.bind("<<TreeviewSelect>>", self.seleccionar_producto)
         self.tabla.pack(fill="both", expand=True, padx=10, pady=10)
+        # Altas/ediciones/bajas tocan solo el ítem afectado (orden por nombre, como el listado)
+        self.filas = TablaEnlazada(self.tabla, obtener=self._obtener, clave_orden=lambda f: f[1] or "")
 
     # ---------- Datos ----------
     def cargar_categorias(self):
@@ -103,8 +106,7 @@ class ProductosView(tk.Frame):
         Pobla el Combobox de categorías con los nombres existentes.
         Si no hay categorías, deja el campo vacío y editable vía entrada directa.
         """
-        datos = Categoria.listar()  # [(id, nombre), ...]
-        nombres = [nombre for (_id, nombre) in datos]
+        nombres = list(cache_referencias.nombres("categorias"))  # sin releer si no cambiaron
         if nombres:
             self.cmb_categoria.configure(state="readonly")
             self.cmb_categoria["values"] = nombres
@@ -115,11 +117,39 @@ class ProductosView(tk.Frame):
             self.cmb_categoria.set("")
 
     def cargar_tabla(self, datos=None):
-        for row in self.tabla.get_children():
-            self.tabla.delete(row)
-        filas = datos if datos is not None else Producto.listar_todos()
-        for f in filas:
-            self.tabla.insert("", tk.END, values=f)
+        """Carga completa; con `datos` (búsqueda) muestra solo ese subconjunto."""
+        self.filas.recargar(datos if datos is not None else self._listar(), parcial=datos is not None)
+
+    def _aplicar(self, ids):
+        """Refleja en la tabla los productos `ids` recién escritos (recarga completa si no se puede)."""
+        if not self.filas.aplicar(ids):
+            self.cargar_tabla()
+
+    def aplicar_cambios(self, cambios):
+        """Cambios del bus {tabla: {id: op} | None} (MainWindow)."""
+        if "categorias" in cambios:
+            self.cargar_categorias()
+        if "productos" in cambios:
+            if cambios["productos"] is None:
+                self.cargar_tabla()
+            else:
+                self.filas.aplicar(cambios["productos"])
+
+    @staticmethod
+    def _obtener(id_producto):
+        if catalogo_memoria.disponible():
+            return catalogo_memoria.catalogo().obtener(id_producto)
+        return Producto.obtener_por_id(id_producto)
+
+    @staticmethod
+    def _listar(nombre=None):
+        """Listado desde el catálogo en memoria (modo remoto: consulta al modelo)."""
+        if not catalogo_memoria.disponible():
+            return Producto.buscar_por_nombre(nombre) if nombre else Producto.listar_todos()
+        cat = catalogo_memoria.catalogo()
+        if not bus_cambios.activo():
+            cat.refrescar_stock()  # sin bus, ventas/compras mueven stock sin avisar al catálogo
+        return cat.listar(nombre=nombre)
 
     def limpiar_entradas(self):
         for k, w in self.entradas.items():
@@ -153,7 +183,7 @@ class ProductosView(tk.Frame):
             iva_val       = self._to_float(iva_input, "IVA")
 
             # Crear
-            Producto.crear(
+            nuevo_id = Producto.crear(
                 d["nombre"],
                 d.get("categoria", ""),
                 float(precio_compra),
@@ -168,7 +198,10 @@ class ProductosView(tk.Frame):
             messagebox.showinfo("✅ Éxito", "Producto guardado correctamente.")
             self.limpiar_entradas()
             self.cargar_categorias()
-            self.cargar_tabla()
+            if nuevo_id is not None:
+                self._aplicar([nuevo_id])
+            else:
+                self.cargar_tabla()
         except Exception as e:
             messagebox.showerror("❌ Error", f"No se pudo guardar: {e}")
 
@@ -225,8 +258,9 @@ class ProductosView(tk.Frame):
             iva_input     = d.get("iva", str(IVA_RATE)) or str(IVA_RATE)
             iva_val       = self._to_float(iva_input, "IVA")
 
+            pid = self.producto_seleccionado_id
             Producto.editar(
-                self.producto_seleccionado_id,
+                pid,
                 d["nombre"],
                 d.get("categoria", ""),
                 float(precio_compra),
@@ -241,7 +275,7 @@ class ProductosView(tk.Frame):
             messagebox.showinfo("✏️ Editado", "Producto actualizado exitosamente.")
             self.limpiar_entradas()
             self.cargar_categorias()
-            self.cargar_tabla()
+            self._aplicar([pid])
         except Exception as e:
             messagebox.showerror("❌ Error", f"No se pudo editar: {e}")
 
@@ -256,7 +290,7 @@ class ProductosView(tk.Frame):
             Producto.eliminar(pid)
             messagebox.showinfo("🗑️ Eliminado", "Producto eliminado.")
             self.limpiar_entradas()
-            self.cargar_tabla()
+            self._aplicar([pid])
         except Exception as e:
             messagebox.showerror("❌ Error", f"No se pudo eliminar: {e}")
 
@@ -265,7 +299,7 @@ class ProductosView(tk.Frame):
         if not nombre:
             messagebox.showwarning("⚠️ Atención", "Ingresa un nombre para buscar.")
             return
-        resultados = Producto.buscar_por_nombre(nombre)
+        resultados = self._listar(nombre)
         if not resultados:
             messagebox.showinfo("🔎 Sin resultados", "No se encontraron productos para ese nombre.")
         self.cargar_tabla(resultados)
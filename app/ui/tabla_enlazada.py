@@ -0,0 +1,115 @@
+# app/ui/tabla_enlazada.py
+"""
+Treeview enlazado por clave primaria: aplica diferencias en vez de recargar todo.
+
+- recargar(filas): carga completa (la única que borra y reinserta todo). Cada ítem
+  usa iid = str(id), así una fila se ubica sin recorrer la tabla.
+- aplicar(ids | {id: op}): relee solo esos ids con `obtener(id)` y por cada uno
+  inserta, actualiza o quita un único ítem. Editar un producto en una tabla de 30k
+  filas toca un ítem, no 30k.
+- El orden se mantiene con bisect sobre (clave_orden(fila), id): un alta o un
+  cambio de nombre mueve solo ese ítem a su lugar.
+- Si la tabla muestra un subconjunto (búsqueda), aplicar() actualiza/quita lo visible
+  pero no agrega filas nuevas. Si otro componente llenó el Treeview (BusquedaViva),
+  llamar soltar(): aplicar() devuelve False y el llamador decide (recargar o nada).
+
+Uso:
+    self.filas = TablaEnlazada(self.tabla, obtener=Cliente.obtener_por_id, clave_orden=lambda f: f[1] or "")
+    self.filas.recargar(Cliente.listar_todos())
+    nuevo = Cliente.crear(...)
+    self.filas.aplicar([nuevo])
+"""
+
+from __future__ import annotations
+
+import tkinter as tk
+from bisect import bisect_left, insort
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple, Union
+
+Fila = Sequence[Any]
+
+
+class TablaEnlazada:
+    def __init__(
+        self,
+        tabla,
+        obtener: Callable[[int], Optional[Fila]],
+        clave_orden: Optional[Callable[[Fila], Any]] = None,
+    ):
+        self.tabla = tabla
+        self.obtener = obtener
+        self.clave_orden = clave_orden or (lambda f: 0)  # sin orden: por id
+        self._orden: List[Tuple[Any, int]] = []   # (clave, id) en el orden mostrado
+        self._clave_de: Dict[int, Any] = {}      # id -> clave con la que está en _orden
+        self._propia = False                     # el Treeview refleja lo último que cargamos
+        self._parcial = False                    # se cargó un subconjunto (búsqueda)
+
+    @property
+    def propia(self) -> bool:
+        return self._propia
+
+    # ---------------------------
+    # Carga completa (respaldo)
+    # ---------------------------
+    def recargar(self, filas: Iterable[Fila], parcial: bool = False) -> int:
+        self.tabla.delete(*self.tabla.get_children())
+        self._orden = []
+        self._clave_de = {}
+        for f in filas:
+            pid = int(f[0])
+            if pid in self._clave_de:
+                continue  # id repetido: el primero manda (como el listado)
+            self.tabla.insert("", tk.END, iid=str(pid), values=tuple(f))
+            self._clave_de[pid] = self.clave_orden(f)
+        self._orden = sorted((c, i) for i, c in self._clave_de.items())
+        self._propia = True
+        self._parcial = bool(parcial)
+        return len(self._orden)
+
+    def soltar(self) -> None:
+        """Otro componente va a llenar el Treeview: deja de aplicar diferencias."""
+        self._propia = False
+
+    # ---------------------------
+    # Diferencias
+    # ---------------------------
+    def aplicar(self, cambios: Union[Mapping[int, str], Iterable[int]]) -> bool:
+        """
+        Relee y aplica los ids indicados (un dict {id: op} del bus sirve igual).
+        False si la tabla no es propia (el llamador decide si recarga).
+        """
+        if not self._propia:
+            return False
+        for pid in sorted({int(i) for i in cambios}):
+            self._aplicar_uno(pid, self.obtener(pid))
+        return True
+
+    def _aplicar_uno(self, pid: int, fila: Optional[Fila]) -> None:
+        iid = str(pid)
+        if fila is None:
+            if pid in self._clave_de:
+                self._sacar_de_orden(pid)
+                self.tabla.delete(iid)
+            return
+
+        clave = self.clave_orden(fila)
+        if pid in self._clave_de:
+            self.tabla.item(iid, values=tuple(fila))
+            if self._clave_de[pid] != clave:
+                self._sacar_de_orden(pid)
+                self.tabla.move(iid, "", self._meter_en_orden(pid, clave))
+        elif not self._parcial:
+            self.tabla.insert("", self._meter_en_orden(pid, clave), iid=iid, values=tuple(fila))
+
+    def _sacar_de_orden(self, pid: int) -> None:
+        clave = self._clave_de.pop(pid)
+        pos = bisect_left(self._orden, (clave, pid))
+        if pos < len(self._orden) and self._orden[pos] == (clave, pid):
+            del self._orden[pos]
+        else:
+            self._orden.remove((clave, pid))  # orden desalineado (claves no comparables): búsqueda lineal
+
+    def _meter_en_orden(self, pid: int, clave: Any) -> int:
+        insort(self._orden, (clave, pid))
+        self._clave_de[pid] = clave
+        return bisect_left(self._orden, (clave, pid))
@@ -3,10 +3,11 @@ import tkinter as tk
 from tkinter import ttk, messagebox
 from typing import Dict, Any
 
+from app.db.filas import VentaFila
 from app.models.venta import Venta
-from app.models.cliente import Cliente
-from app.models.producto import Producto
 from app.config.tipos import DocTipo
+from app.services import catalogo_memoria
+from app.ui.autocompletar import Autocompletar, sugerir_clientes, sugerir_productos
 
 # Intentamos importar el servicio; si no viene inyectado, usamos el módulo
 try:
@@ -44,7 +45,6 @@ class VentasView(tk.Frame):
         self.var_total = tk.StringVar(value="0.00")
 
         self.crear_widgets()
-        self.cargar_comboboxes()
         self.cargar_tabla()
         self._recalcular()
 
@@ -65,12 +65,13 @@ class VentasView(tk.Frame):
 
         # Cliente
         tk.Label(form, text="Cliente:", bg="white").grid(row=1, column=0, sticky="e", padx=5, pady=5)
-        self.cliente_cb = ttk.Combobox(form, width=30, state="readonly")
+        # Autocompletar: sugiere por prefijo mientras se escribe (no carga el catálogo completo)
+        self.cliente_cb = Autocompletar(form, buscar=sugerir_clientes, tabla="clientes", width=30)
         self.cliente_cb.grid(row=1, column=1, padx=5, pady=5)
 
         # Producto
         tk.Label(form, text="Producto:", bg="white").grid(row=2, column=0, sticky="e", padx=5, pady=5)
-        self.producto_cb = ttk.Combobox(form, width=30, state="readonly")
+        self.producto_cb = Autocompletar(form, buscar=sugerir_productos, tabla="productos", width=30)
         self.producto_cb.grid(row=2, column=1, padx=5, pady=5)
         self.producto_cb.bind("<<ComboboxSelected>>", self.mostrar_ultima_venta)
 
@@ -118,7 +119,7 @@ class VentasView(tk.Frame):
         # Tabla de ventas (se ajusta dinámicamente según columnas disponibles)
         self.tabla_frame = tk.Frame(self, bg="white")
         self.tabla_frame.pack(fill="both", expand=True, padx=10, pady=10)
-        self._build_tree(columns=("id", "cliente", "producto", "cantidad", "precio_unitario", "iva", "total", "fecha"))
+        self._build_tree(columns=VentaFila._fields)
 
     def _build_tree(self, columns: tuple[str, ...]):
         # Destruye y crea de nuevo el Treeview con columnas dadas
@@ -132,42 +133,13 @@ class VentasView(tk.Frame):
 
     # ------------- Datos -------------
 
-    def cargar_comboboxes(self):
-        # Poblar comboboxes con datos actuales
-        try:
-            clientes = [c[1] for c in Cliente.listar_todos()]
-        except Exception:
-            clientes = []
-        try:
-            productos = [p[1] for p in Producto.listar_todos()]
-        except Exception:
-            productos = []
-        self.cliente_cb["values"] = clientes
-        self.producto_cb["values"] = productos
-
     def cargar_tabla(self):
-        # Refrescar tabla con todas las ventas; intenta detectar columnas extendidas
+        # Refrescar tabla con todas las ventas (VentaFila: columnas fijas)
         if hasattr(self, "tabla"):
             for row in self.tabla.get_children():
                 self.tabla.delete(row)
 
-        ventas = list(Venta.listar_todas())
-        if not ventas:
-            return
-
-        # Detección de columnas por longitud de tupla
-        # Legacy:   (id, cliente, producto, cantidad, precio_unitario, iva, total, fecha) -> 8
-        # Extendido:(id, cliente, producto, cantidad, precio_unitario, doc_tipo, neto, iva, retencion, total, fecha) -> 11
-        cols = ("id", "cliente", "producto", "cantidad", "precio_unitario", "iva", "total", "fecha")
-        if len(ventas[0]) >= 11:
-            cols = (
-                "id", "cliente", "producto", "cantidad", "precio_unitario",
-                "doc_tipo", "neto", "iva", "retencion", "total", "fecha"
-            )
-
-        self._build_tree(columns=cols)
-
-        for v in ventas:
+        for v in Venta.listar_todas():
             self.tabla.insert("", tk.END, values=v)
 
     # ------------- UX -------------
@@ -181,30 +153,23 @@ class VentasView(tk.Frame):
         venta = Venta.ultima_venta_producto(producto)
         if not venta:
             self.info_venta.config(text="Sin ventas anteriores registradas.")
+            # Sin historial: precarga el precio de lista del catálogo en memoria
+            precio = catalogo_memoria.catalogo().precio_venta(producto) if catalogo_memoria.disponible() else None
+            if precio is not None:
+                self.entry_precio_unitario.delete(0, tk.END)
+                self.entry_precio_unitario.insert(0, str(precio))
+                self._recalcular()
             return
 
-        # Legacy (8 cols): (..., iva[5], total[6], fecha[7])
-        # Extendido (11 cols): (..., doc_tipo[5], neto[6], iva[7], ret[8], total[9], fecha[10])
-        if len(venta) >= 11:
-            total = venta[9]
-            fecha = venta[10]
-        elif len(venta) >= 8:
-            total = venta[6]
-            fecha = venta[7]
-        else:
-            total = ""
-            fecha = ""
-
         # (Opcional) precargar el precio unitario de la última venta
         try:
-            precio_unitario = venta[4]
             self.entry_precio_unitario.delete(0, tk.END)
-            self.entry_precio_unitario.insert(0, str(precio_unitario))
+            self.entry_precio_unitario.insert(0, str(venta.precio_unitario))
             self._recalcular()
         except Exception:
             pass
 
-        self.info_venta.config(text=f"🕒 Última venta de {producto}: {fecha} (Total: ${total})")
+        self.info_venta.config(text=f"🕒 Última venta de {producto}: {venta.fecha} (Total: ${venta.total})")
 
     # ------------- Lógica -------------
 
@@ -250,6 +215,10 @@ class VentasView(tk.Frame):
             precio_neto = float(self.entry_precio_unitario.get())
             if not cliente or not producto:
                 raise ValueError("Debe seleccionar cliente y producto.")
+            if not self.cliente_cb.seleccion_valida():
+                raise ValueError(f"Cliente '{cliente}' no existe. Elija uno de la lista.")
+            if not self.producto_cb.seleccion_valida():
+                raise ValueError(f"Producto '{producto}' no existe. Elija uno de la lista.")
             if cantidad <= 0 or precio_neto < 0:
                 raise ValueError("Cantidad y precio deben ser válidos.")
 
@@ -282,15 +251,14 @@ class VentasView(tk.Frame):
             messagebox.showinfo("✅ Éxito", "Venta registrada correctamente.")
 
             # Limpiar campos
-            self.cliente_cb.set("")
-            self.producto_cb.set("")
+            self.cliente_cb.limpiar()
+            self.producto_cb.limpiar()
             self.entry_cantidad.delete(0, tk.END); self.entry_cantidad.insert(0, "1")
             self.entry_precio_unitario.delete(0, tk.END); self.entry_precio_unitario.insert(0, "0")
             self.info_venta.config(text="")
             self._recalcular()
 
             # Refrescar datos
-            self.cargar_comboboxes()
             self.cargar_tabla()
 
         except Exception as e:
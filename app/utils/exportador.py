@@ -1,9 +1,12 @@
 # control_negocio/app/utils/exportador.py
 
+import csv
 import pandas as pd
 from pathlib import Path
 from datetime import datetime
 
+from app.db.database import usar_perfil
+
 EXPORT_PATH = Path(__file__).resolve().parent.parent / "exportaciones"
 EXPORT_PATH.mkdir(parents=True, exist_ok=True)
 
@@ -18,3 +21,21 @@ class Exportador:
             return archivo
         except Exception as e:
             raise Exception(f"No se pudo exportar: {e}")
+
+    @staticmethod
+    def exportar_csv(nombre_archivo, encabezados, filas):
+        """
+        Escribe fila a fila: `filas` puede ser un iterar_* de los modelos y la memoria
+        no crece con la tabla (exportar_excel arma un DataFrame completo).
+        """
+        try:
+            fecha = datetime.now().strftime("%Y%m%d_%H%M%S")
+            archivo = EXPORT_PATH / f"{nombre_archivo}_{fecha}.csv"
+            # Perfil lote: los iterar_* abren su conexión recién al consumirse, acá adentro
+            with usar_perfil("lote"), open(archivo, "w", newline="", encoding="utf-8") as f:
+                w = csv.writer(f)
+                w.writerow(encabezados)
+                w.writerows(filas)
+            return archivo
+        except Exception as e:
+            raise Exception(f"No se pudo exportar: {e}")
@@ -2,17 +2,53 @@
 """
 Validadores reutilizables (Chile).
 - validar_rut: Módulo 11 (admite formatos con puntos/guion; DV 0-9 o K).
+- digito_verificador: DV de un cuerpo de RUT (generación de datos de prueba).
+- validar_ruts / normalizar_ruts: versiones por lote (registros de terceros, importaciones).
+  Con NumPy instalado y lotes grandes, el Módulo 11 se calcula vectorizado.
 """
 
 import re
+from itertools import cycle
+from operator import getitem, mul
+from typing import Iterable, List, Optional
+
+try:
+    import numpy as np
+except Exception:
+    np = None
+
+# Patrones/tablas precalculados (se evalúan una sola vez al importar)
+_RE_RUT = re.compile(r"[0-9]+[0-9K]")
+# Solo puntos y guion: los espacios de los extremos se recortan (strip), los del medio
+# dejan el RUT inválido (como siempre: "12 345 678-5" no es un RUT)
+_TABLA_LIMPIEZA = str.maketrans("", "", ".-")
+_FACTORES = (2, 3, 4, 5, 6, 7)
+# DV según (suma % 11): resto 0 -> 11 -> "0", resto 1 -> 10 -> "K", resto r -> 11 - r
+_DV_POR_RESTO = "0K987654321"
+# Tabla por posición (desde la derecha): carácter -> dígito * factor
+_TABLAS_POSICION = tuple(
+    {str(d): d * _FACTORES[k % 6] for d in range(10)} for k in range(16)
+)
+
+# Desde este tamaño de lote conviene la ruta NumPy (si está disponible)
+UMBRAL_NUMPY = 20_000
 
 
 def normalizar_rut(rut: str) -> str:
     """
-    Normaliza el RUT (quita puntos/guion, mayúsculas).
+    Normaliza el RUT (quita puntos/guion y espacios de los extremos, mayúsculas).
     Ej: "12.345.678-5" -> "123456785"
     """
-    return rut.replace(".", "").replace("-", "").strip().upper()
+    return rut.translate(_TABLA_LIMPIEZA).strip().upper()
+
+
+def _dv_calculado(cuerpo: str) -> str:
+    # Módulo 11 con factores 2..7 cíclicos desde la derecha
+    if len(cuerpo) <= len(_TABLAS_POSICION):
+        suma = sum(map(getitem, _TABLAS_POSICION, reversed(cuerpo)))
+    else:
+        suma = sum(map(mul, map(int, reversed(cuerpo)), cycle(_FACTORES)))
+    return _DV_POR_RESTO[suma % 11]
 
 
 def validar_rut(rut: str) -> bool:
@@ -21,29 +57,73 @@ def validar_rut(rut: str) -> bool:
     Acepta 'k'/'K' como dígito verificador.
     """
     s = normalizar_rut(rut)
-    if len(s) < 2 or not re.match(r"^\d+[\dK]$", s):
+    if not _RE_RUT.fullmatch(s):
         return False
+    return s[-1] == _dv_calculado(s[:-1])
 
-    cuerpo, dv = s[:-1], s[-1]
-    if not cuerpo.isdigit():
-        return False
 
-    # Módulo 11 con factores 2..7 cíclicos
-    suma, factor = 0, 2
-    for d in reversed(cuerpo):
-        suma += int(d) * factor
-        factor = 2 if factor == 7 else factor + 1
-
-    resto = suma % 11
-    dv_calc_num = 11 - resto
-    if dv_calc_num == 11:
-        dv_calc = "0"
-    elif dv_calc_num == 10:
-        dv_calc = "K"
-    else:
-        dv_calc = str(dv_calc_num)
+def digito_verificador(cuerpo: str | int) -> str:
+    """
+    Calcula el dígito verificador (Módulo 11) para el cuerpo numérico del RUT.
+    Ej: "12345678" -> "5"
+    """
+    return _dv_calculado(str(cuerpo))
+
+
+# -------------------------------------------------
+# Lotes
+# -------------------------------------------------
+def normalizar_ruts(ruts: Iterable[Optional[str]]) -> List[str]:
+    """Normaliza un lote de RUT. None/'' -> ''."""
+    tabla = _TABLA_LIMPIEZA
+    return [r.translate(tabla).strip().upper() if r else "" for r in ruts]
 
-    return dv == dv_calc
+
+def _validar_normalizados_py(normalizados: List[str]) -> List[bool]:
+    patron = _RE_RUT.fullmatch
+    dv_calc = _dv_calculado
+    return [bool(patron(s)) and s[-1] == dv_calc(s[:-1]) for s in normalizados]
+
+
+def _validar_normalizados_np(normalizados: List[str]) -> List[bool]:
+    """
+    Módulo 11 vectorizado: cada RUT se alinea a la derecha con ceros (no alteran
+    la suma) en una matriz de bytes n×ancho; la suma ponderada es un producto matricial.
+    """
+    n = len(normalizados)
+    largos = np.fromiter(map(len, normalizados), dtype=np.int64, count=n)
+    ancho = int(largos.max())
+    if ancho < 2:
+        return [False] * n
+
+    # Caracteres no ASCII -> '?', conserva el ancho por fila (y queda inválido)
+    buf = "".join(s.rjust(ancho, "0") for s in normalizados).encode("ascii", "replace")
+    m = np.frombuffer(buf, dtype=np.uint8).reshape(n, ancho)
+
+    digitos = m[:, :-1].astype(np.int64) - 48
+    dv = m[:, -1]
+    cuerpo_ok = ((digitos >= 0) & (digitos <= 9)).all(axis=1)
+
+    # Factor de cada columna: 2..7 cíclico contando desde la derecha del cuerpo
+    pesos = np.array([_FACTORES[k % 6] for k in range(ancho - 2, -1, -1)], dtype=np.int64)
+    sumas = np.where(cuerpo_ok[:, None], digitos, 0) @ pesos
+    esperado = np.frombuffer(_DV_POR_RESTO.encode("ascii"), dtype=np.uint8)[sumas % 11]
+
+    return ((largos >= 2) & cuerpo_ok & (dv == esperado)).tolist()
+
+
+def validar_ruts(ruts: Iterable[Optional[str]], usar_numpy: Optional[bool] = None) -> List[bool]:
+    """
+    Valida un lote de RUT (cualquier formato). Retorna una lista de bool alineada con la entrada.
+    - usar_numpy=None: automático (NumPy disponible y lote >= UMBRAL_NUMPY).
+    - usar_numpy=True sin NumPy instalado: usa la ruta Python.
+    """
+    normalizados = normalizar_ruts(ruts)
+    if usar_numpy is None:
+        usar_numpy = len(normalizados) >= UMBRAL_NUMPY
+    if usar_numpy and np is not None and normalizados:
+        return _validar_normalizados_np(normalizados)
+    return _validar_normalizados_py(normalizados)
 
 
 def formatear_rut(rut: str) -> str:
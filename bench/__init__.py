@@ -0,0 +1,12 @@
+# bench/__init__.py
+"""
+Benchmarks reproducibles de los modelos sobre una BD SQLite temporal.
+
+- bench.generador: datos sintéticos realistas (RUT válidos, productos, ventas,
+  compras, facturas, movimientos) a escala 10^3–10^6 productos.
+- bench.run: cronometra las APIs calientes y emite JSON comparable entre commits.
+
+Uso:
+    python -m bench.run --productos 1000 10000 --out bench_resultados.json
+    python -m bench.run --productos 1000 --comparar bench_resultados.json
+"""
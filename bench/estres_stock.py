@@ -0,0 +1,147 @@
+# bench/estres_stock.py
+"""
+Prueba de estrés de concurrencia sobre el descuento de stock.
+
+Varios procesos (cajas) venden el mismo producto con Venta.crear hasta agotarlo.
+Al final verifica que no hubo sobreventa:
+
+    vendido == stock_inicial, stock final == 0, suma de ordenes_venta == vendido
+
+    python -m bench.estres_stock --procesos 8 --stock 500
+    python -m bench.estres_stock --procesos 8 --stock 500 --reservas   # mezcla reservas
+
+Código de salida 1 si se detecta sobreventa o stock negativo.
+"""
+
+from __future__ import annotations
+
+import argparse
+import multiprocessing as mp
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, Tuple
+
+PRODUCTO = "Producto Estrés"
+
+
+def _preparar(ruta: Path, stock: int) -> None:
+    import contextlib
+    import io
+
+    import app.db.database as database
+
+    database.DB_PATH = ruta
+    with contextlib.redirect_stdout(io.StringIO()):
+        database.init_db()
+    conn = database.get_connection()
+    try:
+        conn.execute(
+            "INSERT INTO productos (nombre, categoria, precio_compra, precio_venta, stock, codigo_interno)"
+            " VALUES (?, 'Estrés', 500, 1000, ?, 'ESTRES-1')",
+            (PRODUCTO, int(stock)),
+        )
+        conn.execute("INSERT INTO clientes (nombre) VALUES ('Cliente Estrés')")
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def _caja(ruta: str, semilla: int, con_reservas: bool, salida: "mp.Queue") -> None:
+    """Vende de a 1–3 unidades hasta que el modelo informe stock insuficiente."""
+    import random
+
+    import app.db.database as database
+    from app.models.venta import Venta
+
+    database.DB_PATH = Path(ruta)
+    rnd = random.Random(semilla)
+    vendido = rechazos = bloqueos = 0
+    while True:
+        cant = rnd.randint(1, 3)
+        try:
+            if con_reservas and rnd.random() < 0.3:
+                rid = Venta.reservar(PRODUCTO, cant, referencia=f"caja-{semilla}")
+                if rnd.random() < 0.5:
+                    Venta.liberar_reserva(rid)
+                    continue
+                Venta.confirmar_reserva(rid, "Cliente Estrés", 1000, doc_tipo="BOLETA")
+            else:
+                Venta.crear("Cliente Estrés", PRODUCTO, cant, 1000, doc_tipo="BOLETA")
+            vendido += cant
+        except ValueError:
+            # Sin stock para esta cantidad: si ni 1 unidad alcanza, la caja termina
+            rechazos += 1
+            if cant == 1:
+                break
+        except sqlite3.OperationalError:
+            bloqueos += 1  # agotó reintentos de lock
+    salida.put((vendido, rechazos, bloqueos))
+
+
+def ejecutar(procesos: int, stock: int, con_reservas: bool = False) -> Dict[str, int]:
+    ruta = Path(tempfile.mkdtemp(prefix="cn_estres_")) / "estres.db"
+    _preparar(ruta, stock)
+
+    salida: "mp.Queue[Tuple[int, int, int]]" = mp.Queue()
+    t0 = time.perf_counter()
+    cajas = [
+        mp.Process(target=_caja, args=(str(ruta), i, con_reservas, salida))
+        for i in range(int(procesos))
+    ]
+    for p in cajas:
+        p.start()
+    resultados = [salida.get() for _ in cajas]
+    for p in cajas:
+        p.join()
+    segundos = time.perf_counter() - t0
+
+    conn = sqlite3.connect(str(ruta))
+    try:
+        stock_final, reservado = conn.execute(
+            "SELECT stock, reservado FROM productos WHERE nombre = ?", (PRODUCTO,)
+        ).fetchone()
+        en_ventas = conn.execute(
+            "SELECT COALESCE(SUM(cantidad), 0), COUNT(*) FROM ordenes_venta WHERE producto = ?", (PRODUCTO,)
+        ).fetchone()
+    finally:
+        conn.close()
+
+    return {
+        "stock_inicial": int(stock),
+        "vendido": sum(r[0] for r in resultados),
+        "rechazos": sum(r[1] for r in resultados),
+        "bloqueos": sum(r[2] for r in resultados),
+        "stock_final": int(stock_final),
+        "reservado_final": int(reservado),
+        "unidades_en_ventas": int(en_ventas[0]),
+        "ventas": int(en_ventas[1]),
+        "ventas_por_segundo": int(en_ventas[1] / segundos) if segundos else 0,
+    }
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Estrés de ventas concurrentes sobre un mismo producto.")
+    ap.add_argument("--procesos", type=int, default=8)
+    ap.add_argument("--stock", type=int, default=500)
+    ap.add_argument("--reservas", action="store_true", help="mezcla reservar/confirmar/liberar con ventas directas")
+    args = ap.parse_args(argv)
+
+    r = ejecutar(args.procesos, args.stock, args.reservas)
+    for k, v in r.items():
+        print(f"{k:>20}: {v}")
+
+    ok = (
+        r["stock_final"] == 0
+        and r["reservado_final"] == 0
+        and r["vendido"] == r["stock_inicial"]
+        and r["unidades_en_ventas"] == r["vendido"]
+    )
+    print("OK: sin sobreventa" if ok else "ERROR: inventario inconsistente")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
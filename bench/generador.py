@@ -0,0 +1,303 @@
+# bench/generador.py
+"""
+Generador de datos sintéticos para benchmarks.
+
+- Inserta directo con executemany en una sola transacción (el objetivo es
+  poblar rápido, no medir los modelos).
+- Respeta los formatos que guardan los modelos:
+  clientes.rut '12345678K', proveedores.rut '12345678-k', montos desglosados.
+- Determinista: misma semilla ⇒ mismos datos (comparables entre commits).
+"""
+
+from __future__ import annotations
+
+import random
+import sqlite3
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Dict, List
+
+from app.config.constantes import IVA_RATE, RETENCION_HONORARIOS, DEFAULT_PAYMENT_DAYS
+from app.utils.validators import digito_verificador
+
+CATEGORIAS = [
+    "Abarrotes", "Bebidas", "Lácteos", "Congelados", "Limpieza", "Panadería",
+    "Carnes", "Frutas y Verduras", "Librería", "Ferretería", "Mascotas", "Higiene",
+]
+BASES_PRODUCTO = [
+    "Arroz", "Azúcar", "Harina", "Aceite", "Fideos", "Leche", "Yogur", "Queso",
+    "Jugo", "Bebida", "Agua", "Café", "Té", "Detergente", "Cloro", "Jabón",
+    "Pan", "Galletas", "Pollo", "Vacuno", "Manzana", "Palta", "Cuaderno", "Clavos",
+]
+MARCAS = ["Don Pepe", "La Vaquita", "Sur", "Andes", "Patagonia", "Colchagua", "Maipo", "Elqui"]
+NOMBRES = ["Juan", "María", "Pedro", "Camila", "José", "Valentina", "Diego", "Fernanda", "Matías", "Javiera"]
+APELLIDOS = ["González", "Muñoz", "Rojas", "Díaz", "Pérez", "Soto", "Contreras", "Silva", "Martínez", "Sepúlveda"]
+COMUNAS = ["Santiago", "Providencia", "Maipú", "Puente Alto", "Valparaíso", "Concepción", "Temuco", "La Serena"]
+DOCS_VENTA = ["FACTURA", "BOLETA", "BOLETA", "BOLETA", "FACTURA_EXENTA"]
+
+
+def _rut(rnd: random.Random) -> tuple[str, str]:
+    cuerpo = rnd.randint(5_000_000, 26_000_000)
+    return str(cuerpo), digito_verificador(cuerpo)
+
+
+def _fecha(rnd: random.Random, hoy: date, dias_atras: int = 365) -> str:
+    return (hoy - timedelta(days=rnd.randint(0, dias_atras))).isoformat()
+
+
+def _desglose(neto: float, exento: bool = False, honorarios: bool = False) -> tuple[float, float, float, float]:
+    neto = round(neto, 2)
+    if honorarios:
+        ret = round(neto * RETENCION_HONORARIOS, 2)
+        return neto, 0.0, ret, round(neto - ret, 2)
+    iva = 0.0 if exento else round(neto * IVA_RATE, 2)
+    return neto, iva, 0.0, round(neto + iva, 2)
+
+
+def escalas(productos: int) -> Dict[str, int]:
+    """Volumen de cada tabla en función de la cantidad de productos."""
+    return {
+        "productos": productos,
+        "clientes": max(50, productos // 10),
+        "proveedores": max(20, productos // 50),
+        "ventas": productos * 2,
+        "compras": productos,
+        "facturas": productos,
+        "movimientos": productos * 2,
+        "ingresos": max(100, productos // 5),
+        "gastos": max(100, productos // 5),
+    }
+
+
+def poblar(conn: sqlite3.Connection, productos: int = 1000, semilla: int = 2025) -> Dict[str, int]:
+    """
+    Puebla una BD ya inicializada (init_db) con datos sintéticos.
+    Retorna la cantidad de filas insertadas por tabla.
+    """
+    rnd = random.Random(semilla)
+    hoy = date.today()
+    n = escalas(int(productos))
+
+    cur = conn.cursor()
+    cur.execute("BEGIN")
+    try:
+        cur.executemany(
+            "INSERT OR IGNORE INTO categorias (nombre) VALUES (?)", [(c,) for c in CATEGORIAS]
+        )
+
+        # --- Productos ---
+        filas_prod = []
+        for i in range(n["productos"]):
+            nombre = f"{rnd.choice(BASES_PRODUCTO)} {rnd.choice(MARCAS)} {i:07d}"
+            compra = round(rnd.uniform(300, 30_000), 0)
+            venc = (hoy + timedelta(days=rnd.randint(-30, 540))).isoformat() if rnd.random() < 0.4 else None
+            filas_prod.append((
+                nombre, rnd.choice(CATEGORIAS), compra, round(compra * rnd.uniform(1.15, 1.8), 0),
+                rnd.randint(500, 5000), f"P{i:07d}", f"780{rnd.randint(10**9, 10**10 - 1)}",
+                IVA_RATE, f"B{rnd.randint(1, 40):02d}-{rnd.randint(1, 12):02d}", venc,
+            ))
+        cur.executemany(
+            """
+            INSERT INTO productos (
+                nombre, categoria, precio_compra, precio_venta, stock,
+                codigo_interno, codigo_externo, iva, ubicacion, fecha_vencimiento
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            filas_prod,
+        )
+        nombres_prod = [f[0] for f in filas_prod]
+
+        # --- Lotes: 1–3 por producto con vencimiento (stock repartido), uno sin vencimiento si no vence ---
+        filas_lote = []
+        ids_prod = [r[0] for r in cur.execute(
+            "SELECT id FROM productos ORDER BY id DESC LIMIT ?", (len(filas_prod),)
+        ).fetchall()][::-1]
+        for pid, f in zip(ids_prod, filas_prod):
+            stock, venc = f[4], f[9]
+            if not venc:
+                filas_lote.append((pid, "L0", stock, None, hoy.isoformat()))
+                continue
+            partes = rnd.randint(1, 3)
+            base = date.fromisoformat(venc)
+            for k in range(partes):
+                cant = stock // partes + (stock % partes if k == 0 else 0)
+                filas_lote.append((pid, f"L{k}", cant, (base + timedelta(days=60 * k)).isoformat(), hoy.isoformat()))
+        cur.executemany(
+            """
+            INSERT INTO lotes_inventario (producto_id, lote, cantidad, fecha_vencimiento, fecha_ingreso)
+            VALUES (?, ?, ?, ?, ?)
+            """,
+            filas_lote,
+        )
+        codigos_prod = [f[5] for f in filas_prod]
+        precios = {f[0]: (f[2], f[3]) for f in filas_prod}
+
+        # --- Clientes / Proveedores ---
+        filas_cli = []
+        for i in range(n["clientes"]):
+            cuerpo, dv = _rut(rnd)
+            filas_cli.append((
+                f"{rnd.choice(NOMBRES)} {rnd.choice(APELLIDOS)} {i}", f"{cuerpo}{dv}",
+                f"{rnd.choice(COMUNAS)} {rnd.randint(1, 9999)}", f"+569{rnd.randint(10**7, 10**8 - 1)}",
+            ))
+        cur.executemany(
+            "INSERT INTO clientes (nombre, rut, direccion, telefono) VALUES (?, ?, ?, ?)", filas_cli
+        )
+        nombres_cli = [f[0] for f in filas_cli]
+
+        filas_prov = []
+        for i in range(n["proveedores"]):
+            cuerpo, dv = _rut(rnd)
+            razon = f"Comercial {rnd.choice(APELLIDOS)} {i} SpA"
+            filas_prov.append((
+                razon, f"{cuerpo}-{dv.lower()}", f"{rnd.choice(COMUNAS)} {rnd.randint(1, 9999)}",
+                f"+562{rnd.randint(10**7, 10**8 - 1)}", razon, f"ventas{i}@proveedor.cl", rnd.choice(COMUNAS),
+            ))
+        cur.executemany(
+            """
+            INSERT INTO proveedores (nombre, rut, direccion, telefono, razon_social, correo, comuna)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            """,
+            filas_prov,
+        )
+        nombres_prov = [f[0] for f in filas_prov]
+
+        # --- Compras ---
+        filas_compra = []
+        for _ in range(n["compras"]):
+            prod = rnd.choice(nombres_prod)
+            cant = rnd.randint(1, 200)
+            unit = precios[prod][0]
+            neto, iva, ret, total = _desglose(unit * cant)
+            f = _fecha(rnd, hoy)
+            venc = (date.fromisoformat(f) + timedelta(days=DEFAULT_PAYMENT_DAYS)).isoformat()
+            filas_compra.append((rnd.choice(nombres_prov), prod, cant, unit, 33, neto, iva, ret, total, f, venc))
+        cur.executemany(
+            """
+            INSERT INTO compras (
+                proveedor, producto, cantidad, precio_unitario,
+                doc_tipo, neto, iva, retencion, total, fecha, vencimiento
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            filas_compra,
+        )
+
+        # --- Ventas ---
+        filas_venta = []
+        for _ in range(n["ventas"]):
+            prod = rnd.choice(nombres_prod)
+            cant = rnd.randint(1, 10)
+            unit = precios[prod][1]
+            doc = rnd.choice(DOCS_VENTA)
+            neto, iva, ret, total = _desglose(unit * cant, exento=doc.endswith("EXENTA"))
+            filas_venta.append((rnd.choice(nombres_cli), prod, cant, unit, doc, neto, iva, ret, total, _fecha(rnd, hoy)))
+        cur.executemany(
+            """
+            INSERT INTO ordenes_venta (
+                cliente, producto, cantidad, precio_unitario,
+                doc_tipo, neto, iva, retencion, total, fecha
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            filas_venta,
+        )
+
+        # --- Facturas (cliente/proveedor, estados mezclados) ---
+        filas_fact = []
+        for i in range(n["facturas"]):
+            tipo = "proveedor" if rnd.random() < 0.5 else "cliente"
+            tercero = rnd.choice(nombres_prov if tipo == "proveedor" else nombres_cli)
+            neto, iva, ret, total = _desglose(rnd.uniform(5_000, 2_000_000))
+            f = _fecha(rnd, hoy)
+            venc = (date.fromisoformat(f) + timedelta(days=DEFAULT_PAYMENT_DAYS)).isoformat()
+            estado = rnd.choice(["pendiente", "pagada", "pagada", "vencida"])
+            filas_fact.append((f"{i + 1:08d}", tercero, total, estado, f, tipo, 33, neto, iva, ret, total, venc))
+        cur.executemany(
+            """
+            INSERT INTO facturas (
+                numero, proveedor, monto, estado, fecha, tipo,
+                doc_tipo, neto, iva, retencion, total, vencimiento
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            filas_fact,
+        )
+
+        # --- Movimientos de inventario ---
+        filas_mov = [
+            (
+                rnd.choice(codigos_prod), "entrada" if rnd.random() < 0.6 else "salida", rnd.randint(1, 100),
+                f"B{rnd.randint(1, 40):02d}", rnd.choice(["manual", "escaner", "compra"]),
+                f"{_fecha(rnd, hoy)} {rnd.randint(8, 20):02d}:{rnd.randint(0, 59):02d}:00",
+            )
+            for _ in range(n["movimientos"])
+        ]
+        cur.executemany(
+            """
+            INSERT INTO movimientos_inventario (codigo_producto, tipo, cantidad, ubicacion, metodo, fecha)
+            VALUES (?, ?, ?, ?, ?, ?)
+            """,
+            filas_mov,
+        )
+
+        # --- Ingresos / Gastos ---
+        cur.executemany(
+            "INSERT INTO ingresos (nombre, descripcion, monto, estado, fecha) VALUES (?, ?, ?, ?, ?)",
+            [
+                (f"Ingreso {i}", "Venta mostrador", round(rnd.uniform(1_000, 500_000), 0),
+                 rnd.choice(["recibido", "recibido", "pendiente"]), _fecha(rnd, hoy))
+                for i in range(n["ingresos"])
+            ],
+        )
+        cur.executemany(
+            "INSERT INTO gastos (nombre, descripcion, monto, estado, fecha) VALUES (?, ?, ?, ?, ?)",
+            [
+                (f"Gasto {i}", rnd.choice(["Arriendo", "Luz", "Agua", "Internet", "Sueldos"]),
+                 round(rnd.uniform(1_000, 300_000), 0), rnd.choice(["pagado", "pagado", "pendiente"]),
+                 _fecha(rnd, hoy))
+                for i in range(n["gastos"])
+            ],
+        )
+
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+    # Estadísticas frescas para el planificador (como en una BD ya en uso)
+    conn.execute("ANALYZE")
+    return n
+
+
+def crear_bd(ruta: Path, productos: int = 1000, semilla: int = 2025) -> Dict[str, int]:
+    """
+    Crea una BD nueva en 'ruta' (init_db + datos) y deja database.DB_PATH apuntando a ella,
+    de modo que los modelos trabajen sobre la BD sintética.
+    """
+    import contextlib
+    import io
+
+    import app.db.database as database
+
+    database.DB_PATH = Path(ruta)
+    with contextlib.redirect_stdout(io.StringIO()):
+        database.init_db()
+    conn = database.get_connection()
+    try:
+        return poblar(conn, productos=productos, semilla=semilla)
+    finally:
+        conn.close()
+
+
+def muestra(tabla: str, columna: str, k: int = 50) -> List[str]:
+    """Valores existentes repartidos por la tabla (determinista, para parametrizar búsquedas)."""
+    from app.db.database import get_connection
+
+    conn = get_connection()
+    try:
+        total = conn.execute(f"SELECT MAX(id) FROM {tabla}").fetchone()[0] or 0
+        paso = max(1, total // max(1, int(k)))
+        cur = conn.execute(
+            f"SELECT {columna} FROM {tabla} WHERE id % ? = 0 LIMIT ?", (paso, int(k))
+        )
+        return [r[0] for r in cur.fetchall()]
+    finally:
+        conn.close()
@@ -0,0 +1,184 @@
+# bench/perfiles.py
+"""
+Efecto de cada ajuste del perfil de conexión sobre las consultas calientes.
+
+Parte de la conexión de siempre (solo foreign_keys/WAL/synchronous) y mide cada
+ajuste por separado (cache_size, mmap_size, temp_store, busy_timeout, isolation_level)
+y luego los perfiles completos de app/config/rendimiento.SQL_PERFILES.
+
+    python -m bench.perfiles --productos 10000 --repeticiones 10
+    python -m bench.perfiles --productos 100000 --solo reporte --out perfiles.json
+
+busy_timeout e isolation_level no cambian la latencia sin contención (cambian cuánto
+se espera un lock y cuándo se toma): aparecen para dejarlo a la vista. Para eso está
+bench.estres_stock.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+from app.config import rendimiento
+from app.db import cola_escritura
+from bench.generador import crear_bd, muestra
+
+# Conexión previa a los perfiles: valores por defecto de SQLite
+BASE: Dict[str, Any] = {"cache_kb": 2000, "mmap_mb": 0, "temp_memoria": False, "busy_ms": 5000.0,
+                        "aislamiento": "DEFERRED"}
+
+
+def variantes() -> Dict[str, Dict[str, Any]]:
+    """Base, base + un ajuste del perfil interactivo/lote, y los perfiles completos."""
+    ui, lote = rendimiento.SQL_PERFILES["interactivo"], rendimiento.SQL_PERFILES["lote"]
+    salida: Dict[str, Dict[str, Any]] = {"base": dict(BASE)}
+    for clave in BASE:
+        for perfil in (ui, lote):
+            if perfil[clave] != BASE[clave]:
+                salida.setdefault(f"{clave}={perfil[clave]}", dict(BASE, **{clave: perfil[clave]}))
+    salida["perfil interactivo"] = dict(ui)
+    salida["perfil lote"] = dict(lote)
+    return salida
+
+
+def casos() -> Dict[str, Callable[[], Callable[[int], Any]]]:
+    """Lecturas calientes de la UI y de reportes (sin escrituras: todas las variantes ven la misma BD)."""
+    from app.db.database import get_connection
+    from app.models.analitica_ventas import AnaliticaVentas
+    from app.models.factura import Factura
+    from app.models.finanzas import Finanzas
+    from app.models.inventario import Inventario
+    from app.models.producto import Producto
+    from app.models.venta import Venta
+
+    def buscar_por_nombre():
+        terminos = [n.split(" ")[0] for n in muestra("productos", "nombre", 20)]
+        return lambda i: Producto.buscar_por_nombre(terminos[i % len(terminos)])
+
+    def consulta(sql: str):
+        def correr(i):
+            conn = get_connection()
+            try:
+                return len(conn.execute(sql).fetchall())
+            finally:
+                conn.close()
+
+        return correr
+
+    # Reportes sin índice que los sirva: GROUP BY / ORDER BY arman árboles B temporales
+    # y el ordenamiento completo desborda la caché (archivos temporales sin temp_store=MEMORY)
+    def reporte_agrupado():
+        return consulta(
+            "SELECT cliente, producto, COUNT(*), SUM(total) FROM ordenes_venta "
+            "GROUP BY cliente, producto ORDER BY SUM(total) DESC"
+        )
+
+    def reporte_ordenado():
+        return consulta("SELECT * FROM ordenes_venta ORDER BY total * cantidad DESC, fecha")
+
+    def recorrer_ventas():
+        return lambda i: sum(1 for _ in Venta.iterar_todas())
+
+    return {
+        "Producto.buscar_por_nombre": buscar_por_nombre,
+        "Finanzas.estado_resultado": lambda: (lambda i: Finanzas.estado_resultado()),
+        "Inventario.por_vencer": lambda: (lambda i: Inventario.por_vencer(30)),
+        "Factura.listar_todas": lambda: (lambda i: Factura.listar_todas()),
+        "AnaliticaVentas.margen_por_producto": lambda: (lambda i: AnaliticaVentas.margen_por_producto()),
+        "Venta.iterar_todas": recorrer_ventas,
+        "reporte agrupado (GROUP BY)": reporte_agrupado,
+        "reporte ordenado (ORDER BY sin índice)": reporte_ordenado,
+    }
+
+
+def ejecutar(productos: int, repeticiones: int, semilla: int, filtro: str | None = None) -> Dict[str, Any]:
+    from app.db.database import usar_perfil
+
+    resultado: Dict[str, Any] = {"productos": productos, "sqlite": sqlite3.sqlite_version,
+                                 "repeticiones": repeticiones, "variantes": {}}
+    with tempfile.TemporaryDirectory(prefix="bench_cn_") as tmp:
+        t0 = time.perf_counter()
+        resultado["filas"] = crear_bd(Path(tmp) / "bench.db", productos=productos, semilla=semilla)
+        print(f"▶ {productos} productos (datos generados en {time.perf_counter() - t0:.1f} s)")
+
+        preparados = {
+            nombre: preparar() for nombre, preparar in casos().items()
+            if not filtro or filtro.lower() in nombre.lower()
+        }
+        todas = variantes()
+        for variante, ajustes in todas.items():
+            rendimiento.SQL_PERFILES[f"bench:{variante}"] = ajustes
+        try:
+            for nombre, fn in preparados.items():
+                # Variantes intercaladas (una ronda = cada variante una vez, en orden rotado):
+                # la deriva del equipo (caché del SO, turbo, otros procesos) se reparte entre todas
+                tiempos: Dict[str, List[float]] = {v: [] for v in todas}
+                orden = list(todas)
+                for ronda in range(1 + repeticiones):
+                    orden = orden[1:] + orden[:1]
+                    for variante in orden:
+                        with usar_perfil(f"bench:{variante}"):
+                            t0 = time.perf_counter()
+                            fn(ronda)
+                            if ronda:  # la primera ronda calienta
+                                tiempos[variante].append((time.perf_counter() - t0) * 1000.0)
+                for variante, ts in tiempos.items():
+                    datos = resultado["variantes"].setdefault(variante, {"ajustes": todas[variante], "casos": {}})
+                    datos["casos"][nombre] = _resumen(ts)
+                print(f"   {nombre}")
+        finally:
+            for variante in todas:
+                rendimiento.SQL_PERFILES.pop(f"bench:{variante}", None)
+            cola_escritura.cerrar()
+    return resultado
+
+
+def _resumen(tiempos: List[float]) -> Dict[str, float]:
+    tiempos = sorted(tiempos)
+    return {
+        "n": len(tiempos),
+        "min_ms": round(tiempos[0], 3),
+        "mediana_ms": round(statistics.median(tiempos), 3),
+        "p95_ms": round(tiempos[min(len(tiempos) - 1, int(round(0.95 * (len(tiempos) - 1))))], 3),
+    }
+
+
+def imprimir(resultado: Dict[str, Any]) -> None:
+    """Mediana por caso y variante, con la variación respecto de la base."""
+    base = resultado["variantes"]["base"]["casos"]
+    for caso, stats in base.items():
+        print(f"\n{caso}  (base {stats['mediana_ms']:.2f} ms)")
+        for variante, datos in resultado["variantes"].items():
+            if variante == "base":
+                continue
+            ahora = datos["casos"][caso]["mediana_ms"]
+            delta = (ahora - stats["mediana_ms"]) / stats["mediana_ms"] * 100.0 if stats["mediana_ms"] else 0.0
+            print(f"   {variante:<28} {ahora:>9.2f} ms ({delta:+.1f}%)")
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Efecto de los ajustes de conexión en las consultas calientes.")
+    parser.add_argument("--productos", type=int, default=10000)
+    parser.add_argument("--repeticiones", type=int, default=10)
+    parser.add_argument("--semilla", type=int, default=2025)
+    parser.add_argument("--solo", default=None, help="Filtra casos por nombre (subcadena).")
+    parser.add_argument("--out", type=Path, default=None, help="Archivo JSON de salida.")
+    args = parser.parse_args(argv)
+
+    resultado = ejecutar(args.productos, args.repeticiones, args.semilla, args.solo)
+    imprimir(resultado)
+    if args.out:
+        args.out.write_text(json.dumps(resultado, indent=2, ensure_ascii=False), encoding="utf-8")
+        print(f"\n💾 Resultados en {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
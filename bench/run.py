@@ -0,0 +1,239 @@
+# bench/run.py
+"""
+Cronometra las APIs calientes de los modelos sobre BDs sintéticas.
+
+    python -m bench.run --productos 1000 10000 --repeticiones 20 --out resultados.json
+    python -m bench.run --productos 1000 --comparar resultados_commit_anterior.json
+
+El JSON incluye commit, versión de Python/SQLite y, por escala y caso:
+min/mediana/p95/promedio en ms, para comparar regresiones entre commits. Los casos que
+no aplican en el entorno (p.ej. analítica columnar sin NumPy) quedan en "omitidos".
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+from app.db import cola_escritura
+from bench.generador import crear_bd, muestra
+
+
+# -------------------------------------------------
+# Medición
+# -------------------------------------------------
+class CasoOmitido(Exception):
+    """La preparación de un caso lo descarta en este entorno (p.ej. falta una dependencia opcional)."""
+
+
+def medir(fn: Callable[[int], Any], repeticiones: int, calentamiento: int = 1) -> Dict[str, float]:
+    """Ejecuta fn(i) 'repeticiones' veces y resume latencias en ms."""
+    for i in range(calentamiento):
+        fn(i)
+    tiempos: List[float] = []
+    for i in range(repeticiones):
+        t0 = time.perf_counter()
+        fn(i)
+        tiempos.append((time.perf_counter() - t0) * 1000.0)
+    tiempos.sort()
+    p95 = tiempos[min(len(tiempos) - 1, int(round(0.95 * (len(tiempos) - 1))))]
+    return {
+        "n": len(tiempos),
+        "min_ms": round(tiempos[0], 3),
+        "mediana_ms": round(statistics.median(tiempos), 3),
+        "p95_ms": round(p95, 3),
+        "prom_ms": round(statistics.fmean(tiempos), 3),
+    }
+
+
+def casos() -> Dict[str, Callable[[], Callable[[int], Any]]]:
+    """
+    Casos de benchmark. Cada entrada prepara sus parámetros (sobre la BD ya
+    poblada) y devuelve la función a cronometrar.
+    """
+    from app.models.producto import Producto
+    from app.models.venta import Venta
+    from app.models.finanzas import Finanzas
+    from app.models.inventario import Inventario
+    from app.models.factura import Factura
+
+    def buscar_por_nombre():
+        terminos = [n.split(" ")[0] for n in muestra("productos", "nombre", 20)]
+        return lambda i: Producto.buscar_por_nombre(terminos[i % len(terminos)])
+
+    def venta_crear():
+        productos = muestra("productos", "nombre", 50)
+        clientes = muestra("clientes", "nombre", 50)
+        return lambda i: Venta.crear(
+            clientes[i % len(clientes)], productos[i % len(productos)], 1, 1000, doc_tipo="BOLETA"
+        )
+
+    def estado_resultado():
+        return lambda i: Finanzas.estado_resultado()
+
+    def por_vencer():
+        return lambda i: Inventario.por_vencer(30)
+
+    def listar_facturas():
+        return lambda i: Factura.listar_todas()
+
+    def ctas_por_pagar():
+        return lambda i: Factura.listar_extendidas("proveedor", None if i % 2 else "pendiente")
+
+    def registrar_lote():
+        from app.models.ingreso_inventario import IngresoInventario
+
+        codigos = muestra("productos", "codigo_interno", 1000)
+        filas = [(codigos[j % len(codigos)], 1 + j % 5, "B01") for j in range(5000)]
+        return lambda i: IngresoInventario.registrar_lote(filas)
+
+    def movimientos_diferidos():
+        from app.models.movimiento_inventario import MovimientoInventario
+
+        codigos = muestra("productos", "codigo_interno", 100)
+
+        def rafaga(i):
+            futuros = [
+                MovimientoInventario.registrar_diferido(codigos[j % len(codigos)], "entrada", 1, metodo="escáner")
+                for j in range(500)
+            ]
+            for f in futuros:
+                f.result()
+
+        return rafaga
+
+    def margen_por_producto():
+        from app.models.analitica_ventas import AnaliticaVentas
+
+        return lambda i: AnaliticaVentas.margen_por_producto(costo="promedio" if i % 2 else "ultimo")
+
+    def analitica_mensual():
+        from app.services import analitica_columnar
+
+        if analitica_columnar.np is None:
+            raise CasoOmitido("requiere NumPy")
+        analitica_columnar.generar_snapshot()
+        snap = analitica_columnar.Snapshot.cargar()
+        return lambda i: snap.ventas_mensuales_por_cliente()
+
+    def validar_ruts():
+        from app.utils.validators import digito_verificador, validar_ruts as validar
+
+        ruts = [f"{c}-{digito_verificador(c)}" for c in range(10_000_000, 10_100_000)]
+        return lambda i: validar(ruts)
+
+    return {
+        "Producto.buscar_por_nombre": buscar_por_nombre,
+        "Venta.crear": venta_crear,
+        "Finanzas.estado_resultado": estado_resultado,
+        "Inventario.por_vencer": por_vencer,
+        "Factura.listar_todas": listar_facturas,
+        "Factura.listar_extendidas": ctas_por_pagar,
+        "IngresoInventario.registrar_lote (5000)": registrar_lote,
+        "MovimientoInventario.registrar_diferido (500)": movimientos_diferidos,
+        "validators.validar_ruts (10^5)": validar_ruts,
+        "AnaliticaVentas.margen_por_producto": margen_por_producto,
+        "Analitica.ventas_mensuales_por_cliente": analitica_mensual,
+    }
+
+
+def _commit_actual() -> str | None:
+    try:
+        res = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, cwd=Path(__file__).resolve().parent.parent, timeout=10,
+        )
+        return res.stdout.strip() or None
+    except Exception:
+        return None
+
+
+def ejecutar(productos: List[int], repeticiones: int, semilla: int, filtro: str | None = None) -> Dict[str, Any]:
+    resultado: Dict[str, Any] = {
+        "fecha": datetime.now().isoformat(timespec="seconds"),
+        "commit": _commit_actual(),
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "plataforma": platform.platform(),
+        "repeticiones": repeticiones,
+        "semilla": semilla,
+        "escalas": {},
+    }
+    for n in productos:
+        with tempfile.TemporaryDirectory(prefix="bench_cn_") as tmp:
+            t0 = time.perf_counter()
+            filas = crear_bd(Path(tmp) / "bench.db", productos=n, semilla=semilla)
+            generacion_s = time.perf_counter() - t0
+            print(f"▶ {n} productos (datos generados en {generacion_s:.1f} s)")
+
+            escala: Dict[str, Any] = {
+                "filas": filas, "generacion_s": round(generacion_s, 2), "casos": {}, "omitidos": {},
+            }
+            for nombre, preparar in casos().items():
+                if filtro and filtro.lower() not in nombre.lower():
+                    continue
+                try:
+                    fn = preparar()
+                except CasoOmitido as e:
+                    escala["omitidos"][nombre] = str(e)
+                    print(f"   {nombre:<30} omitido ({e})")
+                    continue
+                stats = medir(fn, repeticiones)
+                escala["casos"][nombre] = stats
+                print(f"   {nombre:<30} mediana {stats['mediana_ms']:>9.3f} ms   p95 {stats['p95_ms']:>9.3f} ms")
+            resultado["escalas"][str(n)] = escala
+            cola_escritura.cerrar()  # su conexión apunta a la BD de esta escala
+    return resultado
+
+
+def comparar(actual: Dict[str, Any], base: Dict[str, Any]) -> None:
+    """Imprime la variación de la mediana por caso respecto de un JSON anterior."""
+    print(f"\nComparación contra {base.get('commit') or '?'} ({base.get('fecha', '')}):")
+    for escala, datos in actual["escalas"].items():
+        previos = base.get("escalas", {}).get(escala, {}).get("casos", {})
+        for nombre, stats in datos["casos"].items():
+            if nombre not in previos:
+                continue
+            antes = previos[nombre]["mediana_ms"]
+            ahora = stats["mediana_ms"]
+            delta = ((ahora - antes) / antes * 100.0) if antes else 0.0
+            marca = "⚠️ " if delta > 10 else "  "
+            print(f" {marca}[{escala}] {nombre:<30} {antes:>9.3f} → {ahora:>9.3f} ms ({delta:+.1f}%)")
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmarks de los modelos sobre datos sintéticos.")
+    parser.add_argument("--productos", type=int, nargs="+", default=[1000],
+                        help="Escalas a medir (cantidad de productos; 10^3–10^6).")
+    parser.add_argument("--repeticiones", type=int, default=20)
+    parser.add_argument("--semilla", type=int, default=2025)
+    parser.add_argument("--solo", default=None, help="Filtra casos por nombre (subcadena).")
+    parser.add_argument("--out", type=Path, default=None, help="Archivo JSON de salida.")
+    parser.add_argument("--comparar", type=Path, default=None, help="JSON previo para comparar medianas.")
+    args = parser.parse_args(argv)
+
+    resultado = ejecutar(args.productos, args.repeticiones, args.semilla, args.solo)
+
+    if args.out:
+        args.out.write_text(json.dumps(resultado, indent=2, ensure_ascii=False), encoding="utf-8")
+        print(f"\n💾 Resultados en {args.out}")
+    else:
+        print(json.dumps(resultado, indent=2, ensure_ascii=False))
+
+    if args.comparar:
+        comparar(resultado, json.loads(args.comparar.read_text(encoding="utf-8")))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
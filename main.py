@@ -93,28 +93,41 @@ def _construir_servicios() -> Dict[str, Any]:
 def main() -> int:
     """
     Orquestación de arranque:
-    - Asegura carpeta de datos
-    - Inicializa/migra la BD
-    - Muestra tablas
+    - Modo multi-terminal (CN_SERVIDOR_URL): conecta al servidor local, que es el
+      dueño de la BD y su esquema; no abre el archivo compartido
+    - Modo local: asegura carpeta de datos, inicializa/migra la BD y muestra tablas
     - Inyecta servicios y lanza UI
     """
     _print_header()
 
-    data_path = asegurar_directorio_db()
-    if not os.access(str(data_path), os.W_OK):
-        print(f"❌ Sin permisos de escritura en: {data_path}")
-        return 1
-
-    try:
-        init_db()
-        print("✅ Base de datos inicializada/migrada.")
-    except Exception as e:
-        print("❌ Error inicializando la base de datos:")
-        print(f"   {e}")
-        traceback.print_exc()
-        return 2
-
-    verificar_tablas()
+    # Modo multi-terminal: los modelos hablan con el servidor local (app/services/servidor_local.py)
+    url_servidor = os.environ.get("CN_SERVIDOR_URL", "").strip()
+    if url_servidor:
+        from app.services import cliente_remoto
+
+        try:
+            cliente_remoto.activar(url_servidor)
+            print(f"🌐 Modo multi-terminal: servidor {url_servidor}")
+        except ConnectionError as e:
+            print("❌ No se pudo conectar al servidor local:")
+            print(f"   {e}")
+            return 4
+    else:
+        data_path = asegurar_directorio_db()
+        if not os.access(str(data_path), os.W_OK):
+            print(f"❌ Sin permisos de escritura en: {data_path}")
+            return 1
+
+        try:
+            init_db()
+            print("✅ Base de datos inicializada/migrada.")
+        except Exception as e:
+            print("❌ Error inicializando la base de datos:")
+            print(f"   {e}")
+            traceback.print_exc()
+            return 2
+
+        verificar_tablas()
 
     # Construcción de servicios a compartir con las vistas
     servicios = _construir_servicios()
@@ -0,0 +1,39 @@
+# tests/conftest.py
+"""
+Fixtures comunes: cada prueba que pide `bd` trabaja sobre una BD SQLite nueva en un
+directorio temporal (init_db completo: esquema, migraciones, triggers, lotes).
+"""
+
+import contextlib
+import io
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import app.db.database as database  # noqa: E402
+from app.db import cola_escritura  # noqa: E402
+from app.services import cache_referencias, catalogo_memoria  # noqa: E402
+
+
+@pytest.fixture
+def bd(tmp_path, monkeypatch):
+    """Ruta de una BD recién inicializada; get_connection() apunta a ella durante la prueba."""
+    ruta = tmp_path / "negocio.db"
+    monkeypatch.setattr(database, "DB_PATH", ruta)
+    monkeypatch.setattr(catalogo_memoria, "_catalogo", None)
+    cache_referencias.invalidar()
+    with contextlib.redirect_stdout(io.StringIO()):
+        database.init_db()
+    yield ruta
+    cola_escritura.cerrar()  # su conexión apunta a esta BD
+    cache_referencias.invalidar()
+
+
+@pytest.fixture
+def conn(bd):
+    c = database.get_connection()
+    yield c
+    c.close()
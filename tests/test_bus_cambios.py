@@ -0,0 +1,101 @@
+# tests/test_bus_cambios.py
+from app.config import rendimiento
+from app.models.producto import Producto
+from app.models.venta import Venta
+from app.services import bus_cambios, cache_referencias, catalogo_memoria
+from app.services.bus_cambios import BusCambios, acumular
+
+
+def test_acumular_une_ids_por_tabla():
+    pendientes = {}
+    acumular(pendientes, "productos", {1: "I"})
+    acumular(pendientes, "productos", {1: "U", 2: "D"})
+    assert pendientes == {"productos": {1: "U", 2: "D"}}
+
+
+def test_recarga_completa_sin_pendientes_previos():
+    # Antes: setdefault(tabla, {}).update(None) -> TypeError y la vista nunca recargaba
+    pendientes = {}
+    acumular(pendientes, "productos", None)
+    assert pendientes == {"productos": None}
+
+
+def test_recarga_completa_gana_sobre_ids():
+    pendientes = {}
+    acumular(pendientes, "productos", {1: "I"})
+    acumular(pendientes, "productos", None)
+    acumular(pendientes, "productos", {2: "U"})
+    assert pendientes == {"productos": None}
+
+
+def test_tablas_independientes():
+    pendientes = {}
+    acumular(pendientes, "clientes", None)
+    acumular(pendientes, "productos", {3: "I"})
+    assert pendientes == {"clientes": None, "productos": {3: "I"}}
+
+
+# -------------------------------------------------
+# Captura real: triggers -> registro_cambios -> sondear -> suscriptores
+# -------------------------------------------------
+def _bus_con_registro():
+    bus = BusCambios()
+    entregas = []
+    bus.suscribir(None, lambda tabla, cambios: entregas.append((tabla, cambios)))
+    bus.suscribir(None, bus_cambios._reenviar_a_referencias)
+    assert bus.sondear() == 0  # fija la versión de partida
+    return bus, entregas
+
+
+def test_cambios_de_modelos_llegan_por_tabla(bd):
+    bus, entregas = _bus_con_registro()
+    try:
+        assert bus.sondear() == 0 and bus.stats["lecturas"] == 0  # data_version sin cambios: no lee tablas
+
+        pid = Producto.crear("Leche", "Lácteos", 500, 900, 10, "LEC", "", 19, "B1", None)
+        vid = Venta.crear("Cliente", "Leche", 2, 900)
+        assert bus.sondear() > 0
+        assert dict(entregas) == {"productos": {pid: "U"}, "ordenes_venta": {vid: "I"}}
+        assert bus.sondear() == 0 and bus.stats["lecturas"] == 1
+    finally:
+        bus.cerrar()
+
+
+def test_cambio_externo_se_reenvia_a_referencias_y_catalogo(bd, conn):
+    pid = Producto.crear("Leche", "Lácteos", 500, 900, 10, "LEC", "", 19, "B1", None)
+    catalogo = catalogo_memoria.catalogo()
+    assert catalogo.precio_venta("Leche") == 900
+    version = cache_referencias.version("productos")
+    bus, entregas = _bus_con_registro()
+    try:
+        # Otra caja (otra conexión, sin pasar por los modelos de este proceso)
+        conn.execute("UPDATE productos SET precio_venta = 1234 WHERE id = ?", (pid,))
+        conn.commit()
+        bus.sondear()
+        assert entregas == [("productos", {pid: "U"})]
+        assert cache_referencias.version("productos") > version
+        assert catalogo.precio_venta("Leche") == 1234
+    finally:
+        bus.cerrar()
+
+
+def test_desborde_o_registro_podado_pide_recarga_completa(bd, conn, monkeypatch):
+    bus, entregas = _bus_con_registro()
+    try:
+        monkeypatch.setattr(rendimiento, "CDC_MAX_FILAS", 3)
+        for i in range(5):
+            Producto.crear(f"P{i}", "Varios", 1, 2, 0, f"C{i}", "", 19, "B1", None)
+        assert bus.sondear() > 3
+        assert entregas == [("productos", None)]
+
+        # Cambios ya podados antes de leerlos: tampoco se sabe qué filas cambiaron
+        entregas.clear()
+        monkeypatch.setattr(rendimiento, "CDC_MAX_FILAS", 2000)
+        conn.execute("INSERT INTO clientes (nombre, rut) VALUES ('A', '1-9')")
+        conn.execute("INSERT INTO clientes (nombre, rut) VALUES ('B', '2-7')")
+        conn.commit()
+        bus_cambios.podar(conn, conservar=1)
+        bus.sondear()
+        assert entregas == [("clientes", None)]
+    finally:
+        bus.cerrar()
@@ -0,0 +1,34 @@
+# tests/test_catalogo_consultas.py
+"""Catálogo de planes: mismo SQL que los modelos, sin SCAN sobre una BD recién creada."""
+
+import sqlite3
+
+from app.db import catalogo_consultas, database
+from app.models.movimiento_inventario import MovimientoInventario
+from app.models.producto import Producto
+
+
+def test_planes_catalogados_usan_indices(conn):
+    assert catalogo_consultas.verificar_planes(conn) == []
+
+
+def test_catalogo_usa_las_constantes_de_los_modelos():
+    por_nombre = {c.nombre: c.sql for c in catalogo_consultas.CATALOGO}
+    assert por_nombre["Producto.obtener_por_id"] is Producto._SQL_POR_ID
+    assert por_nombre["MovimientoInventario.filtrar_por_codigo"] is MovimientoInventario._SQL_CODIGO_CONTIENE
+
+
+def test_filtrar_por_codigo_subcadena_por_defecto(bd):
+    for codigo in ("ABC-1", "X-abc", "ZZZ"):
+        MovimientoInventario.registrar(codigo, "entrada", 1)
+    assert sorted(m.codigo_producto for m in MovimientoInventario.filtrar_por_codigo("abc")) == ["ABC-1", "X-abc"]
+    assert [m.codigo_producto for m in MovimientoInventario.filtrar_por_codigo("abc", prefijo=True)] == ["ABC-1"]
+
+
+def test_cli_informa_bd_sin_migrar(tmp_path, monkeypatch, capsys):
+    antigua = tmp_path / "antigua.db"
+    with sqlite3.connect(antigua) as c:
+        c.execute("CREATE TABLE productos (id INTEGER PRIMARY KEY, nombre TEXT, stock INTEGER)")
+    monkeypatch.setattr(database, "DB_PATH", antigua)
+    assert catalogo_consultas.main() == 2
+    assert "BD sin migrar" in capsys.readouterr().out
@@ -0,0 +1,46 @@
+# tests/test_cola_escritura.py
+"""Cola de escritura: un COMMIT por lote y un SAVEPOINT por escritura."""
+
+import pytest
+
+from app.db.cola_escritura import ColaEscritura
+
+
+def _insertar(nombre, fallar=False):
+    def fn(cur):
+        cur.execute("INSERT INTO categorias (nombre) VALUES (?)", (nombre,))
+        if fallar:
+            raise ValueError(f"falla {nombre}")
+        return cur.lastrowid
+
+    return fn
+
+
+def test_escritura_fallida_se_deshace_sola(conn):
+    cola = ColaEscritura(ventana_ms=200)
+    try:
+        futuros = [
+            cola.enviar(_insertar("A")),
+            cola.enviar(_insertar("B", fallar=True)),
+            cola.enviar(_insertar("A")),  # UNIQUE: falla en SQLite, no en Python
+            cola.enviar(_insertar("C")),
+        ]
+        assert cola.vaciar(timeout=10)
+        assert isinstance(futuros[0].result(), int) and isinstance(futuros[3].result(), int)
+        with pytest.raises(ValueError):
+            futuros[1].result()
+        with pytest.raises(Exception, match="UNIQUE"):
+            futuros[2].result()
+        assert cola.stats == {"escrituras": 4, "commits": 1}
+    finally:
+        cola.cerrar()
+
+    filas = conn.execute("SELECT nombre FROM categorias WHERE nombre IN ('A', 'B', 'C') ORDER BY nombre")
+    assert [n for (n,) in filas] == ["A", "C"]
+
+
+def test_cerrada_no_acepta_escrituras(bd):
+    cola = ColaEscritura(ventana_ms=0)
+    cola.cerrar()
+    with pytest.raises(RuntimeError):
+        cola.enviar(_insertar("X"))
@@ -0,0 +1,81 @@
+# tests/test_costo_promedio.py
+"""Costo promedio ponderado: compras, su edición/borrado y el recálculo desde el historial."""
+
+import pytest
+
+from app.models.analitica_ventas import CAMPOS_MARGEN, AnaliticaVentas
+from app.models.compra import Compra
+from app.models.costo_promedio import CostoPromedio
+from app.models.producto import Producto
+from app.models.venta import Venta
+
+
+def _producto(precio_compra=0):
+    Producto.crear("Leche", "Lácteos", precio_compra, 900, 0, "LEC", "", 19, "B1", None)
+
+
+def _costo(conn):
+    return conn.execute("SELECT stock, ROUND(costo_promedio, 2) FROM productos WHERE nombre = 'Leche'").fetchone()
+
+
+def test_compras_edicion_y_borrado(conn):
+    _producto()
+    Compra.crear("Prov", "Leche", 10, 100)
+    segunda = Compra.crear("Prov", "Leche", 10, 200)
+    assert _costo(conn) == (20, 150.0)
+
+    # La edición revierte sin validar (validar=False) y vuelve a entrar con el precio nuevo
+    Compra.editar_extendido(segunda, "Prov", "Leche", 10, 300, None)
+    assert _costo(conn) == (20, 200.0)
+
+    Compra.eliminar(segunda)
+    assert _costo(conn) == (10, 100.0)
+    assert CostoPromedio.recalcular() == []
+    assert CostoPromedio.valor_total() == 1000.0
+
+
+def test_borrar_compra_ya_vendida_mantiene_el_costo(conn):
+    _producto()
+    Compra.crear("Prov", "Leche", 10, 100)
+    cara = Compra.crear("Prov", "Leche", 1, 300)
+    assert _costo(conn) == (11, 118.18)
+    Venta.crear("Cliente", "Leche", 9, 900)
+
+    # Quedan 2 unidades que valen menos que la compra a quitar: la reversa no tiene sentido
+    Compra.eliminar(cara)
+    assert _costo(conn) == (1, 118.18)
+
+    # El historial sin esa compra dice 100: recalcular lo informa y lo corrige
+    assert CostoPromedio.recalcular() == [(1, "Leche", 118.18, 100.0)]
+    CostoPromedio.recalcular(aplicar=True)
+    assert _costo(conn) == (1, 100.0) and CostoPromedio.recalcular() == []
+
+
+def test_reversa_no_toca_lo_reservado(conn):
+    _producto()
+    compra = Compra.crear("Prov", "Leche", 10, 100)
+    Venta.reservar("Leche", 4)
+    with pytest.raises(ValueError, match="Stock insuficiente"):
+        Compra.eliminar(compra)
+    assert _costo(conn) == (10, 100.0)
+
+
+def test_sin_compras_usa_precio_compra(conn):
+    _producto(precio_compra=80)
+    Producto.ajustar_stock_por_codigo("LEC", 5)
+    assert CostoPromedio.valorizacion() == [(1, "Leche", "Lácteos", 5, 80.0, 400.0)]
+    assert CostoPromedio.recalcular() == []
+
+
+def test_margen_promedio_usa_el_mismo_cpp(conn):
+    _producto()
+    Compra.crear("Prov", "Leche", 10, 100)
+    Compra.crear("Prov", "Leche", 10, 200)
+    Venta.crear("Cliente", "Leche", 15, 400)
+    Compra.crear("Prov", "Leche", 10, 300)
+    # CPP con las ventas descontadas: (5 × 150 + 10 × 300) / 15 = 250 (solo compras daría 200)
+    assert _costo(conn) == (15, 250.0)
+    fila = dict(zip(CAMPOS_MARGEN, tuple(AnaliticaVentas.margen_por_producto(costo="promedio")[0])))
+    assert fila["costo_unitario"] == 250.0 and fila["costo"] == 15 * 250.0
+    fila = dict(zip(CAMPOS_MARGEN, tuple(AnaliticaVentas.margen_por_producto(costo="ultimo")[0])))
+    assert fila["costo_unitario"] == 300.0
@@ -0,0 +1,48 @@
+# tests/test_factura.py
+"""tipo/estado de facturas: normalizados al escribir y en la migración, filtrados sobre el índice."""
+
+import contextlib
+import io
+
+from app.db import database
+from app.models.factura import Factura
+from app.models.finanzas import Finanzas
+
+
+def test_alta_y_cambio_de_estado_normalizan(conn):
+    fid = Factura.crear_extendida("1", "Prov", None, 100, 19, 0, 119, " Proveedor ", estado="Pendiente ")
+    assert conn.execute("SELECT tipo, estado FROM facturas WHERE id = ?", (fid,)).fetchone() == (
+        "proveedor", "pendiente")
+    Factura.cambiar_estado(fid, "PAGADA")
+    Finanzas.editar_factura(fid, "1", "Prov", 119, " Vencida", "2030-01-01", "PROVEEDOR")
+    assert conn.execute("SELECT tipo, estado FROM facturas WHERE id = ?", (fid,)).fetchone() == (
+        "proveedor", "vencida")
+
+
+def test_filtros_no_distinguen_mayusculas_ni_espacios(conn):
+    Factura.crear_desde_neto("Prov", "proveedor", 1000, estado="pendiente")
+    Factura.crear_desde_neto("Cli", "cliente", 1000, estado="pendiente")
+    assert [f.proveedor for f in Factura.listar_extendidas("Proveedor", " Pendiente")] == ["Prov"]
+    assert [f.proveedor for f in Factura.listar_por_tipo_y_estado("CLIENTE", ["Pendiente", "pagada"])] == ["Cli"]
+
+
+def test_migracion_normaliza_filas_antiguas(conn):
+    conn.executemany(
+        "INSERT INTO facturas (numero, proveedor, monto, estado, fecha, tipo) VALUES (?, ?, 10, ?, '2030-01-01', ?)",
+        [("1", "A", "Pendiente", "proveedor"), ("2", "B", "pendiente", " cliente"), ("3", "C", "PAGADA ", "Proveedor")],
+    )
+    conn.commit()
+    # Antes de migrar, la igualdad exacta no las ve
+    assert not Factura.listar_extendidas("proveedor", "pendiente") and not Factura.listar_extendidas("cliente")
+    with contextlib.redirect_stdout(io.StringIO()):
+        database.init_db()
+    assert [f.numero for f in Factura.listar_extendidas("proveedor", "pendiente")] == ["1"]
+    assert [f.numero for f in Factura.listar_extendidas("cliente", "pendiente")] == ["2"]
+    assert [f.numero for f in Factura.listar_extendidas("proveedor", "pagada")] == ["3"]
+
+
+def test_filtro_usa_indice_tipo_estado(conn):
+    plan = " ".join(r[-1] for r in conn.execute(
+        "EXPLAIN QUERY PLAN SELECT id FROM facturas WHERE tipo = ? AND estado = ?", ("proveedor", "pendiente")
+    ))
+    assert "idx_facturas_tipo_estado" in plan
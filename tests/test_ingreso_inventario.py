@@ -0,0 +1,83 @@
+# tests/test_ingreso_inventario.py
+"""Ingreso masivo: encabezado por nombre de columnas y lotes por upsert."""
+
+import contextlib
+import io
+
+from app.db import database
+from app.models.ingreso_inventario import IngresoInventario
+from app.models.producto import Producto
+
+
+def _productos():
+    Producto.crear("Leche", "Lácteos", 500, 900, 0, "LEC", "", 19, "B1", None)
+    Producto.crear("Queso", "Lácteos", 900, 1500, 0, "QUE", "", 19, "B1", None)
+
+
+def _lotes(conn):
+    return conn.execute(
+        "SELECT p.codigo_interno, l.lote, l.fecha_vencimiento, l.cantidad"
+        " FROM lotes_inventario l JOIN productos p ON p.id = l.producto_id ORDER BY l.id"
+    ).fetchall()
+
+
+def test_lotes_agrupados_y_sumados_a_los_existentes(conn):
+    _productos()
+    IngresoInventario.registrar("LEC", 2, "B1", lote="L1", fecha_vencimiento="2030-01-31")
+    res = IngresoInventario.registrar_lote(io.StringIO(
+        "LEC;3;B1;L1;2030-01-31\n"
+        "LEC;1;B2;L1;2030-01-31\n"
+        "LEC;4\n"
+        "QUE;5;B1;;2030-02-28\n"
+        "LEC;1\n"
+    ))
+    assert res["procesados"] == 2 and res["unidades"] == 14 and not res["rechazados"]
+    assert _lotes(conn) == [
+        ("LEC", "L1", "2030-01-31", 6),
+        ("LEC", None, None, 5),
+        ("QUE", None, "2030-02-28", 5),
+    ]
+    # Un segundo ingreso sin lote ni vencimiento suma a la misma fila (NULL cuenta como clave)
+    IngresoInventario.registrar_lote([("LEC", 2)])
+    assert _lotes(conn)[1] == ("LEC", None, None, 7)
+    assert conn.execute("SELECT stock FROM productos WHERE codigo_interno = 'LEC'").fetchone()[0] == 13
+
+
+def test_encabezado_por_nombres_de_columna(conn):
+    _productos()
+    res = IngresoInventario.registrar_lote(io.StringIO("Código;Cantidad;Ubicación;Lote;Vencimiento\nLEC;2\n"))
+    assert res["lineas"] == 1 and res["unidades"] == 2 and not res["rechazados"]
+
+
+def test_primera_linea_con_cantidad_invalida_se_rechaza(conn):
+    # Antes se descartaba en silencio como si fuera encabezado
+    _productos()
+    res = IngresoInventario.registrar_lote(io.StringIO("LEC;dos\nQUE;1\n"))
+    assert res["lineas"] == 2 and res["unidades"] == 1
+    assert [(r["linea"], r["codigo"]) for r in res["rechazados"]] == [(1, "LEC")]
+
+
+def test_migracion_unifica_lotes_duplicados(bd, conn):
+    _productos()
+    pid = conn.execute("SELECT id FROM productos WHERE codigo_interno = 'LEC'").fetchone()[0]
+    conn.executescript("DROP INDEX idx_lotes_clave;")
+    conn.executemany(
+        "INSERT INTO lotes_inventario (producto_id, lote, cantidad, fecha_vencimiento) VALUES (?, NULL, ?, NULL)",
+        [(pid, 2), (pid, 3)],
+    )
+    conn.execute("UPDATE productos SET stock = 5 WHERE id = ?", (pid,))
+    conn.commit()
+    with contextlib.redirect_stdout(io.StringIO()):
+        database.init_db()
+    assert _lotes(conn) == [("LEC", None, None, 5)]
+
+
+def test_codigo_repetido_suma_stock_y_lote_al_mismo_producto(conn):
+    primero = Producto.crear("Leche", "Lácteos", 500, 900, 0, "X", "", 19, "B1", None)
+    segundo = Producto.crear("Leche Light", "Lácteos", 500, 900, 0, "X", "", 19, "B1", None)
+    res = IngresoInventario.registrar_lote([("X", 5)])
+    IngresoInventario.registrar("X", 2, "B1")
+    assert res["unidades"] == 5
+    stock = dict(conn.execute("SELECT id, stock FROM productos"))
+    assert stock == {primero: 7, segundo: 0}
+    assert conn.execute("SELECT producto_id, cantidad FROM lotes_inventario").fetchall() == [(primero, 7)]
@@ -0,0 +1,152 @@
+# tests/test_lotes.py
+"""Lotes: consumo FEFO y reversa en ventas, y lotes alineados con productos.stock en las demás vías."""
+
+import contextlib
+import io
+from datetime import date, timedelta
+
+from app.db import database
+from app.models.compra import Compra
+from app.models.ingreso_inventario import IngresoInventario
+from app.models.inventario import Inventario
+from app.models.lote_inventario import LoteInventario
+from app.models.producto import Producto
+from app.models.venta import Venta
+
+
+def _dias(n: int) -> str:
+    return (date.today() + timedelta(days=n)).isoformat()
+
+
+def _producto(nombre: str = "Yogurt", stock: int = 0, venc=None) -> int:
+    return Producto.crear(nombre, "Lácteos", 500, 900, stock, nombre[:3].upper(), "", 19, "B1", venc)
+
+
+def _lotes(conn, producto_id: int):
+    return dict(conn.execute(
+        "SELECT COALESCE(lote, '-'), cantidad FROM lotes_inventario WHERE producto_id = ?", (producto_id,)
+    ).fetchall())
+
+
+def _stock(conn, producto_id: int) -> int:
+    return conn.execute("SELECT stock FROM productos WHERE id = ?", (producto_id,)).fetchone()[0]
+
+
+def _tres_lotes() -> int:
+    pid = _producto()
+    IngresoInventario.registrar("YOG", 5, "B1", lote="A", fecha_vencimiento=_dias(10))
+    IngresoInventario.registrar("YOG", 5, "B1", lote="B", fecha_vencimiento=_dias(5))
+    IngresoInventario.registrar("YOG", 5, "B1", lote="C")  # sin vencimiento: al final
+    return pid
+
+
+def test_venta_consume_fefo_y_eliminar_repone(conn):
+    pid = _tres_lotes()
+    venta = Venta.crear("Cliente", "Yogurt", 7, 900)
+    assert _lotes(conn, pid) == {"A": 3, "B": 0, "C": 5}
+    assert conn.execute("SELECT COUNT(*) FROM venta_lotes WHERE venta_id = ?", (venta,)).fetchone()[0] == 2
+    # El próximo vencimiento del producto pasa al lote A (B quedó sin saldo)
+    assert conn.execute("SELECT fecha_vencimiento FROM productos WHERE id = ?", (pid,)).fetchone()[0] == _dias(10)
+
+    Venta.eliminar(venta)
+    assert _lotes(conn, pid) == {"A": 5, "B": 5, "C": 5}
+    assert _stock(conn, pid) == 15
+    assert conn.execute("SELECT COUNT(*) FROM venta_lotes").fetchone()[0] == 0
+    assert conn.execute("SELECT fecha_vencimiento FROM productos WHERE id = ?", (pid,)).fetchone()[0] == _dias(5)
+
+
+def test_editar_venta_reversa_y_vuelve_a_consumir(conn):
+    pid = _tres_lotes()
+    venta = Venta.crear("Cliente", "Yogurt", 7, 900)
+    Venta.editar_extendido(venta, "Cliente", "Yogurt", 2, 900, None)
+    assert _lotes(conn, pid) == {"A": 5, "B": 3, "C": 5}
+    assert _stock(conn, pid) == 13
+
+
+def test_producto_nuevo_con_stock_crea_lote_inicial(conn):
+    pid = _producto(stock=4, venc=_dias(3))
+    assert _lotes(conn, pid) == {"INICIAL": 4}
+    assert [f[1] for f in LoteInventario.por_vencer(7)] == [pid]
+
+
+def test_ajuste_negativo_sale_primero_de_lo_sin_lote(conn):
+    pid = _tres_lotes()
+    Compra.crear("Proveedor", "Yogurt", 3, 400)  # 3 unidades sin lote
+    assert _stock(conn, pid) == 18 and sum(_lotes(conn, pid).values()) == 15
+
+    Producto.ajustar_stock_por_nombre("Yogurt", -5)  # 3 sin lote + 2 del lote B (FEFO)
+    assert _stock(conn, pid) == 13
+    assert _lotes(conn, pid) == {"A": 5, "B": 3, "C": 5}
+
+    Producto.ajustar_stock_por_codigo("YOG", -4)
+    assert _lotes(conn, pid) == {"A": 4, "B": 0, "C": 5}
+
+
+def test_ajuste_diferido_recorta_lotes(conn):
+    pid = _tres_lotes()
+    Producto.ajustar_stock_por_nombre_diferido("Yogurt", -6).result(timeout=10)
+    assert _stock(conn, pid) == 9
+    assert _lotes(conn, pid) == {"A": 4, "B": 0, "C": 5}
+
+
+def test_editar_producto_y_revertir_compra_recortan_lotes(conn):
+    pid = _tres_lotes()
+    Producto.editar(pid, "Yogurt", "Lácteos", 500, 900, 12, "YOG", "", 19, "B1", None)
+    assert _lotes(conn, pid) == {"A": 5, "B": 2, "C": 5}
+
+    # La compra revertida ya no está: su stock sale de los lotes
+    compra = Compra.crear("Proveedor", "Yogurt", 2, 400)
+    Producto.ajustar_stock_por_nombre("Yogurt", -2)  # consume las 2 sin lote
+    Compra.eliminar(compra)
+    assert _stock(conn, pid) == 10
+    assert _lotes(conn, pid) == {"A": 5, "B": 0, "C": 5}
+
+
+def test_alertas_acotadas_al_stock(conn):
+    pid = _tres_lotes()
+    # Stock cambiado por fuera de los modelos (BD antigua, edición directa)
+    conn.execute("UPDATE productos SET stock = 2 WHERE id = ?", (pid,))
+    conn.commit()
+    assert [f[6] for f in Inventario.por_vencer(30)] == [2, 2]
+    assert [f[5] for f in LoteInventario.por_vencer(30)] == [2, 2]
+
+    conn.execute("UPDATE productos SET stock = 0 WHERE id = ?", (pid,))
+    conn.commit()
+    assert Inventario.por_vencer(30) == []
+    assert Inventario.buscar_por_vencimiento(_dias(30)) == []
+    assert LoteInventario.por_vencer(30) == []
+
+
+def test_lotes_iniciales_se_siembran_una_sola_vez(conn):
+    # BD anterior a los lotes: producto con stock y sin tablas de lotes
+    conn.executescript("DROP TABLE venta_lotes; DROP TABLE lotes_inventario;")
+    conn.execute(
+        "INSERT INTO productos (nombre, stock, codigo_interno, fecha_vencimiento) VALUES ('Queso', 6, 'QUE', ?)",
+        (_dias(20),),
+    )
+    conn.commit()
+    with contextlib.redirect_stdout(io.StringIO()):
+        database.init_db()
+    pid = conn.execute("SELECT id FROM productos WHERE nombre = 'Queso'").fetchone()[0]
+    assert _lotes(conn, pid) == {"INICIAL": 6}
+
+    Venta.crear("Cliente", "Queso", 6, 900)
+    Producto.ajustar_stock_por_nombre("Queso", 4)  # reposición sin lote
+    with contextlib.redirect_stdout(io.StringIO()):
+        database.init_db()
+    assert _lotes(conn, pid) == {"INICIAL": 0}
+
+
+def test_filas_por_lote_tipadas(conn):
+    from app.db.filas import FILAS, LoteFila
+    from app.services.servidor_local import codificar, decodificar
+
+    pid = _tres_lotes()
+    filas = Inventario.por_vencer(30)
+    assert all(type(f) is LoteFila for f in filas)
+    assert [(f.id, f.lote, f.stock, f.fecha_vencimiento) for f in filas] == [
+        (pid, "B", 5, _dias(5)), (pid, "A", 5, _dias(10)),
+    ]
+    assert [f.lote for f in Inventario.buscar_por_vencimiento(_dias(7))] == ["B"]
+    # Registrada: viaja tipada por el servidor local
+    assert FILAS["LoteFila"] is LoteFila and decodificar(codificar(filas)) == filas
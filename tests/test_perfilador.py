@@ -0,0 +1,62 @@
+# tests/test_perfilador.py
+"""Perfilador de la UI: las consultas de una acción son solo las del hilo que la mide."""
+
+import threading
+
+import pytest
+
+from app.db import database, instrumentacion
+from app.models.producto import Producto
+from app.services import perfilador
+
+
+@pytest.fixture
+def perfil(bd):
+    perfilador.activar()
+    yield
+    perfilador.desactivar()
+    perfilador.reiniciar()
+
+
+def _consultas_de_obtener_por_id():
+    # Una conexión nueva: sus PRAGMA de apertura + el SELECT por id
+    return len(database._pragmas(database.perfil_conexion(None))) + 1
+
+
+def test_accion_cuenta_las_consultas_del_modelo(perfil):
+    pid = Producto.crear("Leche", "Lácteos", 500, 900, 10, "LEC", "", 19, "B1", None)
+    with perfilador.accion("abrir ficha") as m:
+        assert Producto.obtener_por_id(pid).codigo_interno == "LEC"
+    assert m.consultas == _consultas_de_obtener_por_id()
+    assert m.modelo_ms > 0
+    assert perfilador.resumen()[0]["consultas_prom"] == m.consultas
+
+
+def test_consultas_de_otros_hilos_no_se_cuentan(perfil):
+    pid = Producto.crear("Leche", "Lácteos", 500, 900, 10, "LEC", "", 19, "B1", None)
+    arranco, parar = threading.Event(), threading.Event()
+
+    def sondeo():  # como el bus de cambios o el mantenimiento, en su propio hilo
+        while not parar.is_set():
+            conn = database.get_connection()
+            try:
+                conn.execute("PRAGMA data_version").fetchone()
+            finally:
+                conn.close()
+            arranco.set()
+
+    hilo = threading.Thread(target=sondeo, daemon=True)
+    hilo.start()
+    try:
+        assert arranco.wait(10)
+        total0 = instrumentacion.total_sentencias()
+        with perfilador.accion("abrir ficha") as m:
+            Producto.obtener_por_id(pid)
+            arranco.clear()
+            assert arranco.wait(10)  # el otro hilo consultó durante la acción
+        otras = instrumentacion.total_sentencias() - total0 - m.consultas
+    finally:
+        parar.set()
+        hilo.join(10)
+    assert m.consultas == _consultas_de_obtener_por_id()
+    assert otras > 0
@@ -0,0 +1,117 @@
+# tests/test_reservas.py
+"""Reservas y sobreventa: ninguna baja de stock toca lo reservado."""
+
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.config import rendimiento
+from app.models.compra import Compra
+from app.models.producto import Producto
+from app.models.venta import Venta
+
+
+def _producto(stock: int = 10) -> int:
+    return Producto.crear("Arroz", "Abarrotes", 500, 900, stock, "ARR", "", 19, "A1", None)
+
+
+def _stock(conn):
+    return conn.execute("SELECT stock, reservado FROM productos WHERE nombre = 'Arroz'").fetchone()
+
+
+def test_reserva_limita_ventas_y_se_confirma(conn):
+    _producto(10)
+    reserva = Venta.reservar("Arroz", 7, referencia="pedido 1")
+    with pytest.raises(ValueError, match="Stock insuficiente"):
+        Venta.reservar("Arroz", 4)
+    with pytest.raises(ValueError, match="Stock insuficiente \\(3\\)"):
+        Venta.crear("Cliente", "Arroz", 4, 900)
+    Venta.crear("Cliente", "Arroz", 3, 900)
+    assert _stock(conn) == (7, 7)
+
+    Venta.confirmar_reserva(reserva, "Cliente", 900)
+    assert _stock(conn) == (0, 0)
+    with pytest.raises(ValueError, match="no está activa"):
+        Venta.liberar_reserva(reserva)
+
+
+def test_liberar_devuelve_disponible(conn):
+    _producto(5)
+    reserva = Venta.reservar("Arroz", 5)
+    with pytest.raises(ValueError):
+        Venta.crear("Cliente", "Arroz", 1, 900)
+    Venta.liberar_reserva(reserva)
+    Venta.crear("Cliente", "Arroz", 5, 900)
+    assert _stock(conn) == (0, 0)
+
+
+def test_ajustes_no_bajan_de_lo_reservado(conn):
+    pid = _producto(10)
+    Venta.reservar("Arroz", 6)
+    with pytest.raises(ValueError, match="Stock insuficiente \\(4\\)"):
+        Producto.ajustar_stock_por_nombre("Arroz", -5)
+    with pytest.raises(ValueError):
+        Producto.ajustar_stock_por_codigo("ARR", -5)
+    with pytest.raises(ValueError):
+        Producto.ajustar_stock_por_nombre_diferido("Arroz", -5).result(timeout=10)
+    with pytest.raises(ValueError, match="reservado"):
+        Producto.editar(pid, "Arroz", "Abarrotes", 500, 900, 5, "ARR", "", 19, "A1", None)
+    assert _stock(conn) == (10, 6)
+
+    Producto.ajustar_stock_por_nombre("Arroz", -4)
+    Producto.editar(pid, "Arroz", "Abarrotes", 500, 950, 6, "ARR", "", 19, "A1", None)
+    assert _stock(conn) == (6, 6)
+
+
+def test_revertir_compra_respeta_reservas(conn):
+    _producto(0)
+    compra = Compra.crear("Proveedor", "Arroz", 5, 400)
+    Venta.reservar("Arroz", 3)
+    with pytest.raises(ValueError, match="Stock insuficiente"):
+        Compra.eliminar(compra)
+    with pytest.raises(ValueError, match="reservadas"):
+        Compra.editar_extendido(compra, "Proveedor", "Arroz", 2, 400, None)
+    # Cambiar solo el precio no baja el stock final: se permite
+    Compra.editar_extendido(compra, "Proveedor", "Arroz", 5, 450, None)
+    assert _stock(conn) == (5, 3)
+
+
+def test_ventas_concurrentes_no_sobrevenden(conn):
+    _producto(5)
+    Venta.reservar("Arroz", 2)
+
+    def vender(_):
+        try:
+            Venta.crear("Cliente", "Arroz", 1, 900)
+            return True
+        except ValueError:
+            return False
+
+    with ThreadPoolExecutor(max_workers=8) as ex:
+        vendidas = sum(ex.map(vender, range(12)))
+    assert vendidas == 3
+    assert _stock(conn) == (2, 2)
+
+
+def test_eliminar_venta_reintenta_si_otra_caja_tiene_el_lock(bd, conn, monkeypatch):
+    _producto(5)
+    venta = Venta.crear("Cliente", "Arroz", 2, 900)
+    monkeypatch.setitem(rendimiento.SQL_PERFILES["interactivo"], "busy_ms", 20.0)
+    monkeypatch.setattr(rendimiento, "SQL_REINTENTOS", 10)
+    monkeypatch.setattr(rendimiento, "SQL_REINTENTO_BASE_MS", 20.0)
+
+    intentos = []
+    original = Venta._eliminar
+    monkeypatch.setattr(Venta, "_eliminar", staticmethod(lambda i: intentos.append(i) or original(i)))
+
+    otra_caja = sqlite3.connect(bd, isolation_level=None, check_same_thread=False)
+    otra_caja.execute("BEGIN IMMEDIATE")
+    threading.Timer(0.3, otra_caja.execute, ("COMMIT",)).start()
+    try:
+        Venta.eliminar(venta)
+    finally:
+        otra_caja.close()
+    assert len(intentos) > 1
+    assert _stock(conn) == (5, 0)
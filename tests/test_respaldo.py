@@ -0,0 +1,44 @@
+# tests/test_respaldo.py
+"""Respaldo en caliente: copia verificada, omisión sin cambios y restauración."""
+
+import pytest
+
+from app.models.producto import Producto
+from app.services import respaldo
+
+
+def _nombres():
+    return [p.nombre for p in Producto.listar_todos()]
+
+
+def test_respaldo_verificar_y_restaurar(bd):
+    Producto.crear("Leche", "Lácteos", 500, 900, 10, "LEC", "", 19, "B1", None)
+    # paginas=1: la copia avanza por pasos, como el servicio de fondo
+    hecho = respaldo.respaldar(forzar=True, paginas=1, pausa_ms=0)
+    assert hecho["errores"] == [] and not hecho["omitido"]
+    assert hecho["ruta"].parent == respaldo.carpeta() == bd.parent / "respaldos"
+    assert respaldo.verificar(hecho["ruta"]) == []
+
+    # Sin cambios desde el último respaldo no se copia nada
+    assert respaldo.respaldar()["omitido"]
+
+    Producto.crear("Queso", "Lácteos", 900, 1500, 5, "QUE", "", 19, "B1", None)
+    Producto.eliminar(Producto.buscar_por_codigo("LEC")[0].id)
+    assert _nombres() == ["Queso"]
+
+    resultado = respaldo.restaurar(hecho["ruta"])
+    assert _nombres() == ["Leche"]
+    assert Producto.buscar_por_codigo("LEC")[0].stock == 10
+    # El estado previo queda respaldado antes de reemplazarlo
+    assert resultado["previo"] is not None and respaldo.verificar(resultado["previo"]) == []
+
+
+def test_restaurar_rechaza_respaldo_danado(bd, tmp_path):
+    danado = tmp_path / "negocio_20250101_000000.db"
+    danado.write_bytes(b"SQLite format 3\x00" + b"\xff" * 4096)
+    assert respaldo.verificar(danado)
+    assert respaldo.verificar(tmp_path / "no_existe.db")
+    Producto.crear("Leche", "Lácteos", 500, 900, 10, "LEC", "", 19, "B1", None)
+    with pytest.raises(ValueError):
+        respaldo.restaurar(danado)
+    assert _nombres() == ["Leche"]
@@ -0,0 +1,83 @@
+# tests/test_servidor_local.py
+"""Servidor local en localhost: lotes /rpc, errores de negocio, escritor único y caché."""
+
+import threading
+
+import pytest
+
+from app.db.filas import ProductoFila
+from app.models.ingreso_inventario import IngresoInventario
+from app.services import servidor_local
+from app.services.cliente_remoto import ClienteRemoto
+
+
+@pytest.fixture
+def cliente(bd):
+    servidor, url = servidor_local.iniciar_en_hilo()
+    yield ClienteRemoto(url, timeout=10)
+    servidor_local.detener(servidor)
+
+
+def _crear(cliente, nombre, codigo, stock=0):
+    return cliente.llamar("Producto.crear", nombre, "Lácteos", 500, 900, stock, codigo, "", 19, "B1", None)
+
+
+def _stock(cliente, codigo):
+    return {p.codigo_interno: p.stock for p in cliente.llamar("Producto.listar_todos")}[codigo]
+
+
+def test_lote_rpc_en_una_peticion(cliente):
+    pid, filas, fila = cliente.lote([
+        ("Producto.crear", ("Leche", "Lácteos", 500, 900, 0, "LEC", "", 19, "B1", None), {}),
+        ("Producto.listar_todos", (), {}),
+        ("Producto.obtener_por_id", (1,), {}),
+    ])
+    assert pid == 1
+    assert [p.nombre for p in filas] == ["Leche"]
+    assert isinstance(fila, ProductoFila) and fila.codigo_interno == "LEC"
+
+
+def test_error_de_negocio_llega_como_value_error(cliente):
+    _crear(cliente, "Leche", "LEC", stock=2)
+    with pytest.raises(ValueError, match="Stock insuficiente"):
+        cliente.llamar("Venta.crear", "Cliente", "Leche", 5, 900)
+    with pytest.raises(ValueError, match="no expuesta"):
+        cliente.llamar("Producto.__init__")
+    assert _stock(cliente, "LEC") == 2
+
+
+def test_escrituras_concurrentes_pasan_por_el_escritor_unico(cliente):
+    _crear(cliente, "Leche", "LEC")
+    errores = []
+
+    def sumar():
+        try:
+            for _ in range(10):
+                cliente.llamar("Producto.ajustar_stock_por_codigo", "LEC", 1)
+        except Exception as e:  # un "database is locked" aquí sería contención entre terminales
+            errores.append(e)
+
+    hilos = [threading.Thread(target=sumar) for _ in range(8)]
+    for h in hilos:
+        h.start()
+    for h in hilos:
+        h.join()
+    assert errores == []
+    assert _stock(cliente, "LEC") == 80
+    assert cliente.salud()["escrituras"] == 1 + 80
+
+
+def test_cache_se_invalida_con_escrituras_propias_y_externas(cliente):
+    _crear(cliente, "Leche", "LEC")
+    assert _stock(cliente, "LEC") == 0
+    aciertos = cliente.salud()["aciertos_cache"]
+    assert _stock(cliente, "LEC") == 0
+    assert cliente.salud()["aciertos_cache"] == aciertos + 1
+
+    cliente.llamar("Producto.ajustar_stock_por_codigo", "LEC", 3)
+    assert _stock(cliente, "LEC") == 3
+
+    # Escritura directa al archivo, sin pasar por el servidor
+    IngresoInventario.registrar("LEC", 7, "bodega")
+    assert _stock(cliente, "LEC") == 10
+    assert cliente.salud()["cambios_externos"] >= 1
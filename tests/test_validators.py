@@ -0,0 +1,89 @@
+# tests/test_validators.py
+"""Paridad de validar_rut/normalizar_rut (tablas y ruta NumPy) con el validador original."""
+
+import random
+import re
+
+import pytest
+
+from app.utils import validators as v
+
+
+# Validador original (antes de las tablas precalculadas), copiado tal cual como referencia
+def _normalizar_original(rut: str) -> str:
+    return rut.replace(".", "").replace("-", "").strip().upper()
+
+
+def _validar_original(rut: str) -> bool:
+    s = _normalizar_original(rut)
+    if len(s) < 2 or not re.match(r"^\d+[\dK]$", s):
+        return False
+    cuerpo, dv = s[:-1], s[-1]
+    if not cuerpo.isdigit():
+        return False
+    suma, factor = 0, 2
+    for d in reversed(cuerpo):
+        suma += int(d) * factor
+        factor = 2 if factor == 7 else factor + 1
+    dv_calc_num = 11 - suma % 11
+    dv_calc = "0" if dv_calc_num == 11 else "K" if dv_calc_num == 10 else str(dv_calc_num)
+    return dv == dv_calc
+
+
+BORDES = [
+    "12.345.678-5", "12345678-5", "123456785", "12.345.678-5\n", "12.345.678-5\r",
+    " 12.345.678-5 ", "\t12345678-5\r\n", "12 345 678-5", "12.345.678 -5", "12345678-5 -",
+    "- 12345678-5", "11.111.111-1", "11111111-1", "7.654.321-k", "7654321K", "7654321-k ",
+    "", " ", "-", ".", "k", "0", "00", "0-0", "1-9", "5-K", "12.345.678-K", "12.345.678-4",
+    "abc", "12.345.678-5x", "１２３４５６７８-5",
+]
+
+
+def _corpus(n: int = 4000, semilla: int = 7):
+    azar = random.Random(semilla)
+    salida = list(BORDES)
+    for _ in range(n):
+        cuerpo = str(azar.randint(1, 99_999_999))
+        dv = v.digito_verificador(cuerpo) if azar.random() < 0.7 else azar.choice("0123456789K")
+        rut = v.formatear_rut(cuerpo + dv) if azar.random() < 0.5 else f"{cuerpo}-{dv}"
+        if azar.random() < 0.3:
+            rut = rut.lower()
+        if azar.random() < 0.3:
+            i = azar.randint(0, len(rut))
+            rut = rut[:i] + azar.choice([" ", "\t", "\n", "\r", ".", "-", "x"]) + rut[i:]
+        if azar.random() < 0.3:
+            rut = azar.choice(["", " ", "\n", "\r\n"]) + rut + azar.choice(["", " ", "\n", "\r", "-"])
+        salida.append(rut)
+    # Solo dígitos ASCII (ver test_digitos_no_ascii)
+    return [r for r in salida if r.isascii()]
+
+
+def test_normalizar_rut_igual_al_original():
+    for rut in _corpus():
+        assert v.normalizar_rut(rut) == _normalizar_original(rut), repr(rut)
+
+
+def test_validar_rut_igual_al_original():
+    for rut in _corpus():
+        assert v.validar_rut(rut) == _validar_original(rut), repr(rut)
+
+
+@pytest.mark.parametrize("usar_numpy", [False, pytest.param(True, marks=pytest.mark.skipif(
+    v.np is None, reason="NumPy no instalado"))])
+def test_validar_ruts_igual_al_original(usar_numpy):
+    corpus = _corpus()
+    assert v.validar_ruts(corpus, usar_numpy=usar_numpy) == [_validar_original(r) for r in corpus]
+
+
+def test_espacios_internos_invalidan():
+    assert v.validar_rut("12.345.678-5\r\n")
+    assert not v.validar_rut("12 345 678-5")
+    assert not v.validar_rut("12.345.678 -5")
+    assert v.validar_ruts(["12 345 678-5", " 12345678-5 "], usar_numpy=False) == [False, True]
+
+
+def test_digitos_no_ascii():
+    # El original aceptaba dígitos Unicode (\d / isdigit); un RUT solo lleva dígitos ASCII
+    assert _validar_original("１２３４５６７８-5")
+    assert not v.validar_rut("１２３４５６７８-5")
+    assert v.validar_ruts(["１２３４５６７８-5"]) == [False]